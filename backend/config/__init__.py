@@ -20,6 +20,25 @@ class Config:
     # Upload Configuration
     MAX_CONTENT_LENGTH = 256 * 1024 * 1024  # 256MB max request size (multi-file uploads)
     UPLOAD_FOLDER = os.getenv('UPLOAD_FOLDER', 'uploads')
+
+    # Content downloads: '' (app streams the file), 'x-accel' (nginx internal
+    # location at CONTENT_ACCEL_PREFIX aliased to UPLOAD_FOLDER) or 'x-sendfile'
+    CONTENT_SENDFILE = os.getenv('CONTENT_SENDFILE', '')
+    CONTENT_ACCEL_PREFIX = os.getenv('CONTENT_ACCEL_PREFIX', '/_content/')
+    # Rendered thumbnails/page previews; default <instance>/preview_cache
+    PREVIEW_CACHE_FOLDER = os.getenv('PREVIEW_CACHE_FOLDER')
+    # Cache-Control per content folder (longest prefix wins); ETags are content hashes
+    CONTENT_CACHE_DEFAULT = 'public, max-age=3600'
+    CONTENT_CACHE_POLICIES = {
+        'ΝΟΜΟΘΕΣΙΑ_ΚΟΙΝΩΝΙΚΗΣ_ΜΕΡΙΜΝΑΣ': 'public, max-age=86400',
+        'ΕΚΠΑΙΔΕΥΤΙΚΟ_ΥΛΙΚΟ': 'public, max-age=86400',
+        'ΕΚΘΕΣΕΙΣ_ΕΛΕΓΧΩΝ': 'private, no-cache',
+        'inspections': 'private, no-cache',
+        'advisor_reports': 'private, no-cache',
+        'uploads': 'private, no-cache',
+    }
+    # Case-file upload folders (PII) kept out of the full-text content index
+    CONTENT_INDEX_EXCLUDE_FOLDERS = ['advisor_reports', 'inspections', 'licenses']
     
     # Celery Configuration (basic)
     CELERY_BROKER_URL = os.getenv('CELERY_BROKER_URL', 'redis://localhost:6379/0')
@@ -31,6 +50,24 @@ class Config:
     # AI Chat rate limit
     AI_CHAT_RATE_LIMIT = "20 per minute"
 
+    # Knowledge reindex jobs: auto (Celery if a worker answers, else thread), celery, thread, eager
+    REINDEX_BACKEND = os.getenv('REINDEX_BACKEND', 'auto')
+
+    # Oversight alert refreshes after relevant commits: thread, celery or none
+    ALERTS_REFRESH_BACKEND = os.getenv('ALERTS_REFRESH_BACKEND', 'thread')
+
+    # pgvector ANN index on file_chunk.embedding: hnsw, ivfflat or none
+    VECTOR_INDEX_TYPE = os.getenv('VECTOR_INDEX_TYPE', 'hnsw')
+    HNSW_M = int(os.getenv('HNSW_M', 16))
+    HNSW_EF_CONSTRUCTION = int(os.getenv('HNSW_EF_CONSTRUCTION', 64))
+    HNSW_EF_SEARCH = int(os.getenv('HNSW_EF_SEARCH', 40))
+    IVFFLAT_LISTS = int(os.getenv('IVFFLAT_LISTS', 0))  # 0 = derive from row count
+    IVFFLAT_PROBES = int(os.getenv('IVFFLAT_PROBES', 10))
+
+    # Chunk vector search: auto (pgvector on PostgreSQL, else numpy), pgvector, numpy
+    VECTOR_STORE = os.getenv('VECTOR_STORE', 'auto')
+    VECTOR_STORE_PATH = os.getenv('VECTOR_STORE_PATH')  # numpy memmap dir; default <instance>/vector_store
+
 
 class DevelopmentConfig(Config):
     """Development configuration."""
@@ -54,6 +91,21 @@ class TestingConfig(Config):
 
     AI_CHAT_RATE_LIMIT = "100 per minute"
 
+    # Only the per-test KNOWLEDGE_FOLDER is indexed
+    KNOWLEDGE_EXTRA_FOLDERS = []
+
+    # Run reindex jobs inline so tests are deterministic
+    REINDEX_BACKEND = 'eager'
+
+    # Tests refresh oversight alerts explicitly
+    ALERTS_REFRESH_BACKEND = 'none'
+
+    # Keep the numpy vector store in memory (no memmap files)
+    VECTOR_STORE_PATH = ':memory:'
+
+    # Index library files inline; no background content index syncs
+    CONTENT_INDEX_BACKGROUND = False
+
     # Disable email sending during tests
     MAIL_SUPPRESS_SEND = True
 
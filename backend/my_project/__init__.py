@@ -6,7 +6,6 @@ Creates and configures the Flask application instance
 from flask import Flask
 from flask_cors import CORS
 import os
-import httpx
 from dotenv import load_dotenv
 
 load_dotenv()  # Load .env file
@@ -38,6 +37,15 @@ def create_app():
         'KNOWLEDGE_FOLDER',
         os.path.join(os.path.dirname(__file__), '..', '..', 'knowledge')
     )
+    # Further trees indexed alongside KNOWLEDGE_FOLDER (os.pathsep-separated).
+    # Defaults to the public legislation library; keep case files out (PII).
+    extra_folders = os.environ.get('KNOWLEDGE_EXTRA_FOLDERS')
+    if extra_folders is not None:
+        app.config['KNOWLEDGE_EXTRA_FOLDERS'] = [p for p in extra_folders.split(os.pathsep) if p]
+    else:
+        app.config.setdefault('KNOWLEDGE_EXTRA_FOLDERS', [
+            os.path.join(app.config['UPLOAD_FOLDER'], 'ΝΟΜΟΘΕΣΙΑ_ΚΟΙΝΩΝΙΚΗΣ_ΜΕΡΙΜΝΑΣ'),
+        ])
     app.config['MAX_CONTENT_LENGTH'] = 256 * 1024 * 1024
     app.config['FRONTEND_DIR'] = os.environ.get(
         'FRONTEND_DIR',
@@ -64,6 +72,12 @@ def create_app():
         result_serializer='json',
         timezone='Europe/Athens',
         enable_utc=True,
+        beat_schedule={
+            'oversight-refresh-alerts': {
+                'task': 'oversight.refresh_alerts',
+                'schedule': float(os.environ.get('ALERTS_REFRESH_SECONDS', 300)),
+            },
+        },
     )
 
     # Configure Celery task context
@@ -74,21 +88,23 @@ def create_app():
 
     celery.Task = ContextTask
 
-    # Initialize OpenAI client (optional — only if API key present)
+    # Register Celery tasks defined inside the package
+    from .ai import jobs  # noqa: F401
+    from .oversight import alerts  # noqa: F401
+
+    # Shared, pooled OpenAI client (optional — only if API key present).
+    # AI modules fetch theirs from ai.clients; this is the same instance.
     openai_key = os.environ.get('OPENAI_API_KEY')
     if openai_key and not openai_key.startswith('sk-your'):
         try:
-            from openai import OpenAI
-            app.client = OpenAI(api_key=openai_key)
+            from .ai.clients import get_llm_client
+            app.client = get_llm_client()
         except Exception:
             app.client = None
     else:
         app.client = None
     app.assistant_id = None
 
-    # Initialize HTTP client
-    app.http_client = httpx.Client()
-
     # ChromaDB removed — using pgvector for embeddings
     app.chroma_client = None
     app.document_collection = None
@@ -178,6 +194,16 @@ def create_app():
             ('users', 'irida_base_url', 'VARCHAR(200)'),
             # User active status for soft-delete
             ('users', 'is_active', 'BOOLEAN DEFAULT true'),
+            # Incremental knowledge reindex — stat pre-check
+            ('document_index', 'file_mtime', 'DOUBLE PRECISION'),
+            ('document_index', 'file_size', 'BIGINT'),
+            # Chunk offsets into the source text
+            ('file_chunk', 'char_start', 'INTEGER'),
+            ('file_chunk', 'char_end', 'INTEGER'),
+            # Content file hash for download ETags
+            ('content_file', 'sha256', 'VARCHAR(64)'),
+            # Uploaded file hash for dedup
+            ('file_items', 'sha256', 'VARCHAR(64)'),
         ]
         for table, column, col_type in _migrate_columns:
             try:
@@ -207,6 +233,14 @@ def create_app():
         except Exception:
             db.session.rollback()
 
+        # ANN index on file_chunk.embedding (PostgreSQL only)
+        try:
+            from .ai.vector_index import ensure_vector_index
+            ensure_vector_index()
+        except Exception as e:
+            db.session.rollback()
+            print(f"[knowledge] Vector index warning: {e}")
+
         # Seed comprehensive demo data (users, structures, inspections, forum, etc.)
         # Runs in development OR when SEED_DEMO=true (for Render)
         # Skipped in testing (tests create their own data) and production
@@ -283,18 +317,10 @@ def create_app():
             if DocumentIndex.query.count() == 0:
                 knowledge_dir = os.path.abspath(app.config['KNOWLEDGE_FOLDER'])
                 if os.path.exists(knowledge_dir):
-                    from .ai.knowledge import process_file
+                    from .ai.knowledge import reindex_directory
                     generate_vectors = bool(app.client)  # Only if OpenAI key present
-                    docs_found = 0
-                    for root, dirs, files in os.walk(knowledge_dir):
-                        for fname in files:
-                            if os.path.splitext(fname)[1].lower() in {'.txt', '.md'}:
-                                fpath = os.path.join(root, fname)
-                                try:
-                                    process_file(fpath, generate_vectors=generate_vectors)
-                                    docs_found += 1
-                                except Exception:
-                                    pass
+                    report = reindex_directory(knowledge_dir, generate_vectors=generate_vectors)
+                    docs_found = report.files_scanned - report.errors
                     print(f"[knowledge] Ingested {docs_found} documents"
                           f" ({'with' if generate_vectors else 'without'} embeddings)")
                 else:
@@ -0,0 +1,171 @@
+"""
+Semantic answer cache for the ΠΥΛΗ ΚΟΙΝΩΝΙΚΗΣ ΜΕΡΙΜΝΑΣ AI copilot.
+A new question whose embedding is close enough to a cached one (same LLM
+model and asker role) reuses its answer, skipping retrieval, document
+loading and the LLM call. Each entry pins the file_hash of the documents
+it was built from and is dropped as soon as any of them changes.
+"""
+import os
+import json
+import logging
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from my_project.extensions import db
+from my_project.models import AnswerCache, DocumentIndex
+from my_project.ai.embedding_cache import get_query_embedding
+from my_project.ai.vector_index import is_supported
+
+logger = logging.getLogger(__name__)
+
+ANSWER_CACHE_ENABLED = os.environ.get("ANSWER_CACHE_ENABLED", "true").lower() == "true"
+# Cosine similarity a new question needs to reuse a cached answer
+ANSWER_CACHE_THRESHOLD = float(os.environ.get("ANSWER_CACHE_THRESHOLD", 0.95))
+ANSWER_CACHE_TTL = timedelta(hours=float(os.environ.get("ANSWER_CACHE_TTL_HOURS", 24)))
+ANSWER_CACHE_MAX_ENTRIES = int(os.environ.get("ANSWER_CACHE_MAX_ENTRIES", 1000))
+# Nearest entries checked per lookup (the best may be stale)
+ANSWER_CACHE_CANDIDATES = 5
+
+
+def _source_hashes(paths: Iterable[str]) -> Dict[str, Optional[str]]:
+    paths = sorted(set(p for p in paths if p))
+    if not paths:
+        return {}
+    current = dict(
+        db.session.query(DocumentIndex.file_path, DocumentIndex.file_hash)
+        .filter(DocumentIndex.file_path.in_(paths))
+    )
+    return {p: current.get(p) for p in paths}
+
+
+def _is_fresh(entry: AnswerCache) -> bool:
+    pinned = json.loads(entry.source_hashes or "{}")
+    return not pinned or _source_hashes(pinned) == pinned
+
+
+def _nearest(query: np.ndarray, model: str, role: str) -> List[Tuple[int, float]]:
+    """Up to ANSWER_CACHE_CANDIDATES unexpired (entry id, cosine similarity)
+    pairs for the model and role, most similar first. PostgreSQL orders by
+    pgvector's cosine distance; other databases fall back to NumPy."""
+    filters = (
+        AnswerCache.model == model,
+        AnswerCache.role == role,
+        AnswerCache.expires_at > datetime.utcnow(),
+    )
+    if is_supported():
+        distance = AnswerCache.embedding.cosine_distance(query.tolist()).label("distance")
+        rows = db.session.query(AnswerCache.id, distance).filter(*filters).order_by(
+            distance).limit(ANSWER_CACHE_CANDIDATES).all()
+        return [(entry_id, 1 - float(d)) for entry_id, d in rows]
+
+    rows = db.session.query(AnswerCache.id, AnswerCache.embedding).filter(*filters).all()
+    if not rows:
+        return []
+    matrix = np.asarray([r.embedding for r in rows], dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1) * (np.linalg.norm(query) or 1.0)
+    norms[norms == 0] = 1.0
+    similarities = matrix @ query / norms
+    best = np.argsort(-similarities)[:ANSWER_CACHE_CANDIDATES]
+    return [(rows[i].id, float(similarities[i])) for i in best]
+
+
+def lookup(question: str, model: str, role: str = "",
+           threshold: Optional[float] = None) -> Optional[Dict[str, Any]]:
+    """Cached answer for a similar question, or None.
+
+    Returns the reply fields of get_chat_reply plus cache_similarity.
+    Stale entries (changed source documents) are deleted on the way.
+    """
+    if not ANSWER_CACHE_ENABLED:
+        return None
+    threshold = ANSWER_CACHE_THRESHOLD if threshold is None else threshold
+
+    try:
+        query = np.asarray(get_query_embedding(question).embedding, dtype=np.float32)
+    except Exception as e:
+        logger.warning(f"Answer cache lookup skipped (no query embedding): {e}")
+        return None
+
+    for entry_id, similarity in _nearest(query, model, role or ""):
+        if similarity < threshold:
+            break
+        entry = db.session.get(AnswerCache, entry_id)
+        if entry is None:
+            continue
+        if not _is_fresh(entry):
+            db.session.delete(entry)
+            db.session.commit()
+            continue
+        entry.hit_count = (entry.hit_count or 0) + 1
+        entry.last_hit_at = datetime.utcnow()
+        db.session.commit()
+        return {
+            "reply": entry.reply,
+            "sources": json.loads(entry.sources or "[]"),
+            "context_used": bool(entry.chunks_found or entry.docs_loaded),
+            "chunks_found": entry.chunks_found,
+            "docs_loaded": entry.docs_loaded,
+            "model": entry.model,
+            "cache_similarity": round(similarity, 4),
+        }
+    return None
+
+
+def store(question: str, model: str, role: str, result: Dict[str, Any],
+          source_paths: Iterable[str]) -> None:
+    """Cache a fresh answer, pinned to the current hashes of its source documents."""
+    if not ANSWER_CACHE_ENABLED:
+        return
+    try:
+        embedding = get_query_embedding(question).embedding
+    except Exception as e:
+        logger.warning(f"Answer not cached (no query embedding): {e}")
+        return
+
+    now = datetime.utcnow()
+    db.session.add(AnswerCache(
+        model=model,
+        role=role or "",
+        question=question,
+        embedding=embedding,
+        source_hashes=json.dumps(_source_hashes(source_paths), ensure_ascii=False),
+        reply=result["reply"],
+        sources=json.dumps(result.get("sources", []), ensure_ascii=False),
+        chunks_found=result.get("chunks_found", 0),
+        docs_loaded=result.get("docs_loaded", 0),
+        created_at=now,
+        expires_at=now + ANSWER_CACHE_TTL,
+    ))
+    db.session.flush()
+    _prune(now)
+    db.session.commit()
+
+
+def _prune(now: datetime) -> None:
+    AnswerCache.query.filter(AnswerCache.expires_at <= now).delete(synchronize_session=False)
+    excess = AnswerCache.query.count() - ANSWER_CACHE_MAX_ENTRIES
+    if excess > 0:
+        oldest = [
+            r.id for r in db.session.query(AnswerCache.id).order_by(
+                db.func.coalesce(AnswerCache.last_hit_at, AnswerCache.created_at)
+            ).limit(excess)
+        ]
+        AnswerCache.query.filter(AnswerCache.id.in_(oldest)).delete(synchronize_session=False)
+
+
+def invalidate_sources(paths: Iterable[str]) -> int:
+    """Drop every cached answer built from any of paths. Returns the count."""
+    paths = set(paths)
+    if not paths:
+        return 0
+    stale: List[int] = []
+    for entry_id, pinned in db.session.query(AnswerCache.id, AnswerCache.source_hashes):
+        if paths & set(json.loads(pinned or "{}")):
+            stale.append(entry_id)
+    if stale:
+        AnswerCache.query.filter(AnswerCache.id.in_(stale)).delete(synchronize_session=False)
+        db.session.commit()
+        logger.info(f"Answer cache: invalidated {len(stale)} entries for {len(paths)} changed documents")
+    return len(stale)
@@ -0,0 +1,286 @@
+"""
+Retrieval benchmark for the ΠΥΛΗ ΚΟΙΝΩΝΙΚΗΣ ΜΕΡΙΜΝΑΣ knowledge base.
+Ingests a corpus, runs a labeled question set (question → files that
+answer it) through the copilot's retrieval path and reports recall@k,
+MRR, retrieval latency, prompt tokens and ingestion throughput.
+HashingEmbeddingClient stands in for the embedding API so the benchmark
+runs offline and gives the same numbers on every run.
+"""
+import os
+import json
+import math
+import time
+import hashlib
+import logging
+import unicodedata
+from contextlib import contextmanager
+from dataclasses import dataclass, field, asdict
+from types import SimpleNamespace
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+import numpy as np
+
+from my_project.ai import embedding_cache, embeddings
+from my_project.ai.lexical import tokenize
+from my_project.ai.vector_store import EMBEDDING_DIM
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_K_VALUES = (1, 3, 5)
+
+
+# ── Offline embeddings ──
+
+class HashingEmbeddingClient:
+    """Deterministic stand-in for the OpenAI embeddings endpoint.
+
+    Vectors are signed feature hashes of the BM25 index terms (stems), so
+    texts sharing vocabulary score high. A component common to every vector
+    gives unrelated texts a baseline cosine similarity, as real embedding
+    models do, so the production similarity threshold behaves comparably.
+    """
+
+    def __init__(self, dim: int = EMBEDDING_DIM, baseline_similarity: float = 0.15):
+        self.dim = dim
+        self._bias = math.sqrt(baseline_similarity / (1.0 - baseline_similarity))
+        self.requests = 0
+        self.embeddings = SimpleNamespace(create=self._create)
+
+    def embed(self, text: str) -> List[float]:
+        vec = np.zeros(self.dim, dtype=np.float64)
+        counts: Dict[str, int] = {}
+        for term in tokenize(text):
+            counts[term] = counts.get(term, 0) + 1
+        for term, count in counts.items():
+            digest = int.from_bytes(hashlib.blake2b(term.encode(), digest_size=8).digest(), "little")
+            sign = 1.0 if digest & 1 else -1.0
+            vec[1 + (digest >> 1) % (self.dim - 1)] += sign * (1.0 + math.log(count))
+        norm = np.linalg.norm(vec)
+        if norm:
+            vec /= norm
+        vec[0] = self._bias
+        return (vec / np.linalg.norm(vec)).tolist()
+
+    def _create(self, model: str, input):
+        self.requests += 1
+        texts = [input] if isinstance(input, str) else list(input)
+        return SimpleNamespace(data=[
+            SimpleNamespace(index=i, embedding=self.embed(text))
+            for i, text in enumerate(texts)
+        ])
+
+
+@contextmanager
+def fake_embeddings(client: Optional[HashingEmbeddingClient] = None) -> Iterator[HashingEmbeddingClient]:
+    """Route all embedding calls to a HashingEmbeddingClient.
+
+    The in-process query cache is cleared on entry and exit and the durable
+    query-embedding table is bypassed, so fake vectors never outlive the run.
+    """
+    client = client or HashingEmbeddingClient()
+    saved = (embeddings._get_client, embedding_cache._load_durable, embedding_cache._store_durable)
+    embeddings._get_client = lambda max_retries=2: client
+    embedding_cache._load_durable = lambda model, text_hash: None
+    embedding_cache._store_durable = lambda result, text_hash: None
+    embedding_cache.clear_cache()
+    try:
+        yield client
+    finally:
+        embeddings._get_client, embedding_cache._load_durable, embedding_cache._store_durable = saved
+        embedding_cache.clear_cache()
+
+
+# ── Metrics ──
+
+def first_hit_rank(retrieved: Sequence[str], expected: Sequence[str]) -> Optional[int]:
+    """1-based rank of the first retrieved file that is one of the expected ones."""
+    wanted = set(expected)
+    for rank, path in enumerate(retrieved, start=1):
+        if path in wanted:
+            return rank
+    return None
+
+
+def recall_at_k(ranks: Sequence[Optional[int]], k: int) -> float:
+    """Share of questions answered by a file within the top k."""
+    if not ranks:
+        return 0.0
+    return sum(1 for r in ranks if r is not None and r <= k) / len(ranks)
+
+
+def mean_reciprocal_rank(ranks: Sequence[Optional[int]]) -> float:
+    if not ranks:
+        return 0.0
+    return sum(1.0 / r for r in ranks if r) / len(ranks)
+
+
+def percentile(values: Sequence[float], pct: float) -> float:
+    """Linear-interpolated percentile (pct in 0–100)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    pos = (len(ordered) - 1) * pct / 100.0
+    lo = int(pos)
+    hi = min(lo + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (pos - lo)
+
+
+def _summary(values: Sequence[float], digits: int = 2) -> Dict[str, float]:
+    if not values:
+        return {"mean": 0.0, "p50": 0.0, "p95": 0.0, "max": 0.0}
+    return {
+        "mean": round(sum(values) / len(values), digits),
+        "p50": round(percentile(values, 50), digits),
+        "p95": round(percentile(values, 95), digits),
+        "max": round(max(values), digits),
+    }
+
+
+# ── Runner ──
+
+@dataclass
+class QuestionResult:
+    question: str
+    expected: List[str]
+    retrieved: List[str]
+    rank: Optional[int]
+    latency_ms: List[float]
+    prompt_tokens: int
+
+
+@dataclass
+class BenchmarkReport:
+    questions: int = 0
+    recall: Dict[str, float] = field(default_factory=dict)
+    mrr: float = 0.0
+    latency_ms: Dict[str, float] = field(default_factory=dict)
+    prompt_tokens: Dict[str, float] = field(default_factory=dict)
+    ingestion: Dict[str, Any] = field(default_factory=dict)
+    settings: Dict[str, Any] = field(default_factory=dict)
+    results: List[QuestionResult] = field(default_factory=list)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+def load_questions(path: str) -> List[Dict[str, Any]]:
+    """Questions from a JSON file: a list, or {"questions": [...]}, of
+    {"question": str, "expected": [paths relative to the corpus root]}."""
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    questions = data["questions"] if isinstance(data, dict) else data
+    for q in questions:
+        if not q.get("question") or not q.get("expected"):
+            raise ValueError(f"Question needs 'question' and 'expected': {q!r}")
+    return questions
+
+
+def _relative(path: str, corpus_dir: str) -> str:
+    """Corpus-relative path with '/' separators, NFC-normalized so labels
+    match file names from any file system."""
+    rel = os.path.relpath(path, corpus_dir).replace(os.sep, "/")
+    return unicodedata.normalize("NFC", rel)
+
+
+def ingest_corpus(corpus_dir: str, workers: Optional[int] = None) -> Dict[str, Any]:
+    """Fully (re)index corpus_dir, embed its pending chunks and time both.
+    Chunks of documents outside the corpus are left as they are."""
+    from my_project.models import DocumentIndex
+    from my_project.ai.knowledge import embed_pending_chunks, list_documents, reindex_directory
+
+    corpus_dir = os.path.abspath(corpus_dir)
+    documents = list_documents(corpus_dir)
+    total_bytes = sum(os.path.getsize(p) for p in documents)
+    started = time.perf_counter()
+    report = reindex_directory(corpus_dir, full=True, workers=workers)
+    document_ids = [d.id for d in DocumentIndex.query.filter(DocumentIndex.file_path.in_(documents))]
+    embedded = embed_pending_chunks(document_ids=document_ids) if document_ids else {"embedded": 0}
+    seconds = time.perf_counter() - started
+    chunks = report.chunks_added + report.chunks_changed + report.chunks_unchanged
+    return {
+        "files": report.files_scanned,
+        "errors": report.errors,
+        "chunks": chunks,
+        "chunks_embedded": embedded["embedded"],
+        "megabytes": round(total_bytes / 1e6, 2),
+        "seconds": round(seconds, 3),
+        "files_per_sec": round(report.files_scanned / seconds, 2) if seconds else 0.0,
+        "chunks_per_sec": round(chunks / seconds, 1) if seconds else 0.0,
+        "mb_per_sec": round(total_bytes / 1e6 / seconds, 2) if seconds else 0.0,
+    }
+
+
+def run_benchmark(
+    questions: List[Dict[str, Any]],
+    corpus_dir: str,
+    k_values: Sequence[int] = DEFAULT_K_VALUES,
+    model: Optional[str] = None,
+    repeat: int = 1,
+    ingest: bool = True,
+    workers: Optional[int] = None,
+) -> BenchmarkReport:
+    """Run the question set against the knowledge base (inside an app context).
+
+    Retrieval mirrors the copilot: search_chunks with RAG_CHUNK_LIMIT, files
+    ranked in order of their first chunk, and the prompt packed from the
+    full documents as for a question without chat history. Each question is
+    searched `repeat` times; every run contributes a latency sample.
+    """
+    from my_project.ai.clients import get_encoder
+    from my_project.ai.copilot import RAG_CHUNK_LIMIT, _packed_messages
+    from my_project.ai.knowledge import load_full_documents, search_chunks
+
+    corpus_dir = os.path.abspath(corpus_dir)
+    model = model or os.environ.get("LLM_MODEL", "gpt-4o-mini")
+    report = BenchmarkReport(questions=len(questions))
+    report.settings = {
+        "corpus": corpus_dir,
+        "model": model,
+        "chunk_limit": RAG_CHUNK_LIMIT,
+        "repeat": repeat,
+        "tokenizer": "tiktoken" if get_encoder(model) is not None else "estimate",
+    }
+    if ingest:
+        report.ingestion = ingest_corpus(corpus_dir, workers=workers)
+
+    # The first search loads the vector and BM25 indexes; keep it out of the samples
+    started = time.perf_counter()
+    search_chunks(questions[0]["question"] if questions else "", limit=RAG_CHUNK_LIMIT)
+    report.settings["warmup_ms"] = round((time.perf_counter() - started) * 1000, 3)
+
+    ranks: List[Optional[int]] = []
+    latencies: List[float] = []
+    tokens: List[float] = []
+    for q in questions:
+        expected = [unicodedata.normalize("NFC", p) for p in q["expected"]]
+        samples = []
+        for _ in range(max(1, repeat)):
+            started = time.perf_counter()
+            chunks = search_chunks(q["question"], limit=RAG_CHUNK_LIMIT)
+            samples.append(round((time.perf_counter() - started) * 1000, 3))
+
+        retrieved: List[str] = []
+        for chunk in chunks:
+            rel = _relative(chunk["source_path"], corpus_dir)
+            if rel not in retrieved:
+                retrieved.append(rel)
+        rank = first_hit_rank(retrieved, expected)
+
+        documents = load_full_documents(chunks, max_total_chars=None) if chunks else []
+        _, packed = _packed_messages(q["question"], chunks, documents, [], None, model)
+
+        ranks.append(rank)
+        latencies.extend(samples)
+        tokens.append(packed.tokens["total"])
+        report.results.append(QuestionResult(
+            question=q["question"], expected=expected, retrieved=retrieved,
+            rank=rank, latency_ms=samples, prompt_tokens=packed.tokens["total"],
+        ))
+        if rank is None:
+            logger.info(f"Benchmark miss: {q['question']!r} → {retrieved[:3]}")
+
+    report.recall = {f"@{k}": round(recall_at_k(ranks, k), 4) for k in k_values}
+    report.mrr = round(mean_reciprocal_rank(ranks), 4)
+    report.latency_ms = _summary(latencies)
+    report.prompt_tokens = _summary(tokens, digits=1)
+    return report
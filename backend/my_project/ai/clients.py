@@ -0,0 +1,196 @@
+"""
+Shared AI client registry for ΠΥΛΗ ΚΟΙΝΩΝΙΚΗΣ ΜΕΡΙΜΝΑΣ.
+One OpenAI-compatible client — and so one keep-alive HTTP connection pool —
+per (base URL, API key, retry policy), reused by every chat and embedding
+call in the process, plus the tiktoken encoder cache. Set LLM_BASE_URL
+(e.g. http://ollama:11434/v1) to send chat completions to a local server,
+and EMBEDDING_BASE_URL to do the same for embeddings.
+"""
+import os
+import time
+import logging
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+import httpx
+import openai
+import tiktoken
+
+logger = logging.getLogger(__name__)
+
+# Per-pool connection limits and timeouts
+CLIENT_MAX_CONNECTIONS = int(os.environ.get("LLM_MAX_CONNECTIONS", 20))
+CLIENT_KEEPALIVE_CONNECTIONS = int(os.environ.get("LLM_KEEPALIVE_CONNECTIONS", 10))
+CLIENT_KEEPALIVE_EXPIRY = float(os.environ.get("LLM_KEEPALIVE_EXPIRY", 60.0))
+CLIENT_TIMEOUT = float(os.environ.get("LLM_TIMEOUT", 120.0))
+
+# Local OpenAI-compatible servers ignore the key, but the SDK requires one
+_PLACEHOLDER_API_KEY = "not-needed"
+
+
+class _PoolMetrics:
+    """Counts responses through one pool and how many needed a new connection."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.responses = 0
+        self.new_connections = 0
+        self.tls_handshakes = 0
+
+    def on_request(self, request: httpx.Request) -> None:
+        def trace(event_name: str, info: Dict[str, Any]) -> None:
+            if event_name == "connection.connect_tcp.complete":
+                trace.connected = True
+            elif event_name == "connection.start_tls.complete":
+                with self._lock:
+                    self.tls_handshakes += 1
+
+        trace.connected = False
+        request.extensions["trace"] = trace
+
+    def on_response(self, response: httpx.Response) -> None:
+        trace = response.request.extensions.get("trace")
+        with self._lock:
+            self.responses += 1
+            if getattr(trace, "connected", False):
+                self.new_connections += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            reused = self.responses - self.new_connections
+            return {
+                "responses": self.responses,
+                "new_connections": self.new_connections,
+                "tls_handshakes": self.tls_handshakes,
+                "reused_connections": reused,
+                "reuse_ratio": round(reused / self.responses, 3) if self.responses else 0.0,
+            }
+
+
+class ClientRegistry:
+    """Process-wide cache of OpenAI clients and tiktoken encoders."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._clients: Dict[Tuple[str, str, int], openai.OpenAI] = {}
+        self._metrics: Dict[Tuple[str, str, int], _PoolMetrics] = {}
+        self._encoders: Dict[str, Any] = {}
+        self._encoder_load_seconds = 0.0
+
+    def client(self, base_url: Optional[str], api_key: str, max_retries: int = 2) -> openai.OpenAI:
+        key = (base_url or "", api_key, max_retries)
+        client = self._clients.get(key)
+        if client is not None:
+            return client
+        with self._lock:
+            client = self._clients.get(key)
+            if client is None:
+                metrics = _PoolMetrics()
+                http_client = httpx.Client(
+                    limits=httpx.Limits(
+                        max_connections=CLIENT_MAX_CONNECTIONS,
+                        max_keepalive_connections=CLIENT_KEEPALIVE_CONNECTIONS,
+                        keepalive_expiry=CLIENT_KEEPALIVE_EXPIRY,
+                    ),
+                    timeout=httpx.Timeout(CLIENT_TIMEOUT, connect=10.0),
+                    event_hooks={"request": [metrics.on_request], "response": [metrics.on_response]},
+                )
+                client = openai.OpenAI(
+                    api_key=api_key,
+                    base_url=base_url or None,
+                    max_retries=max_retries,
+                    http_client=http_client,
+                )
+                self._clients[key] = client
+                self._metrics[key] = metrics
+                logger.info(f"AI client pool created for {base_url or 'api.openai.com'}")
+        return client
+
+    def encoder(self, model: str):
+        """tiktoken encoder for model, or None if it cannot be loaded.
+        Failures are remembered too: offline, every retry would block on
+        the BPE download again."""
+        if model in self._encoders:
+            return self._encoders[model]
+        with self._lock:
+            if model in self._encoders:
+                return self._encoders[model]
+            started = time.perf_counter()
+            try:
+                try:
+                    enc = tiktoken.encoding_for_model(model)
+                except KeyError:
+                    enc = tiktoken.get_encoding("cl100k_base")
+            except Exception as e:
+                logger.warning(f"tiktoken encoder unavailable for {model}: {e}")
+                enc = None
+            self._encoder_load_seconds += time.perf_counter() - started
+            self._encoders[model] = enc
+            return enc
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            pools = {
+                base_url or "https://api.openai.com/v1": metrics.snapshot()
+                for (base_url, _, _), metrics in self._metrics.items()
+            }
+            return {
+                "pools": pools,
+                "clients": len(self._clients),
+                "encoders": sorted(m for m, enc in self._encoders.items() if enc is not None),
+                "encoder_load_seconds": round(self._encoder_load_seconds, 3),
+            }
+
+    def close(self) -> None:
+        with self._lock:
+            for client in self._clients.values():
+                try:
+                    client.close()
+                except Exception:
+                    pass
+            self._clients.clear()
+            self._metrics.clear()
+
+
+_registry = ClientRegistry()
+
+
+def get_registry() -> ClientRegistry:
+    return _registry
+
+
+def get_llm_client(max_retries: int = 2) -> openai.OpenAI:
+    """Pooled client for chat completions (LLM_BASE_URL, else OpenAI)."""
+    base_url = os.environ.get("LLM_BASE_URL") or None
+    api_key = os.environ.get("LLM_API_KEY") or os.environ.get("OPENAI_API_KEY")
+    if not api_key:
+        if not base_url:
+            raise RuntimeError("OPENAI_API_KEY environment variable not set")
+        api_key = _PLACEHOLDER_API_KEY
+    return _registry.client(base_url, api_key, max_retries)
+
+
+def get_embedding_client(max_retries: int = 2) -> openai.OpenAI:
+    """Pooled client for embeddings (EMBEDDING_BASE_URL, else OpenAI)."""
+    base_url = os.environ.get("EMBEDDING_BASE_URL") or None
+    api_key = os.environ.get("OPENAI_API_KEY")
+    if not api_key:
+        if not base_url:
+            raise RuntimeError("OPENAI_API_KEY environment variable not set")
+        api_key = _PLACEHOLDER_API_KEY
+    return _registry.client(base_url, api_key, max_retries)
+
+
+def get_encoder(model: str):
+    """Return the (cached) tiktoken encoder for a model, or None if unavailable.
+
+    Unknown model names (e.g. Ollama models) use cl100k_base. If the BPE files
+    cannot be loaded (offline install), callers fall back to an estimate.
+    Failures are cached per process like successes, so an offline install
+    does not retry the BPE download on every call; restart to try again.
+    """
+    return _registry.encoder(model)
+
+
+def client_metrics() -> Dict[str, Any]:
+    return _registry.metrics()
@@ -0,0 +1,223 @@
+"""
+Token-aware prompt packing for the ΠΥΛΗ ΚΟΙΝΩΝΙΚΗΣ ΜΕΡΙΜΝΑΣ AI copilot.
+Splits the model's prompt budget between the fixed parts (system prompt,
+user context, question), recent chat history and retrieved documents,
+counting with the model's own tokenizer. Documents that do not fit whole
+are reduced to the windows around their best-matching chunks rather than
+cut off at an arbitrary offset.
+"""
+import os
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from my_project.ai.embeddings import count_tokens, truncate_to_tokens
+
+logger = logging.getLogger(__name__)
+
+# Context window by model-name prefix (longest match wins); unknown names,
+# e.g. local Ollama models, get the conservative default.
+CONTEXT_WINDOWS = {
+    "gpt-3.5": 16385,
+    "gpt-4": 8192,
+    "gpt-4-turbo": 128000,
+    "gpt-4o": 128000,
+    "gpt-4.1": 1047576,
+    "gpt-5": 400000,
+    "o1": 200000,
+    "o3": 200000,
+    "o4": 200000,
+}
+DEFAULT_CONTEXT_WINDOW = int(os.environ.get("LLM_CONTEXT_WINDOW", 8192))
+
+# Prompt ceiling regardless of window size — large windows cost money and latency
+MAX_PROMPT_TOKENS = int(os.environ.get("RAG_MAX_PROMPT_TOKENS", 32000))
+# Kept free for the model's answer
+RESPONSE_RESERVE_TOKENS = int(os.environ.get("RAG_RESPONSE_RESERVE_TOKENS", 4096))
+# Upper bound for chat history inside the prompt
+HISTORY_MAX_TOKENS = int(os.environ.get("RAG_HISTORY_MAX_TOKENS", 6000))
+HISTORY_MAX_MESSAGES = 20
+# Characters of surrounding text kept on each side of a matching chunk
+WINDOW_PADDING_CHARS = int(os.environ.get("RAG_WINDOW_PADDING_CHARS", 1000))
+
+# Per-message framing overhead in the chat format
+MESSAGE_OVERHEAD_TOKENS = 4
+WINDOW_SEPARATOR = "\n\n[…]\n\n"
+
+
+@dataclass
+class PackedContext:
+    documents: List[Dict[str, Any]] = field(default_factory=list)
+    chunks: List[Dict[str, Any]] = field(default_factory=list)
+    history: List[Dict[str, str]] = field(default_factory=list)
+    tokens: Dict[str, int] = field(default_factory=dict)
+
+
+def context_window(model: str) -> int:
+    best = ""
+    for prefix in CONTEXT_WINDOWS:
+        if model.startswith(prefix) and len(prefix) > len(best):
+            best = prefix
+    return CONTEXT_WINDOWS[best] if best else DEFAULT_CONTEXT_WINDOW
+
+
+def prompt_budget(model: str) -> int:
+    return max(0, min(context_window(model) - RESPONSE_RESERVE_TOKENS, MAX_PROMPT_TOKENS))
+
+
+def _message_tokens(text: str, model: str) -> int:
+    return count_tokens(text, model) + MESSAGE_OVERHEAD_TOKENS
+
+
+# ── Document windows ──
+
+def _locate(text: str, chunk: str) -> Optional[Tuple[int, int]]:
+    """Span of chunk in text, for chunks without usable offsets. Older chunks
+    may carry a re-joined overlap prefix, so fall back to matching a probe
+    from the chunk's middle."""
+    start = text.find(chunk)
+    if start >= 0:
+        return start, start + len(chunk)
+    probe_len = min(200, len(chunk))
+    offset = (len(chunk) - probe_len) // 2
+    probe = chunk[offset:offset + probe_len]
+    start = text.find(probe) if probe.strip() else -1
+    if start < 0:
+        return None
+    return max(0, start - offset), min(len(text), start - offset + len(chunk))
+
+
+def _snap(text: str, start: int, end: int) -> Tuple[int, int]:
+    """Widen a span by the padding, then trim to line boundaries."""
+    lo = max(0, start - WINDOW_PADDING_CHARS)
+    hi = min(len(text), end + WINDOW_PADDING_CHARS)
+    if lo > 0:
+        nl = text.find("\n", lo, start)
+        lo = nl + 1 if nl >= 0 else lo
+    if hi < len(text):
+        nl = text.rfind("\n", end, hi)
+        hi = nl if nl >= 0 else hi
+    return lo, hi
+
+
+def _windows(text: str, chunks: List[Dict[str, Any]]) -> List[Tuple[float, int, int]]:
+    """(similarity, start, end) windows around each chunk, best first, overlaps merged."""
+    spans = []
+    for c in chunks:
+        content = c.get("content", "")
+        start, end = c.get("char_start"), c.get("char_end")
+        if start is not None and end is not None and text[start:end] == content:
+            found = (start, end)  # offsets recorded at chunking time still match
+        else:
+            found = _locate(text, content)
+        if found:
+            spans.append((c.get("similarity", 0.0),) + _snap(text, *found))
+    spans.sort(key=lambda s: s[1])
+    merged: List[List[Any]] = []
+    for sim, lo, hi in spans:
+        if merged and lo <= merged[-1][2]:
+            merged[-1][0] = max(merged[-1][0], sim)
+            merged[-1][2] = max(merged[-1][2], hi)
+        else:
+            merged.append([sim, lo, hi])
+    return sorted((tuple(m) for m in merged), key=lambda m: -m[0])
+
+
+def _excerpt(text: str, chunks: List[Dict[str, Any]], budget: int, model: str) -> str:
+    """Best-matching windows of text in document order, within budget tokens."""
+    chosen = []
+    used = 0
+    separator_tokens = count_tokens(WINDOW_SEPARATOR, model)
+    for _, lo, hi in _windows(text, chunks):
+        cost = count_tokens(text[lo:hi], model) + (separator_tokens if chosen else 0)
+        if used + cost > budget:
+            continue
+        chosen.append((lo, hi))
+        used += cost
+    if not chosen:
+        # No chunk located, or even the best window is too large
+        return truncate_to_tokens(text, budget, model) if budget > 0 else ""
+    chosen.sort()
+    parts = [text[lo:hi] for lo, hi in chosen]
+    if chosen[0][0] > 0:
+        parts[0] = "[…] " + parts[0]
+    if chosen[-1][1] < len(text):
+        parts[-1] = parts[-1] + " […]"
+    return WINDOW_SEPARATOR.join(parts)
+
+
+# ── Packing ──
+
+def pack_context(
+    model: str,
+    fixed_texts: List[str],
+    user_message: str,
+    full_documents: List[Dict[str, Any]],
+    context_chunks: List[Dict[str, Any]],
+    chat_history: List[Dict[str, str]],
+) -> PackedContext:
+    """Fit history and documents into the model's prompt budget.
+
+    fixed_texts are the system messages that are always sent. History is
+    kept newest-first up to its own cap; documents get what remains, in
+    ranking order, whole when they fit and as chunk windows otherwise.
+    """
+    packed = PackedContext()
+    budget = prompt_budget(model)
+    fixed = sum(_message_tokens(t, model) for t in fixed_texts)
+    question = _message_tokens(user_message, model)
+
+    history_budget = min(HISTORY_MAX_TOKENS, max(0, budget - fixed - question))
+    history_tokens = 0
+    for msg in reversed(chat_history[-HISTORY_MAX_MESSAGES:]):
+        cost = _message_tokens(msg.get("content", ""), model)
+        if history_tokens + cost > history_budget:
+            break
+        packed.history.insert(0, msg)
+        history_tokens += cost
+
+    remaining = max(0, budget - fixed - question - history_tokens - MESSAGE_OVERHEAD_TOKENS)
+    document_tokens = 0
+    if full_documents:
+        for doc in full_documents:
+            if remaining <= 0:
+                break
+            path = doc.get("source_path", "")
+            content = doc.get("content", "")
+            header = count_tokens(f"ΕΓΓΡΑΦΟ: {os.path.basename(path)}\n\n", model)
+            cost = count_tokens(content, model) + header
+            if cost > remaining:
+                content = _excerpt(
+                    content, [c for c in context_chunks if c.get("source_path") == path],
+                    remaining - header, model,
+                )
+                if not content:
+                    continue
+                cost = count_tokens(content, model) + header
+                doc = {**doc, "content": content, "excerpt": True}
+            packed.documents.append(doc)
+            remaining -= cost
+            document_tokens += cost
+    else:
+        for chunk in context_chunks:
+            cost = count_tokens(chunk.get("content", ""), model) + 10
+            if cost > remaining:
+                continue
+            packed.chunks.append(chunk)
+            remaining -= cost
+            document_tokens += cost
+
+    packed.tokens = {
+        "system": fixed,
+        "documents": document_tokens,
+        "history": history_tokens,
+        "question": question,
+        "total": fixed + document_tokens + history_tokens + question,
+        "budget": budget,
+    }
+    if len(packed.documents) < len(full_documents) or any(d.get("excerpt") for d in packed.documents):
+        logger.info(
+            f"Context packed for {model}: {len(packed.documents)}/{len(full_documents)} docs, "
+            f"{packed.tokens['total']}/{budget} tokens"
+        )
+    return packed
@@ -8,18 +8,23 @@ Document chunks are sent to OpenAI's API (US-based servers) for embedding
 and chat completion. Only public legislation and official guidelines should
 be stored in the knowledge base. Do NOT ingest documents containing citizen
 PII or case-specific data. For on-premises deployment, the LLM client can
-be swapped to a local Ollama instance by setting LLM_BASE_URL env var.
+be swapped to a local Ollama instance by setting LLM_BASE_URL env var
+(see ai/clients.py).
 """
 import os
 import logging
-from typing import List, Dict, Any, Optional
-
-import openai
+from typing import List, Dict, Any, Iterator, Optional
 
+from my_project.ai import answer_cache
+from my_project.ai.clients import get_llm_client
+from my_project.ai.context_packer import pack_context
 from my_project.ai.knowledge import search_chunks, load_full_documents
 
 logger = logging.getLogger(__name__)
 
+# Chunks retrieved per question; their files become the full-document context
+RAG_CHUNK_LIMIT = 8
+
 SYSTEM_PROMPT = """Είσαι ο νομικός σύμβουλος της Πύλης Κοινωνικής Μέριμνας — εξειδικευμένο \
 εργαλείο για κοινωνικούς λειτουργούς, κοινωνικούς συμβούλους, μέλη επιτροπών \
 ελέγχου και στελέχη Διευθύνσεων Κοινωνικής Μέριμνας στις Περιφέρειες.
@@ -61,6 +66,10 @@ DISCLAIMER_TEXT = (
 )
 
 
+ERROR_REPLY = ("Λυπάμαι, αντιμετώπισα τεχνικό πρόβλημα. "
+               "Παρακαλώ δοκιμάστε ξανά σε λίγο.")
+
+
 def build_system_prompt() -> str:
     """Return the system prompt for the copilot."""
     return SYSTEM_PROMPT
@@ -84,7 +93,8 @@ def build_messages(
     if full_documents:
         separator = "\n\n" + "═" * 60 + "\n\n"
         context_text = separator.join(
-            f"ΕΓΓΡΑΦΟ: {os.path.basename(d.get('source_path', 'Άγνωστο'))}\n"
+            f"ΕΓΓΡΑΦΟ: {os.path.basename(d.get('source_path', 'Άγνωστο'))}"
+            f"{' (αποσπάσματα)' if d.get('excerpt') else ''}\n"
             f"{d['content']}"
             for d in full_documents
         )
@@ -114,12 +124,7 @@ def build_messages(
 
     # Add user context if available
     if user_context:
-        user_info = (
-            f"Ο χρήστης που ρωτάει: {user_context.get('username', 'Άγνωστος')}, "
-            f"ρόλος: {user_context.get('role', 'guest')}. "
-            f"Προσάρμοσε το επίπεδο λεπτομέρειας ανάλογα με τον ρόλο."
-        )
-        messages.append({"role": "system", "content": user_info})
+        messages.append({"role": "system", "content": _user_context_text(user_context)})
 
     # Add chat history (last 20 messages)
     for msg in chat_history[-20:]:
@@ -134,73 +139,240 @@ def build_messages(
     return messages
 
 
-def get_chat_reply(
-    user_message: str,
-    chat_history: Optional[List[Dict[str, str]]] = None,
-    use_rag: bool = True,
-    user_context: Optional[Dict[str, str]] = None,
-    model_override: Optional[str] = None,
-) -> Dict[str, Any]:
-    """Generate AI reply with full-document RAG retrieval."""
-    if chat_history is None:
-        chat_history = []
+def _user_context_text(user_context: Dict[str, str]) -> str:
+    role = user_context.get('role', 'guest')
+    if not user_context.get('username'):
+        # Cacheable answers are shared by every user of the role
+        return (f"Ρόλος του χρήστη που ρωτάει: {role}. "
+                f"Προσάρμοσε το επίπεδο λεπτομέρειας ανάλογα με τον ρόλο.")
+    return (
+        f"Ο χρήστης που ρωτάει: {user_context['username']}, "
+        f"ρόλος: {role}. "
+        f"Προσάρμοσε το επίπεδο λεπτομέρειας ανάλογα με τον ρόλο."
+    )
+
+
+def _packed_messages(user_message, context_chunks, full_documents, chat_history,
+                     user_context, model):
+    """build_messages over the token-budgeted subset of documents and history."""
+    fixed = [SYSTEM_PROMPT]
+    if user_context:
+        fixed.append(_user_context_text(user_context))
+    packed = pack_context(
+        model, fixed, user_message, full_documents, context_chunks, chat_history,
+    )
+    messages = build_messages(
+        user_message, packed.chunks, packed.history,
+        user_context, full_documents=packed.documents,
+    )
+    return messages, packed
 
+
+def _retrieve_context(user_message: str, use_rag: bool):
+    """RAG retrieval: ranked chunks plus the full documents they point to."""
     context_chunks = []
     full_documents = []
+    if not use_rag:
+        return context_chunks, full_documents
+
+    try:
+        context_chunks = search_chunks(user_message, limit=RAG_CHUNK_LIMIT)
+    except Exception as e:
+        logger.error(f"RAG search failed: {e}")
 
-    if use_rag:
+    if context_chunks:
         try:
-            context_chunks = search_chunks(user_message, limit=8)
+            full_documents = load_full_documents(
+                context_chunks, max_total_chars=None
+            )
+            logger.info(
+                f"Full-doc RAG: {len(full_documents)} docs loaded "
+                f"from {len(context_chunks)} chunks"
+            )
         except Exception as e:
-            logger.error(f"RAG search failed: {e}")
-
-        if context_chunks:
-            try:
-                full_documents = load_full_documents(
-                    context_chunks, max_total_chars=80000
-                )
-                logger.info(
-                    f"Full-doc RAG: {len(full_documents)} docs loaded "
-                    f"from {len(context_chunks)} chunks"
-                )
-            except Exception as e:
-                logger.error(f"Full doc loading failed, using chunks: {e}")
-                full_documents = []
-
-    messages = build_messages(
-        user_message, context_chunks, chat_history,
-        user_context, full_documents=full_documents,
-    )
+            logger.error(f"Full doc loading failed, using chunks: {e}")
+            full_documents = []
+    return context_chunks, full_documents
 
-    model = model_override or os.environ.get("LLM_MODEL", "gpt-4o-mini")
-    try:
-        client = openai.OpenAI(api_key=os.environ.get("OPENAI_API_KEY"))
 
-        is_reasoning = any(model.startswith(p) for p in ("gpt-5", "o1", "o3", "o4"))
-        params = dict(model=model, messages=messages)
-        if not is_reasoning:
-            params["temperature"] = 0.3
+def _completion_params(model: str, messages: List[Dict[str, str]]) -> Dict[str, Any]:
+    is_reasoning = any(model.startswith(p) for p in ("gpt-5", "o1", "o3", "o4"))
+    params = dict(model=model, messages=messages)
+    if not is_reasoning:
+        params["temperature"] = 0.3
+    return params
 
-        logger.info(f"Calling LLM: model={model}, docs={len(full_documents)}, chunks={len(context_chunks)}")
-        response = client.chat.completions.create(**params)
-        reply = response.choices[0].message.content or ""
-    except Exception as e:
-        logger.error(f"LLM call failed (model={model}): {e}")
-        reply = ("Λυπάμαι, αντιμετώπισα τεχνικό πρόβλημα. "
-                "Παρακαλώ δοκιμάστε ξανά σε λίγο.")
 
+def _reply_metadata(context_chunks, full_documents, model: str,
+                    tokens: Optional[Dict[str, int]] = None) -> Dict[str, Any]:
     if full_documents:
         sources = [doc["source_path"] for doc in full_documents]
     else:
         sources = list(set(
             c.get("source_path", "") for c in context_chunks if c.get("source_path")
         ))
-
     return {
-        "reply": reply + DISCLAIMER_TEXT,
         "sources": sources,
         "context_used": len(full_documents) > 0 or len(context_chunks) > 0,
         "chunks_found": len(context_chunks),
         "docs_loaded": len(full_documents),
         "model": model,
+        "tokens": tokens or {},
+    }
+
+
+def _cacheable(chat_history, use_rag) -> bool:
+    """Standalone RAG questions go through the answer cache. Follow-up
+    questions depend on the conversation so they always go to the LLM."""
+    return not chat_history and use_rag
+
+
+def _cache_context(user_context: Optional[Dict[str, str]]) -> Optional[Dict[str, str]]:
+    """The asker context of a cacheable prompt: the role only, since the
+    answer is keyed by role and may be served to other users."""
+    if not user_context:
+        return user_context
+    return {"role": user_context.get("role", "guest")}
+
+
+def _cache_role(user_context: Optional[Dict[str, str]]) -> str:
+    return (user_context or {}).get("role", "")
+
+
+def _cached_reply(user_message, chat_history, use_rag, user_context, model):
+    """Answer-cache hit for a standalone RAG question, or None."""
+    if not _cacheable(chat_history, use_rag):
+        return None
+    try:
+        hit = answer_cache.lookup(user_message, model, _cache_role(user_context))
+    except Exception as e:
+        logger.error(f"Answer cache lookup failed: {e}")
+        return None
+    if hit:
+        logger.info(f"Answer cache hit: model={model}, similarity={hit['cache_similarity']}")
+        hit["cached"] = True
+    return hit
+
+
+def _cache_reply(user_message, chat_history, use_rag, user_context, result, full_documents):
+    if not _cacheable(chat_history, use_rag) or not result["context_used"]:
+        return
+    try:
+        answer_cache.store(
+            user_message, result["model"], _cache_role(user_context), result,
+            source_paths=[d["source_path"] for d in full_documents] or result["sources"],
+        )
+    except Exception as e:
+        logger.error(f"Answer cache store failed: {e}")
+
+
+def get_chat_reply(
+    user_message: str,
+    chat_history: Optional[List[Dict[str, str]]] = None,
+    use_rag: bool = True,
+    user_context: Optional[Dict[str, str]] = None,
+    model_override: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Generate AI reply with full-document RAG retrieval.
+
+    Standalone questions are answered from the semantic answer cache when
+    possible; the result then carries cached=True and cache_similarity.
+    """
+    if chat_history is None:
+        chat_history = []
+
+    model = model_override or os.environ.get("LLM_MODEL", "gpt-4o-mini")
+    if _cacheable(chat_history, use_rag):
+        user_context = _cache_context(user_context)
+    cached = _cached_reply(user_message, chat_history, use_rag, user_context, model)
+    if cached:
+        return cached
+
+    context_chunks, full_documents = _retrieve_context(user_message, use_rag)
+
+    messages, packed = _packed_messages(
+        user_message, context_chunks, full_documents, chat_history, user_context, model,
+    )
+
+    failed = False
+    try:
+        client = get_llm_client()
+        logger.info(f"Calling LLM: model={model}, docs={len(full_documents)}, chunks={len(context_chunks)}")
+        response = client.chat.completions.create(**_completion_params(model, messages))
+        reply = response.choices[0].message.content or ""
+    except Exception as e:
+        logger.error(f"LLM call failed (model={model}): {e}")
+        reply = ERROR_REPLY
+        failed = True
+
+    result = {
+        "reply": reply + DISCLAIMER_TEXT,
+        **_reply_metadata(context_chunks, packed.documents, model, packed.tokens),
+        "cached": False,
+    }
+    if not failed and reply:
+        _cache_reply(user_message, chat_history, use_rag, user_context, result, full_documents)
+    return result
+
+
+def stream_chat_reply(
+    user_message: str,
+    chat_history: Optional[List[Dict[str, str]]] = None,
+    use_rag: bool = True,
+    user_context: Optional[Dict[str, str]] = None,
+    model_override: Optional[str] = None,
+) -> Iterator[Dict[str, Any]]:
+    """Streaming variant of get_chat_reply.
+
+    Yields {"type": "token", "content": ...} as the model produces text,
+    then one {"type": "done", "reply": <full text>, "sources": ..., ...}
+    frame carrying the same fields get_chat_reply returns. A cache hit is
+    sent as a single token frame.
+    """
+    if chat_history is None:
+        chat_history = []
+
+    model = model_override or os.environ.get("LLM_MODEL", "gpt-4o-mini")
+    if _cacheable(chat_history, use_rag):
+        user_context = _cache_context(user_context)
+    cached = _cached_reply(user_message, chat_history, use_rag, user_context, model)
+    if cached:
+        yield {"type": "token", "content": cached["reply"]}
+        yield {"type": "done", **cached}
+        return
+
+    context_chunks, full_documents = _retrieve_context(user_message, use_rag)
+    messages, packed = _packed_messages(
+        user_message, context_chunks, full_documents, chat_history, user_context, model,
+    )
+
+    parts: List[str] = []
+    failed = False
+    try:
+        client = get_llm_client()
+        logger.info(f"Streaming LLM: model={model}, docs={len(full_documents)}, chunks={len(context_chunks)}")
+        stream = client.chat.completions.create(stream=True, **_completion_params(model, messages))
+        for event in stream:
+            if not event.choices:
+                continue
+            delta = event.choices[0].delta.content
+            if delta:
+                parts.append(delta)
+                yield {"type": "token", "content": delta}
+    except Exception as e:
+        logger.error(f"LLM stream failed (model={model}): {e}")
+        error_text = ERROR_REPLY if not parts else "\n\n" + ERROR_REPLY
+        parts.append(error_text)
+        failed = True
+        yield {"type": "token", "content": error_text}
+
+    parts.append(DISCLAIMER_TEXT)
+    yield {"type": "token", "content": DISCLAIMER_TEXT}
+    result = {
+        "reply": "".join(parts),
+        **_reply_metadata(context_chunks, packed.documents, model, packed.tokens),
+        "cached": False,
     }
+    if not failed and len(parts) > 1:
+        _cache_reply(user_message, chat_history, use_rag, user_context, result, full_documents)
+    yield {"type": "done", **result}
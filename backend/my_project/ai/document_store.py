@@ -0,0 +1,201 @@
+"""
+Cached knowledge document loader for ΠΥΛΗ ΚΟΙΝΩΝΙΚΗΣ ΜΕΡΙΜΝΑΣ.
+Resolves chunk source paths (absolute, relative to KNOWLEDGE_FOLDER, or by
+basename) through an index built once and rebuilt only when a directory
+mtime changes, and keeps decoded texts in a size-bounded LRU validated by
+(mtime, size) — one stat per document on a warm cache, never a walk.
+PDF/DOCX sources are cached as their extracted text.
+"""
+import os
+import stat
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from flask import current_app
+
+from my_project.ai.ingest import EXTRACTABLE_TYPES, extract_text
+
+logger = logging.getLogger(__name__)
+
+# Upper bound on cached document text, in bytes of source file
+DOCUMENT_CACHE_MAX_BYTES = int(os.environ.get("DOCUMENT_CACHE_MAX_BYTES", 64 * 1024 * 1024))
+
+_KNOWLEDGE_PREFIXES = ("knowledge/", "knowledge\\")
+
+_create_lock = threading.Lock()
+
+
+class DocumentStore:
+    """Path index + LRU text cache for the files under one knowledge root."""
+
+    def __init__(self, root: str, max_bytes: int = DOCUMENT_CACHE_MAX_BYTES):
+        self.root = os.path.abspath(root) if root else ""
+        self.max_bytes = max_bytes
+        self._lock = threading.RLock()
+        self._by_name: Dict[str, List[str]] = {}
+        self._by_relpath: Dict[str, str] = {}
+        self._dir_mtimes: Dict[str, int] = {}
+        self._indexed = False
+        self._resolved: Dict[str, str] = {}
+        self._texts: "OrderedDict[str, Tuple[Tuple[int, int], str, int]]" = OrderedDict()
+        self._bytes = 0
+        self._stats = {"hits": 0, "misses": 0, "index_builds": 0}
+
+    # ── Path index ──
+
+    def _build_index(self) -> None:
+        by_name: Dict[str, List[str]] = {}
+        by_relpath: Dict[str, str] = {}
+        dir_mtimes: Dict[str, int] = {}
+
+        def scan(path: str) -> None:
+            try:
+                dir_mtimes[path] = os.stat(path).st_mtime_ns
+                entries = list(os.scandir(path))
+            except OSError:
+                return
+            for entry in entries:
+                if entry.name.startswith("."):
+                    continue
+                if entry.is_dir(follow_symlinks=False):
+                    scan(entry.path)
+                elif entry.is_file():
+                    by_name.setdefault(entry.name, []).append(entry.path)
+                    rel = os.path.relpath(entry.path, self.root).replace(os.sep, "/")
+                    by_relpath[rel] = entry.path
+
+        if self.root and os.path.isdir(self.root):
+            scan(self.root)
+        with self._lock:
+            self._by_name, self._by_relpath, self._dir_mtimes = by_name, by_relpath, dir_mtimes
+            self._indexed = True
+            self._stats["index_builds"] += 1
+
+    def _index_stale(self) -> bool:
+        for path, mtime in self._dir_mtimes.items():
+            try:
+                if os.stat(path).st_mtime_ns != mtime:
+                    return True
+            except OSError:
+                return True
+        return False
+
+    def _candidates(self, source_path: str) -> Iterator[str]:
+        """Possible absolute paths for source_path, cheapest first."""
+        if os.path.isabs(source_path):
+            yield source_path
+        relative = source_path
+        for prefix in _KNOWLEDGE_PREFIXES:
+            if relative.startswith(prefix):
+                relative = relative[len(prefix):]
+                break
+        if not self.root:
+            return
+        if not os.path.isabs(relative):
+            yield os.path.join(self.root, relative)
+
+        if not self._indexed:
+            self._build_index()
+        basename = os.path.basename(source_path.replace("\\", "/"))
+        rel_key = relative.replace("\\", "/")
+        if rel_key not in self._by_relpath and basename not in self._by_name and self._index_stale():
+            self._build_index()
+        if rel_key in self._by_relpath:
+            yield self._by_relpath[rel_key]
+        yield from self._by_name.get(basename, [])
+
+    # ── Text cache ──
+
+    def _read_cached(self, path: str) -> Optional[str]:
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        if not stat.S_ISREG(st.st_mode):
+            return None
+        key = (st.st_mtime_ns, st.st_size)
+
+        with self._lock:
+            entry = self._texts.get(path)
+            if entry is not None and entry[0] == key:
+                self._texts.move_to_end(path)
+                self._stats["hits"] += 1
+                return entry[1]
+
+        try:
+            if os.path.splitext(path)[1].lower().strip(".") in EXTRACTABLE_TYPES:
+                text = extract_text(path)
+            else:
+                with open(path, "r", encoding="utf-8", errors="ignore") as f:
+                    text = f.read()
+        except OSError:
+            return None
+        except Exception as e:
+            logger.error(f"Could not extract text from {path}: {e}")
+            return None
+
+        with self._lock:
+            self._stats["misses"] += 1
+            old = self._texts.pop(path, None)
+            if old is not None:
+                self._bytes -= old[2]
+            self._texts[path] = (key, text, st.st_size)
+            self._bytes += st.st_size
+            while self._bytes > self.max_bytes and len(self._texts) > 1:
+                _, (_, _, size) = self._texts.popitem(last=False)
+                self._bytes -= size
+        return text
+
+    def read(self, source_path: str) -> str:
+        """Full text of a chunk's source file, or "" if it cannot be found."""
+        path = self._resolved.get(source_path)
+        if path is not None:
+            text = self._read_cached(path)
+            if text is not None:
+                return text
+            self._resolved.pop(source_path, None)
+
+        seen = set()
+        for candidate in self._candidates(source_path):
+            if candidate in seen:
+                continue
+            seen.add(candidate)
+            text = self._read_cached(candidate)
+            if text is not None:
+                self._resolved[source_path] = candidate
+                return text
+
+        logger.warning(f"Could not read source file: {source_path}")
+        return ""
+
+    def clear(self) -> None:
+        with self._lock:
+            self._texts.clear()
+            self._resolved.clear()
+            self._bytes = 0
+            self._indexed = False
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            **self._stats,
+            "cached_documents": len(self._texts),
+            "cached_bytes": self._bytes,
+            "indexed_files": len(self._by_relpath),
+        }
+
+
+def get_document_store() -> DocumentStore:
+    """The app's document store for the current KNOWLEDGE_FOLDER."""
+    app = current_app._get_current_object()
+    root = app.config.get("KNOWLEDGE_FOLDER") or ""
+    root = os.path.abspath(root) if root else ""
+    store = app.extensions.get("document_store")
+    if store is None or store.root != root:
+        with _create_lock:
+            store = app.extensions.get("document_store")
+            if store is None or store.root != root:
+                store = DocumentStore(root)
+                app.extensions["document_store"] = store
+    return store
@@ -0,0 +1,141 @@
+"""
+Query embedding cache for ΠΥΛΗ ΚΟΙΝΩΝΙΚΗΣ ΜΕΡΙΜΝΑΣ.
+Two tiers: a bounded in-process LRU and a durable `query_embeddings` table,
+both keyed by (model, normalized text hash). Repeat questions skip the
+OpenAI round trip entirely.
+"""
+import os
+import hashlib
+import logging
+import threading
+import unicodedata
+from typing import Any, Dict, Optional, Tuple
+
+from my_project.caching import LRUCache
+from my_project.ai.embeddings import EmbeddingResult, generate_embedding
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MODEL = "text-embedding-3-small"
+
+
+# ── Key normalization ──
+
+def normalize_query(text: str) -> str:
+    """Normalize a query for cache keying: NFC, collapsed whitespace, casefolded."""
+    text = unicodedata.normalize("NFC", text or "")
+    return " ".join(text.split()).casefold()
+
+
+def query_hash(text: str) -> str:
+    """SHA-256 of the normalized query text."""
+    return hashlib.sha256(normalize_query(text).encode()).hexdigest()
+
+
+# ── In-process tier ──
+
+_memory = LRUCache(maxsize=int(os.environ.get("EMBEDDING_CACHE_SIZE", 1024)))
+
+_stats_lock = threading.Lock()
+_stats = {"memory_hits": 0, "db_hits": 0, "misses": 0}
+
+
+def _count(name: str) -> None:
+    with _stats_lock:
+        _stats[name] += 1
+
+
+# ── Durable tier ──
+
+def _load_durable(model: str, text_hash: str) -> Optional[EmbeddingResult]:
+    from my_project.extensions import db
+    from my_project.models import QueryEmbedding
+    try:
+        row = QueryEmbedding.query.filter_by(model=model, text_hash=text_hash).first()
+    except Exception as e:
+        # A failed query aborts the transaction on PostgreSQL; clear it for the search
+        db.session.rollback()
+        logger.warning(f"Query embedding table unavailable: {e}")
+        return None
+    if row is None:
+        return None
+    return EmbeddingResult(
+        embedding=[float(x) for x in row.embedding],
+        model=model,
+        text_hash=text_hash,
+        token_count=row.token_count or 0,
+    )
+
+
+def _store_durable(result: EmbeddingResult, text_hash: str) -> None:
+    from my_project.extensions import db
+    from my_project.models import QueryEmbedding
+    try:
+        db.session.add(QueryEmbedding(
+            model=result.model,
+            text_hash=text_hash,
+            embedding=result.embedding,
+            token_count=result.token_count,
+        ))
+        db.session.commit()
+    except Exception as e:
+        # Concurrent insert of the same key or missing table — memory tier still works
+        db.session.rollback()
+        logger.debug(f"Could not persist query embedding: {e}")
+
+
+# ── Public API ──
+
+def get_query_embedding(text: str, model: str = DEFAULT_MODEL) -> EmbeddingResult:
+    """Return the embedding for a query, consulting memory, then DB, then the API.
+
+    The API is called with the whitespace-normalized original text, so case
+    is preserved for acronyms like ΚΔΑΠ while the cache key is case-insensitive.
+    """
+    text_hash = query_hash(text)
+    key: Tuple[str, str] = (model, text_hash)
+
+    cached = _memory.get(key)
+    if cached is not None:
+        _count("memory_hits")
+        return cached
+
+    cached = _load_durable(model, text_hash)
+    if cached is not None:
+        _count("db_hits")
+        _memory.put(key, cached)
+        return cached
+
+    _count("misses")
+    result = generate_embedding(" ".join(text.split()), model=model)
+    result = EmbeddingResult(
+        embedding=result.embedding,
+        model=result.model,
+        text_hash=text_hash,
+        token_count=result.token_count,
+    )
+    _memory.put(key, result)
+    _store_durable(result, text_hash)
+    return result
+
+
+def cache_stats() -> Dict[str, Any]:
+    """Hit/miss counters for both tiers."""
+    with _stats_lock:
+        stats = dict(_stats)
+    lookups = stats["memory_hits"] + stats["db_hits"] + stats["misses"]
+    hits = stats["memory_hits"] + stats["db_hits"]
+    stats["lookups"] = lookups
+    stats["hit_rate"] = round(hits / lookups, 4) if lookups else 0.0
+    stats["memory_size"] = len(_memory)
+    stats["memory_max"] = _memory.maxsize
+    return stats
+
+
+def clear_cache(reset_stats: bool = False) -> None:
+    """Drop the in-process tier (the durable table is left intact)."""
+    _memory.clear()
+    if reset_stats:
+        with _stats_lock:
+            for k in _stats:
+                _stats[k] = 0
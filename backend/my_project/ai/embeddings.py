@@ -4,13 +4,18 @@ Ported from Academicon — API-based embeddings via OpenAI.
 No GPU/torch required.
 """
 import os
+import time
+import random
+import re
 import hashlib
 import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from dataclasses import dataclass, field
-from typing import List, Optional
+from typing import Iterator, List, Optional, Tuple
 
 import openai
-import tiktoken
+
+from my_project.ai.clients import get_embedding_client, get_encoder
 
 logger = logging.getLogger(__name__)
 
@@ -22,6 +27,8 @@ class TextChunk:
     chunk_index: int = 0
     chunk_type: str = "text"
     metadata: dict = field(default_factory=dict)
+    start: int = 0  # Offsets of content in the source text
+    end: int = 0
 
 @dataclass
 class EmbeddingResult:
@@ -32,6 +39,132 @@ class EmbeddingResult:
 
 # ── Text Chunking ──
 
+_SENTENCE_END = re.compile(r"(?<=[.!?;])\s+")
+_NON_SPACE = re.compile(r"\S")
+
+
+def _trim(text: str, start: int, end: int) -> Tuple[int, int]:
+    """Shrink [start, end) past leading/trailing whitespace."""
+    m = _NON_SPACE.search(text, start, end)
+    if not m:
+        return end, end
+    start = m.start()
+    while end > start and text[end - 1].isspace():
+        end -= 1
+    return start, end
+
+
+def _pieces(text: str, start: int, end: int, pattern: "re.Pattern") -> Iterator[Tuple[int, int]]:
+    """Spans of text[start:end] between pattern matches. The range must be
+    trimmed and the pattern must consume the whitespace it splits on, so
+    every piece is already trimmed."""
+    pos = start
+    for m in pattern.finditer(text, start, end):
+        if m.start() > pos:
+            yield pos, m.start()
+        pos = m.end()
+    if end > pos:
+        yield pos, end
+
+
+def _paragraphs(text: str) -> Iterator[Tuple[int, int]]:
+    """Trimmed, non-empty paragraph spans (separated by a blank line)."""
+    pos = 0
+    while True:
+        brk = text.find("\n\n", pos)
+        a, b = _trim(text, pos, len(text) if brk < 0 else brk)
+        if a < b:
+            yield a, b
+        if brk < 0:
+            return
+        pos = brk + 2
+
+
+def _pack(spans: Iterator[Tuple[int, int]], chunk_size: int) -> Iterator[Tuple[int, int]]:
+    """Merge consecutive spans while the merged source range fits chunk_size."""
+    current = None
+    for a, b in spans:
+        if current and b - current[0] <= chunk_size:
+            current = (current[0], b)
+            continue
+        if current:
+            yield current
+        current = (a, b)
+    if current:
+        yield current
+
+
+def _split_words(text: str, start: int, end: int, chunk_size: int) -> Iterator[Tuple[int, int]]:
+    """Cut a trimmed span into pieces of at most chunk_size at the last
+    whitespace before each limit (hard cut if a single word is longer)."""
+    pos = start
+    while end - pos > chunk_size:
+        limit = pos + chunk_size
+        cut = max(text.rfind(" ", pos, limit + 1), text.rfind("\n", pos, limit + 1))
+        if cut <= pos:
+            cut = limit
+        a, b = _trim(text, pos, cut)
+        if a < b:
+            yield a, b
+        m = _NON_SPACE.search(text, cut, end)
+        pos = m.start() if m else end
+    if end > pos:
+        yield pos, end
+
+
+def _split_long(text: str, start: int, end: int, chunk_size: int) -> Iterator[Tuple[int, int]]:
+    """Spans of an over-long paragraph: packed sentences, with any sentence
+    that is itself too long packed by words."""
+    cur_a = cur_b = -1
+    for a, b in _pieces(text, start, end, _SENTENCE_END):
+        if cur_a >= 0 and b - cur_a <= chunk_size:
+            cur_b = b
+            continue
+        if cur_a >= 0:
+            yield cur_a, cur_b
+        if b - a <= chunk_size:
+            cur_a, cur_b = a, b
+        else:
+            cur_a = -1
+            yield from _split_words(text, a, b, chunk_size)
+    if cur_a >= 0:
+        yield cur_a, cur_b
+
+
+def iter_chunk_spans(
+    text: str,
+    chunk_size: int = 1200,
+    overlap: int = 200,
+) -> Iterator[Tuple[int, int]]:
+    """Yield (start, end) offsets of overlapping chunks of text, lazily.
+
+    Hierarchy of split points: paragraphs > sentences > words. Paragraphs
+    are packed while their source range fits chunk_size; an over-long one is
+    split by sentences. Each chunk after the first starts about `overlap`
+    characters back inside the previous one (at a word start), so
+    text[start:end] is always an exact slice of the source.
+    """
+    def base_spans():
+        for a, b in _pack(_paragraphs(text), chunk_size):
+            if b - a <= chunk_size:
+                yield a, b
+            else:
+                # A single paragraph over the limit (packing never merges into one)
+                yield from _split_long(text, a, b, chunk_size)
+
+    prev = None
+    for a, b in base_spans():
+        start = a
+        if prev and overlap > 0:
+            start = max(prev[0], prev[1] - overlap)
+            if start > prev[0] and not text[start - 1].isspace():
+                # Back up to the start of the word the cut landed in
+                ws = max(text.rfind(" ", prev[0], start), text.rfind("\n", prev[0], start))
+                start = ws + 1 if ws >= 0 else prev[0]
+        yield start, b
+        prev = (a, b)
+
+
 def chunk_text(
     text: str,
     chunk_size: int = 1200,
@@ -39,110 +172,171 @@ def chunk_text(
 ) -> List[TextChunk]:
     """Split text into overlapping chunks using semantic boundaries.
 
-    Hierarchy of split points: paragraphs > sentences > clauses > words.
+    List form of iter_chunk_spans; each chunk carries its source offsets.
     """
     if not text or not text.strip():
         return []
+    return [
+        TextChunk(content=text[start:end], chunk_index=i, start=start, end=end)
+        for i, (start, end) in enumerate(iter_chunk_spans(text, chunk_size, overlap))
+    ]
 
-    # Normalize whitespace
-    text = text.strip()
 
-    # Try paragraph splits first
-    paragraphs = [p.strip() for p in text.split("\n\n") if p.strip()]
+# ── Embedding Generation ──
 
-    chunks: List[TextChunk] = []
-    current = ""
+DEFAULT_EMBEDDING_MODEL = "text-embedding-3-small"
 
-    for para in paragraphs:
-        if len(current) + len(para) + 2 <= chunk_size:
-            current = f"{current}\n\n{para}".strip() if current else para
-        else:
-            if current:
-                chunks.append(TextChunk(
-                    content=current,
-                    chunk_index=len(chunks),
-                ))
-            # If paragraph itself exceeds chunk_size, split by sentences
-            if len(para) > chunk_size:
-                sentence_chunks = _split_by_sentences(para, chunk_size, overlap)
-                for sc in sentence_chunks:
-                    sc.chunk_index = len(chunks)
-                    chunks.append(sc)
-            else:
-                current = para
-                continue
-            current = ""
+# Request packing limits (OpenAI allows 2048 inputs / 300k tokens per request,
+# 8191 tokens per input — stay well below so batches parallelize)
+MAX_INPUT_TOKENS = 8191
+MAX_BATCH_TOKENS = int(os.environ.get("EMBEDDING_MAX_BATCH_TOKENS", 50000))
+MAX_BATCH_ITEMS = int(os.environ.get("EMBEDDING_MAX_BATCH_ITEMS", 512))
+EMBEDDING_CONCURRENCY = int(os.environ.get("EMBEDDING_CONCURRENCY", 4))
+EMBEDDING_MAX_RETRIES = int(os.environ.get("EMBEDDING_MAX_RETRIES", 5))
 
-    if current:
-        chunks.append(TextChunk(content=current, chunk_index=len(chunks)))
+_RETRY_BASE_DELAY = 1.0
+_RETRY_MAX_DELAY = 60.0
 
-    # Apply overlap
-    if overlap > 0 and len(chunks) > 1:
-        chunks = _apply_overlap(chunks, overlap)
 
-    return chunks
+def _get_client(max_retries: int = 2) -> openai.OpenAI:
+    """Get the shared, pooled embedding client."""
+    return get_embedding_client(max_retries=max_retries)
 
 
-def _split_by_sentences(text: str, chunk_size: int, overlap: int) -> List[TextChunk]:
-    """Split text by sentence boundaries."""
-    import re
-    sentences = re.split(r'(?<=[.!?;])\s+', text)
-    chunks = []
-    current = ""
+def _text_hash(text: str) -> str:
+    return hashlib.sha256(text.encode()).hexdigest()[:16]
 
-    for sent in sentences:
-        if len(current) + len(sent) + 1 <= chunk_size:
-            current = f"{current} {sent}".strip() if current else sent
-        else:
-            if current:
-                chunks.append(TextChunk(content=current))
-            current = sent
 
+def count_tokens(text: str, model: str = DEFAULT_EMBEDDING_MODEL) -> int:
+    """Count tokens with the model tokenizer (≈2 chars/token estimate if unavailable)."""
+    enc = get_encoder(model)
+    if enc is None:
+        return -(-len(text) // 2)
+    return len(enc.encode_ordinary(text))
+
+
+def truncate_to_tokens(text: str, max_tokens: int, model: str = DEFAULT_EMBEDDING_MODEL) -> str:
+    """Cut text to at most max_tokens tokens of the model's tokenizer."""
+    enc = get_encoder(model)
+    if enc is None:
+        return text[:max_tokens * 2]
+    tokens = enc.encode_ordinary(text)
+    return enc.decode(tokens[:max_tokens]) if len(tokens) > max_tokens else text
+
+
+def pack_batches(
+    token_counts: List[int],
+    max_tokens: int = MAX_BATCH_TOKENS,
+    max_items: int = MAX_BATCH_ITEMS,
+) -> List[List[int]]:
+    """Greedily pack input indices into requests bounded by tokens and item count."""
+    batches: List[List[int]] = []
+    current: List[int] = []
+    current_tokens = 0
+    for i, n in enumerate(token_counts):
+        if current and (current_tokens + n > max_tokens or len(current) >= max_items):
+            batches.append(current)
+            current, current_tokens = [], 0
+        current.append(i)
+        current_tokens += n
     if current:
-        chunks.append(TextChunk(content=current))
-
-    return chunks
-
-
-def _apply_overlap(chunks: List[TextChunk], overlap: int) -> List[TextChunk]:
-    """Add overlapping context between consecutive chunks."""
-    result = [chunks[0]]
-    for i in range(1, len(chunks)):
-        prev_text = chunks[i - 1].content
-        overlap_text = prev_text[-overlap:] if len(prev_text) > overlap else prev_text
-        new_content = f"{overlap_text} {chunks[i].content}".strip()
-        result.append(TextChunk(
-            content=new_content,
-            chunk_index=i,
-            chunk_type=chunks[i].chunk_type,
-            metadata=chunks[i].metadata,
-        ))
-    return result
-
-
-# ── Embedding Generation ──
-
-def _get_client() -> openai.OpenAI:
-    """Get OpenAI client."""
-    api_key = os.environ.get("OPENAI_API_KEY")
-    if not api_key:
-        raise RuntimeError("OPENAI_API_KEY environment variable not set")
-    return openai.OpenAI(api_key=api_key)
-
-
-def _text_hash(text: str) -> str:
-    return hashlib.sha256(text.encode()).hexdigest()[:16]
+        batches.append(current)
+    return batches
+
+
+def _is_retryable(error: Exception) -> bool:
+    if isinstance(error, (openai.RateLimitError, openai.APIConnectionError)):
+        return True
+    if isinstance(error, openai.APIStatusError):
+        return error.status_code >= 500
+    return False
+
+
+def _retry_delay(error: Exception, attempt: int) -> float:
+    """Honour Retry-After when the API sends it, else exponential backoff with jitter."""
+    response = getattr(error, "response", None)
+    retry_after = response.headers.get("retry-after") if response is not None else None
+    if retry_after:
+        try:
+            return min(float(retry_after), _RETRY_MAX_DELAY)
+        except ValueError:
+            pass
+    delay = min(_RETRY_BASE_DELAY * (2 ** attempt), _RETRY_MAX_DELAY)
+    return delay * (0.5 + random.random() / 2)
+
+
+def _embed_request(client, model: str, texts: List[str], max_retries: int):
+    """One embeddings.create call with backoff on 429/5xx/connection errors."""
+    attempt = 0
+    while True:
+        try:
+            response = client.embeddings.create(model=model, input=texts)
+            return [d.embedding for d in sorted(response.data, key=lambda d: d.index)]
+        except Exception as e:
+            if attempt >= max_retries or not _is_retryable(e):
+                raise
+            delay = _retry_delay(e, attempt)
+            logger.warning(f"Embedding request failed ({e}); retry {attempt + 1} in {delay:.1f}s")
+            time.sleep(delay)
+            attempt += 1
+
+
+def iter_embeddings(
+    texts: List[str],
+    model: str = DEFAULT_EMBEDDING_MODEL,
+    max_tokens: int = MAX_BATCH_TOKENS,
+    max_items: int = MAX_BATCH_ITEMS,
+    concurrency: int = EMBEDDING_CONCURRENCY,
+    max_retries: int = EMBEDDING_MAX_RETRIES,
+    client=None,
+) -> Iterator[Tuple[List[int], List[EmbeddingResult]]]:
+    """Embed texts in token-budgeted requests, several in flight at once.
+
+    Yields (indices, results) per request as it completes, so callers can
+    persist vectors while later requests are still running. A request that
+    still fails after retries yields an empty results list for its indices.
+    """
+    if not texts:
+        return
+
+    client = client or _get_client(max_retries=0)
+    inputs = [truncate_to_tokens(t, MAX_INPUT_TOKENS, model) for t in texts]
+    token_counts = [count_tokens(t, model) for t in inputs]
+    batches = pack_batches(token_counts, max_tokens=max_tokens, max_items=max_items)
+
+    def run(indices: List[int]) -> List[EmbeddingResult]:
+        vectors = _embed_request(client, model, [inputs[i] for i in indices], max_retries)
+        return [
+            EmbeddingResult(
+                embedding=vec,
+                model=model,
+                text_hash=_text_hash(texts[i]),
+                token_count=token_counts[i],
+            )
+            for i, vec in zip(indices, vectors)
+        ]
+
+    with ThreadPoolExecutor(max_workers=max(1, min(concurrency, len(batches)))) as pool:
+        futures = {pool.submit(run, indices): indices for indices in batches}
+        try:
+            for future in as_completed(futures):
+                indices = futures[future]
+                try:
+                    yield indices, future.result()
+                except Exception as e:
+                    logger.error(f"Embedding batch of {len(indices)} inputs failed: {e}")
+                    yield indices, []
+        finally:
+            for future in futures:
+                future.cancel()
 
 
 def generate_embedding(
     text: str,
-    model: str = "text-embedding-3-small",
+    model: str = DEFAULT_EMBEDDING_MODEL,
 ) -> EmbeddingResult:
     """Generate embedding vector for text via OpenAI API."""
     client = _get_client()
-    enc = tiktoken.encoding_for_model(model)
-    token_count = len(enc.encode(text))
-
     response = client.embeddings.create(model=model, input=text)
     embedding = response.data[0].embedding
 
@@ -150,29 +344,22 @@ def generate_embedding(
         embedding=embedding,
         model=model,
         text_hash=_text_hash(text),
-        token_count=token_count,
+        token_count=count_tokens(text, model),
     )
 
 
 def generate_embeddings_batch(
     texts: List[str],
-    model: str = "text-embedding-3-small",
+    model: str = DEFAULT_EMBEDDING_MODEL,
 ) -> List[EmbeddingResult]:
-    """Generate embeddings for multiple texts in one API call."""
+    """Generate embeddings for multiple texts using token-budgeted concurrent requests."""
     if not texts:
         return []
 
-    client = _get_client()
-    enc = tiktoken.encoding_for_model(model)
-
-    response = client.embeddings.create(model=model, input=texts)
-
-    results = []
-    for i, data in enumerate(response.data):
-        results.append(EmbeddingResult(
-            embedding=data.embedding,
-            model=model,
-            text_hash=_text_hash(texts[i]),
-            token_count=len(enc.encode(texts[i])),
-        ))
+    results: List[Optional[EmbeddingResult]] = [None] * len(texts)
+    for indices, batch in iter_embeddings(texts, model=model):
+        if not batch:
+            raise RuntimeError(f"Embedding failed for {len(indices)} of {len(texts)} inputs")
+        for i, result in zip(indices, batch):
+            results[i] = result
     return results
@@ -0,0 +1,129 @@
+"""
+Parallel text extraction for ΠΥΛΗ ΚΟΙΝΩΝΙΚΗΣ ΜΕΡΙΜΝΑΣ document ingestion.
+PDF (PyMuPDF, page by page) and DOCX (python-docx) parsing is CPU-bound,
+so it runs in a process pool with a per-file time limit; results are
+yielded as each file finishes so the caller can chunk and write to the
+database while the remaining files are still being extracted.
+Kept free of Flask/DB imports so pool workers start quickly.
+"""
+import os
+import time
+import signal
+import logging
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Iterable, Iterator, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+EXTRACTABLE_TYPES = {"pdf", "docx"}
+# Worker processes for extraction (default: all cores)
+INGEST_WORKERS = int(os.environ.get("INGEST_WORKERS", 0)) or os.cpu_count() or 1
+# Seconds one file may take before it is abandoned
+INGEST_FILE_TIMEOUT = float(os.environ.get("INGEST_FILE_TIMEOUT", 120))
+
+
+class ExtractionTimeout(Exception):
+    """Raised when a file exceeds its extraction time limit."""
+
+
+def _check_deadline(deadline: Optional[float], file_path: str) -> None:
+    if deadline is not None and time.monotonic() > deadline:
+        raise ExtractionTimeout(f"Extraction timed out: {os.path.basename(file_path)}")
+
+
+def extract_pdf(file_path: str, deadline: Optional[float] = None) -> str:
+    """Text of every page, in reading order, separated by blank lines."""
+    import fitz  # PyMuPDF
+
+    parts = []
+    with fitz.open(file_path) as doc:
+        for page in doc:
+            _check_deadline(deadline, file_path)
+            text = page.get_text("text", sort=True).strip()
+            if text:
+                parts.append(text)
+    return "\n\n".join(parts)
+
+
+def extract_docx(file_path: str, deadline: Optional[float] = None) -> str:
+    """Paragraph text followed by table rows (cells joined with ' | ')."""
+    from docx import Document
+
+    doc = Document(file_path)
+    parts = [p.text for p in doc.paragraphs if p.text.strip()]
+    for table in doc.tables:
+        _check_deadline(deadline, file_path)
+        for row in table.rows:
+            cells = [c.text.strip() for c in row.cells if c.text.strip()]
+            if cells:
+                parts.append(" | ".join(cells))
+    return "\n\n".join(parts)
+
+
+def extract_text(file_path: str, deadline: Optional[float] = None) -> str:
+    file_type = os.path.splitext(file_path)[1].lower().strip(".")
+    if file_type == "pdf":
+        return extract_pdf(file_path, deadline)
+    if file_type == "docx":
+        return extract_docx(file_path, deadline)
+    raise ValueError(f"Unsupported file type for extraction: {file_type}")
+
+
+def _on_alarm(signum, frame):
+    raise ExtractionTimeout("Extraction timed out")
+
+
+def _extract_one(file_path: str, timeout: float) -> Tuple[str, Optional[str]]:
+    """Pool worker: (text, error). Errors are returned as strings so
+    nothing unpicklable crosses the process boundary."""
+    deadline = time.monotonic() + timeout if timeout else None
+    use_alarm = (timeout > 0 and hasattr(signal, "SIGALRM")
+                 and threading.current_thread() is threading.main_thread())
+    if use_alarm:
+        previous = signal.signal(signal.SIGALRM, _on_alarm)
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        return extract_text(file_path, deadline), None
+    except Exception as e:
+        return "", f"{type(e).__name__}: {e}"
+    finally:
+        if use_alarm:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            signal.signal(signal.SIGALRM, previous)
+
+
+def extract_texts(
+    paths: Iterable[str],
+    workers: Optional[int] = None,
+    timeout: float = INGEST_FILE_TIMEOUT,
+) -> Iterator[Tuple[str, str, Optional[str]]]:
+    """Yield (path, text, error) for each file as soon as it is extracted.
+
+    Uses a spawn-context process pool (safe from threaded servers); a single
+    file or workers=1 is extracted inline. Closing the generator early
+    cancels files that have not started.
+    """
+    paths = list(paths)
+    workers = min(workers or INGEST_WORKERS, len(paths))
+    if workers <= 1:
+        for path in paths:
+            text, error = _extract_one(path, timeout)
+            yield path, text, error
+        return
+
+    started = time.monotonic()
+    pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+    try:
+        futures = {pool.submit(_extract_one, path, timeout): path for path in paths}
+        for future in as_completed(futures):
+            path = futures[future]
+            try:
+                text, error = future.result()
+            except Exception as e:  # worker crashed (e.g. BrokenProcessPool)
+                text, error = "", f"{type(e).__name__}: {e}"
+            yield path, text, error
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
+    logger.info(f"Extracted {len(paths)} files with {workers} workers in {time.monotonic() - started:.1f}s")
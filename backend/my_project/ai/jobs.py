@@ -0,0 +1,204 @@
+"""
+Background knowledge reindex jobs for ΠΥΛΗ ΚΟΙΝΩΝΙΚΗΣ ΜΕΡΙΜΝΑΣ.
+Runs on Celery when a worker is reachable, otherwise on an in-process
+thread pool, so a reindex never holds a gunicorn request worker.
+Progress and per-file outcomes are recorded in reindex_jobs/reindex_job_files.
+"""
+import os
+import json
+import logging
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+
+from flask import current_app
+
+from my_project.extensions import db, celery, CELERY_AVAILABLE
+from my_project.models import ReindexJob, ReindexJobFile
+
+logger = logging.getLogger(__name__)
+
+# A queued/running job that has not checked in for this long is treated as dead
+STALE_AFTER = timedelta(minutes=int(os.environ.get("REINDEX_STALE_MINUTES", 15)))
+_HEARTBEAT_INTERVAL = timedelta(seconds=30)
+
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="reindex")
+_futures: Dict[int, Future] = {}
+
+
+class JobConflict(Exception):
+    """Raised when a reindex is requested while another one is active."""
+
+    def __init__(self, job: ReindexJob):
+        super().__init__(f"Reindex job {job.id} is already {job.status}")
+        self.job = job
+
+
+def active_job() -> Optional[ReindexJob]:
+    """The currently queued/running job, ignoring ones that stopped heart-beating."""
+    cutoff = datetime.utcnow() - STALE_AFTER
+    return ReindexJob.query.filter(
+        ReindexJob.status.in_(ReindexJob.ACTIVE_STATUSES),
+        ReindexJob.heartbeat_at >= cutoff,
+    ).order_by(ReindexJob.id.desc()).first()
+
+
+def start_reindex_job(user_id: Optional[int] = None, full: bool = False,
+                      backend: Optional[str] = None) -> ReindexJob:
+    """Create a job row and hand it to Celery, the thread pool, or run it inline.
+
+    backend: 'auto' (Celery if a worker answers, else thread), 'celery',
+    'thread' or 'eager' (inline — tests and CLI). Defaults to REINDEX_BACKEND.
+    """
+    existing = active_job()
+    if existing:
+        raise JobConflict(existing)
+
+    job = ReindexJob(status="queued", full=full, requested_by=user_id)
+    db.session.add(job)
+    db.session.commit()
+
+    backend = backend or current_app.config.get("REINDEX_BACKEND", "auto")
+    _dispatch(job, backend)
+    return job
+
+
+def _celery_workers_available() -> bool:
+    if not CELERY_AVAILABLE:
+        return False
+    try:
+        return bool(celery.control.inspect(timeout=0.5).ping())
+    except Exception:
+        return False
+
+
+def _dispatch(job: ReindexJob, backend: str) -> None:
+    if backend == "celery" or (backend == "auto" and _celery_workers_available()):
+        try:
+            result = reindex_job_task.apply_async(args=[job.id], retry=False)
+            job.backend = "celery"
+            job.task_id = result.id
+            db.session.commit()
+            return
+        except Exception as e:
+            logger.warning(f"Celery unavailable for reindex job {job.id}, using thread pool: {e}")
+
+    if backend == "eager":
+        job.backend = "eager"
+        db.session.commit()
+        run_reindex_job(job.id)
+        return
+
+    job.backend = "thread"
+    db.session.commit()
+    app = current_app._get_current_object()
+    _futures[job.id] = _executor.submit(_run_in_app_context, app, job.id)
+
+
+def _run_in_app_context(app, job_id: int) -> None:
+    with app.app_context():
+        try:
+            run_reindex_job(job_id)
+        finally:
+            db.session.remove()
+            _futures.pop(job_id, None)
+
+
+def wait_for_job(job_id: int, timeout: Optional[float] = None) -> None:
+    """Block until a thread-pool job finishes (no-op for other backends)."""
+    future = _futures.get(job_id)
+    if future is not None:
+        future.result(timeout=timeout)
+
+
+def run_reindex_job(job_id: int) -> None:
+    """Execute a reindex job, recording per-file status and honouring cancellation."""
+    from my_project.ai.knowledge import list_documents, reindex_directory
+    from my_project.ai.vector_index import ensure_vector_index
+
+    job = db.session.get(ReindexJob, job_id)
+    if job is None or job.status not in ReindexJob.ACTIVE_STATUSES:
+        return
+    if job.cancel_requested:
+        _finish(job, "cancelled")
+        return
+
+    roots = [os.path.abspath(d) for d in (
+        [current_app.config["KNOWLEDGE_FOLDER"]] + list(current_app.config.get("KNOWLEDGE_EXTRA_FOLDERS", []))
+    )]
+    roots = [d for d in roots if os.path.isdir(d)]
+    paths = [p for root in roots for p in list_documents(root)]
+
+    job.status = "running"
+    job.started_at = datetime.utcnow()
+    job.heartbeat_at = job.started_at
+    job.total_files = len(paths)
+    db.session.commit()
+
+    last_beat = [datetime.utcnow()]
+
+    def on_file(path, status, error):
+        db.session.add(ReindexJobFile(job_id=job_id, file_path=path, status=status, error=error))
+        job.processed_files = (job.processed_files or 0) + 1
+        job.heartbeat_at = last_beat[0] = datetime.utcnow()
+        db.session.commit()
+
+    def should_cancel():
+        now = datetime.utcnow()
+        if now - last_beat[0] >= _HEARTBEAT_INTERVAL:
+            ReindexJob.query.filter_by(id=job_id).update({"heartbeat_at": now})
+            db.session.commit()
+            last_beat[0] = now
+        return bool(db.session.query(ReindexJob.cancel_requested).filter_by(id=job_id).scalar())
+
+    try:
+        report = reindex_directory(
+            roots,
+            full=bool(job.full),
+            generate_vectors=True,
+            paths=paths,
+            on_file=on_file,
+            should_cancel=should_cancel,
+        )
+        job.report = json.dumps(report.to_dict())
+        _finish(job, "cancelled" if report.cancelled else "completed")
+    except Exception as e:
+        logger.exception(f"Reindex job {job_id} failed")
+        db.session.rollback()
+        job.error = str(e)
+        _finish(job, "failed")
+        return
+
+    try:
+        ensure_vector_index()  # IVFFlat is only built once embeddings exist
+    except Exception as e:
+        db.session.rollback()
+        logger.warning(f"Could not create vector index after reindex job {job_id}: {e}")
+
+
+def _finish(job: ReindexJob, status: str) -> None:
+    job.status = status
+    job.finished_at = datetime.utcnow()
+    db.session.commit()
+
+
+def cancel_reindex_job(job: ReindexJob) -> ReindexJob:
+    """Cancel a queued job immediately; ask a running job to stop at its next checkpoint."""
+    if job.status not in ReindexJob.ACTIVE_STATUSES:
+        return job
+    job.cancel_requested = True
+    if job.status == "queued":
+        if job.task_id and CELERY_AVAILABLE:
+            try:
+                celery.control.revoke(job.task_id)
+            except Exception as e:
+                logger.warning(f"Could not revoke Celery task {job.task_id}: {e}")
+        job.status = "cancelled"
+        job.finished_at = datetime.utcnow()
+    db.session.commit()
+    return job
+
+
+@celery.task(name="knowledge.reindex_job")
+def reindex_job_task(job_id):
+    run_reindex_job(job_id)
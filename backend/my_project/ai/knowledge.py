@@ -6,11 +6,23 @@ Adapted from Academicon's knowledge_service.py.
 import os
 import hashlib
 import logging
-from typing import List, Optional, Dict, Any
+from collections import defaultdict
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+from sqlalchemy.orm import defer
 
 from my_project.extensions import db
 from my_project.models import DocumentIndex, FileChunk
-from my_project.ai.embeddings import chunk_text, generate_embedding, generate_embeddings_batch
+from my_project.ai.embeddings import (
+    DEFAULT_EMBEDDING_MODEL, generate_embeddings_batch, iter_chunk_spans, iter_embeddings,
+)
+from my_project.ai.embedding_cache import get_query_embedding
+from my_project.ai.vector_store import get_vector_store, record_chunk_changes
+from my_project.ai.lexical import get_lexical_index, reciprocal_rank_fusion, record_chunk_texts
+from my_project.ai.document_store import get_document_store
+from my_project.ai.answer_cache import invalidate_sources
+from my_project.ai.ingest import EXTRACTABLE_TYPES, extract_docx, extract_pdf, extract_texts
 
 logger = logging.getLogger(__name__)
 
@@ -41,13 +53,7 @@ def parse_document_content(content_or_path: str, filename: str, file_type: str)
 def _parse_pdf(file_path: str) -> str:
     """Extract text from PDF using PyMuPDF."""
     try:
-        import fitz  # PyMuPDF
-        doc = fitz.open(file_path)
-        text_parts = []
-        for page in doc:
-            text_parts.append(page.get_text())
-        doc.close()
-        return "\n\n".join(text_parts)
+        return extract_pdf(file_path)
     except Exception as e:
         logger.error(f"PDF parsing error for {file_path}: {e}")
         return ""
@@ -56,9 +62,7 @@ def _parse_pdf(file_path: str) -> str:
 def _parse_docx(file_path: str) -> str:
     """Extract text from DOCX."""
     try:
-        from docx import Document
-        doc = Document(file_path)
-        return "\n\n".join(p.text for p in doc.paragraphs if p.text.strip())
+        return extract_docx(file_path)
     except Exception as e:
         logger.error(f"DOCX parsing error for {file_path}: {e}")
         return ""
@@ -66,35 +70,78 @@ def _parse_docx(file_path: str) -> str:
 
 # ── Document Processing Pipeline ──
 
+SUPPORTED_EXTENSIONS = {".txt", ".md", ".pdf", ".docx"}
+
+
+@dataclass
+class ReindexReport:
+    """Counters collected while (re)indexing documents."""
+    files_scanned: int = 0
+    files_skipped: int = 0      # stat (mtime/size) unchanged — file not read
+    files_unchanged: int = 0    # read, but content hash unchanged
+    files_added: int = 0
+    files_updated: int = 0
+    files_removed: int = 0
+    chunks_added: int = 0
+    chunks_changed: int = 0
+    chunks_removed: int = 0
+    chunks_unchanged: int = 0
+    chunks_embedded: int = 0
+    errors: int = 0
+    cancelled: bool = False
+    embedding_error: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+def _chunk_hash(content: str) -> str:
+    return hashlib.sha256(content.encode()).hexdigest()[:16]
+
+
 def process_document_text(
     text: str,
     source_path: str,
     file_name: str,
     file_type: str,
     generate_vectors: bool = False,
+    force: bool = False,
+    report: Optional[ReindexReport] = None,
 ) -> DocumentIndex:
     """Process text into chunks and optionally generate embeddings.
 
+    Re-processing a changed document diffs its chunks by text_hash: rows
+    whose text is unchanged are kept (with their embeddings), only new or
+    edited chunks are inserted, and chunks that disappeared are deleted.
+
     Args:
         text: The full text content of the document.
         source_path: Path relative to content/ directory.
         file_name: Original filename.
         file_type: File extension (pdf, docx, txt).
         generate_vectors: If True, call OpenAI API for embeddings.
+        force: Re-chunk even if the content hash is unchanged.
+        report: Optional ReindexReport to accumulate file/chunk counters into.
     """
+    report = report if report is not None else ReindexReport()
+
     # Check if already processed
     existing = DocumentIndex.query.filter_by(file_path=source_path).first()
     text_hash = hashlib.sha256(text.encode()).hexdigest()
 
-    if existing and existing.file_hash == text_hash and existing.status == "ready":
+    if existing and existing.file_hash == text_hash and existing.status == "ready" and not force:
         logger.info(f"Document already processed: {source_path}")
+        report.files_unchanged += 1
         return existing
 
     # Create or update document index
+    old_chunks: List[FileChunk] = []
     if existing:
         doc_index = existing
-        # Delete old chunks
-        FileChunk.query.filter_by(document_id=doc_index.id).delete()
+        old_chunks = FileChunk.query.options(defer(FileChunk.embedding)).filter_by(
+            document_id=doc_index.id
+        ).order_by(FileChunk.chunk_index).all()
+        report.files_updated += 1
     else:
         doc_index = DocumentIndex(
             file_path=source_path,
@@ -102,189 +149,471 @@ def process_document_text(
             file_type=file_type,
         )
         db.session.add(doc_index)
+        report.files_added += 1
 
     doc_index.status = "processing"
     doc_index.file_hash = text_hash
     db.session.flush()  # Get the ID
 
-    # Chunk the text
-    chunks = chunk_text(text, chunk_size=1200, overlap=200)
-
-    if not chunks:
-        doc_index.status = "ready"
-        doc_index.chunk_count = 0
-        db.session.commit()
-        return doc_index
-
-    # Generate embeddings if requested
-    embeddings = []
-    if generate_vectors:
-        try:
-            embeddings = generate_embeddings_batch(
-                [c.content for c in chunks]
+    # Index old rows by content hash so unchanged chunks keep their embeddings
+    reusable: Dict[str, List[FileChunk]] = defaultdict(list)
+    for old in old_chunks:
+        reusable[old.text_hash].append(old)
+    missing_vectors = set()
+    if old_chunks:
+        missing_vectors = {
+            cid for (cid,) in db.session.query(FileChunk.id).filter(
+                FileChunk.document_id == doc_index.id,
+                FileChunk.embedding.is_(None),
             )
-        except Exception as e:
-            logger.error(f"Embedding generation failed for {source_path}: {e}")
-            embeddings = []
-
-    # Store chunks
-    for i, chunk in enumerate(chunks):
-        file_chunk = FileChunk(
+        }
+
+    # Chunk the text lazily: spans are sliced one at a time, never held as a list
+    kept = 0
+    chunk_count = 0
+    new_rows: List[FileChunk] = []
+    to_embed: List[FileChunk] = []
+    for i, (start, end) in enumerate(iter_chunk_spans(text, chunk_size=1200, overlap=200)):
+        chunk_count += 1
+        content = text[start:end]
+        chunk_hash = _chunk_hash(content)
+        if reusable.get(chunk_hash):
+            row = reusable[chunk_hash].pop(0)
+            row.chunk_index = i
+            row.chunk_type = "text"
+            row.char_start, row.char_end = start, end
+            kept += 1
+            if row.id in missing_vectors:
+                to_embed.append(row)
+            continue
+        row = FileChunk(
             document_id=doc_index.id,
             source_path=source_path,
-            content=chunk.content,
+            content=content,
             chunk_index=i,
-            chunk_type=chunk.chunk_type,
-            text_hash=hashlib.sha256(chunk.content.encode()).hexdigest()[:16],
+            chunk_type="text",
+            text_hash=chunk_hash,
+            char_start=start,
+            char_end=end,
         )
-        if embeddings and i < len(embeddings):
-            file_chunk.embedding = embeddings[i].embedding
-            file_chunk.embedding_model = embeddings[i].model
-
-        db.session.add(file_chunk)
+        db.session.add(row)
+        new_rows.append(row)
+        to_embed.append(row)
+
+    leftover = [row for rows in reusable.values() for row in rows]
+    for row in leftover:
+        db.session.delete(row)
+
+    # A new row paired with a removed one counts as a changed chunk
+    changed = min(len(new_rows), len(leftover))
+    report.chunks_unchanged += kept
+    report.chunks_changed += changed
+    report.chunks_added += len(new_rows) - changed
+    report.chunks_removed += len(leftover) - changed
+
+    # Generate embeddings only for chunks that lack one
+    if generate_vectors and to_embed:
+        try:
+            embeddings = generate_embeddings_batch([row.content for row in to_embed])
+            for row, emb in zip(to_embed, embeddings):
+                row.embedding = emb.embedding
+                row.embedding_model = emb.model
+            report.chunks_embedded += len(embeddings)
+        except Exception as e:
+            logger.error(f"Embedding generation failed for {source_path}: {e}")
 
-    doc_index.chunk_count = len(chunks)
+    doc_index.chunk_count = chunk_count
     doc_index.status = "ready"
+    db.session.flush()
+    removed_ids = [row.id for row in leftover]
+    added_vectors = [(row.id, row.embedding) for row in to_embed if row.embedding is not None]
+    added_texts = [(row.id, row.content) for row in new_rows]
     db.session.commit()
+    record_chunk_changes(added=added_vectors, removed=removed_ids)
+    record_chunk_texts(added=added_texts, removed=removed_ids)
+    if existing:
+        invalidate_sources([source_path])
 
-    logger.info(f"Processed {source_path}: {len(chunks)} chunks")
+    logger.info(
+        f"Processed {source_path}: {chunk_count} chunks "
+        f"({kept} kept, {len(new_rows)} new, {len(leftover)} removed)"
+    )
     return doc_index
 
 
-def process_file(file_path: str, generate_vectors: bool = False) -> Optional[DocumentIndex]:
-    """Process a file from the filesystem into chunks."""
+def _file_type(file_name: str) -> str:
+    return file_name.rsplit(".", 1)[-1].lower() if "." in file_name else "txt"
+
+
+def _stat_unchanged(file_path: str, existing: Optional[DocumentIndex] = None) -> bool:
+    """True if the indexed copy of file_path matches its current mtime and size."""
+    if existing is None:
+        existing = DocumentIndex.query.filter_by(file_path=file_path).first()
+    try:
+        stat = os.stat(file_path)
+    except OSError:
+        return False
+    return (existing is not None and existing.status == "ready"
+            and existing.file_size == stat.st_size
+            and existing.file_mtime == stat.st_mtime)
+
+
+def process_file(
+    file_path: str,
+    generate_vectors: bool = False,
+    force: bool = False,
+    report: Optional[ReindexReport] = None,
+    text: Optional[str] = None,
+) -> Optional[DocumentIndex]:
+    """Process a file from the filesystem into chunks.
+
+    Files whose mtime and size match the stored DocumentIndex are skipped
+    without being read, unless force is set. text may carry content that
+    was already extracted (e.g. by the ingest process pool).
+    """
+    report = report if report is not None else ReindexReport()
     file_path = os.path.abspath(file_path)  # Normalize to canonical path
     if not os.path.exists(file_path):
         logger.error(f"File not found: {file_path}")
         return None
 
     file_name = os.path.basename(file_path)
-    file_type = file_name.rsplit(".", 1)[-1].lower() if "." in file_name else "txt"
+    file_type = _file_type(file_name)
 
-    if file_type not in ("txt", "md"):
-        logger.warning(f"Skipping unsupported file type: {file_name} (only .md and .txt allowed)")
+    if "." + file_type not in SUPPORTED_EXTENSIONS:
+        logger.warning(f"Skipping unsupported file type: {file_name}")
         return None
 
-    with open(file_path, "r", encoding="utf-8", errors="ignore") as f:
-        text = f.read()
+    stat = os.stat(file_path)
+    existing = DocumentIndex.query.filter_by(file_path=file_path).first()
+    if not force and _stat_unchanged(file_path, existing):
+        report.files_skipped += 1
+        return existing
+
+    if text is None:
+        if file_type in EXTRACTABLE_TYPES:
+            text = parse_document_content(file_path, file_name, file_type)
+        else:
+            with open(file_path, "r", encoding="utf-8", errors="ignore") as f:
+                text = f.read()
 
     if not text.strip():
+        # Still recorded (with no chunks), so the stat check skips it next time
         logger.warning(f"No text extracted from {file_path}")
-        return None
+        text = ""
 
-    return process_document_text(
+    doc_index = process_document_text(
         text=text,
         source_path=file_path,
         file_name=file_name,
         file_type=file_type,
         generate_vectors=generate_vectors,
+        force=force,
+        report=report,
     )
+    doc_index.file_size = stat.st_size
+    doc_index.file_mtime = stat.st_mtime
+    db.session.commit()
+    return doc_index
+
+
+def list_documents(base_dir: str, extensions=SUPPORTED_EXTENSIONS) -> List[str]:
+    """Absolute paths of all indexable files under base_dir, sorted."""
+    paths = []
+    for root, dirs, files in os.walk(os.path.abspath(base_dir)):
+        for fname in files:
+            if os.path.splitext(fname)[1].lower() in extensions:
+                paths.append(os.path.join(root, fname))
+    return sorted(paths)
 
 
-# ── Vector Search ──
+def _file_outcome(before: Dict[str, Any], report: ReindexReport) -> str:
+    """Name the counter process_file bumped: skipped/unchanged/added/updated."""
+    after = report.to_dict()
+    for status in ("skipped", "unchanged", "added", "updated"):
+        if after[f"files_{status}"] > before[f"files_{status}"]:
+            return status
+    return "empty"
+
+
+def reindex_directory(
+    base_dir: Union[str, Sequence[str]],
+    extensions=SUPPORTED_EXTENSIONS,
+    full: bool = False,
+    generate_vectors: bool = False,
+    paths: Optional[List[str]] = None,
+    on_file: Optional[Callable[[str, str, Optional[str]], None]] = None,
+    should_cancel: Optional[Callable[[], bool]] = None,
+    workers: Optional[int] = None,
+) -> ReindexReport:
+    """Incrementally bring the index in line with one or more directory trees.
+
+    Unchanged files are skipped by stat, changed files are chunk-diffed,
+    and documents whose files were deleted are pruned. With full=True
+    every file is re-read and re-chunked (embeddings are still reused for
+    identical chunks). PDF/DOCX text is extracted in a process pool of
+    `workers` processes and each file is chunked and written as soon as
+    its text arrives. Pending chunks are embedded at the end in shared
+    batches when generate_vectors is set.
+
+    on_file(path, status, error) is called after each file; should_cancel()
+    is polled between files and embedding batches to stop early.
+    """
+    report = ReindexReport()
+    roots = [base_dir] if isinstance(base_dir, str) else list(base_dir)
+    roots = [os.path.abspath(root) for root in roots]
+    if paths is None:
+        paths = [p for root in roots for p in list_documents(root, extensions)]
+
+    def handle(fpath: str, text: Optional[str] = None, extract_error: Optional[str] = None) -> None:
+        report.files_scanned += 1
+        before = report.to_dict()
+        error = extract_error
+        if error:
+            logger.error(f"Extraction failed for {fpath}: {error}")
+            report.errors += 1
+            status = "error"
+        else:
+            try:
+                process_file(fpath, generate_vectors=False, force=full, report=report, text=text)
+                status = _file_outcome(before, report)
+            except Exception as e:
+                db.session.rollback()
+                logger.error(f"Reindex error for {fpath}: {e}")
+                report.errors += 1
+                status, error = "error", str(e)
+        if on_file:
+            on_file(fpath, status, error)
+
+    to_extract = [
+        p for p in paths
+        if _file_type(p) in EXTRACTABLE_TYPES and (full or not _stat_unchanged(os.path.abspath(p)))
+    ]
+    pending = set(to_extract)
+
+    for fpath in paths:
+        if fpath in pending:
+            continue
+        if should_cancel and should_cancel():
+            report.cancelled = True
+            return report
+        handle(fpath)
+
+    if to_extract:
+        results = extract_texts(to_extract, workers=workers)
+        try:
+            for fpath, text, error in results:
+                if should_cancel and should_cancel():
+                    report.cancelled = True
+                    return report
+                handle(fpath, text=text, extract_error=error)
+        finally:
+            results.close()
+
+    # Prune documents whose files no longer exist
+    seen = set(paths)
+    indexed = DocumentIndex.query.filter(db.or_(*(
+        DocumentIndex.file_path.startswith(root + os.sep, autoescape=True) for root in roots
+    ))).all()
+    pruned_ids: List[int] = []
+    pruned_paths: List[str] = []
+    for doc in indexed:
+        if doc.file_path not in seen and not os.path.exists(doc.file_path):
+            report.files_removed += 1
+            pruned_paths.append(doc.file_path)
+            report.chunks_removed += doc.chunk_count or 0
+            pruned_ids.extend(cid for (cid,) in db.session.query(FileChunk.id).filter_by(document_id=doc.id))
+            db.session.delete(doc)
+    db.session.commit()
+    record_chunk_changes(removed=pruned_ids)
+    record_chunk_texts(removed=pruned_ids)
+    invalidate_sources(pruned_paths)
+
+    if generate_vectors:
+        try:
+            result = embed_pending_chunks(should_cancel=should_cancel)
+            report.chunks_embedded += result["embedded"]
+            report.cancelled = result.get("cancelled", False)
+        except Exception as e:
+            logger.error(f"Embedding pending chunks failed: {e}")
+            report.embedding_error = str(e)
+
+    return report
+
+
+def embed_pending_chunks(
+    model: str = DEFAULT_EMBEDDING_MODEL,
+    document_ids: Optional[List[int]] = None,
+    should_cancel: Optional[Callable[[], bool]] = None,
+) -> Dict[str, Any]:
+    """Embed every FileChunk that has no vector yet, across all documents.
+
+    Chunks from many documents are packed into shared token-budgeted requests
+    (see iter_embeddings) and each completed request is written back and
+    committed immediately, so an interrupted or cancelled run keeps its
+    progress and the remainder is picked up next time.
+    """
+    query = db.session.query(FileChunk.id, FileChunk.content).filter(
+        FileChunk.embedding.is_(None)
+    )
+    if document_ids is not None:
+        query = query.filter(FileChunk.document_id.in_(document_ids))
+    rows = query.order_by(FileChunk.id).all()
+    if not rows:
+        return {"embedded": 0, "failed": 0, "cancelled": False}
+
+    chunk_ids = [r.id for r in rows]
+    embedded = 0
+    failed = 0
+    cancelled = False
+    batches = iter_embeddings([r.content for r in rows], model=model)
+    for indices, results in batches:
+        if not results:
+            failed += len(indices)
+        else:
+            db.session.bulk_update_mappings(FileChunk, [
+                {"id": chunk_ids[i], "embedding": r.embedding, "embedding_model": r.model}
+                for i, r in zip(indices, results)
+            ])
+            db.session.commit()
+            record_chunk_changes(added=[(chunk_ids[i], r.embedding) for i, r in zip(indices, results)])
+            embedded += len(results)
+            logger.info(f"Embedded {embedded}/{len(rows)} pending chunks")
+        if should_cancel and should_cancel():
+            cancelled = True
+            batches.close()
+            break
+
+    return {"embedded": embedded, "failed": failed, "cancelled": cancelled}
+
+
+# ── Hybrid Search ──
+
+# Reciprocal rank fusion constant: larger values flatten rank differences
+RRF_K = int(os.environ.get("RAG_RRF_K", 60))
+
 
 def search_chunks(
     query: str,
     limit: int = 5,
     similarity_threshold: float = 0.3,
 ) -> List[Dict[str, Any]]:
-    """Search for relevant document chunks using vector similarity.
-
-    Uses pgvector's cosine distance operator for O(log n) search.
+    """Hybrid search: vector similarity fused with BM25 by reciprocal rank.
+
+    Vector top-k comes from the app's vector store (see vector_store):
+    pgvector's HNSW/IVFFlat index on PostgreSQL, the in-process NumPy
+    matrix elsewhere. Lexical top-k comes from the Greek-aware BM25 index
+    (see lexical), which catches exact references like "Ν.5041/2023" that
+    embeddings blur. Without a vector store or query embedding the BM25
+    ranking is used alone.
     """
+    vector_hits = _vector_hits(query, limit * 2, similarity_threshold)
+    if not vector_hits:
+        return _fallback_keyword_search(query, limit)
+    lexical_hits = _lexical_hits(query, limit * 2)
+
+    similarity = dict(vector_hits)
+    similarity.update(
+        (cid, score) for cid, score in _normalize_scores(lexical_hits) if cid not in similarity
+    )
+    fused = reciprocal_rank_fusion(
+        [[cid for cid, _ in vector_hits], [cid for cid, _ in lexical_hits]], k=RRF_K
+    )
+    return _load_chunk_results(
+        [(cid, similarity[cid], score) for cid, score in fused], limit
+    )
+
+
+def _vector_hits(query: str, k: int, similarity_threshold: float) -> List[Tuple[int, float]]:
+    store = get_vector_store()
+    if store is None:
+        return []
     try:
-        query_embedding_result = generate_embedding(query)
-        query_vector = query_embedding_result.embedding
+        query_vector = get_query_embedding(query).embedding
     except Exception as e:
         logger.error(f"Failed to generate query embedding: {e}")
-        return _fallback_keyword_search(query, limit)
+        return []
+    try:
+        hits = store.search(query_vector, k)
+    except Exception as e:
+        logger.warning(f"Vector search unavailable ({store.name}): {e}")
+        db.session.rollback()
+        return []
+    return [(cid, sim) for cid, sim in hits if sim >= similarity_threshold]
 
-    # pgvector cosine distance search (requires PostgreSQL + pgvector)
+
+def _lexical_hits(query: str, k: int) -> List[Tuple[int, float]]:
     try:
-        results = db.session.query(
-            FileChunk,
-            FileChunk.embedding.cosine_distance(query_vector).label("distance")
-        ).filter(
-            FileChunk.embedding.isnot(None)
-        ).order_by(
-            "distance"
-        ).limit(limit * 2).all()
+        return get_lexical_index().search(query, k)
     except Exception as e:
-        logger.warning(f"Vector search unavailable (SQLite?): {e}")
+        logger.warning(f"Lexical search unavailable: {e}")
         db.session.rollback()
-        return _fallback_keyword_search(query, limit)
+        return []
 
-    chunks = []
-    for chunk, distance in results:
-        similarity = 1 - distance  # cosine_distance → similarity
-        if similarity >= similarity_threshold:
-            chunks.append({
-                "content": chunk.content,
-                "source_path": chunk.source_path,
-                "chunk_type": chunk.chunk_type,
-                "similarity": round(similarity, 4),
-                "document_id": chunk.document_id,
-            })
 
-    return chunks[:limit]
+def _normalize_scores(hits: List[Tuple[int, float]]) -> List[Tuple[int, float]]:
+    """Scale BM25 scores into 0..1 relative to the best hit."""
+    if not hits:
+        return []
+    top = hits[0][1] or 1.0
+    return [(cid, score / top) for cid, score in hits]
+
+
+def _load_chunk_results(ranked: List[Tuple[int, float, float]], limit: int) -> List[Dict[str, Any]]:
+    """Materialize (chunk_id, similarity, score) hits, skipping deleted chunks."""
+    ids = [cid for cid, _, _ in ranked[:limit * 2]]
+    rows = FileChunk.query.options(defer(FileChunk.embedding)).filter(
+        FileChunk.id.in_(ids)
+    ).all() if ids else []
+    by_id = {row.id: row for row in rows}
+
+    chunks = []
+    for chunk_id, similarity, score in ranked:
+        chunk = by_id.get(chunk_id)
+        if chunk is None:  # deleted since the index last refreshed
+            continue
+        chunks.append({
+            "content": chunk.content,
+            "source_path": chunk.source_path,
+            "chunk_type": chunk.chunk_type,
+            "similarity": round(similarity, 4),
+            "score": round(score, 6),
+            "document_id": chunk.document_id,
+            "char_start": chunk.char_start,
+            "char_end": chunk.char_end,
+        })
+        if len(chunks) >= limit:
+            break
+    return chunks
 
 
 def _read_source_file(source_path: str) -> str:
-    """Read a source file from disk, trying multiple path strategies.
+    """Read a chunk's source file through the cached document store.
 
-    source_path from DB may be absolute or relative. Tries:
-    1. As-is (absolute path)
-    2. Relative to KNOWLEDGE_FOLDER config
-    3. Walk KNOWLEDGE_FOLDER looking for matching basename
+    source_path from DB may be absolute, relative to KNOWLEDGE_FOLDER, or
+    only findable by basename (see document_store for resolution order).
     """
-    from flask import current_app
-
-    # Strategy 1: Absolute path
-    if os.path.isfile(source_path):
+    try:
+        return get_document_store().read(source_path)
+    except RuntimeError:  # No app context
         try:
             with open(source_path, "r", encoding="utf-8", errors="ignore") as f:
                 return f.read()
-        except Exception:
-            pass
-
-    # Strategy 2: Relative to KNOWLEDGE_FOLDER
-    try:
-        knowledge_dir = current_app.config.get("KNOWLEDGE_FOLDER", "")
-        if knowledge_dir:
-            relative = source_path
-            for prefix in ("knowledge/", "knowledge\\"):
-                if relative.startswith(prefix):
-                    relative = relative[len(prefix):]
-                    break
-
-            candidate = os.path.join(knowledge_dir, relative)
-            if os.path.isfile(candidate):
-                with open(candidate, "r", encoding="utf-8", errors="ignore") as f:
-                    return f.read()
-
-            # Strategy 3: Walk and find by basename
-            basename = os.path.basename(source_path)
-            for root, dirs, files in os.walk(knowledge_dir):
-                if basename in files:
-                    full = os.path.join(root, basename)
-                    with open(full, "r", encoding="utf-8", errors="ignore") as f:
-                        return f.read()
-    except RuntimeError:
-        pass  # No app context (tests)
-
-    logger.warning(f"Could not read source file: {source_path}")
-    return ""
+        except OSError:
+            logger.warning(f"Could not read source file: {source_path}")
+            return ""
 
 
 def load_full_documents(
     chunks: List[Dict[str, Any]],
-    max_total_chars: int = 80000,
+    max_total_chars: Optional[int] = 80000,
 ) -> List[Dict[str, Any]]:
     """From search result chunks, load full source files.
 
     Uses chunks only to identify WHICH files are relevant,
     then loads the complete file content from disk.
-    Stops when max_total_chars is reached.
+    Stops when max_total_chars is reached; None loads every ranked file
+    and leaves budgeting to the caller (see context_packer).
     """
     from collections import defaultdict
 
@@ -315,7 +644,7 @@ def load_full_documents(
         if not file_text:
             continue
 
-        if total_chars + len(file_text) > max_total_chars:
+        if max_total_chars is not None and total_chars + len(file_text) > max_total_chars:
             if not full_documents:
                 # First doc — include truncated rather than nothing
                 file_text = file_text[:max_total_chars]
@@ -335,28 +664,6 @@ def load_full_documents(
 
 
 def _fallback_keyword_search(query: str, limit: int) -> List[Dict[str, Any]]:
-    """Keyword search fallback using SQL LIKE (no full-table scan in Python)."""
-    keywords = [kw for kw in query.lower().split() if len(kw) >= 2]
-    if not keywords:
-        return []
-
-    # Build OR filter: match any keyword via SQL LIKE
-    from sqlalchemy import or_, func
-    filters = [func.lower(FileChunk.content).contains(kw) for kw in keywords]
-    results = FileChunk.query.filter(or_(*filters)).limit(limit * 3).all()
-
-    # Score and sort by number of keywords matched
-    scored = []
-    for chunk in results:
-        content_lower = chunk.content.lower()
-        score = sum(1 for kw in keywords if kw in content_lower)
-        scored.append({
-            "content": chunk.content,
-            "source_path": chunk.source_path,
-            "chunk_type": chunk.chunk_type,
-            "similarity": score / len(keywords),
-            "document_id": chunk.document_id,
-        })
-
-    scored.sort(key=lambda x: x["similarity"], reverse=True)
-    return scored[:limit]
+    """Keyword-only search: BM25 over the Greek-aware lexical index."""
+    hits = _normalize_scores(_lexical_hits(query, limit))
+    return _load_chunk_results([(cid, sim, sim) for cid, sim in hits], limit)
@@ -0,0 +1,242 @@
+"""
+Greek-aware lexical (BM25) index over knowledge chunks for ΠΥΛΗ ΚΟΙΝΩΝΙΚΗΣ ΜΕΡΙΜΝΑΣ.
+Tokens are accent-stripped, case- and final-sigma-folded and lightly
+stemmed; statute references like "Ν.5041/2023" are kept whole as well as
+split into their numbers. The inverted index lives in-process and is kept
+in sync with file_chunk incrementally, like the NumPy vector store.
+"""
+import re
+import math
+import heapq
+import time
+import logging
+import threading
+import unicodedata
+from collections import Counter
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+from flask import current_app
+
+from my_project.extensions import db
+from my_project.models import FileChunk
+
+logger = logging.getLogger(__name__)
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+_LOAD_BATCH = 1000
+
+# Compound tokens: words/numbers joined by . / - (Ν.5041/2023, Δ11/οικ.13734, 4-5)
+_TOKEN_RE = re.compile(r"\w+(?:[./\-]\w+)*")
+_GREEK_RE = re.compile(r"^[α-ω]+$")
+
+# Inflectional endings, longest first (accent-free, final sigma folded)
+_GREEK_SUFFIXES = sorted([
+    "ουσ", "εισ", "ησ", "ασ", "οσ", "εσ", "ισ", "υσ", "ων", "ου", "ια",
+    "αι", "ει", "οι", "η", "α", "ο", "ε", "ι", "υ",
+], key=len, reverse=True)
+
+_STOPWORDS_RAW = """
+και του της των το τα η ο οι τη την τον τις τους σε στο στη στην στον στα στις
+στους με για απο να που ή ως κατα προς επι μετα δια θα δεν μη ειναι ενα μια
+ενος μιας αυτο αυτη αυτα αυτου αυτης οπως οταν εαν αν ητοι δε
+"""
+
+
+def normalize(text: str) -> str:
+    """Casefold and strip accents/diaeresis; casefold already maps ς → σ."""
+    decomposed = unicodedata.normalize("NFD", text.casefold())
+    return "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+
+
+def stem(token: str) -> str:
+    """Strip one common Greek inflectional ending, keeping a stem of ≥ 3 letters."""
+    if len(token) < 4 or not _GREEK_RE.match(token):
+        return token
+    for suffix in _GREEK_SUFFIXES:
+        if token.endswith(suffix) and len(token) - len(suffix) >= 3:
+            return token[:-len(suffix)]
+    return token
+
+
+STOPWORDS = frozenset(normalize(w) for w in _STOPWORDS_RAW.split())
+
+
+def tokenize(text: str) -> List[str]:
+    """Index terms for text: stems, plus whole compounds and their parts."""
+    terms = []
+    for match in _TOKEN_RE.finditer(normalize(text)):
+        token = match.group(0)
+        parts = re.split(r"[./\-]", token)
+        if len(parts) > 1:
+            terms.append(token)
+            # "ν.5041/2023" also matches "5041/2023" and "5041"
+            rest = token[len(parts[0]) + 1:]
+            if not parts[0].isdigit() and any(ch.isdigit() for ch in rest):
+                terms.append(rest)
+            terms.extend(
+                p if p.isdigit() else stem(p)
+                for p in parts if p.isdigit() or (len(p) > 1 and p not in STOPWORDS)
+            )
+            continue
+        if token in STOPWORDS or (len(token) < 2 and not token.isdigit()):
+            continue
+        terms.append(stem(token))
+    return terms
+
+
+class LexicalIndex:
+    """In-memory BM25 inverted index keyed by FileChunk.id."""
+
+    def __init__(self, refresh_interval: float = 30.0):
+        self.refresh_interval = refresh_interval
+        self._lock = threading.RLock()
+        self._postings: Dict[str, Dict[int, int]] = {}
+        self._doc_len: Dict[int, int] = {}
+        self._doc_terms: Dict[int, Tuple[str, ...]] = {}
+        self._total_len = 0
+        self._loaded = False
+        self._stale = False
+        self._last_refresh = 0.0
+        self._refresh_lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._doc_len)
+
+    def add(self, chunk_id: int, text: str) -> None:
+        counts = Counter(tokenize(text))
+        with self._lock:
+            if chunk_id in self._doc_len:
+                self._remove(chunk_id)
+            for term, tf in counts.items():
+                self._postings.setdefault(term, {})[chunk_id] = tf
+            length = sum(counts.values())
+            self._doc_len[chunk_id] = length
+            self._doc_terms[chunk_id] = tuple(counts)
+            self._total_len += length
+
+    def remove(self, chunk_ids: Iterable[int]) -> None:
+        with self._lock:
+            for chunk_id in chunk_ids:
+                if chunk_id in self._doc_len:
+                    self._remove(chunk_id)
+
+    def _remove(self, chunk_id: int) -> None:
+        for term in self._doc_terms.pop(chunk_id):
+            posting = self._postings.get(term)
+            if posting is not None:
+                posting.pop(chunk_id, None)
+                if not posting:
+                    del self._postings[term]
+        self._total_len -= self._doc_len.pop(chunk_id)
+
+    def mark_stale(self) -> None:
+        """Reload on the next refresh, regardless of the interval."""
+        self._stale = True
+
+    def _due(self, force: bool) -> bool:
+        return (force or not self._loaded or self._stale
+                or time.monotonic() - self._last_refresh >= self.refresh_interval)
+
+    def refresh(self, force: bool = False) -> None:
+        """Bring the index in line with the database.
+
+        Only one caller loads at a time. Callers arriving before the first
+        load has finished wait for it; once loaded, a periodic refresh
+        already in progress elsewhere is not waited on. The index counts as
+        loaded only after a load succeeds, so a failed one is retried.
+        """
+        if not self._due(force):
+            return
+        if not self._refresh_lock.acquire(blocking=force or not self._loaded):
+            return
+        try:
+            if not force and not self._due(False):
+                return  # another caller refreshed while we waited
+            started = time.monotonic()
+            self._stale = False
+            try:
+                self._load()
+            except Exception:
+                self._stale = True
+                raise
+            self._last_refresh = started
+            self._loaded = True
+        finally:
+            self._refresh_lock.release()
+
+    def _load(self) -> None:
+        """Diff indexed ids against file_chunk and load only new chunks.
+
+        A chunk's content never changes under the same id (edited chunks
+        get new rows), so the id set is enough to detect drift.
+        """
+        db_ids = {cid for (cid,) in db.session.query(FileChunk.id)}
+        with self._lock:
+            known = set(self._doc_len)
+        removed = known - db_ids
+        added = sorted(db_ids - known)
+        self.remove(removed)
+        for start in range(0, len(added), _LOAD_BATCH):
+            batch = added[start:start + _LOAD_BATCH]
+            for chunk_id, content in db.session.query(FileChunk.id, FileChunk.content).filter(
+                FileChunk.id.in_(batch)
+            ):
+                self.add(chunk_id, content)
+        if removed or added:
+            logger.info(f"Lexical index refreshed: +{len(added)} -{len(removed)} ({len(self)} chunks)")
+
+    def search(self, query: str, k: int) -> List[Tuple[int, float]]:
+        """Top-k (chunk_id, BM25 score) pairs, best first."""
+        self.refresh()
+        terms = set(tokenize(query))
+        with self._lock:
+            n = len(self._doc_len)
+            if not terms or n == 0:
+                return []
+            avg_len = self._total_len / n or 1.0
+            scores: Dict[int, float] = {}
+            for term in terms:
+                posting = self._postings.get(term)
+                if not posting:
+                    continue
+                idf = math.log(1 + (n - len(posting) + 0.5) / (len(posting) + 0.5))
+                for chunk_id, tf in posting.items():
+                    norm = BM25_K1 * (1 - BM25_B + BM25_B * self._doc_len[chunk_id] / avg_len)
+                    scores[chunk_id] = scores.get(chunk_id, 0.0) + idf * tf * (BM25_K1 + 1) / (tf + norm)
+        return heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+
+    def stats(self) -> Dict[str, int]:
+        return {"chunks": len(self._doc_len), "terms": len(self._postings)}
+
+
+def reciprocal_rank_fusion(rankings: Sequence[Sequence[int]], k: int = 60) -> List[Tuple[int, float]]:
+    """Fuse ranked id lists: score(d) = Σ 1 / (k + rank). Best first."""
+    scores: Dict[int, float] = {}
+    for ranking in rankings:
+        for rank, chunk_id in enumerate(ranking, start=1):
+            scores[chunk_id] = scores.get(chunk_id, 0.0) + 1.0 / (k + rank)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
+
+
+_create_lock = threading.Lock()
+
+
+def get_lexical_index() -> LexicalIndex:
+    """The app's lexical index (created on first use)."""
+    app = current_app._get_current_object()
+    if "lexical_index" not in app.extensions:
+        with _create_lock:
+            if "lexical_index" not in app.extensions:
+                app.extensions["lexical_index"] = LexicalIndex()
+    return app.extensions["lexical_index"]
+
+
+def record_chunk_texts(added: Sequence[Tuple[int, str]] = (), removed: Iterable[int] = ()) -> None:
+    """Apply committed chunk writes to an already-loaded index."""
+    index = current_app.extensions.get("lexical_index")
+    if index is None or not index._loaded:
+        return
+    index.remove(removed)
+    for chunk_id, content in added:
+        index.add(chunk_id, content)
@@ -0,0 +1,251 @@
+"""
+Managed pgvector ANN indexes on file_chunk.embedding for ΠΥΛΗ ΚΟΙΝΩΝΙΚΗΣ ΜΕΡΙΜΝΑΣ.
+HNSW by default, IVFFlat optional. Build parameters come from config
+(VECTOR_INDEX_TYPE, HNSW_M, HNSW_EF_CONSTRUCTION, IVFFLAT_LISTS) and the
+per-query knobs (HNSW_EF_SEARCH, IVFFLAT_PROBES) are applied with SET LOCAL.
+Only PostgreSQL is supported; on SQLite every function is a no-op.
+"""
+import math
+import time
+import logging
+from typing import Any, Dict, List, Optional
+
+from flask import current_app
+
+from my_project.extensions import db
+from my_project.models import FileChunk
+
+logger = logging.getLogger(__name__)
+
+INDEX_TYPES = ("hnsw", "ivfflat")
+_INDEX_NAME = "ix_file_chunk_embedding_{}"
+
+
+class VectorIndexUnsupported(Exception):
+    """Raised when ANN index management is requested on a non-PostgreSQL database."""
+
+
+def is_supported() -> bool:
+    return db.engine.dialect.name == "postgresql"
+
+
+# ── Settings ────────────────────────────────────────────────────────
+
+def index_settings(**overrides) -> Dict[str, Any]:
+    """Effective index settings: app config, with any non-None overrides applied."""
+    cfg = current_app.config
+    settings = {
+        "type": cfg.get("VECTOR_INDEX_TYPE", "hnsw"),
+        "m": cfg.get("HNSW_M", 16),
+        "ef_construction": cfg.get("HNSW_EF_CONSTRUCTION", 64),
+        "ef_search": cfg.get("HNSW_EF_SEARCH", 40),
+        "lists": cfg.get("IVFFLAT_LISTS", 0),
+        "probes": cfg.get("IVFFLAT_PROBES", 10),
+    }
+    settings.update({k: v for k, v in overrides.items() if v is not None})
+
+    settings["type"] = str(settings["type"]).lower()
+    if settings["type"] not in INDEX_TYPES + ("none",):
+        raise ValueError(f"Unknown vector index type: {settings['type']}")
+    for key in ("m", "ef_construction", "ef_search", "lists", "probes"):
+        try:
+            settings[key] = int(settings[key])
+        except (TypeError, ValueError):
+            raise ValueError(f"{key} must be an integer")
+        if settings[key] < 0 or (key != "lists" and settings[key] == 0):
+            raise ValueError(f"{key} must be positive")
+    return settings
+
+
+def ivfflat_lists(row_count: int) -> int:
+    """pgvector's guidance: rows/1000 up to 1M rows, sqrt(rows) beyond."""
+    if row_count <= 1_000_000:
+        return max(1, row_count // 1000)
+    return int(math.sqrt(row_count))
+
+
+def index_ddl(settings: Dict[str, Any], row_count: int = 0) -> str:
+    """CREATE INDEX statement for the configured index type."""
+    kind = settings["type"]
+    if kind == "hnsw":
+        params = f"m = {settings['m']}, ef_construction = {settings['ef_construction']}"
+    elif kind == "ivfflat":
+        params = f"lists = {settings['lists'] or ivfflat_lists(row_count)}"
+    else:
+        raise ValueError(f"No index DDL for type: {kind}")
+    return (
+        f"CREATE INDEX IF NOT EXISTS {_INDEX_NAME.format(kind)} ON file_chunk "
+        f"USING {kind} (embedding vector_cosine_ops) WITH ({params})"
+    )
+
+
+# ── Index management ────────────────────────────────────────────────
+
+def _embedded_count() -> int:
+    return FileChunk.query.filter(FileChunk.embedding.isnot(None)).count()
+
+
+def existing_indexes() -> List[Dict[str, Any]]:
+    """ANN indexes currently defined on file_chunk.embedding."""
+    if not is_supported():
+        return []
+    rows = db.session.execute(db.text(
+        "SELECT indexname, indexdef, pg_relation_size(quote_ident(indexname)::regclass) "
+        "FROM pg_indexes WHERE tablename = 'file_chunk' "
+        "AND (indexdef ILIKE '%USING hnsw%' OR indexdef ILIKE '%USING ivfflat%')"
+    )).fetchall()
+    return [
+        {
+            "name": name,
+            "type": "hnsw" if "using hnsw" in definition.lower() else "ivfflat",
+            "definition": definition,
+            "size_bytes": size,
+        }
+        for name, definition, size in rows
+    ]
+
+
+def index_status() -> Dict[str, Any]:
+    supported = is_supported()
+    return {
+        "supported": supported,
+        "settings": index_settings(),
+        "indexes": existing_indexes() if supported else [],
+        "embedded_chunks": _embedded_count(),
+    }
+
+
+def ensure_vector_index() -> Optional[str]:
+    """Create the configured index at startup if no ANN index exists yet.
+
+    IVFFlat is skipped while there are no embeddings: its lists are trained
+    on the rows present at build time, so building it empty gives poor recall.
+    Switching index types is left to rebuild_vector_index().
+    """
+    if not is_supported():
+        return None
+    settings = index_settings()
+    if settings["type"] == "none" or existing_indexes():
+        return None
+
+    row_count = _embedded_count()
+    if settings["type"] == "ivfflat" and row_count == 0:
+        return None
+
+    db.session.execute(db.text(index_ddl(settings, row_count)))
+    db.session.commit()
+    logger.info(f"Created {settings['type']} index on file_chunk.embedding ({row_count} vectors)")
+    return _INDEX_NAME.format(settings["type"])
+
+
+def rebuild_vector_index(**overrides) -> Dict[str, Any]:
+    """Drop every ANN index on file_chunk.embedding and build the requested one."""
+    if not is_supported():
+        raise VectorIndexUnsupported("Vector indexes require PostgreSQL with pgvector")
+    settings = index_settings(**overrides)
+
+    for index in existing_indexes():
+        db.session.execute(db.text(f'DROP INDEX IF EXISTS "{index["name"]}"'))
+
+    row_count = _embedded_count()
+    started = time.perf_counter()
+    if settings["type"] != "none":
+        db.session.execute(db.text(index_ddl(settings, row_count)))
+    db.session.commit()
+    build_seconds = round(time.perf_counter() - started, 3)
+
+    logger.info(f"Rebuilt vector index: {settings['type']} over {row_count} vectors in {build_seconds}s")
+    return {
+        "settings": settings,
+        "indexes": existing_indexes(),
+        "embedded_chunks": row_count,
+        "build_seconds": build_seconds,
+    }
+
+
+# ── Query-time settings ─────────────────────────────────────────────
+
+def apply_search_settings(ef_search: Optional[int] = None, probes: Optional[int] = None) -> None:
+    """Set hnsw.ef_search and ivfflat.probes for the current transaction only.
+
+    Both are set because the live index may differ from VECTOR_INDEX_TYPE
+    (rebuild_vector_index can switch it at runtime, from any process); the
+    knob of the absent index type is ignored by the planner.
+    """
+    if not is_supported():
+        return
+    settings = index_settings(ef_search=ef_search, probes=probes)
+    db.session.execute(db.text(f"SET LOCAL hnsw.ef_search = {settings['ef_search']}"))
+    db.session.execute(db.text(f"SET LOCAL ivfflat.probes = {settings['probes']}"))
+
+
+# ── Recall vs latency ───────────────────────────────────────────────
+
+def recall_at_k(exact_ids: List[int], approx_ids: List[int]) -> float:
+    if not exact_ids:
+        return 1.0
+    return len(set(exact_ids) & set(approx_ids)) / len(exact_ids)
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[int(round((len(ordered) - 1) * pct))]
+
+
+def _nearest_ids(vector, k: int) -> List[int]:
+    rows = db.session.query(FileChunk.id).filter(
+        FileChunk.embedding.isnot(None)
+    ).order_by(
+        FileChunk.embedding.cosine_distance(vector)
+    ).limit(k).all()
+    return [row[0] for row in rows]
+
+
+def measure_recall(samples: int = 20, k: int = 10,
+                   ef_search: Optional[int] = None, probes: Optional[int] = None) -> Dict[str, Any]:
+    """Compare ANN results with an exact (sequential-scan) search.
+
+    Query vectors are sampled from stored chunk embeddings. Each search runs
+    in its own transaction so SET LOCAL settings never leak between them.
+    """
+    if not is_supported():
+        raise VectorIndexUnsupported("Vector indexes require PostgreSQL with pgvector")
+
+    queries = [
+        row[0] for row in db.session.query(FileChunk.embedding).filter(
+            FileChunk.embedding.isnot(None)
+        ).order_by(db.func.random()).limit(samples).all()
+    ]
+    db.session.rollback()
+
+    recalls, ann_ms, exact_ms = [], [], []
+    for vector in queries:
+        vector = [float(x) for x in vector]
+
+        apply_search_settings(ef_search=ef_search, probes=probes)
+        started = time.perf_counter()
+        approx = _nearest_ids(vector, k)
+        ann_ms.append((time.perf_counter() - started) * 1000)
+        db.session.rollback()
+
+        db.session.execute(db.text("SET LOCAL enable_indexscan = off"))
+        started = time.perf_counter()
+        exact = _nearest_ids(vector, k)
+        exact_ms.append((time.perf_counter() - started) * 1000)
+        db.session.rollback()
+
+        recalls.append(recall_at_k(exact, approx))
+
+    settings = index_settings(ef_search=ef_search, probes=probes)
+    return {
+        "index_type": settings["type"],
+        "ef_search": settings["ef_search"],
+        "probes": settings["probes"],
+        "k": k,
+        "samples": len(queries),
+        "recall": round(sum(recalls) / len(recalls), 4) if recalls else None,
+        "ann_ms": {"p50": round(_percentile(ann_ms, 0.5), 2), "p95": round(_percentile(ann_ms, 0.95), 2)},
+        "exact_ms": {"p50": round(_percentile(exact_ms, 0.5), 2), "p95": round(_percentile(exact_ms, 0.95), 2)},
+    }
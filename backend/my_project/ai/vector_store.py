@@ -0,0 +1,429 @@
+"""
+Pluggable vector store for knowledge chunk search for ΠΥΛΗ ΚΟΙΝΩΝΙΚΗΣ ΜΕΡΙΜΝΑΣ.
+On PostgreSQL queries go to pgvector; elsewhere (SQLite, local installs)
+a NumPy store keeps a memory-mapped float32 matrix of normalized chunk
+embeddings and answers top-k with blocked matrix multiplies + argpartition.
+"""
+import os
+import json
+import time
+import logging
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from flask import current_app
+
+from my_project.extensions import db
+from my_project.models import FileChunk
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - numpy is in requirements.txt
+    np = None
+
+try:
+    import fcntl
+except ImportError:  # Windows: dev server is single-process
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+EMBEDDING_DIM = 1536
+_MIN_CAPACITY = 256
+_LOAD_BATCH = 500
+
+_create_lock = threading.Lock()
+
+
+class VectorStore:
+    """Top-k cosine search over chunk embeddings, keyed by FileChunk.id."""
+
+    name = "base"
+
+    def search(self, vector: Sequence[float], k: int) -> List[Tuple[int, float]]:
+        """Return up to k (chunk_id, cosine similarity) pairs, best first."""
+        raise NotImplementedError
+
+    def add(self, ids: Sequence[int], vectors: Sequence[Sequence[float]]) -> None:
+        """Insert or replace the vectors for ids (no-op for DB-backed stores)."""
+
+    def remove(self, ids: Iterable[int]) -> None:
+        """Drop ids from the store (no-op for DB-backed stores)."""
+
+    def refresh(self, force: bool = False) -> None:
+        """Bring the store in line with FileChunk rows (no-op for DB-backed stores)."""
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": self.name}
+
+
+# ── pgvector ────────────────────────────────────────────────────────
+
+class PgVectorStore(VectorStore):
+    """Delegates to pgvector's cosine distance operator (and its ANN index)."""
+
+    name = "pgvector"
+
+    def search(self, vector, k):
+        from my_project.ai.vector_index import apply_search_settings
+
+        apply_search_settings()
+        rows = db.session.query(
+            FileChunk.id,
+            FileChunk.embedding.cosine_distance(vector).label("distance"),
+        ).filter(
+            FileChunk.embedding.isnot(None)
+        ).order_by("distance").limit(k).all()
+        return [(chunk_id, 1 - float(distance)) for chunk_id, distance in rows]
+
+
+# ── NumPy ───────────────────────────────────────────────────────────
+
+class NumpyVectorStore(VectorStore):
+    """In-process exact search over a (memory-mapped) float32 matrix.
+
+    Rows are L2-normalized on insert, so cosine similarity is a dot product.
+    Row i holds the vector of chunk ids[i]; freed rows have id -1 and are
+    reused. With a path the matrix lives in <path>/vectors.f32 and survives
+    restarts; refresh() then only loads chunks embedded since. Only the
+    process holding <path>/lock writes to disk — others keep an in-memory copy.
+    """
+
+    name = "numpy"
+
+    def __init__(self, path: Optional[str] = None, dim: int = EMBEDDING_DIM,
+                 block_rows: int = 65536, refresh_interval: float = 30.0):
+        if np is None:
+            raise RuntimeError("NumPy is required for the numpy vector store")
+        self.path = path
+        self.dim = dim
+        self.block_rows = block_rows
+        self.refresh_interval = refresh_interval
+        self._lock = threading.RLock()
+        self._lock_file = None
+        self._matrix = None
+        self._ids = None
+        self._row_of: Dict[int, int] = {}
+        self._free: List[int] = []
+        self._size = 0
+        self._loaded = False
+        self._last_refresh = 0.0
+        self._refresh_lock = threading.Lock()
+
+    # -- storage --------------------------------------------------------
+
+    @property
+    def capacity(self) -> int:
+        return 0 if self._ids is None else len(self._ids)
+
+    def _vectors_file(self) -> str:
+        return os.path.join(self.path, "vectors.f32")
+
+    def _acquire_path(self) -> bool:
+        """Take the on-disk store for this process; False means stay in memory."""
+        if not self.path:
+            return False
+        os.makedirs(self.path, exist_ok=True)
+        if fcntl is None:
+            return True
+        handle = open(os.path.join(self.path, "lock"), "w")
+        try:
+            fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            handle.close()
+            logger.info(f"Vector store {self.path} is held by another process, using memory")
+            return False
+        self._lock_file = handle
+        return True
+
+    def _open_matrix(self, capacity: int):
+        if not self.path:
+            return np.zeros((capacity, self.dim), dtype=np.float32)
+        with open(self._vectors_file(), "ab") as f:
+            f.truncate(capacity * self.dim * 4)
+        return np.memmap(self._vectors_file(), dtype=np.float32, mode="r+",
+                         shape=(capacity, self.dim))
+
+    def _grow(self, needed: int) -> None:
+        capacity = max(needed, self.capacity * 2, _MIN_CAPACITY)
+        if self.path:
+            if self._matrix is not None:
+                self._matrix.flush()
+                self._matrix = None
+            matrix = self._open_matrix(capacity)
+        else:
+            matrix = self._open_matrix(capacity)
+            if self._size:
+                matrix[:self._size] = self._matrix[:self._size]
+        ids = np.full(capacity, -1, dtype=np.int64)
+        if self._size:
+            ids[:self._size] = self._ids[:self._size]
+        self._matrix, self._ids = matrix, ids
+
+    def _load_from_disk(self) -> bool:
+        meta_file = os.path.join(self.path, "meta.json")
+        ids_file = os.path.join(self.path, "ids.npy")
+        try:
+            with open(meta_file, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            if meta["dim"] != self.dim:
+                return False
+            capacity, size = int(meta["capacity"]), int(meta["size"])
+            if os.path.getsize(self._vectors_file()) < capacity * self.dim * 4:
+                return False
+            stored = np.load(ids_file)
+            if len(stored) != size:
+                return False
+        except (OSError, ValueError, KeyError):
+            return False
+
+        self._matrix = self._open_matrix(capacity)
+        self._ids = np.full(capacity, -1, dtype=np.int64)
+        self._ids[:size] = stored
+        self._size = size
+        self._row_of = {int(cid): row for row, cid in enumerate(stored) if cid >= 0}
+        self._free = [row for row, cid in enumerate(stored) if cid < 0]
+        return True
+
+    def _save(self) -> None:
+        if not self.path:
+            return
+        self._matrix.flush()
+        ids_tmp = os.path.join(self.path, "ids.tmp.npy")
+        np.save(ids_tmp, self._ids[:self._size])
+        os.replace(ids_tmp, os.path.join(self.path, "ids.npy"))
+        meta_tmp = os.path.join(self.path, "meta.tmp.json")
+        with open(meta_tmp, "w", encoding="utf-8") as f:
+            json.dump({"dim": self.dim, "capacity": self.capacity, "size": self._size}, f)
+        os.replace(meta_tmp, os.path.join(self.path, "meta.json"))
+
+    def _open(self) -> None:
+        """Allocate the matrix, reusing the on-disk store when it is usable."""
+        with self._lock:
+            if self._ids is not None:
+                return
+            if not self._acquire_path():
+                self.path = None
+            if not (self.path and self._load_from_disk()):
+                self._size = 0
+                self._row_of, self._free = {}, []
+                self._grow(_MIN_CAPACITY)
+
+    def _ensure_loaded(self) -> None:
+        if not self._loaded:
+            self.refresh()
+
+    # -- mutation -------------------------------------------------------
+
+    def add(self, ids, vectors):
+        self._ensure_loaded()
+        with self._lock:
+            if self._add(ids, vectors):
+                self._save()
+
+    def remove(self, ids):
+        self._ensure_loaded()
+        with self._lock:
+            if self._remove(ids):
+                self._save()
+
+    def _add(self, ids, vectors) -> bool:
+        """Write vectors into rows (unsaved); True if anything changed."""
+        if not ids:
+            return False
+        matrix = np.array(vectors, dtype=np.float32).reshape(len(ids), -1)
+        if matrix.shape[1] != self.dim:
+            logger.warning(f"Ignoring {len(ids)} vectors of dim {matrix.shape[1]} (expected {self.dim})")
+            return False
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        matrix /= norms
+
+        with self._lock:
+            rows = []
+            for chunk_id in ids:
+                chunk_id = int(chunk_id)
+                row = self._row_of.get(chunk_id)
+                if row is None:
+                    if self._free:
+                        row = self._free.pop()
+                    else:
+                        if self._size >= self.capacity:
+                            self._grow(self._size + 1)
+                        row = self._size
+                        self._size += 1
+                    self._row_of[chunk_id] = row
+                rows.append(row)
+            rows = np.asarray(rows)
+            self._matrix[rows] = matrix
+            self._ids[rows] = np.asarray(ids, dtype=np.int64)
+        return True
+
+    def _remove(self, ids) -> bool:
+        """Free the rows of ids (unsaved); True if anything changed."""
+        with self._lock:
+            rows = [self._row_of.pop(int(cid)) for cid in ids if int(cid) in self._row_of]
+            if not rows:
+                return False
+            self._ids[rows] = -1
+            self._matrix[rows] = 0.0
+            self._free.extend(rows)
+        return True
+
+    def _due(self, force: bool) -> bool:
+        return force or not self._loaded or time.monotonic() - self._last_refresh >= self.refresh_interval
+
+    def refresh(self, force=False):
+        """Bring the store in line with embedded FileChunk rows.
+
+        Only one caller loads at a time; callers arriving before the first
+        load has finished wait for it, and the store counts as loaded only
+        once that load succeeded.
+        """
+        if not self._due(force):
+            return
+        if not self._refresh_lock.acquire(blocking=force or not self._loaded):
+            return
+        try:
+            if not force and not self._due(False):
+                return  # another caller refreshed while we waited
+            started = time.monotonic()
+            self._open()
+            self._load()
+            self._last_refresh = started
+            self._loaded = True
+        finally:
+            self._refresh_lock.release()
+
+    def _load(self) -> None:
+        """Diff stored ids against embedded FileChunk rows; load only what is
+        new and save once at the end.
+
+        Chunk ids never change vector once embedded (edited chunks get new
+        rows), so the id set is enough to detect drift from other processes.
+        """
+        db_ids = {cid for (cid,) in db.session.query(FileChunk.id).filter(
+            FileChunk.embedding.isnot(None)
+        )}
+        with self._lock:
+            known = set(self._row_of)
+        removed = known - db_ids
+        added = sorted(db_ids - known)
+        changed = self._remove(removed)
+        for start in range(0, len(added), _LOAD_BATCH):
+            batch = added[start:start + _LOAD_BATCH]
+            rows = db.session.query(FileChunk.id, FileChunk.embedding).filter(
+                FileChunk.id.in_(batch)
+            ).all()
+            changed |= self._add([r.id for r in rows], [[float(x) for x in r.embedding] for r in rows])
+        if changed:
+            with self._lock:
+                self._save()
+        if removed or added:
+            logger.info(f"Vector store refreshed: +{len(added)} -{len(removed)} ({len(self._row_of)} vectors)")
+
+    # -- search ---------------------------------------------------------
+
+    def search(self, vector, k):
+        self.refresh()
+        query = np.array(vector, dtype=np.float32).reshape(-1)
+        if query.shape[0] != self.dim:
+            raise ValueError(f"Query vector has dim {query.shape[0]}, expected {self.dim}")
+        norm = np.linalg.norm(query)
+        if norm == 0:
+            return []
+        query /= norm
+
+        with self._lock:
+            k = min(k, len(self._row_of))
+            if k <= 0:
+                return []
+            cand_scores, cand_rows = [], []
+            for start in range(0, self._size, self.block_rows):
+                end = min(start + self.block_rows, self._size)
+                scores = self._matrix[start:end] @ query
+                scores[self._ids[start:end] < 0] = -np.inf
+                if len(scores) > k:
+                    top = np.argpartition(-scores, k - 1)[:k]
+                else:
+                    top = np.arange(len(scores))
+                cand_scores.append(scores[top])
+                cand_rows.append(top + start)
+            scores = np.concatenate(cand_scores)
+            rows = np.concatenate(cand_rows)
+            if len(scores) > k:
+                top = np.argpartition(-scores, k - 1)[:k]
+                scores, rows = scores[top], rows[top]
+            order = np.argsort(-scores)
+            ids = self._ids[rows[order]]
+            return [
+                (int(cid), float(score))
+                for cid, score in zip(ids, scores[order])
+                if cid >= 0
+            ]
+
+    def close(self) -> None:
+        """Flush and release the memmap and the on-disk lock."""
+        with self._lock:
+            if self._loaded:
+                self._save()
+            self._matrix = self._ids = None
+            self._row_of, self._free, self._size = {}, [], 0
+            self._loaded = False
+            if self._lock_file is not None:
+                self._lock_file.close()
+                self._lock_file = None
+
+    def stats(self):
+        self._ensure_loaded()
+        return {
+            "backend": self.name,
+            "vectors": len(self._row_of),
+            "capacity": self.capacity,
+            "path": self.path,
+        }
+
+
+# ── Store selection ─────────────────────────────────────────────────
+
+def _create_store(app) -> Optional[VectorStore]:
+    backend = app.config.get("VECTOR_STORE", "auto")
+    if backend == "auto":
+        backend = "pgvector" if db.engine.dialect.name == "postgresql" else "numpy"
+    if backend == "pgvector":
+        return PgVectorStore()
+    if backend == "numpy":
+        if np is None:
+            logger.warning("NumPy not installed — semantic search disabled, using keyword fallback")
+            return None
+        path = app.config.get("VECTOR_STORE_PATH") or os.path.join(app.instance_path, "vector_store")
+        return NumpyVectorStore(path=None if path == ":memory:" else path)
+    logger.warning(f"Unknown VECTOR_STORE '{backend}', using keyword fallback")
+    return None
+
+
+def get_vector_store() -> Optional[VectorStore]:
+    """The app's vector store (created on first use), or None if unavailable."""
+    app = current_app._get_current_object()
+    if "vector_store" not in app.extensions:
+        with _create_lock:
+            if "vector_store" not in app.extensions:
+                app.extensions["vector_store"] = _create_store(app)
+    return app.extensions["vector_store"]
+
+
+def record_chunk_changes(added: Sequence[Tuple[int, Sequence[float]]] = (),
+                         removed: Iterable[int] = ()) -> None:
+    """Apply committed chunk writes to an already-loaded in-process store.
+
+    Keeps the NumPy store current without a DB round trip; a store that
+    has not been loaded yet picks the changes up on its first refresh.
+    """
+    store = current_app.extensions.get("vector_store")
+    if not isinstance(store, NumpyVectorStore) or not store._loaded:
+        return
+    with store._lock:
+        changed = store._remove(list(removed))
+        changed |= store._add([cid for cid, _ in added], [vec for _, vec in added])
+        if changed:
+            store._save()
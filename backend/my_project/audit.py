@@ -4,8 +4,9 @@ from .extensions import db
 from .models import AuditLog
 
 
-def log_action(action, resource=None, resource_id=None, user_id=None, details=None):
-    """Record an audit log entry."""
+def log_action(action, resource=None, resource_id=None, user_id=None, details=None, commit=True):
+    """Record an audit log entry. With commit=False the entry is only added
+    to the session, to be committed together with the caller's rows."""
     entry = AuditLog(
         user_id=user_id,
         action=action,
@@ -15,6 +16,8 @@ def log_action(action, resource=None, resource_id=None, user_id=None, details=No
         ip_address=request.remote_addr if request else None,
     )
     db.session.add(entry)
+    if not commit:
+        return
     try:
         db.session.commit()
     except Exception:
@@ -0,0 +1,71 @@
+"""
+In-process caches shared by the AI layer and the oversight views
+"""
+import time
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Hashable
+
+
+class LRUCache:
+    """Thread-safe, size-bounded LRU mapping."""
+
+    def __init__(self, maxsize: int = 1024):
+        self.maxsize = max(int(maxsize), 0)
+        self._data: "OrderedDict[Any, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            if key not in self._data:
+                return None
+            self._data.move_to_end(key)
+            return self._data[key]
+
+    def put(self, key, value) -> None:
+        if self.maxsize == 0:
+            return
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class CommitCache:
+    """Size-bounded LRU of built values that expire after ttl seconds or
+    as soon as invalidate() is called (wired to a commit hook)."""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.ttl = ttl
+        self._entries = LRUCache(maxsize)
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def invalidate(self) -> None:
+        """Drop every cached value in this process."""
+        with self._lock:
+            self._generation += 1
+
+    def get_or_build(self, key: Hashable, build: Callable[[], Any]) -> Any:
+        generation = self._generation  # read first: a commit while building wins
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] == generation and time.monotonic() < entry[1]:
+            return entry[2]
+        value = build()
+        self._entries.put(key, (generation, time.monotonic() + self.ttl, value))
+        return value
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,129 @@
+"""
+Content file delivery for ΠΥΛΗ ΚΟΙΝΩΝΙΚΗΣ ΜΕΡΙΜΝΑΣ
+Downloads carry a strong ETag (the file's SHA-256, stored on its
+content_file row), a Cache-Control policy chosen by folder, and answer
+Range / If-None-Match / If-Range requests. With CONTENT_SENDFILE set to
+'x-accel' (nginx) or 'x-sendfile' (Apache, lighttpd) the app only checks
+the path and sets headers; the proxy streams the bytes, so a large
+legislation PDF does not hold a worker thread for the whole transfer.
+"""
+import os
+import hashlib
+import logging
+import mimetypes
+import threading
+from typing import Dict, Optional, Tuple
+from urllib.parse import quote
+
+from flask import Response, current_app, request, send_file
+from werkzeug.security import safe_join
+from werkzeug.utils import send_file as _send_file
+
+from .extensions import db
+from .models import ContentFile
+from .content_tree import content_root
+
+logger = logging.getLogger(__name__)
+
+SENDFILE_MODES = {'', 'x-accel', 'x-sendfile'}
+_HASH_BLOCK = 1024 * 1024
+_HASH_CACHE_SIZE = 4096
+
+# abs path -> (size, mtime_ns, sha256); saves a DB lookup per download
+_hashes: Dict[str, Tuple[int, int, str]] = {}
+_hash_lock = threading.Lock()
+
+
+def file_sha256(path: str) -> str:
+    """Hex SHA-256 of a file, read in 1 MB blocks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(_HASH_BLOCK), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def content_hash(rel_path: str, abs_path: str, st: os.stat_result) -> str:
+    """SHA-256 of a content file, from memory, its content_file row, or
+    computed (and stored on the row) when neither is current."""
+    with _hash_lock:
+        cached = _hashes.get(abs_path)
+    if cached and cached[:2] == (st.st_size, st.st_mtime_ns):
+        return cached[2]
+
+    row = ContentFile.query.filter_by(path=rel_path).first()
+    current = row is not None and (row.file_size, row.file_mtime) == (st.st_size, st.st_mtime)
+    if current and row.sha256:
+        sha = row.sha256
+    else:
+        sha = file_sha256(abs_path)
+        if current:
+            row.sha256 = sha
+            db.session.commit()
+
+    with _hash_lock:
+        if len(_hashes) >= _HASH_CACHE_SIZE:
+            del _hashes[next(iter(_hashes))]
+        _hashes[abs_path] = (st.st_size, st.st_mtime_ns, sha)
+    return sha
+
+
+def cache_policy(rel_path: str) -> str:
+    """Cache-Control value for a file: the CONTENT_CACHE_POLICIES entry with
+    the longest matching folder prefix, else CONTENT_CACHE_DEFAULT."""
+    policies = current_app.config.get('CONTENT_CACHE_POLICIES') or {}
+    best, best_len = current_app.config.get('CONTENT_CACHE_DEFAULT', 'no-cache'), -1
+    for folder, policy in policies.items():
+        folder = folder.strip('/')
+        if (rel_path == folder or rel_path.startswith(folder + '/')) and len(folder) > best_len:
+            best, best_len = policy, len(folder)
+    return best
+
+
+def resolve_content_path(rel_path: str) -> Optional[Tuple[str, str]]:
+    """(normalized relative path, absolute path) of a servable content file,
+    or None for traversal attempts, hidden entries and missing files."""
+    rel_path = rel_path.replace('\\', '/').strip('/')
+    parts = rel_path.split('/')
+    if not rel_path or any(p.startswith('.') for p in parts):
+        return None
+    abs_path = safe_join(content_root(), *parts)
+    if abs_path is None or not os.path.isfile(abs_path):
+        return None
+    return rel_path, abs_path
+
+
+def send_content_file(rel_path: str, as_attachment: bool = False) -> Optional[Response]:
+    """Response for a content file, or None if there is no such file."""
+    resolved = resolve_content_path(rel_path)
+    if resolved is None:
+        return None
+    rel_path, abs_path = resolved
+    st = os.stat(abs_path)
+    etag = content_hash(rel_path, abs_path, st)
+    mode = current_app.config.get('CONTENT_SENDFILE', '')
+    if mode not in SENDFILE_MODES:
+        logger.warning(f"Unknown CONTENT_SENDFILE mode {mode!r}, serving directly")
+        mode = ''
+
+    if mode:
+        # Headers only (the file is never opened); the proxy serves the
+        # body and handles Range itself
+        response = _send_file(abs_path, request.environ, mimetype=mimetypes.guess_type(abs_path)[0],
+                              as_attachment=as_attachment, conditional=False, etag=etag,
+                              last_modified=st.st_mtime, use_x_sendfile=True,
+                              response_class=current_app.response_class)
+        del response.headers['Content-Length']  # recomputed for the empty body
+        if mode == 'x-accel':
+            del response.headers['X-Sendfile']
+            prefix = current_app.config.get('CONTENT_ACCEL_PREFIX', '/_content/')
+            response.headers['X-Accel-Redirect'] = prefix.rstrip('/') + '/' + quote(rel_path)
+        response.make_conditional(request)
+    else:
+        response = send_file(abs_path, mimetype=mimetypes.guess_type(abs_path)[0],
+                             as_attachment=as_attachment, conditional=True,
+                             etag=etag, last_modified=st.st_mtime)
+        # Advertise ranges up front so PDF viewers fetch pages on demand
+        response.headers.setdefault('Accept-Ranges', 'bytes')
+    response.headers['Cache-Control'] = cache_policy(rel_path)
+    return response
@@ -0,0 +1,414 @@
+"""
+Content library search index for ΠΥΛΗ ΚΟΙΝΩΝΙΚΗΣ ΜΕΡΙΜΝΑΣ
+Every file under UPLOAD_FOLDER, except the case-file folders listed in
+CONTENT_INDEX_EXCLUDE_FOLDERS, gets a content_file row holding its name
+and extracted text (PDF/DOCX via ai.ingest, plain text read directly).
+Searches run against an in-memory BM25 index over those rows, using the
+same Greek normalization and stemming as the knowledge base, so a
+decision PDF can be found by its content without browsing folders.
+
+The index is kept current by the upload path (index_files) and by an
+incremental sync (sync_content_index) that compares size/mtime of every
+file and re-extracts only what changed. Searches schedule that sync in
+the background at most every CONTENT_INDEX_SYNC_SECONDS.
+"""
+import os
+import re
+import time
+import logging
+import threading
+import unicodedata
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from flask import current_app
+
+from .extensions import db
+from .models import ContentFile
+from .content_tree import content_root, get_content_tree
+from .file_utils import format_file_size, get_file_type
+from .ai.ingest import EXTRACTABLE_TYPES, extract_texts
+from .ai.lexical import LexicalIndex, normalize, tokenize
+
+logger = logging.getLogger(__name__)
+
+# Characters of extracted text kept per file
+CONTENT_INDEX_MAX_CHARS = int(os.environ.get("CONTENT_INDEX_MAX_CHARS", 200000))
+# Minimum seconds between background syncs triggered by searches
+CONTENT_INDEX_SYNC_SECONDS = float(os.environ.get("CONTENT_INDEX_SYNC_SECONDS", 300))
+TEXT_EXTENSIONS = {".txt", ".md", ".csv"}
+# File and folder names count this many times against the body text
+NAME_WEIGHT = 3
+SNIPPET_CHARS = 160
+_COMMIT_BATCH = 50
+
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="content-index")
+_create_lock = threading.Lock()
+
+
+# ── Extraction ──
+
+def _excluded_folders() -> frozenset:
+    return frozenset(current_app.config.get('CONTENT_INDEX_EXCLUDE_FOLDERS', ()))
+
+
+def is_indexable(rel_path: str) -> bool:
+    """False for hidden paths and anything under an excluded case-file folder."""
+    parts = rel_path.replace(os.sep, "/").split("/")
+    return parts[0] not in _excluded_folders() and not any(p.startswith('.') for p in parts)
+
+
+def _scan(root: str) -> Dict[str, Tuple[int, float]]:
+    """{relative path: (size, mtime)} for every indexable file under root."""
+    excluded = _excluded_folders()
+    found = {}
+    stack = [(root, "")]
+    while stack:
+        abs_path, rel_path = stack.pop()
+        try:
+            with os.scandir(abs_path) as it:
+                entries = list(it)
+        except OSError:
+            continue
+        for entry in entries:
+            if entry.name.startswith('.') or (not rel_path and entry.name in excluded):
+                continue
+            rel = f"{rel_path}/{entry.name}" if rel_path else entry.name
+            try:
+                if entry.is_dir():
+                    stack.append((entry.path, rel))
+                elif entry.is_file():
+                    st = entry.stat()
+                    found[rel] = (st.st_size, st.st_mtime)
+            except OSError:
+                continue
+    return found
+
+
+def _file_type(rel_path: str) -> str:
+    return os.path.splitext(rel_path)[1].lower().strip(".")
+
+
+def _extract(root: str, rel_paths: List[str], workers: Optional[int] = None
+             ) -> Iterator[Tuple[str, str, Optional[str]]]:
+    """(rel_path, text, error) per file. Plain text is read inline, PDF/DOCX
+    go through the ingestion process pool; other files are indexed by
+    name only."""
+    documents = []
+    for rel in rel_paths:
+        abs_path = os.path.join(root, rel)
+        if _file_type(rel) in EXTRACTABLE_TYPES:
+            documents.append(abs_path)
+        elif os.path.splitext(rel)[1].lower() in TEXT_EXTENSIONS:
+            try:
+                with open(abs_path, "r", encoding="utf-8", errors="ignore") as f:
+                    yield rel, f.read(), None
+            except OSError as e:
+                yield rel, "", f"{type(e).__name__}: {e}"
+        else:
+            yield rel, "", None
+    for abs_path, text, error in extract_texts(documents, workers=workers):
+        yield os.path.relpath(abs_path, root).replace(os.sep, "/"), text, error
+
+
+def _apply(row: Optional[ContentFile], rel: str, stat: Tuple[int, float],
+           text: str, error: Optional[str], root: str) -> ContentFile:
+    from .content_delivery import file_sha256
+
+    if row is None:
+        row = ContentFile(path=rel, version=0)
+        db.session.add(row)
+    row.name = os.path.basename(rel)
+    row.file_type = get_file_type(row.name)
+    row.file_size, row.file_mtime = stat
+    row.text = text[:CONTENT_INDEX_MAX_CHARS]
+    row.text_length = len(text)
+    row.error = error[:500] if error else None
+    try:
+        row.sha256 = file_sha256(os.path.join(root, rel))
+    except OSError:
+        row.sha256 = None
+    row.version = (row.version or 0) + 1
+    row.indexed_at = datetime.utcnow()
+    return row
+
+
+# ── Keeping the index current ──
+
+def sync_content_index(root: Optional[str] = None, full: bool = False,
+                       workers: Optional[int] = None) -> Dict[str, Any]:
+    """Bring content_file in line with the files on disk.
+
+    New files and files whose size or mtime changed are (re)extracted,
+    rows of deleted files are removed; with full=True every file is
+    re-extracted. Commits in batches so a long first build keeps its
+    progress.
+    """
+    started = time.perf_counter()
+    root = root or content_root()
+    on_disk = _scan(root)
+    known = {path: (row_id, size, mtime) for row_id, path, size, mtime in db.session.query(
+        ContentFile.id, ContentFile.path, ContentFile.file_size, ContentFile.file_mtime)}
+
+    removed = [row_id for path, (row_id, _, _) in known.items() if path not in on_disk]
+    changed = sorted(
+        rel for rel, stat in on_disk.items()
+        if full or rel not in known or (known[rel][1], known[rel][2]) != stat
+    )
+    stats = {"scanned": len(on_disk), "added": 0, "updated": 0,
+             "removed": len(removed), "errors": 0}
+
+    for start in range(0, len(removed), 500):
+        ContentFile.query.filter(ContentFile.id.in_(removed[start:start + 500])).delete(
+            synchronize_session=False)
+    db.session.commit()
+
+    pending = 0
+    for rel, text, error in _extract(root, changed, workers=workers):
+        row = db.session.get(ContentFile, known[rel][0]) if rel in known else None
+        stats["updated" if row else "added"] += 1
+        stats["errors"] += 1 if error else 0
+        _apply(row, rel, on_disk[rel], text, error, root)
+        pending += 1
+        if pending >= _COMMIT_BATCH:
+            db.session.commit()
+            pending = 0
+    db.session.commit()
+
+    if changed or removed:
+        get_content_index().mark_stale()
+    stats["seconds"] = round(time.perf_counter() - started, 3)
+    if changed or removed:
+        logger.info(f"Content index synced: {stats}")
+    return stats
+
+
+def index_files(rel_paths: Iterable[str], root: Optional[str] = None) -> int:
+    """Index specific files right away, e.g. just after an upload."""
+    root = root or content_root()
+    stats = {}
+    for rel in rel_paths:
+        if not is_indexable(rel):
+            continue
+        try:
+            st = os.stat(os.path.join(root, rel))
+            stats[rel.replace(os.sep, "/")] = (st.st_size, st.st_mtime)
+        except OSError:
+            continue
+    for rel, text, error in _extract(root, list(stats), workers=1):
+        _apply(ContentFile.query.filter_by(path=rel).first(), rel, stats[rel], text, error, root)
+    db.session.commit()
+    if stats:
+        get_content_index().mark_stale()
+    return len(stats)
+
+
+def _run_in_app_context(app, func, *args) -> bool:
+    with app.app_context():
+        try:
+            func(*args)
+            return True
+        except Exception as e:
+            logger.error(f"Content index update failed: {e}")
+            db.session.rollback()
+            return False
+
+
+def _background_sync(app, state) -> None:
+    if _run_in_app_context(app, sync_content_index):
+        state["synced"] = True
+
+
+def schedule_sync(force: bool = False) -> bool:
+    """Start a background sync unless one ran recently or is still running.
+    With CONTENT_INDEX_BACKGROUND off (tests) nothing is scheduled."""
+    app = current_app._get_current_object()
+    if not app.config.get('CONTENT_INDEX_BACKGROUND', True):
+        return False
+    state = app.extensions.setdefault("content_index_sync", {"future": None, "at": 0.0, "synced": False})
+    with _create_lock:
+        running = state["future"] is not None and not state["future"].done()
+        if running or (not force and time.monotonic() - state["at"] < CONTENT_INDEX_SYNC_SECONDS):
+            return False
+        state["at"] = time.monotonic()
+        state["future"] = _executor.submit(_background_sync, app, state)
+    return True
+
+
+def index_warming() -> bool:
+    """True until this process has finished its first background sync, while
+    the index may still be missing files. Always False without background
+    syncs (tests), where indexing happens inline."""
+    app = current_app._get_current_object()
+    if not app.config.get('CONTENT_INDEX_BACKGROUND', True):
+        return False
+    return not app.extensions.get("content_index_sync", {}).get("synced", False)
+
+
+def index_uploaded_files(rel_paths: List[str]) -> None:
+    """Index freshly uploaded files: in the background normally, inline
+    when background work is disabled."""
+    app = current_app._get_current_object()
+    if app.config.get('CONTENT_INDEX_BACKGROUND', True):
+        _executor.submit(_run_in_app_context, app, index_files, list(rel_paths))
+    else:
+        index_files(rel_paths)
+
+
+# ── Search ──
+
+class ContentSearchIndex(LexicalIndex):
+    """BM25 over content_file rows (file and folder names weighted up)."""
+
+    def __init__(self, refresh_interval: float = 30.0):
+        super().__init__(refresh_interval=refresh_interval)
+        self._versions: Dict[int, int] = {}
+
+    def _load(self) -> None:
+        """Reload rows whose version differs from the indexed one."""
+        db_versions = dict(db.session.query(ContentFile.id, ContentFile.version))
+        with self._lock:
+            removed = [row_id for row_id in self._versions if row_id not in db_versions]
+            stale = sorted(row_id for row_id, v in db_versions.items() if self._versions.get(row_id) != v)
+            for row_id in removed:
+                del self._versions[row_id]
+        self.remove(removed)
+        for start in range(0, len(stale), 200):
+            batch = stale[start:start + 200]
+            for row_id, path, text, version in db.session.query(
+                ContentFile.id, ContentFile.path, ContentFile.text, ContentFile.version
+            ).filter(ContentFile.id.in_(batch)):
+                self.add(row_id, _document_text(path, text))
+                with self._lock:
+                    self._versions[row_id] = version
+        if removed or stale:
+            logger.info(f"Content search index refreshed: ~{len(stale)} -{len(removed)} ({len(self)} files)")
+
+    def stats(self) -> Dict[str, int]:
+        return {"files": len(self._doc_len), "terms": len(self._postings)}
+
+
+def _document_text(path: str, text: Optional[str]) -> str:
+    folders, name = os.path.split(path)
+    names = " ".join([os.path.splitext(name)[0]] * NAME_WEIGHT + folders.split("/"))
+    return f"{names.replace('_', ' ')}\n{text or ''}"
+
+
+def get_content_index() -> ContentSearchIndex:
+    """The app's content search index (created on first use)."""
+    app = current_app._get_current_object()
+    if "content_index" not in app.extensions:
+        with _create_lock:
+            if "content_index" not in app.extensions:
+                app.extensions["content_index"] = ContentSearchIndex()
+    return app.extensions["content_index"]
+
+
+def _letter_variants() -> Dict[str, str]:
+    """Normalized Greek letter -> every accented/uppercase form of it."""
+    variants: Dict[str, str] = {}
+    for cp in list(range(0x0370, 0x0400)) + list(range(0x1F00, 0x2000)):
+        ch = chr(cp)
+        base = normalize(ch)
+        if len(base) == 1 and unicodedata.category(ch).startswith("L"):
+            variants[base] = variants.get(base, base) + ch
+    return variants
+
+
+_VARIANTS = _letter_variants()
+
+
+def _term_pattern(term: str) -> str:
+    """Regex matching a normalized (stemmed) term as a word prefix in raw text."""
+    parts = []
+    for ch in term:
+        forms = _VARIANTS.get(ch)
+        parts.append(f"[{re.escape(forms)}]" if forms else re.escape(ch))
+    return r"(?<!\w)" + "".join(parts)
+
+
+def _snippet(text: Optional[str], query: str) -> Optional[str]:
+    """Text around the first occurrence of a query term, or None."""
+    if not text:
+        return None
+    terms = sorted(set(tokenize(query)), key=len, reverse=True)
+    if not terms:
+        return None
+    match = re.compile("|".join(_term_pattern(t) for t in terms), re.IGNORECASE).search(text)
+    if match is None:
+        return None
+    half = SNIPPET_CHARS // 2
+    start = max(0, match.start() - half)
+    end = min(len(text), match.end() + half)
+    snippet = " ".join(text[start:end].split())
+    return ("…" if start > 0 else "") + snippet + ("…" if end < len(text) else "")
+
+
+def _name_matches(query: str, limit: int, skip: Iterable[str]) -> List[Dict[str, Any]]:
+    """Library files whose name contains every query term, read from the
+    cached content tree; used while the index is still warming."""
+    terms = tokenize(query)
+    if not terms:
+        return []
+    skip = set(skip)
+    categories, _ = get_content_tree().structure()
+    folders = list(categories)
+    results = []
+    while folders and len(results) < limit:
+        folder = folders.pop(0)
+        folders.extend(folder['subfolders'])
+        for f in folder['files']:
+            name = normalize(os.path.splitext(f['name'])[0].replace('_', ' '))
+            if f['path'] in skip or not is_indexable(f['path']) or not all(t in name for t in terms):
+                continue
+            results.append({
+                'path': f['path'],
+                'name': f['name'],
+                'type': f['type'],
+                'size': format_file_size(f['size']),
+                'size_bytes': f['size'],
+                'category': f['path'].split('/', 1)[0],
+                'modified': f['modified'],
+                'score': None,
+                'snippet': None,
+            })
+            if len(results) >= limit:
+                break
+    return results
+
+
+def search_content(query: str, limit: int = 20, snippets: bool = True) -> List[Dict[str, Any]]:
+    """Best-matching library files for query, with a text snippet each
+    (None when snippets is False). While the index is warming, files
+    matched by name only are appended (score and snippet None)."""
+    schedule_sync()
+    hits = get_content_index().search(query, limit)
+    results = []
+    if hits:
+        results = _hit_results(hits, query, snippets)
+    if index_warming() and len(results) < limit:
+        results += _name_matches(query, limit - len(results), [r['path'] for r in results])
+    return results
+
+
+def _hit_results(hits: List[Tuple[int, float]], query: str, snippets: bool) -> List[Dict[str, Any]]:
+    rows = {row.id: row for row in ContentFile.query.filter(
+        ContentFile.id.in_([row_id for row_id, _ in hits]))}
+    results = []
+    for row_id, score in hits:
+        row = rows.get(row_id)
+        if row is None or not is_indexable(row.path):  # folder excluded since the last sync
+            continue
+        results.append({
+            'path': row.path,
+            'name': row.name,
+            'type': row.file_type,
+            'size': format_file_size(row.file_size or 0),
+            'size_bytes': row.file_size,
+            'category': row.path.split('/', 1)[0],
+            'modified': datetime.fromtimestamp(row.file_mtime).isoformat() if row.file_mtime else None,
+            'score': round(score, 4),
+            'snippet': _snippet(row.text, query) if snippets else None,
+        })
+    return results
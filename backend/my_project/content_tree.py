@@ -0,0 +1,396 @@
+"""
+Cached content tree for ΠΥΛΗ ΚΟΙΝΩΝΙΚΗΣ ΜΕΡΙΜΝΑΣ file library
+Scans the content folder with os.scandir (one stat per file) and keeps
+the result per directory. A directory is re-listed only when its own
+mtime changes or it is invalidated explicitly, so a refresh costs one
+stat per directory and untouched subtrees are reused as they are.
+"""
+import os
+import json
+import time
+import base64
+import hashlib
+import logging
+import threading
+import unicodedata
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from flask import current_app
+
+from .file_utils import format_file_size, get_file_type
+
+logger = logging.getLogger(__name__)
+
+# Seconds a built tree is served before directory mtimes are checked again
+CONTENT_TREE_REVALIDATE_SECONDS = float(os.environ.get("CONTENT_TREE_REVALIDATE_SECONDS", 5))
+
+# Top-level entries that are not categories
+ROOT_SKIP = {'.', 'uploads', 'welcome.txt', 'README.md'}
+
+
+def _collate(name: str) -> str:
+    """Sort key for names: case- and accent-insensitive, so έντυπο sorts
+    with the other ε- names rather than before α."""
+    decomposed = unicodedata.normalize("NFD", name.casefold())
+    return "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+
+
+# /api/files/list sort options; ties are broken by name
+SORT_KEYS = {
+    'name': lambda e: _collate(e['name']),
+    'modified': lambda e: e['modified'],
+    'size': lambda e: e['size'],
+    'type': lambda e: e['type'],
+}
+LIST_PAGE_SIZE = 100
+LIST_MAX_PAGE_SIZE = 500
+
+_create_lock = threading.Lock()
+
+
+def content_root(app=None) -> str:
+    """Absolute path of the content folder (UPLOAD_FOLDER)."""
+    app = app or current_app
+    content_dir = app.config['UPLOAD_FOLDER']
+    if not os.path.isabs(content_dir):
+        content_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), content_dir)
+    return content_dir
+
+
+@dataclass
+class _Stats:
+    files: int = 0
+    size: int = 0
+    types: Dict[str, int] = field(default_factory=dict)
+
+    def add(self, other: "_Stats") -> None:
+        self.files += other.files
+        self.size += other.size
+        for t, n in other.types.items():
+            self.types[t] = self.types.get(t, 0) + n
+
+
+@dataclass
+class _Dir:
+    """One scanned directory: its own files and subdirectory names, plus the
+    folder dict and subtree totals last built from it."""
+    mtime_ns: int
+    files: List[Dict[str, Any]]
+    subdirs: List[str]
+    folder: Optional[Dict[str, Any]] = None
+    stats: Optional[_Stats] = None
+    # (sort, order) -> (sorted entries, {(kind, name): position})
+    listings: Dict[Tuple[str, str], Tuple[List[Dict[str, Any]], Dict[Tuple[str, str], int]]] = \
+        field(default_factory=dict)
+
+
+class ContentTree:
+    """Per-process cache of the content folder's structure."""
+
+    def __init__(self, root: str):
+        self.root = os.path.normpath(os.path.abspath(root))
+        self._dirs: Dict[str, _Dir] = {}
+        self._dirty: set = set()
+        self._lock = threading.Lock()
+        self._checked_at = 0.0
+        self._categories: List[Dict[str, Any]] = []
+        self._stats = _Stats()
+        self._updated_at: Optional[datetime] = None
+        self._body: Optional[bytes] = None
+        self._etag: Optional[str] = None
+        self.scans = 0  # directories listed, for tests and diagnostics
+
+    # ── Scanning ──
+
+    def _scan(self, abs_path: str, rel_path: str, mtime_ns: int) -> _Dir:
+        self.scans += 1
+        files, subdirs = [], []
+        try:
+            with os.scandir(abs_path) as it:
+                entries = sorted(it, key=lambda e: e.name)
+        except OSError:
+            entries = []
+        for entry in entries:
+            if entry.name.startswith('.'):
+                continue
+            try:
+                if entry.is_dir():
+                    subdirs.append(entry.name)
+                elif entry.is_file():
+                    st = entry.stat()
+                    files.append({
+                        'name': entry.name,
+                        'path': f"{rel_path}/{entry.name}" if rel_path else entry.name,
+                        'size': st.st_size,
+                        'modified': datetime.fromtimestamp(st.st_mtime).isoformat(),
+                        'type': get_file_type(entry.name),
+                    })
+            except OSError:
+                continue
+        return _Dir(mtime_ns=mtime_ns, files=files, subdirs=subdirs)
+
+    def _visit(self, abs_path: str, rel_path: str, force: bool) -> Tuple[Optional[_Dir], bool]:
+        """Bring one directory and its subtree up to date; returns (node, changed)."""
+        try:
+            mtime_ns = os.stat(abs_path).st_mtime_ns
+        except OSError:
+            self._forget(abs_path)
+            return None, True
+        node = self._dirs.get(abs_path)
+        changed = (force or node is None or node.mtime_ns != mtime_ns or abs_path in self._dirty)
+        if changed:
+            old = node
+            node = self._scan(abs_path, rel_path, mtime_ns)
+            for name in set(old.subdirs if old else ()) - set(node.subdirs):
+                self._forget(os.path.join(abs_path, name))
+            self._dirs[abs_path] = node
+            self._dirty.discard(abs_path)
+
+        children = []
+        for name in node.subdirs:
+            child_rel = f"{rel_path}/{name}" if rel_path else name
+            child, child_changed = self._visit(os.path.join(abs_path, name), child_rel, force)
+            changed = changed or child_changed
+            if child is not None:
+                children.append((name, child))
+
+        if changed or node.folder is None:
+            stats = _Stats()
+            for f in node.files:
+                stats.files += 1
+                stats.size += f['size']
+                stats.types[f['type']] = stats.types.get(f['type'], 0) + 1
+            for _, child in children:
+                stats.add(child.stats)
+            node.stats = stats
+            node.listings = {}
+            node.folder = {
+                'name': os.path.basename(abs_path),
+                'path': rel_path,
+                'files': node.files,
+                'subfolders': [child.folder for _, child in children],
+            }
+        return node, changed
+
+    def _forget(self, abs_path: str) -> None:
+        prefix = abs_path + os.sep
+        for path in [p for p in self._dirs if p == abs_path or p.startswith(prefix)]:
+            del self._dirs[path]
+
+    def _refresh(self, force: bool = False) -> bool:
+        if not os.path.exists(self.root):
+            os.makedirs(self.root, exist_ok=True)
+        root, changed = self._visit(self.root, "", force)
+        if root is None or not (changed or self._updated_at is None):
+            return False
+
+        categories = []
+        stats = _Stats()
+        for name in root.subdirs:
+            if name in ROOT_SKIP:
+                continue
+            node = self._dirs.get(os.path.join(self.root, name))
+            if node is None or node.folder is None:
+                continue
+            categories.append({
+                'id': name.replace(' ', '_').replace('/', '_').replace('\\', '_'),
+                'name': name,
+                'category': name,
+                'path': name,
+                'files': node.folder['files'],
+                'subfolders': node.folder['subfolders'],
+            })
+            stats.add(node.stats)
+        self._categories = categories
+        self._stats = stats
+        self._updated_at = datetime.now()
+        self._body = None
+        return True
+
+    # ── Public API ──
+
+    def invalidate(self, rel_path: str = "") -> None:
+        """Force a re-list of a directory (and rebuild of its ancestors) on
+        the next request, e.g. after a file was overwritten in place, which
+        does not change the directory's mtime."""
+        with self._lock:
+            abs_path = os.path.normpath(os.path.join(self.root, rel_path))
+            if os.path.isfile(abs_path):
+                abs_path = os.path.dirname(abs_path)
+            self._dirty.add(abs_path)
+            self._checked_at = 0.0
+
+    def structure(self, force: bool = False) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+        """(categories, metadata), revalidated at most every
+        CONTENT_TREE_REVALIDATE_SECONDS unless force is set."""
+        with self._lock:
+            now = time.monotonic()
+            if force or self._updated_at is None or now - self._checked_at >= CONTENT_TREE_REVALIDATE_SECONDS:
+                started = time.perf_counter()
+                if self._refresh(force):
+                    logger.info(f"Content tree rebuilt in {(time.perf_counter() - started) * 1000:.1f}ms "
+                                f"({self.scans} directory scans so far)")
+                self._checked_at = now
+            return self._categories, self._metadata()
+
+    def _metadata(self) -> Dict[str, Any]:
+        return {
+            'total_files': self._stats.files,
+            'total_size': self._stats.size,
+            'total_size_formatted': format_file_size(self._stats.size),
+            'file_types': dict(self._stats.types),
+            'last_updated': self._updated_at.isoformat() if self._updated_at else None,
+        }
+
+    def response_body(self) -> Tuple[bytes, str]:
+        """Serialized /api/files/structure payload and its ETag, rebuilt only
+        when the tree changed."""
+        categories, metadata = self.structure()
+        with self._lock:
+            if self._body is None:
+                self._body = json.dumps(
+                    {'categories': categories, 'metadata': metadata, 'status': 'success'},
+                    ensure_ascii=False,
+                ).encode('utf-8')
+                self._etag = hashlib.sha1(self._body).hexdigest()
+            return self._body, self._etag
+
+    # ── Directory listings ──
+
+    def _entries(self, abs_path: str, node: _Dir, sort: str, order: str):
+        """One directory level sorted folders-first, cached on the node until
+        it or anything below it changes."""
+        cached = node.listings.get((sort, order))
+        if cached is not None:
+            return cached
+        at_root = abs_path == self.root
+        rel_path = "" if at_root else os.path.relpath(abs_path, self.root).replace(os.sep, "/")
+        folders = []
+        for name in node.subdirs:
+            child = self._dirs.get(os.path.join(abs_path, name))
+            if (at_root and name in ROOT_SKIP) or child is None or child.stats is None:
+                continue
+            folders.append({
+                'name': name,
+                'path': f"{rel_path}/{name}" if rel_path else name,
+                'type': 'folder',
+                'size': child.stats.size,
+                'modified': datetime.fromtimestamp(child.mtime_ns / 1e9).isoformat(),
+                'total_files': child.stats.files,
+                'total_size': child.stats.size,
+            })
+        files = [] if at_root else node.files
+        key = _sort_key(sort)
+        entries = (sorted(folders, key=key, reverse=order == 'desc')
+                   + sorted(files, key=key, reverse=order == 'desc'))
+        index = {(_kind(e), e['name']): i for i, e in enumerate(entries)}
+        node.listings[(sort, order)] = entries, index
+        return entries, index
+
+    def list_directory(self, rel_path: str = "", cursor: Optional[str] = None,
+                       limit: int = LIST_PAGE_SIZE, sort: str = 'name',
+                       order: str = 'asc') -> Optional[Dict[str, Any]]:
+        """One page of a directory's folders and files, or None if rel_path is
+        not a library directory. Raises ValueError for a bad sort, order,
+        path or cursor.
+
+        Cursors point at the last entry returned, so pages stay consistent
+        when entries are added or removed between requests.
+        """
+        if sort not in SORT_KEYS or order not in ('asc', 'desc'):
+            raise ValueError("Invalid sort or order")
+        parts = [p for p in rel_path.replace('\\', '/').split('/') if p not in ('', '.')]
+        if any(p == '..' for p in parts):
+            raise ValueError("Invalid path")
+        if parts and (parts[0] in ROOT_SKIP or any(p.startswith('.') for p in parts)):
+            return None
+        limit = max(1, min(limit, LIST_MAX_PAGE_SIZE))
+        after = _decode_cursor(cursor, sort) if cursor else None
+
+        self.structure()
+        with self._lock:
+            abs_path = os.path.join(self.root, *parts)
+            node = self._dirs.get(abs_path)
+            if node is None or node.stats is None:
+                return None
+            entries, index = self._entries(abs_path, node, sort, order)
+            start = 0
+            if after is not None:
+                pos = index.get((after['kind'], after['name']))
+                if pos is None:  # cursor entry was removed meanwhile
+                    pos = next((i - 1 for i, e in enumerate(entries)
+                                if _comes_after(e, after, sort, order)), len(entries) - 1)
+                start = pos + 1
+            page = entries[start:start + limit]
+            next_cursor = (_encode_cursor(page[-1], sort)
+                           if page and start + limit < len(entries) else None)
+            return {
+                'path': '/'.join(parts),
+                'parent': '/'.join(parts[:-1]) if parts else None,
+                'items': page,
+                'total': len(entries),
+                'next_cursor': next_cursor,
+                'summary': {
+                    'total_files': node.stats.files,
+                    'total_size': node.stats.size,
+                    'file_types': dict(node.stats.types),
+                },
+            }
+
+
+def _kind(entry: Dict[str, Any]) -> str:
+    return 'folder' if entry['type'] == 'folder' else 'file'
+
+
+def _sort_key(sort: str):
+    value = SORT_KEYS[sort]
+    return lambda e: (value(e), _collate(e['name']), e['name'])
+
+
+def _comes_after(entry: Dict[str, Any], cursor: Dict[str, Any], sort: str, order: str) -> bool:
+    """Whether entry sorts after the (possibly deleted) cursor entry."""
+    kind = _kind(entry)
+    if kind != cursor['kind']:
+        return kind == 'file'
+    key = _sort_key(sort)(entry)
+    cursor_key = (cursor['value'], _collate(cursor['name']), cursor['name'])
+    return key > cursor_key if order == 'asc' else key < cursor_key
+
+
+def _encode_cursor(entry: Dict[str, Any], sort: str) -> str:
+    payload = {'kind': _kind(entry), 'name': entry['name'], 'value': SORT_KEYS[sort](entry)}
+    raw = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def _decode_cursor(cursor: str, sort: str) -> Dict[str, Any]:
+    """Cursor payload, checked against the sort so a stale or tampered
+    cursor cannot reach the comparison in _comes_after."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        payload = json.loads(raw.decode('utf-8'))
+        value = payload['value']
+        # size sorts by byte count; name, type and modified (ISO timestamp) by text
+        value_ok = (isinstance(value, int) and not isinstance(value, bool)
+                    if sort == 'size' else isinstance(value, str))
+        if (payload['kind'] in ('folder', 'file') and isinstance(payload['name'], str)
+                and value_ok):
+            return payload
+    except (ValueError, KeyError, TypeError, AttributeError):
+        pass
+    raise ValueError("Invalid cursor")
+
+
+def get_content_tree() -> ContentTree:
+    """The app's content tree (created on first use, rebuilt if UPLOAD_FOLDER changes)."""
+    app = current_app._get_current_object()
+    root = os.path.normpath(os.path.abspath(content_root(app)))
+    tree = app.extensions.get("content_tree")
+    if tree is None or tree.root != root:
+        with _create_lock:
+            tree = app.extensions.get("content_tree")
+            if tree is None or tree.root != root:
+                tree = app.extensions["content_tree"] = ContentTree(root)
+    return tree
@@ -26,6 +26,7 @@ limiter = Limiter(
 try:
     from celery import Celery
     celery = Celery(__name__, broker='redis://localhost:6379/0', backend='redis://localhost:6379/0')
+    CELERY_AVAILABLE = True
 except ImportError:
     # Celery not installed — create a stub
     class CeleryStub:
@@ -35,4 +36,12 @@ except ImportError:
         class Task:
             def __call__(self, *args, **kwargs):
                 return self.run(*args, **kwargs)
+
+        @staticmethod
+        def task(*args, **kwargs):
+            """@celery.task / @celery.task(name=...) leave the function as-is."""
+            if len(args) == 1 and callable(args[0]) and not kwargs:
+                return args[0]
+            return lambda fn: fn
     celery = CeleryStub()
+    CELERY_AVAILABLE = False
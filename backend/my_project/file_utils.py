@@ -0,0 +1,35 @@
+"""
+File naming helpers shared by the routes, the content tree and the content index
+"""
+import math
+
+
+def get_file_type(filename):
+    """Determine file type based on extension with enhanced categorization."""
+    extension = filename.split('.')[-1].lower() if '.' in filename else ''
+    type_map = {
+        'pdf': 'pdf',
+        'doc': 'document', 'docx': 'document', 'odt': 'document', 'rtf': 'document',
+        'txt': 'text', 'md': 'text', 'rst': 'text', 'csv': 'text',
+        'xlsx': 'spreadsheet', 'xls': 'spreadsheet', 'ods': 'spreadsheet',
+        'ppt': 'presentation', 'pptx': 'presentation', 'odp': 'presentation',
+        'zip': 'archive', 'rar': 'archive', '7z': 'archive', 'tar': 'archive', 'gz': 'archive',
+        'jpg': 'image', 'jpeg': 'image', 'png': 'image', 'gif': 'image', 'bmp': 'image', 'svg': 'image', 'webp': 'image',
+        'mp4': 'video', 'avi': 'video', 'mov': 'video', 'wmv': 'video', 'mkv': 'video', 'webm': 'video',
+        'mp3': 'audio', 'wav': 'audio', 'flac': 'audio', 'aac': 'audio', 'ogg': 'audio',
+        'html': 'web', 'htm': 'web', 'css': 'web', 'js': 'web', 'json': 'web',
+        'py': 'code', 'java': 'code', 'cpp': 'code', 'c': 'code', 'php': 'code',
+    }
+    return type_map.get(extension, 'file')
+
+
+def format_file_size(size_bytes):
+    """Format file size in human readable format."""
+    if size_bytes == 0:
+        return "0 B"
+
+    size_names = ["B", "KB", "MB", "GB", "TB"]
+    i = int(math.floor(math.log(size_bytes, 1024)))
+    p = math.pow(1024, i)
+    s = round(size_bytes / p, 2)
+    return f"{s} {size_names[i]}"
@@ -136,10 +136,33 @@ class FileItem(db.Model):
     category = db.Column(db.String(200), nullable=False)
     file_type = db.Column(db.String(50), nullable=False)
     file_size = db.Column(db.Integer)
+    sha256 = db.Column(db.String(64), index=True)  # content hash, for upload dedup
     uploaded_by = db.Column(db.Integer, db.ForeignKey('users.id'))
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
 
+class ContentFile(db.Model):
+    """A file under UPLOAD_FOLDER in the library search index (see content_index).
+
+    version is bumped whenever name or text changes, so the in-memory
+    search index can tell which rows to reload.
+    """
+    __tablename__ = 'content_file'
+
+    id = db.Column(db.Integer, primary_key=True)
+    path = db.Column(db.String(1000), unique=True, nullable=False)  # relative to UPLOAD_FOLDER
+    name = db.Column(db.String(255), nullable=False)
+    file_type = db.Column(db.String(50))
+    file_size = db.Column(db.BigInteger)
+    file_mtime = db.Column(db.Float)
+    text = db.Column(db.Text)  # extracted text (PDF/DOCX/plain), capped at CONTENT_INDEX_MAX_CHARS
+    text_length = db.Column(db.Integer, default=0)  # before the cap
+    error = db.Column(db.String(500))
+    sha256 = db.Column(db.String(64), index=True)  # content hash, the download ETag
+    version = db.Column(db.Integer, default=1, nullable=False)
+    indexed_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+
 # ============================================================================
 # ENHANCED FORUM MODELS
 # ============================================================================
@@ -436,6 +459,8 @@ class DocumentIndex(db.Model):
     file_name = db.Column(db.String(255), nullable=False)
     file_type = db.Column(db.String(20))  # pdf, docx, txt
     file_hash = db.Column(db.String(64))  # SHA-256 for change detection
+    file_mtime = db.Column(db.Float)  # os.stat() pre-check — skip reading unchanged files
+    file_size = db.Column(db.BigInteger)
     chunk_count = db.Column(db.Integer, default=0)
     status = db.Column(db.String(20), default='pending')  # pending, processing, ready, error
     error_message = db.Column(db.Text)
@@ -459,9 +484,122 @@ class FileChunk(db.Model):
     embedding = db.Column(Vector(1536))  # OpenAI text-embedding-3-small dimension
     embedding_model = db.Column(db.String(50))
     text_hash = db.Column(db.String(64), index=True)  # For deduplication
+    char_start = db.Column(db.Integer)  # content == source text[char_start:char_end]
+    char_end = db.Column(db.Integer)
     created_at = db.Column(db.DateTime, default=db.func.now())
 
 
+class QueryEmbedding(db.Model):
+    """Durable cache of query embeddings, keyed by (model, normalized text hash)."""
+    __tablename__ = 'query_embeddings'
+
+    id = db.Column(db.Integer, primary_key=True)
+    model = db.Column(db.String(50), nullable=False)
+    text_hash = db.Column(db.String(64), nullable=False)  # SHA-256 of normalized query
+    embedding = db.Column(Vector(1536), nullable=False)
+    token_count = db.Column(db.Integer, default=0)
+    created_at = db.Column(db.DateTime, default=db.func.now())
+
+    __table_args__ = (
+        UniqueConstraint('model', 'text_hash', name='uq_query_embeddings_model_hash'),
+    )
+
+
+class AnswerCache(db.Model):
+    """Cached copilot answer, reused for semantically similar first questions.
+
+    source_hashes pins the DocumentIndex.file_hash of every document the
+    answer was built from; the entry is void once any of them changes.
+    """
+    __tablename__ = 'answer_cache'
+
+    id = db.Column(db.Integer, primary_key=True)
+    model = db.Column(db.String(50), nullable=False)  # LLM model that produced the answer
+    role = db.Column(db.String(50), default='')  # Answers are tailored to the asker's role
+    question = db.Column(db.Text, nullable=False)
+    embedding = db.Column(Vector(1536), nullable=False)
+    source_hashes = db.Column(db.Text, default='{}')  # JSON {file_path: file_hash}
+    reply = db.Column(db.Text, nullable=False)
+    sources = db.Column(db.Text, default='[]')  # JSON list of source paths
+    chunks_found = db.Column(db.Integer, default=0)
+    docs_loaded = db.Column(db.Integer, default=0)
+    hit_count = db.Column(db.Integer, default=0)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    last_hit_at = db.Column(db.DateTime)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+
+    __table_args__ = (
+        Index('ix_answer_cache_model_role', 'model', 'role'),
+    )
+
+
+class ReindexJob(db.Model):
+    """A background knowledge-base reindex run."""
+    __tablename__ = 'reindex_jobs'
+
+    ACTIVE_STATUSES = ('queued', 'running')
+
+    id = db.Column(db.Integer, primary_key=True)
+    status = db.Column(db.String(20), default='queued', index=True)  # queued, running, completed, failed, cancelled
+    full = db.Column(db.Boolean, default=False)
+    backend = db.Column(db.String(20))  # celery, thread, eager
+    task_id = db.Column(db.String(100))  # Celery task id
+    requested_by = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=True)
+    cancel_requested = db.Column(db.Boolean, default=False)
+    total_files = db.Column(db.Integer, default=0)
+    processed_files = db.Column(db.Integer, default=0)
+    report = db.Column(db.Text)  # JSON ReindexReport
+    error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+    heartbeat_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    files = db.relationship('ReindexJobFile', backref='job', lazy='dynamic',
+                            cascade='all, delete-orphan', order_by='ReindexJobFile.id')
+
+    def to_dict(self, include_files=False):
+        import json
+        data = {
+            'id': self.id,
+            'status': self.status,
+            'full': self.full,
+            'backend': self.backend,
+            'requested_by': self.requested_by,
+            'cancel_requested': self.cancel_requested,
+            'total_files': self.total_files,
+            'processed_files': self.processed_files,
+            'progress': round(self.processed_files / self.total_files, 4) if self.total_files else 0.0,
+            'report': json.loads(self.report) if self.report else None,
+            'error': self.error,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+        }
+        if include_files:
+            data['files'] = [f.to_dict() for f in self.files]
+        return data
+
+
+class ReindexJobFile(db.Model):
+    """Per-file outcome within a reindex job."""
+    __tablename__ = 'reindex_job_files'
+
+    id = db.Column(db.Integer, primary_key=True)
+    job_id = db.Column(db.Integer, db.ForeignKey('reindex_jobs.id'), nullable=False, index=True)
+    file_path = db.Column(db.String(500), nullable=False)
+    status = db.Column(db.String(20), nullable=False)  # skipped, unchanged, added, updated, empty, error
+    error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def to_dict(self):
+        return {
+            'file_path': self.file_path,
+            'status': self.status,
+            'error': self.error,
+        }
+
+
 # ============================================================================
 # AI CHAT SESSION MODELS
 # ============================================================================
@@ -0,0 +1,214 @@
+"""Daily agenda for oversight staff, scoped to the caller and cached.
+
+The agenda is one UNION ALL query over upcoming inspections, expiring
+licenses, decisions awaiting approval and overdue payments, with the
+priority computed and sorted in SQL. Each branch is restricted to the
+structures the user is responsible for: everything for admins, their
+peripheral unit for directors and administrative staff, and otherwise
+the structures they advise or are assigned to (directly or through an
+inspection committee). Results are cached per user for the day, until a
+relevant commit or AGENDA_CACHE_TTL seconds (for other processes' writes),
+keeping the AGENDA_CACHE_SIZE most recently used agendas.
+"""
+import os
+from datetime import date, timedelta
+from typing import Any, Dict, Optional, Tuple
+
+from sqlalchemy import (Date, Float, String, and_, case, func, literal, null, or_, select, type_coerce,
+                        union, union_all)
+
+from ..caching import CommitCache
+from ..extensions import db
+from .events import on_commit_of
+from .models import UserRole
+
+AGENDA_CACHE_TTL = float(os.environ.get("AGENDA_CACHE_TTL", 300))
+AGENDA_CACHE_SIZE = int(os.environ.get("AGENDA_CACHE_SIZE", 256))
+INSPECTION_DAYS = 7
+LICENSE_DAYS = 30
+LICENSE_URGENT_DAYS = 7
+
+PRIORITIES = ('critical', 'high', 'medium', 'low')
+ALL_STRUCTURES = None
+
+_cache = CommitCache(AGENDA_CACHE_SIZE, AGENDA_CACHE_TTL)
+
+
+def _watched_models() -> Tuple[type, ...]:
+    from ..models import User
+    from ..registry.models import License, Sanction, Structure
+    from ..inspections.models import CommitteeMembership, CommitteeStructureAssignment, Inspection
+    from ..sanctions.models import SanctionDecision
+    return (Inspection, License, Structure, Sanction, SanctionDecision, UserRole,
+            CommitteeMembership, CommitteeStructureAssignment, User)
+
+
+def invalidate_agenda() -> None:
+    """Drop every cached agenda in this process."""
+    _cache.invalidate()
+
+
+on_commit_of(_watched_models, invalidate_agenda)
+
+
+# ── Scope ──
+
+def agenda_scope(user_id: int) -> Optional[Tuple[str, Any]]:
+    """ALL_STRUCTURES, ('unit', peripheral unit) or ('user', user_id) for
+    a user limited to the structures assigned to them."""
+    from ..models import User
+
+    user = db.session.get(User, user_id)
+    if user is None:
+        return ('user', user_id)
+    if user.role == 'admin':
+        return ALL_STRUCTURES
+    roles = {role for (role,) in db.session.query(UserRole.role).filter_by(user_id=user_id)}
+    if roles & {'director', 'administrative'}:
+        return ('unit', user.peripheral_unit) if user.peripheral_unit else ALL_STRUCTURES
+    return ('user', user_id)
+
+
+def _structure_filter(scope, user_id_column=None, committee_column=None):
+    """SQL condition limiting a branch to the scope's structures.
+    Inspections also match on their own inspector and committee."""
+    from ..registry.models import Structure
+    from ..inspections.models import CommitteeMembership, CommitteeStructureAssignment
+
+    kind, value = scope
+    if kind == 'unit':
+        return Structure.peripheral_unit == value
+    committees = select(CommitteeMembership.committee_id).where(CommitteeMembership.user_id == value)
+    assigned = union(
+        select(UserRole.structure_id).where(UserRole.user_id == value, UserRole.structure_id.isnot(None)),
+        select(Structure.id).where(Structure.advisor_id == value),
+        select(CommitteeStructureAssignment.structure_id).where(
+            CommitteeStructureAssignment.committee_id.in_(committees)),
+    )
+    conditions = [Structure.id.in_(assigned)]
+    if user_id_column is not None:
+        conditions.append(user_id_column == value)
+    if committee_column is not None:
+        conditions.append(committee_column.in_(committees))
+    return or_(*conditions)
+
+
+# ── Query ──
+
+def _or_null(column, type_):
+    # Typed NULLs, so every branch of the union yields the same column types
+    return column if column is not None else type_coerce(null(), type_)
+
+
+def _agenda_query(scope, today: date):
+    from ..registry.models import License, Sanction, Structure
+    from ..inspections.models import Inspection
+    from ..sanctions.models import SanctionDecision
+
+    rank = {p: i for i, p in enumerate(PRIORITIES)}
+
+    def branch(kind, priority, item_id, structure_id, day, detail=None, amount=None,
+               obligor=None, deadline=None):
+        return select(
+            literal(kind).label('kind'), priority.label('priority'), item_id.label('item_id'),
+            structure_id.label('structure_id'), Structure.name.label('structure_name'),
+            day.label('day'), _or_null(detail, String).label('detail'),
+            _or_null(amount, Float).label('amount'), _or_null(obligor, String).label('obligor'),
+            _or_null(deadline, Date).label('deadline'),
+        )
+
+    def scoped(query, *columns):
+        if scope is ALL_STRUCTURES:
+            return query
+        return query.where(_structure_filter(scope, *columns))
+
+    inspections = scoped(branch(
+        'inspection',
+        case((Inspection.scheduled_date == today, rank['high']), else_=rank['medium']),
+        Inspection.id, Inspection.structure_id, Inspection.scheduled_date, detail=Inspection.type,
+    ).outerjoin(Structure, Structure.id == Inspection.structure_id).where(
+        Inspection.scheduled_date.between(today, today + timedelta(days=INSPECTION_DAYS)),
+        Inspection.status.in_(['scheduled', 'pending']),
+    ), Inspection.inspector_id, Inspection.committee_id)
+
+    licenses = scoped(branch(
+        'license_expiring',
+        case((License.expiry_date <= today + timedelta(days=LICENSE_URGENT_DAYS), rank['high']),
+             else_=rank['medium']),
+        License.id, License.structure_id, License.expiry_date, detail=License.type,
+    ).outerjoin(Structure, Structure.id == License.structure_id).where(
+        License.expiry_date.between(today, today + timedelta(days=LICENSE_DAYS)),
+        License.status == 'active',
+    ))
+
+    def decisions(kind, priority, day, *conditions):
+        return scoped(branch(
+            kind, literal(rank[priority]), SanctionDecision.id, Sanction.structure_id, day,
+            amount=SanctionDecision.final_amount, obligor=SanctionDecision.obligor_name,
+            deadline=SanctionDecision.payment_deadline,
+        ).outerjoin(Sanction, Sanction.id == SanctionDecision.sanction_id).outerjoin(
+            Structure, Structure.id == Sanction.structure_id
+        ).where(*conditions))
+
+    pending = decisions(
+        'pending_approval', 'high',
+        func.coalesce(func.date(SanctionDecision.created_at, type_=Date), today),
+        SanctionDecision.status == 'submitted',
+    )
+    overdue = decisions(
+        'overdue_payment', 'critical', SanctionDecision.payment_deadline,
+        and_(SanctionDecision.status == 'notified', SanctionDecision.payment_deadline < today),
+    )
+
+    agenda = union_all(inspections, licenses, pending, overdue).subquery()
+    return select(agenda).order_by(agenda.c.priority, agenda.c.day, agenda.c.kind, agenda.c.item_id)
+
+
+def _item(row, today: date) -> Dict[str, Any]:
+    name = row.structure_name or "N/A"
+    day = row.day if isinstance(row.day, date) else today
+    item = {
+        'type': row.kind,
+        'priority': PRIORITIES[row.priority],
+        'date': day.isoformat(),
+        'structure_id': row.structure_id,
+    }
+    if row.kind == 'inspection':
+        item.update(title=f'Έλεγχος: {name}',
+                    subtitle=f'{row.detail} - {day.strftime("%d/%m/%Y")}',
+                    link=f'/inspections/{row.item_id}/report')
+    elif row.kind == 'license_expiring':
+        item.update(title=f'Λήξη Άδειας: {name}',
+                    subtitle=f'{row.detail} - σε {(day - today).days} ημέρες ({day.strftime("%d/%m/%Y")})',
+                    link=f'/registry/{row.structure_id}')
+    elif row.kind == 'pending_approval':
+        item.update(title=f'Εκκρεμεί Έγκριση: {row.obligor or "N/A"}',
+                    subtitle=f'Ποσό: {row.amount}€',
+                    link=f'/sanctions/decisions/{row.item_id}')
+    else:
+        item.update(title=f'Εκπρόθεσμη Πληρωμή: {row.obligor or "N/A"}',
+                    subtitle=f'Ποσό: {row.amount}€ - Προθεσμία: {row.deadline.strftime("%d/%m/%Y")}',
+                    link=f'/sanctions/decisions/{row.item_id}')
+    return item
+
+
+def build_agenda(user_id: int, today: Optional[date] = None) -> Dict[str, Any]:
+    """The user's agenda for today, most urgent first."""
+    today = today or date.today()
+    items = [_item(row, today) for row in db.session.execute(_agenda_query(agenda_scope(user_id), today))]
+    return {
+        'date': today.isoformat(),
+        'items': items,
+        'summary': {
+            'total': len(items),
+            'critical': sum(1 for a in items if a['priority'] == 'critical'),
+            'high': sum(1 for a in items if a['priority'] == 'high'),
+        },
+    }
+
+
+def get_agenda(user_id: int) -> Dict[str, Any]:
+    """Cached agenda for a user, rebuilt on a new day, after a relevant
+    commit or after AGENDA_CACHE_TTL seconds."""
+    today = date.today()
+    return _cache.get_or_build((user_id, today), lambda: build_agenda(user_id, today))
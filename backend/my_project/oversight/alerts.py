@@ -0,0 +1,312 @@
+"""Materialized oversight alerts.
+
+refresh_alerts() evaluates each alert condition with a filtered SQL query
+(only rows that currently raise an alert are read) and reconciles the
+result with the active rows of the alerts table: new conditions are
+inserted, changed ones updated in place, and ones that no longer hold are
+marked resolved. Reads then page through active alerts by
+(severity_rank, id), so their cost depends on the page size, not on how
+many licenses or sanction decisions exist.
+
+Refreshes run in the background, never inside a read: after a commit
+that touched licenses, structures, sanction decisions or advisor reports,
+when a read finds the last refresh older than ALERTS_REFRESH_SECONDS or
+from another day (deadlines move with the date), and on the Celery beat
+schedule via the oversight.refresh_alerts task. ALERTS_REFRESH_BACKEND
+picks the in-process thread (default) or Celery; 'none' (tests) schedules
+nothing and leaves refreshing to the caller.
+"""
+import os
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from flask import current_app
+from sqlalchemy import and_, or_
+
+from ..extensions import db, celery
+from .events import on_commit_of
+from .models import Alert, AlertAcknowledgement, SocialAdvisorReport
+
+logger = logging.getLogger(__name__)
+
+ALERTS_REFRESH_SECONDS = float(os.environ.get("ALERTS_REFRESH_SECONDS", 300))
+SEVERITY_RANK = {'critical': 0, 'warning': 1, 'info': 2}
+ALERTS_PAGE_SIZE = 100
+ALERTS_MAX_PAGE_SIZE = 500
+
+LICENSE_WARNING_DAYS = 90
+PAYMENT_WARNING_DAYS = 7
+APPEAL_WARNING_DAYS = 3
+
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="oversight-alerts")
+# queued: a thread refresh is waiting to start; at/day: when the last one was scheduled
+_state = {'queued': False, 'at': 0.0, 'day': None, 'future': None}
+_lock = threading.Lock()
+
+
+def _watched_models() -> Tuple[type, ...]:
+    from ..registry.models import License, Sanction, Structure
+    from ..sanctions.models import SanctionDecision
+    return (License, Structure, Sanction, SanctionDecision, SocialAdvisorReport)
+
+
+def schedule_refresh() -> bool:
+    """Queue a background refresh unless one is already waiting to start.
+    Returns whether one was queued."""
+    app = current_app._get_current_object()
+    backend = app.config.get('ALERTS_REFRESH_BACKEND', 'thread')
+    if backend == 'none':
+        return False
+    with _lock:
+        if _state['queued']:
+            return False
+        _state['queued'] = True
+        _state['at'], _state['day'] = time.monotonic(), date.today()
+    if backend == 'celery':
+        try:
+            refresh_alerts_task.apply_async(retry=False)
+            with _lock:
+                _state['queued'] = False
+            return True
+        except Exception as e:
+            logger.warning(f"Celery unavailable for the alert refresh, using a thread: {e}")
+    _state['future'] = _executor.submit(_run_in_app_context, app)
+    return True
+
+
+on_commit_of(_watched_models, schedule_refresh)
+
+
+# ── Computing ──
+
+def _alert(type_: str, severity: str, message: str, structure_id: Optional[int], unit: Optional[str],
+           due_date: Optional[date] = None, report_id: Optional[int] = None,
+           decision_id: Optional[int] = None) -> Dict[str, Any]:
+    return {
+        'type': type_, 'severity': severity, 'severity_rank': SEVERITY_RANK[severity],
+        'message': message, 'structure_id': structure_id, 'peripheral_unit': unit,
+        'due_date': due_date, 'report_id': report_id, 'decision_id': decision_id,
+    }
+
+
+def compute_alerts(today: Optional[date] = None) -> Dict[str, Dict[str, Any]]:
+    """{key: alert fields} for every condition that currently holds."""
+    from ..registry.models import License, Sanction, Structure
+    from ..sanctions.models import SanctionDecision
+
+    today = today or date.today()
+    alerts: Dict[str, Dict[str, Any]] = {}
+
+    licenses = db.session.query(
+        License.id, License.structure_id, License.expiry_date, Structure.name, Structure.peripheral_unit
+    ).outerjoin(Structure, Structure.id == License.structure_id).filter(
+        License.status == 'active',
+        License.expiry_date <= today + timedelta(days=LICENSE_WARNING_DAYS),
+    )
+    for license_id, structure_id, expiry, name, unit in licenses:
+        if expiry < today:
+            alerts[f'license_expired:{license_id}'] = _alert(
+                'license_expired', 'critical',
+                f'Η άδεια της δομής "{name or "?"}" έχει λήξει ({expiry.isoformat()})',
+                structure_id, unit, expiry)
+        else:
+            alerts[f'license_expiring:{license_id}'] = _alert(
+                'license_expiring', 'warning',
+                f'Η άδεια της δομής "{name or "?"}" λήγει στις {expiry.isoformat()}',
+                structure_id, unit, expiry)
+
+    reports = db.session.query(
+        SocialAdvisorReport.id, SocialAdvisorReport.structure_id, SocialAdvisorReport.drafted_date,
+        Structure.peripheral_unit
+    ).outerjoin(Structure, Structure.id == SocialAdvisorReport.structure_id).filter(
+        SocialAdvisorReport.status == 'submitted'
+    )
+    for report_id, structure_id, drafted, unit in reports:
+        alerts[f'report_pending_approval:{report_id}'] = _alert(
+            'report_pending_approval', 'info',
+            f'Εκκρεμεί έγκριση έκθεσης κοιν. συμβούλου ({drafted.isoformat() if drafted else "?"})',
+            structure_id, unit, report_id=report_id)
+
+    payment_soon = today + timedelta(days=PAYMENT_WARNING_DAYS)
+    appeal_soon = today + timedelta(days=APPEAL_WARNING_DAYS)
+    decisions = db.session.query(
+        SanctionDecision.id, SanctionDecision.status, SanctionDecision.final_amount,
+        SanctionDecision.payment_deadline, SanctionDecision.appeal_deadline,
+        Sanction.structure_id, Structure.name, Structure.peripheral_unit
+    ).outerjoin(Sanction, Sanction.id == SanctionDecision.sanction_id).outerjoin(
+        Structure, Structure.id == Sanction.structure_id
+    ).filter(or_(
+        SanctionDecision.status == 'returned',
+        and_(SanctionDecision.status == 'notified', or_(
+            SanctionDecision.payment_deadline <= payment_soon,
+            SanctionDecision.appeal_deadline.between(today, appeal_soon),
+        )),
+    ))
+    for decision_id, status, amount, payment, appeal, structure_id, name, unit in decisions:
+        name = name or "?"
+        if status == 'returned':
+            alerts[f'decision_returned:{decision_id}'] = _alert(
+                'decision_returned', 'info',
+                f'Απόφαση κύρωσης επιστράφηκε για διόρθωση — {name}',
+                structure_id, unit, decision_id=decision_id)
+            continue
+        if payment and payment < today:
+            alerts[f'payment_overdue:{decision_id}'] = _alert(
+                'payment_overdue', 'critical',
+                f'Εκπρόθεσμη πληρωμή προστίμου {amount or 0:,.0f}€ — {name} (λήξη: {payment.isoformat()})',
+                structure_id, unit, payment, decision_id=decision_id)
+        elif payment and payment <= payment_soon:
+            alerts[f'payment_approaching:{decision_id}'] = _alert(
+                'payment_approaching', 'warning',
+                f'Πληρωμή προστίμου {amount or 0:,.0f}€ λήγει {payment.isoformat()} — {name}',
+                structure_id, unit, payment, decision_id=decision_id)
+        if appeal and today <= appeal <= appeal_soon:
+            alerts[f'appeal_deadline_approaching:{decision_id}'] = _alert(
+                'appeal_deadline_approaching', 'warning',
+                f'Λήξη προθεσμίας ένστασης {appeal.isoformat()} — {name}',
+                structure_id, unit, appeal, decision_id=decision_id)
+    return alerts
+
+
+def refresh_alerts(today: Optional[date] = None) -> Dict[str, int]:
+    """Reconcile the alerts table with the current conditions."""
+    desired = compute_alerts(today)
+    active = {a.key: a for a in Alert.query.filter(Alert.resolved_at.is_(None))}
+    now = datetime.utcnow()
+    stats = {'created': 0, 'updated': 0, 'resolved': 0, 'active': len(desired)}
+
+    for key, fields in desired.items():
+        alert = active.pop(key, None)
+        if alert is None:
+            alert = Alert.query.filter_by(key=key).first()
+            if alert is None:
+                alert = Alert(key=key, created_at=now)
+                db.session.add(alert)
+            else:
+                # The condition came back: show it again to everyone
+                alert.resolved_at = None
+                alert.created_at = now
+                AlertAcknowledgement.query.filter_by(alert_id=alert.id).delete()
+            stats['created'] += 1
+        elif all(getattr(alert, name) == value for name, value in fields.items()):
+            continue
+        else:
+            stats['updated'] += 1
+        for name, value in fields.items():
+            setattr(alert, name, value)
+        alert.updated_at = now
+
+    for alert in active.values():
+        alert.resolved_at = now
+    stats['resolved'] = len(active)
+    db.session.commit()
+    if stats['created'] or stats['updated'] or stats['resolved']:
+        logger.info(f"Oversight alerts refreshed: {stats}")
+    return stats
+
+
+def refresh_if_due() -> None:
+    """Schedule a refresh if the last one is from another day or older than
+    ALERTS_REFRESH_SECONDS. Does not wait for it."""
+    if _state['day'] != date.today() or time.monotonic() - _state['at'] >= ALERTS_REFRESH_SECONDS:
+        schedule_refresh()
+
+
+def _run_in_app_context(app) -> None:
+    with app.app_context():
+        with _lock:
+            _state['queued'] = False  # commits from here on queue another run
+        try:
+            refresh_alerts()
+        except Exception as e:
+            db.session.rollback()
+            _state['at'] = 0.0  # retried on the next read
+            logger.error(f"Oversight alert refresh failed: {e}")
+        finally:
+            db.session.remove()
+
+
+def wait_for_refresh(timeout: Optional[float] = None) -> None:
+    """Block until the last thread refresh has finished (tests, CLI)."""
+    future = _state['future']
+    if future is not None:
+        future.result(timeout=timeout)
+
+
+@celery.task(name="oversight.refresh_alerts")
+def refresh_alerts_task():
+    refresh_alerts()
+
+
+# ── Reading ──
+
+def _decode_cursor(cursor: str) -> Tuple[int, int]:
+    rank, _, alert_id = cursor.partition('.')
+    return int(rank), int(alert_id)
+
+
+def list_alerts(user_id: int, unit: Optional[str] = None, cursor: Optional[str] = None,
+                limit: Optional[int] = ALERTS_PAGE_SIZE, acknowledged: str = 'exclude',
+                type_: Optional[str] = None, severity: Optional[str] = None
+                ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """One page of active alerts, most severe first: (items, next cursor).
+    limit=None returns every matching alert in one page.
+
+    acknowledged: 'exclude' (default), 'include' or 'only' for the user's
+    acknowledgements. Raises ValueError for a malformed cursor or option.
+    """
+    if acknowledged not in ('exclude', 'include', 'only'):
+        raise ValueError(f"Invalid acknowledged option: {acknowledged}")
+    refresh_if_due()
+
+    ack = AlertAcknowledgement
+    query = db.session.query(Alert, ack.acknowledged_at).outerjoin(
+        ack, and_(ack.alert_id == Alert.id, ack.user_id == user_id)
+    ).filter(Alert.resolved_at.is_(None))
+    if unit:
+        query = query.filter(Alert.peripheral_unit == unit)
+    if type_:
+        query = query.filter(Alert.type == type_)
+    if severity:
+        query = query.filter(Alert.severity == severity)
+    if acknowledged == 'exclude':
+        query = query.filter(ack.id.is_(None))
+    elif acknowledged == 'only':
+        query = query.filter(ack.id.isnot(None))
+    if cursor:
+        rank, after_id = _decode_cursor(cursor)
+        query = query.filter(or_(Alert.severity_rank > rank,
+                                 and_(Alert.severity_rank == rank, Alert.id > after_id)))
+
+    query = query.order_by(Alert.severity_rank, Alert.id)
+    if limit is None:
+        rows = query.all()
+        limit = len(rows)
+    else:
+        limit = max(1, min(limit, ALERTS_MAX_PAGE_SIZE))
+        rows = query.limit(limit + 1).all()
+    items = [{**alert.to_dict(), 'acknowledged': acked_at is not None,
+              'acknowledged_at': acked_at.isoformat() if acked_at else None}
+             for alert, acked_at in rows[:limit]]
+    next_cursor = None
+    if len(rows) > limit:
+        last = rows[limit - 1][0]
+        next_cursor = f'{last.severity_rank}.{last.id}'
+    return items, next_cursor
+
+
+def acknowledge_alert(alert_id: int, user_id: int, acknowledged: bool = True) -> bool:
+    """Set or clear a user's acknowledgement. False if there is no such alert."""
+    if db.session.get(Alert, alert_id) is None:
+        return False
+    existing = AlertAcknowledgement.query.filter_by(alert_id=alert_id, user_id=user_id).first()
+    if acknowledged and existing is None:
+        db.session.add(AlertAcknowledgement(alert_id=alert_id, user_id=user_id))
+    elif not acknowledged and existing is not None:
+        db.session.delete(existing)
+    db.session.commit()
+    return True
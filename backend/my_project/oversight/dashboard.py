@@ -0,0 +1,176 @@
+"""Oversight dashboard aggregation with a short-lived, per-unit cache.
+
+The dashboard counts come from a handful of GROUP BY queries (one per
+table) instead of one count() per figure, and the assembled payload is
+cached per peripheral unit for DASHBOARD_CACHE_TTL seconds, keeping the
+DASHBOARD_CACHE_SIZE most recently used units (the unit comes from the
+query string, so the cache must not grow with it). Any commit
+that touches structures, inspections, sanctions or reports invalidates
+every cached payload in this process; other processes catch up within
+the TTL.
+"""
+import os
+from datetime import date
+from typing import Any, Dict, Optional, Tuple
+
+from sqlalchemy import case, extract, func
+from sqlalchemy.orm import joinedload
+
+from ..caching import CommitCache
+from ..extensions import db
+from .events import on_commit_of
+from .models import SocialAdvisorReport
+
+DASHBOARD_CACHE_TTL = float(os.environ.get("DASHBOARD_CACHE_TTL", 30))
+DASHBOARD_CACHE_SIZE = int(os.environ.get("DASHBOARD_CACHE_SIZE", 64))
+ALL_UNITS = "*"
+
+_cache = CommitCache(DASHBOARD_CACHE_SIZE, DASHBOARD_CACHE_TTL)
+
+
+def _watched_models() -> Tuple[type, ...]:
+    from ..registry.models import License, Sanction, Structure
+    from ..inspections.models import Inspection, InspectionReport
+    from ..sanctions.models import SanctionDecision
+    return (Structure, License, Sanction, SanctionDecision, Inspection, InspectionReport,
+            SocialAdvisorReport)
+
+
+def invalidate_dashboard() -> None:
+    """Drop every cached dashboard payload in this process."""
+    _cache.invalidate()
+
+
+on_commit_of(_watched_models, invalidate_dashboard)
+
+
+def _month_start(today: date, months_back: int) -> date:
+    month = today.month - months_back
+    year = today.year
+    while month <= 0:
+        month += 12
+        year -= 1
+    return date(year, month, 1)
+
+
+def build_dashboard(unit: Optional[str] = None) -> Dict[str, Any]:
+    """Dashboard payload for one peripheral unit (None = all units)."""
+    from ..registry.models import Sanction, Structure, StructureType
+    from ..inspections.models import Inspection
+    from ..sanctions.models import SanctionDecision
+
+    def scoped(query, *joins):
+        """Restrict a query to structures of the unit, joining through joins."""
+        if unit is None:
+            return query
+        for target, condition in joins:
+            query = query.join(target, condition)
+        return query.filter(Structure.peripheral_unit == unit)
+
+    via_structure = lambda model: [(Structure, Structure.id == model.structure_id)]  # noqa: E731
+
+    structure_status = dict(scoped(
+        db.session.query(Structure.status, func.count(Structure.id))
+    ).group_by(Structure.status).all())
+
+    type_counts = scoped(
+        db.session.query(StructureType.name, func.count(Structure.id))
+        .join(Structure, Structure.type_id == StructureType.id)
+    ).group_by(StructureType.name).all()
+
+    inspection_status = dict(scoped(
+        db.session.query(Inspection.status, func.count(Inspection.id)),
+        *via_structure(Inspection)
+    ).group_by(Inspection.status).all())
+
+    today = date.today()
+    since = _month_start(today, 11)
+    year, month = extract('year', Inspection.scheduled_date), extract('month', Inspection.scheduled_date)
+    per_month = {
+        (int(y), int(m)): n for y, m, n in scoped(
+            db.session.query(year, month, func.count(Inspection.id)),
+            *via_structure(Inspection)
+        ).filter(Inspection.scheduled_date >= since).group_by(year, month).all()
+    }
+    inspections_by_month = []
+    for i in range(11, -1, -1):
+        start = _month_start(today, i)
+        inspections_by_month.append({
+            'month': f'{start.year}-{start.month:02d}',
+            'count': per_month.get((start.year, start.month), 0),
+        })
+
+    report_status = dict(scoped(
+        db.session.query(SocialAdvisorReport.status, func.count(SocialAdvisorReport.id)),
+        *via_structure(SocialAdvisorReport)
+    ).group_by(SocialAdvisorReport.status).all())
+
+    sanction_status = scoped(
+        db.session.query(Sanction.status, func.count(Sanction.id)),
+        *via_structure(Sanction)
+    ).group_by(Sanction.status).all()
+
+    overdue = case((SanctionDecision.payment_deadline < today, 1), else_=0)
+    decision_rows = scoped(
+        db.session.query(
+            SanctionDecision.status,
+            func.count(SanctionDecision.id),
+            func.sum(overdue),
+            func.coalesce(func.sum(SanctionDecision.final_amount), 0),
+            func.coalesce(func.sum(SanctionDecision.paid_amount), 0),
+        ),
+        (Sanction, Sanction.id == SanctionDecision.sanction_id),
+        *via_structure(Sanction)
+    ).group_by(SanctionDecision.status).all()
+    decisions = {status: (count, late or 0, amount, paid)
+                 for status, count, late, amount, paid in decision_rows}
+    decision_stats = {s: decisions.get(s, (0,))[0]
+                      for s in ('draft', 'submitted', 'approved', 'notified', 'paid')}
+    decision_stats.update({
+        'overdue': decisions.get('notified', (0, 0))[1],
+        'total_amount_pending': sum(decisions.get(s, (0, 0, 0))[2] for s in ('approved', 'notified')),
+        'total_amount_paid': decisions.get('paid', (0, 0, 0, 0))[3],
+    })
+
+    recent_inspections = scoped(
+        Inspection.query.options(joinedload(Inspection.structure), joinedload(Inspection.report)),
+        *via_structure(Inspection)
+    ).order_by(Inspection.scheduled_date.desc()).limit(5).all()
+    recent_reports = scoped(
+        SocialAdvisorReport.query.options(joinedload(SocialAdvisorReport.structure),
+                                          joinedload(SocialAdvisorReport.author)),
+        *via_structure(SocialAdvisorReport)
+    ).order_by(SocialAdvisorReport.created_at.desc()).limit(5).all()
+
+    return {
+        'stats': {
+            'total_structures': sum(structure_status.values()),
+            'active_structures': structure_status.get('active', 0),
+            'total_inspections': sum(inspection_status.values()),
+            'completed_inspections': inspection_status.get('completed', 0),
+            'pending_reports': report_status.get('draft', 0),
+            'submitted_reports': report_status.get('submitted', 0),
+            'total_sanctions': sum(count for _, count in sanction_status),
+        },
+        'decision_stats': decision_stats,
+        'structures_by_type': [{'name': name, 'count': count} for name, count in type_counts],
+        'inspections_by_month': inspections_by_month,
+        'sanctions_by_status': [{'status': status, 'count': count} for status, count in sanction_status],
+        'recent_inspections': [{
+            **i.to_dict(),
+            'structure_name': i.structure.name if i.structure else None,
+            'report': i.report.to_dict() if i.report else None,
+        } for i in recent_inspections],
+        'recent_reports': [{
+            **r.to_dict(),
+            'structure_name': r.structure.name if r.structure else None,
+            'author_name': r.author.username if r.author else None,
+        } for r in recent_reports],
+        'peripheral_unit': unit,
+    }
+
+
+def get_dashboard(unit: Optional[str] = None) -> Dict[str, Any]:
+    """Cached dashboard payload for a unit, rebuilt after DASHBOARD_CACHE_TTL
+    seconds or once a relevant write has been committed."""
+    return _cache.get_or_build(unit or ALL_UNITS, lambda: build_dashboard(unit))
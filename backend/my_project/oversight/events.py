@@ -0,0 +1,42 @@
+"""Commit hooks for the oversight caches (dashboard, alerts).
+
+Subscribers name the models they derive data from; their callback runs
+after a commit that inserted, updated or deleted any of them. Rolled-back
+writes are forgotten.
+"""
+from itertools import chain
+from typing import Callable, List, Tuple
+
+from sqlalchemy import event
+
+from ..extensions import db
+
+# (models provider, callback); models are resolved lazily to avoid import cycles
+_subscribers: List[Tuple[Callable[[], Tuple[type, ...]], Callable[[], None]]] = []
+
+
+def on_commit_of(models: Callable[[], Tuple[type, ...]], callback: Callable[[], None]) -> None:
+    _subscribers.append((models, callback))
+
+
+@event.listens_for(db.session, "after_flush")
+def _note_writes(session, flush_context):
+    written = {type(obj) for obj in chain(session.new, session.dirty, session.deleted)}
+    if written:
+        session.info.setdefault("oversight_writes", set()).update(written)
+
+
+@event.listens_for(db.session, "after_commit")
+def _after_commit(session):
+    written = session.info.pop("oversight_writes", None)
+    if not written:
+        return
+    for models, callback in _subscribers:
+        watched = models()
+        if any(issubclass(cls, watched) for cls in written):
+            callback()
+
+
+@event.listens_for(db.session, "after_rollback")
+def _forget_rolled_back(session):
+    session.info.pop("oversight_writes", None)
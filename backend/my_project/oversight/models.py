@@ -63,3 +63,54 @@ class SocialAdvisorReport(db.Model):
             'approved_at': self.approved_at.isoformat() if self.approved_at else None,
             'created_at': self.created_at.isoformat() if self.created_at else None,
         }
+
+
+class Alert(db.Model):
+    """A materialized oversight alert (see oversight.alerts).
+
+    key identifies the condition (e.g. 'license_expired:12') so a refresh
+    updates the row in place; resolved_at is set once the condition no
+    longer holds, keeping history out of the active reads.
+    """
+    __tablename__ = 'alerts'
+    id = db.Column(db.Integer, primary_key=True)
+    key = db.Column(db.String(100), unique=True, nullable=False)
+    type = db.Column(db.String(50), nullable=False)
+    severity = db.Column(db.String(20), nullable=False)
+    severity_rank = db.Column(db.Integer, nullable=False)  # 0 critical, 1 warning, 2 info
+    message = db.Column(db.Text, nullable=False)
+    structure_id = db.Column(db.Integer, db.ForeignKey('structures.id'), nullable=True)
+    peripheral_unit = db.Column(db.String(100), nullable=True, index=True)
+    report_id = db.Column(db.Integer, nullable=True)
+    decision_id = db.Column(db.Integer, nullable=True)
+    due_date = db.Column(db.Date, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+    resolved_at = db.Column(db.DateTime, nullable=True)
+
+    __table_args__ = (db.Index('ix_alerts_active_order', 'resolved_at', 'severity_rank', 'id'),)
+
+    def to_dict(self):
+        d = {
+            'id': self.id, 'type': self.type, 'severity': self.severity,
+            'message': self.message, 'structure_id': self.structure_id,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+        }
+        if self.due_date:
+            d['date'] = self.due_date.isoformat()
+        if self.report_id:
+            d['report_id'] = self.report_id
+        if self.decision_id:
+            d['decision_id'] = self.decision_id
+        return d
+
+
+class AlertAcknowledgement(db.Model):
+    """A user's acknowledgement of an alert; hides it from their default feed."""
+    __tablename__ = 'alert_acknowledgements'
+    id = db.Column(db.Integer, primary_key=True)
+    alert_id = db.Column(db.Integer, db.ForeignKey('alerts.id', ondelete='CASCADE'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    acknowledged_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = (db.UniqueConstraint('alert_id', 'user_id'),)
@@ -1,10 +1,18 @@
-"""Report generation utilities (PDF/XLSX).
+"""Report generation utilities (PDF/XLSX/CSV/NDJSON).
 
-Each generate_* function returns bytes (the file content).
+Report rows are read with yield_per, so exports do not hold the whole
+result set. generate_*_pdf functions return bytes (the PDF table is laid
+out in one pass); generate_*_xlsx functions write a write-only workbook
+to a temporary file and return it, rewound; CSV and NDJSON are generators
+of text chunks streamed straight to the response.
 The route handler wraps these in a Flask Response with the correct mimetype.
 """
 import io
+import csv
+import json
+import tempfile
 from datetime import date
+from itertools import chain, islice
 
 from reportlab.lib import colors
 from reportlab.lib.pagesizes import A4
@@ -17,7 +25,11 @@ from reportlab.pdfbase import pdfmetrics
 from reportlab.pdfbase.ttfonts import TTFont
 
 from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
 from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
+from openpyxl.utils import get_column_letter
+from sqlalchemy import case, func
+from sqlalchemy.orm import joinedload
 
 from ..extensions import db
 from ..registry.models import Structure, StructureType, License, Sanction
@@ -72,23 +84,82 @@ def _pdf_table_style():
     ])
 
 
-def _xl_write_header(ws, headers, row=1):
-    for col, h in enumerate(headers, 1):
-        cell = ws.cell(row=row, column=col, value=h)
-        cell.font = XL_HEADER_FONT
-        cell.fill = XL_HEADER_FILL
-        cell.alignment = Alignment(horizontal='center')
-        cell.border = XL_THIN_BORDER
+# Rows fetched per round trip while exporting
+EXPORT_BATCH_SIZE = 500
+# Rows used to size XLSX columns: a write-only sheet writes its column
+# widths before the first row, so they cannot wait for the whole export
+XL_WIDTH_SAMPLE_ROWS = 200
+XL_MAX_WIDTH = 40
+# CSV rows per yielded chunk
+CSV_CHUNK_ROWS = 200
+
 
+def _xl_header_cell(ws, value):
+    cell = WriteOnlyCell(ws, value=value)
+    cell.font = XL_HEADER_FONT
+    cell.fill = XL_HEADER_FILL
+    cell.alignment = Alignment(horizontal='center')
+    cell.border = XL_THIN_BORDER
+    return cell
 
-def _xl_auto_width(ws):
-    for col in ws.columns:
-        max_len = 0
-        col_letter = col[0].column_letter
-        for cell in col:
-            if cell.value:
-                max_len = max(max_len, len(str(cell.value)))
-        ws.column_dimensions[col_letter].width = min(max_len + 3, 40)
+
+def _xl_cell(ws, value, bold=False):
+    cell = WriteOnlyCell(ws, value=value)
+    if bold:
+        cell.font = Font(bold=True)
+    else:
+        cell.border = XL_THIN_BORDER
+    return cell
+
+
+def _xl_export(title, headers, rows, footer=()):
+    """Stream headers and rows into a write-only workbook saved to a
+    temporary file, returned rewound. Column widths follow the longest
+    value seen in the header and the first XL_WIDTH_SAMPLE_ROWS rows;
+    footer rows are written in bold without borders."""
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet(title)
+
+    widths = [len(str(h)) for h in headers]
+    sample = list(islice(rows, XL_WIDTH_SAMPLE_ROWS))
+    for row in sample:
+        for i, val in enumerate(row):
+            if val:
+                widths[i] = max(widths[i], len(str(val)))
+    for i, width in enumerate(widths, 1):
+        ws.column_dimensions[get_column_letter(i)].width = min(width + 3, XL_MAX_WIDTH)
+
+    ws.append([_xl_header_cell(ws, h) for h in headers])
+    for row in chain(sample, rows):
+        ws.append([_xl_cell(ws, val) for val in row])
+    for row in footer:
+        ws.append([_xl_cell(ws, val, bold=True) if val is not None else None for val in row])
+
+    out = tempfile.TemporaryFile()
+    wb.save(out)
+    out.seek(0)
+    return out
+
+
+def stream_csv(headers, rows):
+    """CSV text chunks (UTF-8 BOM first, so Excel reads Greek correctly)."""
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    buf.write('\ufeff')
+    writer.writerow(headers)
+    for i, row in enumerate(rows, 1):
+        writer.writerow(row)
+        if i % CSV_CHUNK_ROWS == 0:
+            yield buf.getvalue()
+            buf.seek(0)
+            buf.truncate()
+    yield buf.getvalue()
+
+
+def stream_ndjson(headers, rows):
+    """One JSON object per row, keyed by the report headers."""
+    for row in rows:
+        yield json.dumps(dict(zip(headers, row)), ensure_ascii=False, default=str) + '\n'
 
 
 def _fmt_date(d):
@@ -104,19 +175,20 @@ def _fmt_date(d):
 # ---------------------------------------------------------------------------
 
 def _registry_data():
-    structures = Structure.query.order_by(Structure.name).all()
+    query = Structure.query.options(joinedload(Structure.structure_type)).order_by(Structure.name)
     headers = ['Κωδικός', 'Επωνυμία', 'Τύπος', 'Κατάσταση', 'Πόλη', 'Λήξη Αδείας']
-    rows = []
-    for s in structures:
-        rows.append([
-            s.code,
-            s.name,
-            s.type.name if s.type else '—',
-            s.status,
-            s.city or '—',
-            _fmt_date(s.license_expiry),
-        ])
-    return headers, rows
+
+    def rows():
+        for s in query.yield_per(EXPORT_BATCH_SIZE):
+            yield [
+                s.code,
+                s.name,
+                s.structure_type.name if s.structure_type else '—',
+                s.status,
+                s.city or '—',
+                _fmt_date(s.license_expiry),
+            ]
+    return headers, rows()
 
 
 def generate_registry_pdf():
@@ -130,7 +202,7 @@ def generate_registry_pdf():
     elements.append(Paragraph(f'Ημερομηνία: {_fmt_date(date.today())}', styles['ReportSubtitle']))
 
     headers, rows = _registry_data()
-    data = [headers] + rows
+    data = [headers] + list(rows)
     col_widths = [55, 130, 80, 60, 60, 65]
     t = Table(data, colWidths=col_widths, repeatRows=1)
     t.setStyle(_pdf_table_style())
@@ -141,21 +213,7 @@ def generate_registry_pdf():
 
 
 def generate_registry_xlsx():
-    wb = Workbook()
-    ws = wb.active
-    ws.title = 'Μητρώο Δομών'
-
-    headers, rows = _registry_data()
-    _xl_write_header(ws, headers)
-    for i, row in enumerate(rows, 2):
-        for j, val in enumerate(row, 1):
-            cell = ws.cell(row=i, column=j, value=val)
-            cell.border = XL_THIN_BORDER
-    _xl_auto_width(ws)
-
-    buf = io.BytesIO()
-    wb.save(buf)
-    return buf.getvalue()
+    return _xl_export('Μητρώο Δομών', *_registry_data())
 
 
 # ---------------------------------------------------------------------------
@@ -163,26 +221,24 @@ def generate_registry_xlsx():
 # ---------------------------------------------------------------------------
 
 def _inspections_data(date_from=None, date_to=None):
-    from sqlalchemy.orm import joinedload
     query = Inspection.query.options(joinedload(Inspection.structure)).order_by(Inspection.scheduled_date.desc())
     if date_from:
         query = query.filter(Inspection.scheduled_date >= date.fromisoformat(date_from))
     if date_to:
         query = query.filter(Inspection.scheduled_date <= date.fromisoformat(date_to))
-    inspections = query.all()
-
     headers = ['Ημ/νία', 'Τύπος', 'Κατάσταση', 'Συμπέρασμα', 'Δομή']
-    rows = []
-    for insp in inspections:
-        structure = insp.structure
-        rows.append([
-            _fmt_date(insp.scheduled_date),
-            insp.type,
-            insp.status,
-            insp.conclusion or '—',
-            structure.name if structure else '—',
-        ])
-    return headers, rows
+
+    def rows():
+        for insp in query.yield_per(EXPORT_BATCH_SIZE):
+            structure = insp.structure
+            yield [
+                _fmt_date(insp.scheduled_date),
+                insp.type,
+                insp.status,
+                insp.conclusion or '—',
+                structure.name if structure else '—',
+            ]
+    return headers, rows()
 
 
 def generate_inspections_pdf(date_from=None, date_to=None):
@@ -199,7 +255,7 @@ def generate_inspections_pdf(date_from=None, date_to=None):
     elements.append(Paragraph(subtitle, styles['ReportSubtitle']))
 
     headers, rows = _inspections_data(date_from, date_to)
-    data = [headers] + rows
+    data = [headers] + list(rows)
     col_widths = [65, 70, 70, 90, 130]
     t = Table(data, colWidths=col_widths, repeatRows=1)
     t.setStyle(_pdf_table_style())
@@ -210,21 +266,7 @@ def generate_inspections_pdf(date_from=None, date_to=None):
 
 
 def generate_inspections_xlsx(date_from=None, date_to=None):
-    wb = Workbook()
-    ws = wb.active
-    ws.title = 'Έλεγχοι'
-
-    headers, rows = _inspections_data(date_from, date_to)
-    _xl_write_header(ws, headers)
-    for i, row in enumerate(rows, 2):
-        for j, val in enumerate(row, 1):
-            cell = ws.cell(row=i, column=j, value=val)
-            cell.border = XL_THIN_BORDER
-    _xl_auto_width(ws)
-
-    buf = io.BytesIO()
-    wb.save(buf)
-    return buf.getvalue()
+    return _xl_export('Έλεγχοι', *_inspections_data(date_from, date_to))
 
 
 # ---------------------------------------------------------------------------
@@ -232,26 +274,24 @@ def generate_inspections_xlsx(date_from=None, date_to=None):
 # ---------------------------------------------------------------------------
 
 def _sanctions_data(date_from=None, date_to=None):
-    from sqlalchemy.orm import joinedload
     query = Sanction.query.options(joinedload(Sanction.structure)).order_by(Sanction.imposed_date.desc())
     if date_from:
         query = query.filter(Sanction.imposed_date >= date.fromisoformat(date_from))
     if date_to:
         query = query.filter(Sanction.imposed_date <= date.fromisoformat(date_to))
-    sanctions = query.all()
-
     headers = ['Ημ/νία', 'Τύπος', 'Ποσό', 'Κατάσταση', 'Δομή']
-    rows = []
-    for s in sanctions:
-        structure = s.structure
-        rows.append([
-            _fmt_date(s.imposed_date),
-            s.type,
-            f'{s.amount} €' if s.amount else '—',
-            s.status,
-            structure.name if structure else '—',
-        ])
-    return headers, rows
+
+    def rows():
+        for s in query.yield_per(EXPORT_BATCH_SIZE):
+            structure = s.structure
+            yield [
+                _fmt_date(s.imposed_date),
+                s.type,
+                f'{s.amount} €' if s.amount else '—',
+                s.status,
+                structure.name if structure else '—',
+            ]
+    return headers, rows()
 
 
 def generate_sanctions_pdf(date_from=None, date_to=None):
@@ -268,7 +308,7 @@ def generate_sanctions_pdf(date_from=None, date_to=None):
     elements.append(Paragraph(subtitle, styles['ReportSubtitle']))
 
     headers, rows = _sanctions_data(date_from, date_to)
-    data = [headers] + rows
+    data = [headers] + list(rows)
     col_widths = [65, 80, 60, 70, 130]
     t = Table(data, colWidths=col_widths, repeatRows=1)
     t.setStyle(_pdf_table_style())
@@ -279,21 +319,7 @@ def generate_sanctions_pdf(date_from=None, date_to=None):
 
 
 def generate_sanctions_xlsx(date_from=None, date_to=None):
-    wb = Workbook()
-    ws = wb.active
-    ws.title = 'Κυρώσεις'
-
-    headers, rows = _sanctions_data(date_from, date_to)
-    _xl_write_header(ws, headers)
-    for i, row in enumerate(rows, 2):
-        for j, val in enumerate(row, 1):
-            cell = ws.cell(row=i, column=j, value=val)
-            cell.border = XL_THIN_BORDER
-    _xl_auto_width(ws)
-
-    buf = io.BytesIO()
-    wb.save(buf)
-    return buf.getvalue()
+    return _xl_export('Κυρώσεις', *_sanctions_data(date_from, date_to))
 
 
 # ---------------------------------------------------------------------------
@@ -313,37 +339,49 @@ DECISION_STATUS_LABELS = {
 }
 
 
-def _decisions_data(date_from=None, date_to=None):
-    from sqlalchemy.orm import joinedload
-    query = SanctionDecision.query.options(
-        joinedload(SanctionDecision.sanction).joinedload(Sanction.structure)
-    ).order_by(SanctionDecision.created_at.desc())
+def _decisions_filter(query, date_from=None, date_to=None):
     if date_from:
         query = query.filter(SanctionDecision.created_at >= date.fromisoformat(date_from))
     if date_to:
         query = query.filter(SanctionDecision.created_at <= date.fromisoformat(date_to))
-    decisions = query.all()
+    return query
+
+
+def _decisions_data(date_from=None, date_to=None):
+    query = _decisions_filter(SanctionDecision.query.options(
+        joinedload(SanctionDecision.sanction).joinedload(Sanction.structure)
+    ).order_by(SanctionDecision.created_at.desc()), date_from, date_to)
 
     headers = ['Α/Α', 'Πρωτόκολλο', 'Δομή', 'Παράβαση', 'Ποσό (€)', 'Κατάσταση', 'Λήξη Πληρωμής']
-    rows = []
-    for d in decisions:
-        sanction = d.sanction
-        structure = sanction.structure if sanction else None
-        rows.append([
-            d.id,
-            d.protocol_number or '—',
-            structure.name if structure else '—',
-            d.violation_code or '—',
-            f'{d.final_amount:,.2f}' if d.final_amount else '—',
-            DECISION_STATUS_LABELS.get(d.status, d.status),
-            _fmt_date(d.payment_deadline),
-        ])
-    return headers, rows, decisions
 
+    def rows():
+        for d in query.yield_per(EXPORT_BATCH_SIZE):
+            sanction = d.sanction
+            structure = sanction.structure if sanction else None
+            yield [
+                d.id,
+                d.protocol_number or '—',
+                structure.name if structure else '—',
+                d.violation_code or '—',
+                f'{d.final_amount:,.2f}' if d.final_amount else '—',
+                DECISION_STATUS_LABELS.get(d.status, d.status),
+                _fmt_date(d.payment_deadline),
+            ]
+    return headers, rows()
+
+
+def _decisions_totals(date_from=None, date_to=None):
+    """(count, total amount, amount collected) computed in SQL."""
+    paid = case((SanctionDecision.status == 'paid', SanctionDecision.paid_amount), else_=0)
+    count, total, collected = _decisions_filter(db.session.query(
+        func.count(SanctionDecision.id),
+        func.coalesce(func.sum(SanctionDecision.final_amount), 0),
+        func.coalesce(func.sum(paid), 0),
+    ), date_from, date_to).one()
+    return count, total, collected
 
-def generate_decisions_pdf(date_from=None, date_to=None):
-    from sqlalchemy import func
 
+def generate_decisions_pdf(date_from=None, date_to=None):
     buf = io.BytesIO()
     doc = SimpleDocTemplate(buf, pagesize=A4, leftMargin=15*mm, rightMargin=15*mm,
                             topMargin=20*mm, bottomMargin=20*mm)
@@ -356,20 +394,19 @@ def generate_decisions_pdf(date_from=None, date_to=None):
         subtitle += f'  |  Περίοδος: {date_from or "—"} — {date_to or "—"}'
     elements.append(Paragraph(subtitle, styles['ReportSubtitle']))
 
-    headers, rows, decisions = _decisions_data(date_from, date_to)
+    headers, rows = _decisions_data(date_from, date_to)
 
     # Summary stats
-    total_amount = sum(d.final_amount or 0 for d in decisions)
-    paid_amount = sum(d.paid_amount or 0 for d in decisions if d.status == 'paid')
+    count, total_amount, paid_amount = _decisions_totals(date_from, date_to)
     summary_text = (
-        f'Σύνολο αποφάσεων: {len(decisions)} | '
+        f'Σύνολο αποφάσεων: {count} | '
         f'Συνολικό ποσό: {total_amount:,.2f}€ | '
         f'Εισπράξεις: {paid_amount:,.2f}€'
     )
     elements.append(Paragraph(summary_text, styles['Normal']))
     elements.append(Spacer(1, 10))
 
-    data = [headers] + rows
+    data = [headers] + list(rows)
     col_widths = [30, 65, 110, 70, 55, 65, 60]
     t = Table(data, colWidths=col_widths, repeatRows=1)
     t.setStyle(_pdf_table_style())
@@ -380,51 +417,55 @@ def generate_decisions_pdf(date_from=None, date_to=None):
 
 
 def generate_decisions_xlsx(date_from=None, date_to=None):
-    wb = Workbook()
-    ws = wb.active
-    ws.title = 'Αποφάσεις Κυρώσεων'
-
-    headers, rows, decisions = _decisions_data(date_from, date_to)
-    _xl_write_header(ws, headers)
-    for i, row in enumerate(rows, 2):
-        for j, val in enumerate(row, 1):
-            cell = ws.cell(row=i, column=j, value=val)
-            cell.border = XL_THIN_BORDER
-    _xl_auto_width(ws)
-
-    # Summary row
-    summary_row = len(rows) + 3
-    ws.cell(row=summary_row, column=1, value='Σύνολο:').font = Font(bold=True)
-    total_amount = sum(d.final_amount or 0 for d in decisions)
-    paid_amount = sum(d.paid_amount or 0 for d in decisions if d.status == 'paid')
-    ws.cell(row=summary_row, column=5, value=f'{total_amount:,.2f}').font = Font(bold=True)
-    ws.cell(row=summary_row + 1, column=1, value='Εισπράξεις:').font = Font(bold=True)
-    ws.cell(row=summary_row + 1, column=5, value=f'{paid_amount:,.2f}').font = Font(bold=True)
-
-    buf = io.BytesIO()
-    wb.save(buf)
-    return buf.getvalue()
+    _, total_amount, paid_amount = _decisions_totals(date_from, date_to)
+    # Summary rows after a blank line
+    footer = [
+        [],
+        ['Σύνολο:', None, None, None, f'{total_amount:,.2f}'],
+        ['Εισπράξεις:', None, None, None, f'{paid_amount:,.2f}'],
+    ]
+    return _xl_export('Αποφάσεις Κυρώσεων', *_decisions_data(date_from, date_to), footer=footer)
 
 
 # ---------------------------------------------------------------------------
 # Dispatcher
 # ---------------------------------------------------------------------------
 
+def _streamed(data, writer):
+    return lambda **kw: writer(*data(**kw))
+
+
 REPORT_GENERATORS = {
     'registry': {
         'pdf': lambda **kw: generate_registry_pdf(),
         'xlsx': lambda **kw: generate_registry_xlsx(),
+        'csv': lambda **kw: stream_csv(*_registry_data()),
+        'ndjson': lambda **kw: stream_ndjson(*_registry_data()),
     },
     'inspections': {
         'pdf': generate_inspections_pdf,
         'xlsx': generate_inspections_xlsx,
+        'csv': _streamed(_inspections_data, stream_csv),
+        'ndjson': _streamed(_inspections_data, stream_ndjson),
     },
     'sanctions': {
         'pdf': generate_sanctions_pdf,
         'xlsx': generate_sanctions_xlsx,
+        'csv': _streamed(_sanctions_data, stream_csv),
+        'ndjson': _streamed(_sanctions_data, stream_ndjson),
     },
     'decisions': {
         'pdf': generate_decisions_pdf,
         'xlsx': generate_decisions_xlsx,
+        'csv': _streamed(_decisions_data, stream_csv),
+        'ndjson': _streamed(_decisions_data, stream_ndjson),
     },
 }
+
+# format: (mimetype, file extension)
+REPORT_FORMATS = {
+    'pdf': ('application/pdf', 'pdf'),
+    'xlsx': ('application/vnd.openxmlformats-officedocument.spreadsheetml.sheet', 'xlsx'),
+    'csv': ('text/csv; charset=utf-8', 'csv'),
+    'ndjson': ('application/x-ndjson', 'ndjson'),
+}
@@ -6,6 +6,9 @@ from werkzeug.utils import secure_filename
 from . import oversight_bp
 from ..extensions import db
 from .models import UserRole, SocialAdvisorReport
+from .agenda import get_agenda
+from .alerts import ALERTS_PAGE_SIZE, acknowledge_alert, list_alerts
+from .dashboard import get_dashboard
 from ..integrations.irida_crypto import encrypt_credential, decrypt_credential
 
 
@@ -495,340 +498,63 @@ def list_irida_transactions():
 @oversight_bp.route('/api/oversight/dashboard', methods=['GET'])
 @jwt_required()
 def oversight_dashboard():
-    from ..registry.models import Structure, StructureType, License, Sanction
-    from ..inspections.models import Inspection, InspectionReport
-    from sqlalchemy import func, extract
-    from datetime import timedelta
-
-    total_structures = Structure.query.count()
-    active_structures = Structure.query.filter_by(status='active').count()
-    total_inspections = Inspection.query.count()
-    completed_inspections = Inspection.query.filter_by(status='completed').count()
-    pending_reports = SocialAdvisorReport.query.filter_by(status='draft').count()
-    submitted_reports = SocialAdvisorReport.query.filter_by(status='submitted').count()
-    total_sanctions = Sanction.query.count()
-
-    # Sanction decision workflow stats
-    from ..sanctions.models import SanctionDecision
-    decision_stats = {
-        'draft': SanctionDecision.query.filter_by(status='draft').count(),
-        'submitted': SanctionDecision.query.filter_by(status='submitted').count(),
-        'approved': SanctionDecision.query.filter_by(status='approved').count(),
-        'notified': SanctionDecision.query.filter_by(status='notified').count(),
-        'paid': SanctionDecision.query.filter_by(status='paid').count(),
-        'overdue': SanctionDecision.query.filter(
-            SanctionDecision.status == 'notified',
-            SanctionDecision.payment_deadline < date.today()
-        ).count(),
-        'total_amount_pending': db.session.query(
-            func.coalesce(func.sum(SanctionDecision.final_amount), 0)
-        ).filter(SanctionDecision.status.in_(['approved', 'notified'])).scalar(),
-        'total_amount_paid': db.session.query(
-            func.coalesce(func.sum(SanctionDecision.paid_amount), 0)
-        ).filter(SanctionDecision.status == 'paid').scalar(),
-    }
-
-    # Structures by type
-    structures_by_type = []
-    type_counts = (
-        db.session.query(StructureType.name, func.count(Structure.id))
-        .join(Structure, Structure.type_id == StructureType.id)
-        .group_by(StructureType.name)
-        .all()
-    )
-    for name, count in type_counts:
-        structures_by_type.append({'name': name, 'count': count})
-
-    # Inspections by month (last 12 months)
-    inspections_by_month = []
-    today = date.today()
-    for i in range(11, -1, -1):
-        m = today.month - i
-        y = today.year
-        while m <= 0:
-            m += 12
-            y -= 1
-        count = Inspection.query.filter(
-            extract('year', Inspection.scheduled_date) == y,
-            extract('month', Inspection.scheduled_date) == m
-        ).count()
-        inspections_by_month.append({
-            'month': f'{y}-{m:02d}',
-            'count': count,
-        })
-
-    # Sanctions by status
-    sanctions_by_status = []
-    status_counts = (
-        db.session.query(Sanction.status, func.count(Sanction.id))
-        .group_by(Sanction.status)
-        .all()
-    )
-    for status, count in status_counts:
-        sanctions_by_status.append({'status': status, 'count': count})
+    return jsonify(get_dashboard(_dashboard_unit(int(get_jwt_identity())))), 200
 
-    # Recent inspections (5)
-    recent_inspections = Inspection.query.order_by(
-        Inspection.scheduled_date.desc()
-    ).limit(5).all()
 
-    # Recent advisor reports (5)
-    recent_reports = SocialAdvisorReport.query.order_by(
-        SocialAdvisorReport.created_at.desc()
-    ).limit(5).all()
+def _dashboard_unit(user_id):
+    """Peripheral unit whose figures the user sees (None = all). Same
+    scoping as the structure registry: directors see their own unit,
+    others may pick one with ?peripheral_unit=."""
+    from ..models import User
+    from ..registry.permissions import is_director
 
-    return jsonify({
-        'stats': {
-            'total_structures': total_structures,
-            'active_structures': active_structures,
-            'total_inspections': total_inspections,
-            'completed_inspections': completed_inspections,
-            'pending_reports': pending_reports,
-            'submitted_reports': submitted_reports,
-            'total_sanctions': total_sanctions,
-        },
-        'decision_stats': decision_stats,
-        'structures_by_type': structures_by_type,
-        'inspections_by_month': inspections_by_month,
-        'sanctions_by_status': sanctions_by_status,
-        'recent_inspections': [{
-            **i.to_dict(),
-            'structure_name': i.structure.name if i.structure else None,
-            'report': i.report.to_dict() if i.report else None,
-        } for i in recent_inspections],
-        'recent_reports': [{
-            **r.to_dict(),
-            'structure_name': r.structure.name if r.structure else None,
-            'author_name': r.author.username if r.author else None,
-        } for r in recent_reports],
-    }), 200
+    user = db.session.get(User, user_id)
+    if user and user.role != 'admin' and is_director(user_id) and user.peripheral_unit:
+        return user.peripheral_unit
+    return request.args.get('peripheral_unit') or None
 
 
 @oversight_bp.route('/api/oversight/daily-agenda', methods=['GET'])
 @jwt_required()
 def daily_agenda():
-    from datetime import timedelta
-    from sqlalchemy.orm import joinedload
-    from ..registry.models import Structure, License
-    from ..inspections.models import Inspection
-    from ..sanctions.models import SanctionDecision
-
-    today = date.today()
-    agenda = []
-
-    # 1. Inspections scheduled today or this week — eager-load structure
-    upcoming_inspections = Inspection.query.options(
-        joinedload(Inspection.structure)
-    ).filter(
-        Inspection.scheduled_date >= today,
-        Inspection.scheduled_date <= today + timedelta(days=7),
-        Inspection.status.in_(['scheduled', 'pending'])
-    ).order_by(Inspection.scheduled_date).all()
-
-    for insp in upcoming_inspections:
-        structure = insp.structure
-        agenda.append({
-            'type': 'inspection',
-            'priority': 'high' if insp.scheduled_date == today else 'medium',
-            'title': f'Έλεγχος: {structure.name if structure else "N/A"}',
-            'subtitle': f'{insp.type} - {insp.scheduled_date.strftime("%d/%m/%Y")}',
-            'date': insp.scheduled_date.isoformat(),
-            'link': f'/inspections/{insp.id}/report',
-            'structure_id': insp.structure_id
-        })
-
-    # 2. Licenses expiring within 30 days — eager-load structure
-    expiring_licenses = License.query.options(
-        joinedload(License.structure)
-    ).filter(
-        License.expiry_date >= today,
-        License.expiry_date <= today + timedelta(days=30),
-        License.status == 'active'
-    ).order_by(License.expiry_date).all()
-
-    for lic in expiring_licenses:
-        structure = lic.structure
-        days_left = (lic.expiry_date - today).days
-        agenda.append({
-            'type': 'license_expiring',
-            'priority': 'high' if days_left <= 7 else 'medium',
-            'title': f'Λήξη Άδειας: {structure.name if structure else "N/A"}',
-            'subtitle': f'{lic.type} - σε {days_left} ημέρες ({lic.expiry_date.strftime("%d/%m/%Y")})',
-            'date': lic.expiry_date.isoformat(),
-            'link': f'/registry/{lic.structure_id}',
-            'structure_id': lic.structure_id
-        })
-
-    # 3. Pending decision approvals
-    pending_decisions = SanctionDecision.query.filter(
-        SanctionDecision.status == 'submitted'
-    ).order_by(SanctionDecision.created_at).all()
-
-    for dec in pending_decisions:
-        agenda.append({
-            'type': 'pending_approval',
-            'priority': 'high',
-            'title': f'Εκκρεμεί Έγκριση: {dec.obligor_name or "N/A"}',
-            'subtitle': f'Ποσό: {dec.final_amount}€',
-            'date': dec.created_at.isoformat() if dec.created_at else today.isoformat(),
-            'link': f'/sanctions/decisions/{dec.id}',
-            'structure_id': dec.structure_id
-        })
-
-    # 4. Overdue payments
-    overdue = SanctionDecision.query.filter(
-        SanctionDecision.status == 'notified',
-        SanctionDecision.payment_deadline < today
-    ).all()
-
-    for dec in overdue:
-        agenda.append({
-            'type': 'overdue_payment',
-            'priority': 'critical',
-            'title': f'Εκπρόθεσμη Πληρωμή: {dec.obligor_name or "N/A"}',
-            'subtitle': f'Ποσό: {dec.final_amount}€ - Προθεσμία: {dec.payment_deadline.strftime("%d/%m/%Y")}',
-            'date': dec.payment_deadline.isoformat(),
-            'link': f'/sanctions/decisions/{dec.id}',
-            'structure_id': dec.structure_id
-        })
-
-    # Sort by priority then date
-    priority_order = {'critical': 0, 'high': 1, 'medium': 2, 'low': 3}
-    agenda.sort(key=lambda x: (priority_order.get(x['priority'], 9), x['date']))
-
-    return jsonify({
-        'date': today.isoformat(),
-        'items': agenda,
-        'summary': {
-            'total': len(agenda),
-            'critical': sum(1 for a in agenda if a['priority'] == 'critical'),
-            'high': sum(1 for a in agenda if a['priority'] == 'high'),
-        }
-    })
+    return jsonify(get_agenda(int(get_jwt_identity())))
 
 
 @oversight_bp.route('/api/oversight/alerts', methods=['GET'])
 @jwt_required()
 def oversight_alerts():
-    from ..registry.models import Structure, License, Sanction as SanctionModel
-    from ..inspections.models import InspectionReport
-    from datetime import timedelta
-
-    from sqlalchemy.orm import joinedload
-    from ..sanctions.models import SanctionDecision
-    alerts = []
-
-    # Expiring licenses (within 3 months) — eager-load structure
-    cutoff = date.today() + timedelta(days=90)
-    expiring = License.query.options(joinedload(License.structure)).filter(
-        License.expiry_date <= cutoff,
-        License.expiry_date >= date.today(),
-        License.status == 'active'
-    ).all()
-    for lic in expiring:
-        structure = lic.structure
-        alerts.append({
-            'type': 'license_expiring',
-            'severity': 'warning',
-            'message': f'Η άδεια της δομής "{structure.name if structure else "?"}" λήγει στις {lic.expiry_date.isoformat()}',
-            'structure_id': lic.structure_id,
-            'date': lic.expiry_date.isoformat(),
-        })
-
-    # Expired licenses — eager-load structure
-    expired = License.query.options(joinedload(License.structure)).filter(
-        License.expiry_date < date.today(),
-        License.status == 'active'
-    ).all()
-    for lic in expired:
-        structure = lic.structure
-        alerts.append({
-            'type': 'license_expired',
-            'severity': 'critical',
-            'message': f'Η άδεια της δομής "{structure.name if structure else "?"}" έχει λήξει ({lic.expiry_date.isoformat()})',
-            'structure_id': lic.structure_id,
-            'date': lic.expiry_date.isoformat(),
-        })
-
-    # Pending advisor reports (submitted but not approved)
-    pending = SocialAdvisorReport.query.filter_by(status='submitted').all()
-    for report in pending:
-        alerts.append({
-            'type': 'report_pending_approval',
-            'severity': 'info',
-            'message': f'Εκκρεμεί έγκριση έκθεσης κοιν. συμβούλου ({report.drafted_date.isoformat() if report.drafted_date else "?"})',
-            'structure_id': report.structure_id,
-            'report_id': report.id,
-        })
-
-    # Batch-load all decisions with sanction→structure in one query
-    all_decisions = SanctionDecision.query.options(
-        joinedload(SanctionDecision.sanction).joinedload(SanctionModel.structure)
-    ).all()
-
-    # Overdue sanction payments (notified + past payment deadline)
-    for dec in all_decisions:
-        if dec.status != 'notified' or not dec.payment_deadline or dec.payment_deadline >= date.today():
-            continue
-        sanction = dec.sanction
-        structure = sanction.structure if sanction else None
-        alerts.append({
-            'type': 'payment_overdue',
-            'severity': 'critical',
-            'message': f'Εκπρόθεσμη πληρωμή προστίμου {dec.final_amount:,.0f}€ — {structure.name if structure else "?"} (λήξη: {dec.payment_deadline.isoformat()})',
-            'structure_id': sanction.structure_id if sanction else None,
-            'decision_id': dec.id,
-        })
-
-    # Approaching payment deadlines (within 7 days)
-    payment_soon = date.today() + timedelta(days=7)
-    for dec in all_decisions:
-        if dec.status != 'notified' or not dec.payment_deadline:
-            continue
-        if dec.payment_deadline < date.today() or dec.payment_deadline > payment_soon:
-            continue
-        sanction = dec.sanction
-        structure = sanction.structure if sanction else None
-        alerts.append({
-            'type': 'payment_approaching',
-            'severity': 'warning',
-            'message': f'Πληρωμή προστίμου {dec.final_amount:,.0f}€ λήγει {dec.payment_deadline.isoformat()} — {structure.name if structure else "?"}',
-            'structure_id': sanction.structure_id if sanction else None,
-            'decision_id': dec.id,
-        })
-
-    # Approaching appeal deadlines (within 3 days)
-    appeal_soon = date.today() + timedelta(days=3)
-    for dec in all_decisions:
-        if dec.status != 'notified' or not dec.appeal_deadline:
-            continue
-        if dec.appeal_deadline < date.today() or dec.appeal_deadline > appeal_soon:
-            continue
-        sanction = dec.sanction
-        structure = sanction.structure if sanction else None
-        alerts.append({
-            'type': 'appeal_deadline_approaching',
-            'severity': 'warning',
-            'message': f'Λήξη προθεσμίας ένστασης {dec.appeal_deadline.isoformat()} — {structure.name if structure else "?"}',
-            'structure_id': sanction.structure_id if sanction else None,
-            'decision_id': dec.id,
-        })
-
-    # Returned decisions requiring revision
-    for dec in all_decisions:
-        if dec.status != 'returned':
-            continue
-        sanction = dec.sanction
-        structure = sanction.structure if sanction else None
-        alerts.append({
-            'type': 'decision_returned',
-            'severity': 'info',
-            'message': f'Απόφαση κύρωσης επιστράφηκε για διόρθωση — {structure.name if structure else "?"}',
-            'structure_id': sanction.structure_id if sanction else None,
-            'decision_id': dec.id,
-        })
-
-    return jsonify(alerts), 200
+    """Active alerts for the current user, most severe first. The body stays
+    a list. Without cursor or limit every alert is returned, as before
+    pagination; otherwise the cursor for the next page is in the
+    X-Next-Cursor header."""
+    user_id = int(get_jwt_identity())
+    paged = 'cursor' in request.args or 'limit' in request.args
+    try:
+        items, next_cursor = list_alerts(
+            user_id,
+            unit=_dashboard_unit(user_id),
+            cursor=request.args.get('cursor'),
+            limit=request.args.get('limit', ALERTS_PAGE_SIZE, type=int) if paged else None,
+            acknowledged=request.args.get('acknowledged', 'include'),
+            type_=request.args.get('type'),
+            severity=request.args.get('severity'),
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    response = jsonify(items)
+    if next_cursor:
+        response.headers['X-Next-Cursor'] = next_cursor
+    return response, 200
+
+
+@oversight_bp.route('/api/oversight/alerts/<int:alert_id>/acknowledge', methods=['POST', 'DELETE'])
+@jwt_required()
+def acknowledge_oversight_alert(alert_id):
+    """POST acknowledges an alert for the current user, DELETE undoes it."""
+    user_id = int(get_jwt_identity())
+    if not acknowledge_alert(alert_id, user_id, acknowledged=request.method == 'POST'):
+        return jsonify({'error': 'Alert not found'}), 404
+    return jsonify({'id': alert_id, 'acknowledged': request.method == 'POST'}), 200
 
 
 # --- Report Generation ---
@@ -836,8 +562,9 @@ def oversight_alerts():
 @oversight_bp.route('/api/oversight/reports/<report_type>', methods=['GET'])
 @jwt_required()
 def generate_report(report_type):
-    from flask import Response
-    from .reports import REPORT_GENERATORS
+    """Report as pdf, xlsx, or csv/ndjson (streamed row by row)."""
+    from flask import Response, send_file, stream_with_context
+    from .reports import REPORT_FORMATS, REPORT_GENERATORS
 
     fmt = request.args.get('format', 'pdf')
     date_from = request.args.get('date_from')
@@ -852,15 +579,14 @@ def generate_report(report_type):
         return jsonify({'error': f'Unknown format: {fmt}'}), 400
 
     content = generator(date_from=date_from, date_to=date_to)
-
-    if fmt == 'pdf':
-        mimetype = 'application/pdf'
-        ext = 'pdf'
-    else:
-        mimetype = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-        ext = 'xlsx'
-
+    mimetype, ext = REPORT_FORMATS[fmt]
     filename = f'{report_type}_{date.today().isoformat()}.{ext}'
+
+    if hasattr(content, 'read'):
+        # XLSX in a temporary file: sent in chunks, removed once closed
+        return send_file(content, mimetype=mimetype, as_attachment=True, download_name=filename)
+    if not isinstance(content, bytes):
+        content = stream_with_context(content)
     return Response(
         content,
         mimetype=mimetype,
@@ -0,0 +1,219 @@
+"""
+Preview images for ΠΥΛΗ ΚΟΙΝΩΝΙΚΗΣ ΜΕΡΙΜΝΑΣ file library
+Renders first-page thumbnails and low-resolution page images of PDFs
+(and image files) with PyMuPDF, so users can tell documents apart without
+downloading them. Rendering is CPU-bound and runs in a process pool;
+results are stored in a content-addressed cache directory (keyed by the
+file's SHA-256, page, size and format) that is trimmed oldest-first once
+it grows past PREVIEW_CACHE_MAX_BYTES.
+Rendering helpers are kept free of Flask/DB imports so pool workers
+start quickly.
+"""
+import io
+import os
+import hashlib
+import logging
+import threading
+import multiprocessing
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Longest side in pixels per preview size
+PREVIEW_SIZES = {"thumb": 256, "page": 1024}
+PREVIEWABLE_TYPES = {"pdf", "png", "jpg", "jpeg", "gif", "bmp", "tif", "tiff", "webp"}
+PREVIEW_CACHE_MAX_BYTES = int(os.environ.get("PREVIEW_CACHE_MAX_BYTES", 256 * 1024 * 1024))
+# Worker processes for rendering; 1 renders in the request thread
+PREVIEW_WORKERS = int(os.environ.get("PREVIEW_WORKERS", 0)) or min(2, os.cpu_count() or 1)
+# Seconds a request waits for a render before giving up
+PREVIEW_TIMEOUT = float(os.environ.get("PREVIEW_TIMEOUT", 30))
+# Evict down to this share of the limit, so eviction is not run per write
+_EVICT_TO = 0.8
+
+
+def webp_supported() -> bool:
+    """WebP output needs Pillow (optional dependency)."""
+    try:
+        import PIL.Image  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+class PreviewError(Exception):
+    """The file or page cannot be rendered."""
+
+
+# ── Rendering (runs in pool workers) ──
+
+def render_preview(file_path: str, page: int, max_px: int, fmt: str) -> bytes:
+    """Image bytes of one page (0-based), scaled so its longest side is max_px.
+    Any failure (unreadable file, corrupt page, encoder error) raises PreviewError."""
+    try:
+        return _render_page(file_path, page, max_px, fmt)
+    except PreviewError:
+        raise
+    except Exception as e:
+        raise PreviewError(f"Cannot render {os.path.basename(file_path)}: {e}")
+
+
+def _render_page(file_path: str, page: int, max_px: int, fmt: str) -> bytes:
+    import fitz  # PyMuPDF
+
+    try:
+        doc = fitz.open(file_path)
+    except Exception as e:
+        raise PreviewError(f"Cannot open {os.path.basename(file_path)}: {e}")
+    with doc:
+        if page < 0 or page >= doc.page_count:
+            raise PreviewError(f"Page {page + 1} out of range (1-{doc.page_count})")
+        rect = doc[page].rect
+        zoom = min(max_px / max(rect.width, rect.height, 1), 4.0)
+        pix = doc[page].get_pixmap(matrix=fitz.Matrix(zoom, zoom), alpha=False)
+    if fmt == "png":
+        return pix.tobytes("png")
+    from PIL import Image
+
+    buffer = io.BytesIO()
+    Image.frombytes("RGB", (pix.width, pix.height), pix.samples).save(buffer, "WEBP", quality=75)
+    return buffer.getvalue()
+
+
+# ── Cache ──
+
+class PreviewCache:
+    """Content-addressed preview files under one directory, with
+    size-based eviction of the least recently used entries."""
+
+    def __init__(self, directory: str, max_bytes: int = PREVIEW_CACHE_MAX_BYTES,
+                 workers: int = PREVIEW_WORKERS):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.workers = workers
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._pending: Dict[str, Future] = {}
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._size = sum(size for _, size, _ in self._entries())
+        self.renders = 0  # for tests and diagnostics
+
+    @staticmethod
+    def key(content_sha256: str, page: int, size: str, fmt: str) -> str:
+        return hashlib.sha256(f"{content_sha256}:{page}:{size}:{fmt}".encode()).hexdigest()
+
+    def path(self, key: str, fmt: str) -> str:
+        return os.path.join(self.directory, key[:2], f"{key}.{fmt}")
+
+    def _entries(self):
+        for sub in os.scandir(self.directory):
+            if not sub.is_dir():
+                continue
+            for entry in os.scandir(sub.path):
+                try:
+                    st = entry.stat()
+                except OSError:
+                    continue
+                yield entry.path, st.st_size, st.st_mtime
+
+    def get(self, file_path: str, content_sha256: str, page: int = 0,
+            size: str = "thumb", fmt: str = "png") -> Tuple[str, str]:
+        """(path of the cached image, cache key), rendering it if needed."""
+        key = self.key(content_sha256, page, size, fmt)
+        path = self.path(key, fmt)
+        try:
+            os.utime(path)  # mtime doubles as last-used time for eviction
+            return path, key
+        except FileNotFoundError:
+            pass
+
+        with self._lock:
+            ready = self._pending.get(key)
+            owner = ready is None
+            if owner:
+                ready = self._pending[key] = Future()
+        if not owner:
+            # Another request is rendering this preview; its future resolves
+            # once the file is in place (or with the render's error)
+            ready.result(timeout=PREVIEW_TIMEOUT)
+            return path, key
+
+        try:
+            self._store(path, self._render(file_path, page, PREVIEW_SIZES[size], fmt))
+            ready.set_result(path)
+        except Exception as e:
+            ready.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._pending.pop(key, None)
+        return path, key
+
+    def _render(self, file_path: str, page: int, max_px: int, fmt: str) -> bytes:
+        self.renders += 1
+        if self.workers <= 1:
+            return render_preview(file_path, page, max_px, fmt)
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self.workers,
+                                                 mp_context=multiprocessing.get_context("spawn"))
+            future = self._pool.submit(render_preview, file_path, page, max_px, fmt)
+        try:
+            return future.result(timeout=PREVIEW_TIMEOUT)
+        except BrokenProcessPool as e:
+            self._pool = None  # a worker crashed (e.g. on a malformed PDF); start afresh next time
+            raise PreviewError(f"Rendering failed: {e}")
+
+    def _store(self, path: str, data: bytes) -> None:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+        with self._lock:
+            self._size += len(data)
+            over = self._size > self.max_bytes
+        if over:
+            self.evict()
+
+    def evict(self) -> int:
+        """Delete least recently used previews until the cache is under
+        its target size. Returns the number of files removed."""
+        with self._lock:
+            entries = sorted(self._entries(), key=lambda e: e[2])
+            total = sum(size for _, size, _ in entries)
+            target = self.max_bytes * _EVICT_TO
+            removed = 0
+            for path, size, _ in entries:
+                if total <= target:
+                    break
+                try:
+                    os.remove(path)
+                except OSError:
+                    continue
+                total -= size
+                removed += 1
+            self._size = total
+        if removed:
+            logger.info(f"Preview cache evicted {removed} files ({total / 1e6:.1f} MB kept)")
+        return removed
+
+    def stats(self) -> Dict[str, int]:
+        return {"bytes": self._size, "max_bytes": self.max_bytes, "renders": self.renders}
+
+
+_create_lock = threading.Lock()
+
+
+def get_preview_cache() -> PreviewCache:
+    """The app's preview cache (PREVIEW_CACHE_FOLDER, default <instance>/preview_cache)."""
+    from flask import current_app
+
+    app = current_app._get_current_object()
+    if "preview_cache" not in app.extensions:
+        with _create_lock:
+            if "preview_cache" not in app.extensions:
+                directory = app.config.get("PREVIEW_CACHE_FOLDER") or os.path.join(app.instance_path, "preview_cache")
+                app.extensions["preview_cache"] = PreviewCache(directory)
+    return app.extensions["preview_cache"]
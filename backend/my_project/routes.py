@@ -3,15 +3,26 @@ Flask Routes for ΠΥΛΗ ΚΟΙΝΩΝΙΚΗΣ ΜΕΡΙΜΝΑΣ
 Consolidated routes file containing all Flask endpoints organized in a Blueprint
 """
 
-from flask import Blueprint, jsonify, request, send_from_directory, send_file, current_app
+from flask import Blueprint, jsonify, request, send_file, send_from_directory, current_app
 import os
+import json
+import uuid
 from datetime import datetime, timedelta
 from werkzeug.utils import secure_filename
-from flask_jwt_extended import jwt_required, get_jwt_identity, create_access_token
+from flask_jwt_extended import jwt_required, get_jwt_identity, create_access_token, verify_jwt_in_request
 
 # Import db and models from the new consolidated structure
 from .extensions import db, limiter
 from .audit import log_action
+from .file_utils import format_file_size, get_file_type
+from .content_delivery import cache_policy, content_hash, resolve_content_path, send_content_file
+from .content_index import index_uploaded_files, index_warming, search_content
+from .content_tree import LIST_PAGE_SIZE, get_content_tree
+from .previews import PREVIEW_SIZES, PREVIEWABLE_TYPES, PreviewError, get_preview_cache, webp_supported
+from .uploads import (
+    UPLOAD_CHUNK_SIZE, UploadError, abort_session, append_chunk, category_dir, create_session,
+    discard, finish_session, get_session, stream_to_temp, store_file,
+)
 from .models import (
     User, Category, Discussion, Post, FileItem, Notification,
     PostAttachment, PostReaction, PostMention, UserReputation,
@@ -25,123 +36,9 @@ from .models import (
 # Create Blueprint
 main_bp = Blueprint('main', __name__)
 
-# Utility functions
-def get_file_type(filename):
-    """Determine file type based on extension with enhanced categorization."""
-    extension = filename.split('.')[-1].lower() if '.' in filename else ''
-    type_map = {
-        'pdf': 'pdf',
-        'doc': 'document', 'docx': 'document', 'odt': 'document', 'rtf': 'document',
-        'txt': 'text', 'md': 'text', 'rst': 'text', 'csv': 'text',
-        'xlsx': 'spreadsheet', 'xls': 'spreadsheet', 'ods': 'spreadsheet',
-        'ppt': 'presentation', 'pptx': 'presentation', 'odp': 'presentation',
-        'zip': 'archive', 'rar': 'archive', '7z': 'archive', 'tar': 'archive', 'gz': 'archive',
-        'jpg': 'image', 'jpeg': 'image', 'png': 'image', 'gif': 'image', 'bmp': 'image', 'svg': 'image', 'webp': 'image',
-        'mp4': 'video', 'avi': 'video', 'mov': 'video', 'wmv': 'video', 'mkv': 'video', 'webm': 'video',
-        'mp3': 'audio', 'wav': 'audio', 'flac': 'audio', 'aac': 'audio', 'ogg': 'audio',
-        'html': 'web', 'htm': 'web', 'css': 'web', 'js': 'web', 'json': 'web',
-        'py': 'code', 'java': 'code', 'cpp': 'code', 'c': 'code', 'php': 'code',
-    }
-    return type_map.get(extension, 'file')
-
-def format_file_size(size_bytes):
-    """Format file size in human readable format."""
-    if size_bytes == 0:
-        return "0 B"
-    
-    size_names = ["B", "KB", "MB", "GB", "TB"]
-    import math
-    i = int(math.floor(math.log(size_bytes, 1024)))
-    p = math.pow(1024, i)
-    s = round(size_bytes / p, 2)
-    return f"{s} {size_names[i]}"
-
 def scan_content_directory():
-    """Scan content directory and return file structure"""
-    content_dir = current_app.config['UPLOAD_FOLDER']
-    # Make sure we have absolute path
-    if not os.path.isabs(content_dir):
-        content_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), content_dir)
-    
-    if not os.path.exists(content_dir):
-        os.makedirs(content_dir)
-        return []
-
-    def list_items(path):
-        """List directory items, handling Greek filenames"""
-        try:
-            return os.listdir(path)
-        except UnicodeDecodeError:
-            import glob
-            return [os.path.basename(p) for p in glob.glob(os.path.join(path, '*'))]
-
-    def make_file_info(name, rel_path, abs_path):
-        """Create a file info dict"""
-        return {
-            'name': name,
-            'path': rel_path,
-            'size': os.path.getsize(abs_path),
-            'modified': datetime.fromtimestamp(os.path.getmtime(abs_path)).isoformat(),
-            'type': get_file_type(name)
-        }
-
-    def scan_folder(abs_path, rel_path):
-        """Scan a folder and return its files and subfolders recursively"""
-        files = []
-        subfolders = []
-
-        try:
-            items = list_items(abs_path)
-        except (OSError, PermissionError):
-            return files, subfolders
-
-        for item in sorted(items):
-            if item.startswith('.'):
-                continue
-            item_abs = os.path.join(abs_path, item)
-            item_rel = f"{rel_path}/{item}" if rel_path else item
-
-            if os.path.isdir(item_abs):
-                sub_files, sub_subfolders = scan_folder(item_abs, item_rel)
-                subfolders.append({
-                    'name': item,
-                    'path': item_rel,
-                    'files': sub_files,
-                    'subfolders': sub_subfolders
-                })
-            elif os.path.isfile(item_abs):
-                try:
-                    files.append(make_file_info(item, item_rel, item_abs))
-                except (OSError, PermissionError):
-                    continue
-
-        return files, subfolders
-
-    # Scan root: each top-level directory becomes a category
-    categories = []
-    skip = {'.', 'uploads', 'welcome.txt', 'README.md'}
-    try:
-        root_items = list_items(content_dir)
-    except (OSError, PermissionError):
-        return []
-
-    for item in sorted(root_items):
-        if item.startswith('.') or item in skip:
-            continue
-        item_path = os.path.join(content_dir, item)
-        if not os.path.isdir(item_path):
-            continue
-
-        files, subfolders = scan_folder(item_path, item)
-        categories.append({
-            'id': item.replace(' ', '_').replace('/', '_').replace('\\', '_'),
-            'name': item,
-            'category': item,
-            'path': item,
-            'files': files,
-            'subfolders': subfolders
-        })
-
+    """Content folder structure: one category per top-level directory (cached, see content_tree)."""
+    categories, _ = get_content_tree().structure()
     return categories
 
 
@@ -450,42 +347,13 @@ def get_reactions(post_id):
 
 @main_bp.route('/api/files/structure', methods=['GET'])
 def get_file_structure():
-    """Get file directory structure with enhanced metadata"""
+    """Get file directory structure with enhanced metadata.
+
+    Served from the cached content tree; the ETag changes only when the
+    tree does, so clients revalidating with If-None-Match get a 304.
+    """
     try:
-        structure = scan_content_directory()
-        
-        # Calculate metadata
-        total_files = 0
-        total_size = 0
-        file_types = {}
-        
-        def count_files(items):
-            """Recursively count files in a list of file-info dicts or folder dicts."""
-            nonlocal total_files, total_size, file_types
-            for item in items:
-                if 'files' in item:  # It's a folder/category — recurse
-                    count_files(item['files'])
-                    if 'subfolders' in item:
-                        count_files(item['subfolders'])
-                else:  # It's a file
-                    total_files += 1
-                    total_size += item.get('size', 0)
-                    file_type = item.get('type', 'unknown')
-                    file_types[file_type] = file_types.get(file_type, 0) + 1
-
-        count_files(structure)
-        
-        return jsonify({
-            'categories': structure,
-            'metadata': {
-                'total_files': total_files,
-                'total_size': total_size,
-                'total_size_formatted': format_file_size(total_size),
-                'file_types': file_types,
-                'last_updated': datetime.now().isoformat()
-            },
-            'status': 'success'
-        })
+        body, etag = get_content_tree().response_body()
     except Exception as e:
         current_app.logger.error(f"Error getting file structure: {str(e)}")
         return jsonify({
@@ -493,19 +361,131 @@ def get_file_structure():
             'status': 'error'
         }), 500
 
+    response = current_app.response_class(body, mimetype='application/json')
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response.make_conditional(request)
+
+
+@main_bp.route('/api/files/list', methods=['GET'])
+def list_files():
+    """One folder level of the content library, paginated.
+
+    Query: path (folder, default the library root), cursor (next_cursor of
+    the previous page), limit, sort (name|modified|size|type), order
+    (asc|desc) and counts=true for recursive file counts and sizes, which
+    come from the content tree's precomputed summaries.
+    """
+    counts = request.args.get('counts', 'false').lower() in ('1', 'true', 'yes')
+    try:
+        listing = get_content_tree().list_directory(
+            request.args.get('path', ''),
+            cursor=request.args.get('cursor') or None,
+            limit=request.args.get('limit', LIST_PAGE_SIZE, type=int),
+            sort=request.args.get('sort', 'name'),
+            order=request.args.get('order', 'asc'),
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e), 'status': 'error'}), 400
+    if listing is None:
+        return jsonify({'error': 'Folder not found', 'status': 'error'}), 404
+
+    if counts:
+        listing['summary']['total_size_formatted'] = format_file_size(listing['summary']['total_size'])
+    else:
+        listing['items'] = [
+            {k: v for k, v in item.items() if k not in ('total_files', 'total_size')}
+            for item in listing['items']
+        ]
+        del listing['summary']
+    listing['status'] = 'success'
+
+    response = jsonify(listing)
+    response.headers['Cache-Control'] = 'no-cache'
+    response.add_etag()
+    return response.make_conditional(request)
+
+
+@main_bp.route('/api/files/preview/<path:file_path>', methods=['GET'])
+def preview_file(file_path):
+    """First-page thumbnail or low-res page image of a PDF or image file.
+    Query: page (1-based, default 1), size (thumb|page), format (png|webp,
+    default webp when the client accepts it)"""
+    resolved = resolve_content_path(file_path)
+    if resolved is None:
+        return jsonify({'error': 'File not found'}), 404
+    rel_path, abs_path = resolved
+    if os.path.splitext(rel_path)[1].lower().strip('.') not in PREVIEWABLE_TYPES:
+        return jsonify({'error': 'No preview for this file type'}), 415
+
+    size = request.args.get('size', 'thumb')
+    fmt = request.args.get('format') or (
+        'webp' if webp_supported() and 'image/webp' in request.headers.get('Accept', '') else 'png')
+    try:
+        page = int(request.args.get('page', 1)) - 1
+    except ValueError:
+        page = -1
+    if size not in PREVIEW_SIZES or fmt not in ('png', 'webp') or page < 0:
+        return jsonify({'error': 'Invalid page, size or format'}), 400
+    if fmt == 'webp' and not webp_supported():
+        return jsonify({'error': 'WebP previews are not available'}), 400
+
+    sha256 = content_hash(rel_path, abs_path, os.stat(abs_path))
+    try:
+        path, key = get_preview_cache().get(abs_path, sha256, page=page, size=size, fmt=fmt)
+    except PreviewError as e:
+        return jsonify({'error': str(e)}), 404
+    except TimeoutError:
+        return jsonify({'error': 'Preview is taking too long, try again'}), 503
+
+    response = send_file(path, mimetype=f'image/{fmt}', etag=key, conditional=True)
+    response.headers['Cache-Control'] = cache_policy(rel_path)
+    response.vary.add('Accept')
+    return response
+
 
 @main_bp.route('/api/files/download/<path:file_path>', methods=['GET'])
 def download_file(file_path):
-    """Download a file"""
-    content_dir = current_app.config['UPLOAD_FOLDER']
-    if not os.path.isabs(content_dir):
-        content_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), content_dir)
-    full_path = os.path.join(content_dir, file_path)
-    
-    if not os.path.exists(full_path) or not os.path.isfile(full_path):
+    """Download a file (Range, ETag and proxy sendfile aware)"""
+    response = send_content_file(file_path, as_attachment=True)
+    if response is None:
         return jsonify({'error': 'File not found'}), 404
-    
-    return send_file(full_path, as_attachment=True)
+    return response
+
+
+def _record_uploads(stored, category, user_id):
+    """FileItem rows and their audit entries for stored files, in one commit."""
+    items = []
+    for name, original_name, rel_path, size, sha256, _ in stored:
+        item = FileItem(
+            name=name,
+            original_name=original_name,
+            path=rel_path,
+            category=category,
+            file_type=get_file_type(name),
+            file_size=size,
+            sha256=sha256,
+            uploaded_by=user_id
+        )
+        db.session.add(item)
+        items.append(item)
+    db.session.flush()
+    for item, entry in zip(items, stored):
+        log_action('upload', resource='file', resource_id=item.id, user_id=user_id,
+                   details=json.dumps({'sha256': entry[4], 'deduplicated': entry[5]}), commit=False)
+    db.session.commit()
+
+    # Re-saved files keep the directory mtime, so tell the tree explicitly
+    get_content_tree().invalidate(category)
+    try:
+        index_uploaded_files([item.path for item in items])
+    except Exception as e:
+        current_app.logger.warning(f"Content indexing of upload failed: {e}")
+    return items
+
+
+def _upload_error(e):
+    return jsonify({'error': str(e), **e.extra}), e.status
 
 
 @main_bp.route('/api/files/upload', methods=['POST'])
@@ -519,39 +499,109 @@ def upload_file():
     category = request.form.get('category', 'uploads')
     user_id = int(get_jwt_identity())
 
-    category_path = os.path.join(current_app.config['UPLOAD_FOLDER'], category)
-    os.makedirs(category_path, exist_ok=True)
-
-    saved = []
-    for file in uploaded_files:
-        if not file or file.filename == '':
-            continue
-        filename = secure_filename(file.filename)
-        file_path = os.path.join(category_path, filename)
-        file.save(file_path)
-
-        file_item = FileItem(
-            name=filename,
-            original_name=file.filename,
-            path=os.path.join(category, filename),
-            category=category,
-            file_type=get_file_type(filename),
-            file_size=os.path.getsize(file_path),
-            uploaded_by=user_id
+    stored = []
+    tmp_path = None
+    try:
+        category_dir(category)  # reject a bad category before reading any bytes
+        for file in uploaded_files:
+            if not file or file.filename == '':
+                continue
+            tmp_path, size, sha256 = stream_to_temp(file.stream)
+            filename = secure_filename(file.filename) or f"upload_{sha256[:12]}"
+            rel_path, deduplicated = store_file(tmp_path, size, sha256, category, filename)
+            tmp_path = None
+            stored.append((filename, file.filename, rel_path, size, sha256, deduplicated))
+    except UploadError as e:
+        return _upload_error(e)
+    finally:
+        discard(tmp_path)
+
+    saved = _record_uploads(stored, category, user_id)
+    return jsonify({
+        'message': f'{len(saved)} file(s) uploaded successfully',
+        'ids': [item.id for item in saved],
+        'deduplicated': sum(1 for entry in stored if entry[5])
+    }), 201
+
+
+@main_bp.route('/api/files/uploads', methods=['POST'])
+@jwt_required()
+def start_chunked_upload():
+    """Start a resumable upload; chunks are then PATCHed with Upload-Offset"""
+    data = request.get_json() or {}
+    original_name = data.get('filename') or ''
+    if not original_name:
+        return jsonify({'error': 'filename required'}), 400
+    try:
+        session = create_session(
+            user_id=int(get_jwt_identity()),
+            filename=secure_filename(original_name) or f"upload_{uuid.uuid4().hex[:12]}",
+            original_name=original_name,
+            category=data.get('category', 'uploads'),
+            size=int(data.get('size', -1)),
         )
-        db.session.add(file_item)
-        saved.append(file_item)
+    except (TypeError, ValueError):
+        return jsonify({'error': 'size must be an integer'}), 400
+    except UploadError as e:
+        return _upload_error(e)
+    return jsonify({
+        'upload_id': session['id'],
+        'offset': 0,
+        'size': session['size'],
+        'chunk_size': UPLOAD_CHUNK_SIZE
+    }), 201
+
+
+@main_bp.route('/api/files/uploads/<upload_id>', methods=['GET'])
+@jwt_required()
+def chunked_upload_status(upload_id):
+    """Bytes received so far, to resume an interrupted upload"""
+    try:
+        session = get_session(upload_id, int(get_jwt_identity()))
+    except UploadError as e:
+        return _upload_error(e)
+    return jsonify({'upload_id': upload_id, 'offset': session['offset'], 'size': session['size']})
 
-    db.session.commit()
-    for item in saved:
-        log_action('upload', resource='file', resource_id=item.id, user_id=user_id)
 
+@main_bp.route('/api/files/uploads/<upload_id>', methods=['PATCH'])
+@jwt_required()
+def upload_chunk(upload_id):
+    """Append the request body at Upload-Offset; the last chunk stores the file"""
+    user_id = int(get_jwt_identity())
+    try:
+        offset = int(request.headers.get('Upload-Offset', ''))
+    except ValueError:
+        return jsonify({'error': 'Upload-Offset header required'}), 400
+    try:
+        session, sha256 = append_chunk(upload_id, user_id, offset, request.stream)
+        if sha256 is None:
+            return jsonify({'upload_id': upload_id, 'offset': session['offset'], 'size': session['size']})
+        rel_path, deduplicated = finish_session(upload_id, session, sha256)
+    except UploadError as e:
+        return _upload_error(e)
+
+    item, = _record_uploads([(session['filename'], session['original_name'], rel_path,
+                              session['size'], sha256, deduplicated)], session['category'], user_id)
     return jsonify({
-        'message': f'{len(saved)} file(s) uploaded successfully',
-        'ids': [item.id for item in saved]
+        'message': 'File uploaded successfully',
+        'id': item.id,
+        'path': rel_path,
+        'sha256': sha256,
+        'deduplicated': deduplicated
     }), 201
 
 
+@main_bp.route('/api/files/uploads/<upload_id>', methods=['DELETE'])
+@jwt_required()
+def abort_chunked_upload(upload_id):
+    """Cancel a resumable upload and discard the bytes received"""
+    try:
+        abort_session(upload_id, int(get_jwt_identity()))
+    except UploadError as e:
+        return _upload_error(e)
+    return jsonify({'message': 'Upload cancelled'})
+
+
 @main_bp.route('/api/folders/create', methods=['POST'])
 @jwt_required()
 def create_folder():
@@ -567,6 +617,7 @@ def create_folder():
     
     try:
         os.makedirs(folder_path, exist_ok=True)
+        get_content_tree().invalidate(parent_path)
         return jsonify({'message': 'Folder created successfully'})
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -772,6 +823,38 @@ def mark_notifications_read():
 # AI CHAT ROUTES
 # ============================================================================
 
+def _prepare_chat(data, user_id):
+    """Resolve the caller's chat session (storing the user message) and user context."""
+    message = data.get('message', '').strip()
+    session = None
+    session_id = data.get('session_id')
+    if session_id:
+        session = ChatSession.query.filter_by(id=session_id, user_id=user_id).first()
+        if session:
+            _store_chat_message(session, 'user', message, [])
+
+    user = db.session.get(User, user_id)
+    user_context = {
+        'username': user.username,
+        'role': user.role,
+    } if user else None
+    return session, user_context
+
+
+def _store_chat_message(session, role, content, sources):
+    import json
+    db.session.add(ChatMessage(
+        session_id=session.id,
+        role=role,
+        content=content,
+        sources=json.dumps(sources),
+    ))
+    try:
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+
+
 @main_bp.route('/api/chat', methods=['POST'])
 @jwt_required()
 @limiter.limit(lambda: current_app.config.get('AI_CHAT_RATE_LIMIT', '20 per minute'))
@@ -784,27 +867,7 @@ def ai_chat():
         return jsonify({'error': 'Παρακαλώ εισάγετε μήνυμα'}), 400
 
     chat_history = data.get('chat_history', [])
-    session_id = data.get('session_id')
-
-    # If session_id provided, verify ownership and store user message
-    user_id = int(get_jwt_identity())
-    session = None
-    if session_id:
-        session = ChatSession.query.filter_by(id=session_id, user_id=user_id).first()
-        if session:
-            db.session.add(ChatMessage(
-                session_id=session.id, role='user', content=message, sources='[]'
-            ))
-            try:
-                db.session.commit()
-            except Exception:
-                db.session.rollback()
-
-    user = db.session.get(User, user_id)
-    user_context = {
-        'username': user.username,
-        'role': user.role,
-    } if user else None
+    session, user_context = _prepare_chat(data, int(get_jwt_identity()))
 
     try:
         from my_project.ai.copilot import get_chat_reply
@@ -824,21 +887,68 @@ def ai_chat():
 
     # Store assistant reply in session
     if session:
-        import json
-        db.session.add(ChatMessage(
-            session_id=session.id,
-            role='assistant',
-            content=result['reply'],
-            sources=json.dumps(result.get('sources', [])),
-        ))
-        try:
-            db.session.commit()
-        except Exception:
-            db.session.rollback()
+        _store_chat_message(session, 'assistant', result['reply'], result.get('sources', []))
 
     return jsonify(result), 200
 
 
+@main_bp.route('/api/chat/stream', methods=['POST'])
+@jwt_required()
+@limiter.limit(lambda: current_app.config.get('AI_CHAT_RATE_LIMIT', '20 per minute'))
+def ai_chat_stream():
+    """Streaming AI Assistant reply as Server-Sent Events.
+
+    Emits `event: token` frames ({"content": ...}) as text arrives, then one
+    `event: done` frame with the full reply, sources and metadata. The
+    assistant message is stored in the session once the stream ends.
+    """
+    import json
+    from flask import Response, stream_with_context
+
+    data = request.get_json() or {}
+    message = data.get('message', '').strip()
+    if not message:
+        return jsonify({'error': 'Παρακαλώ εισάγετε μήνυμα'}), 400
+
+    chat_history = data.get('chat_history', [])
+    session, user_context = _prepare_chat(data, int(get_jwt_identity()))
+
+    def sse(event, payload):
+        return f"event: {event}\ndata: {json.dumps(payload, ensure_ascii=False)}\n\n"
+
+    def generate():
+        from my_project.ai.copilot import stream_chat_reply, ERROR_REPLY
+        parts = []
+        result = None
+        try:
+            for frame in stream_chat_reply(
+                user_message=message,
+                chat_history=chat_history,
+                use_rag=True,
+                user_context=user_context,
+                model_override=data.get('model'),
+            ):
+                if frame['type'] == 'token':
+                    parts.append(frame['content'])
+                    yield sse('token', {'content': frame['content']})
+                else:
+                    result = {k: v for k, v in frame.items() if k != 'type'}
+                    yield sse('done', result)
+        except Exception:
+            current_app.logger.exception('Chat stream failed')
+            yield sse('error', {'error': ERROR_REPLY})
+        finally:
+            # Persist whatever was produced, even if the client went away mid-stream
+            if session and parts:
+                reply = result['reply'] if result else ''.join(parts)
+                _store_chat_message(session, 'assistant', reply, (result or {}).get('sources', []))
+
+    return Response(stream_with_context(generate()), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no',
+    })
+
+
 # ============================================================================
 # CHAT SESSION ROUTES
 # ============================================================================
@@ -934,12 +1044,22 @@ def knowledge_stats():
             elif os.path.isfile(full):
                 file_count += 1
 
+    from my_project.ai.embedding_cache import cache_stats
+    from my_project.ai.vector_store import get_vector_store
+    from my_project.ai.lexical import get_lexical_index
+    from my_project.ai.clients import client_metrics
+    store = get_vector_store()
+
     return jsonify({
         'total_documents': total_docs,
         'total_chunks': total_chunks,
         'embedded_chunks': embedded_chunks,
         'knowledge_files': file_count,
         'knowledge_folders': folder_count,
+        'embedding_cache': cache_stats(),
+        'vector_store': store.stats() if store else None,
+        'lexical_index': get_lexical_index().stats(),
+        'ai_clients': client_metrics(),
     }), 200
 
 
@@ -1196,7 +1316,7 @@ def knowledge_delete_folder(folder_path):
 @main_bp.route('/api/knowledge/reindex', methods=['POST'])
 @jwt_required()
 def knowledge_reindex():
-    """Re-ingest all files in the knowledge directory."""
+    """Start a background reindex job (pass {"full": true} to re-read every file)."""
     admin_check = require_admin()
     if admin_check:
         return admin_check
@@ -1205,28 +1325,118 @@ def knowledge_reindex():
     if not os.path.exists(knowledge_dir):
         return jsonify({'error': 'Knowledge directory not found'}), 404
 
-    from my_project.ai.knowledge import process_file
+    from my_project.ai.jobs import start_reindex_job, JobConflict
 
-    processed = 0
-    errors = 0
-    for root, dirs, files in os.walk(knowledge_dir):
-        for fname in files:
-            ext = os.path.splitext(fname)[1].lower()
-            if ext not in KNOWLEDGE_ALLOWED_EXTENSIONS:
-                continue
-            fpath = os.path.join(root, fname)
-            try:
-                process_file(fpath, generate_vectors=True)
-                processed += 1
-            except Exception as e:
-                current_app.logger.error(f"Reindex error for {fname}: {e}")
-                errors += 1
+    data = request.get_json(silent=True) or {}
+    try:
+        job = start_reindex_job(
+            user_id=int(get_jwt_identity()),
+            full=bool(data.get('full')),
+        )
+    except JobConflict as e:
+        return jsonify({'error': 'Reindex already in progress', 'job': e.job.to_dict()}), 409
 
-    return jsonify({
-        'message': 'Reindex complete',
-        'processed': processed,
-        'errors': errors,
-    }), 200
+    log_action('knowledge_reindex', resource='knowledge', resource_id=job.id,
+               user_id=job.requested_by)
+
+    return jsonify({'message': 'Reindex started', 'job': job.to_dict()}), 202
+
+
+@main_bp.route('/api/knowledge/jobs/<int:job_id>', methods=['GET'])
+@jwt_required()
+def knowledge_job_status(job_id):
+    """Progress of a reindex job (?files=true adds per-file status)."""
+    admin_check = require_admin()
+    if admin_check:
+        return admin_check
+
+    from my_project.models import ReindexJob
+    job = ReindexJob.query.get_or_404(job_id)
+    include_files = request.args.get('files') == 'true'
+    return jsonify(job.to_dict(include_files=include_files)), 200
+
+
+@main_bp.route('/api/knowledge/jobs/<int:job_id>/cancel', methods=['POST'])
+@jwt_required()
+def knowledge_job_cancel(job_id):
+    """Cancel a queued or running reindex job."""
+    admin_check = require_admin()
+    if admin_check:
+        return admin_check
+
+    from my_project.models import ReindexJob
+    from my_project.ai.jobs import cancel_reindex_job
+    job = cancel_reindex_job(ReindexJob.query.get_or_404(job_id))
+    return jsonify(job.to_dict()), 200
+
+
+@main_bp.route('/api/knowledge/vector-index', methods=['GET'])
+@jwt_required()
+def knowledge_vector_index_status():
+    """ANN index definitions, sizes and effective build/search settings."""
+    admin_check = require_admin()
+    if admin_check:
+        return admin_check
+
+    from my_project.ai.vector_index import index_status
+    return jsonify(index_status()), 200
+
+
+@main_bp.route('/api/knowledge/vector-index/rebuild', methods=['POST'])
+@jwt_required()
+def knowledge_vector_index_rebuild():
+    """Drop and rebuild the embedding index.
+
+    Body (all optional): {"type": "hnsw"|"ivfflat"|"none", "m", "ef_construction", "lists"}
+    """
+    admin_check = require_admin()
+    if admin_check:
+        return admin_check
+
+    from my_project.ai.vector_index import rebuild_vector_index, VectorIndexUnsupported
+
+    data = request.get_json(silent=True) or {}
+    try:
+        result = rebuild_vector_index(
+            type=data.get('type'),
+            m=data.get('m'),
+            ef_construction=data.get('ef_construction'),
+            lists=data.get('lists'),
+        )
+    except (ValueError, VectorIndexUnsupported) as e:
+        return jsonify({'error': str(e)}), 400
+
+    log_action('knowledge_vector_index_rebuild', resource='knowledge',
+               user_id=int(get_jwt_identity()),
+               details=f"type={result['settings']['type']} build_seconds={result['build_seconds']}")
+    return jsonify(result), 200
+
+
+@main_bp.route('/api/knowledge/vector-index/recall', methods=['POST'])
+@jwt_required()
+def knowledge_vector_index_recall():
+    """Recall@k and latency of the ANN index against exact search.
+
+    Body (all optional): {"samples": 20, "k": 10, "ef_search", "probes"}
+    """
+    admin_check = require_admin()
+    if admin_check:
+        return admin_check
+
+    from my_project.ai.vector_index import measure_recall, VectorIndexUnsupported
+
+    data = request.get_json(silent=True) or {}
+    try:
+        samples = min(max(int(data.get('samples', 20)), 1), 200)
+        k = min(max(int(data.get('k', 10)), 1), 100)
+        result = measure_recall(
+            samples=samples, k=k,
+            ef_search=data.get('ef_search'),
+            probes=data.get('probes'),
+        )
+    except (ValueError, VectorIndexUnsupported) as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify(result), 200
 
 
 # ============================================================================
@@ -1390,7 +1600,10 @@ def delete_user(user_id):
 @main_bp.route('/content/<path:filename>')
 def serve_content(filename):
     """Serve files from the content directory"""
-    return send_from_directory(current_app.config['UPLOAD_FOLDER'], filename)
+    response = send_content_file(filename)
+    if response is None:
+        return jsonify({'error': 'File not found'}), 404
+    return response
 
 
 @main_bp.route('/api/health', methods=['GET'])
@@ -1528,23 +1741,44 @@ def global_search():
             'total_results': 0
         }
         
-        # Search files
+        # Search files: full-text content index first, then uploads matched by name
         if search_type in ['all', 'files']:
-            files = FileItem.query.filter(
-                FileItem.name.contains(query) | 
+            # Text snippets only for signed-in users; anonymous searches get names
+            verify_jwt_in_request(optional=True)
+            files = search_content(query, limit, snippets=get_jwt_identity() is not None)
+            uploads = {f.path.replace(os.sep, '/'): f for f in FileItem.query.filter(
+                FileItem.path.in_([f['path'] for f in files])
+            )} if files else {}
+            for f in files:
+                item = uploads.get(f['path'])
+                f['id'] = item.id if item else None
+                f['original_name'] = item.original_name if item else f['name']
+                f['uploaded_at'] = item.created_at.isoformat() if item and item.created_at else None
+
+            seen = {f['path'] for f in files}
+            for f in FileItem.query.filter(
+                FileItem.name.contains(query) |
                 FileItem.original_name.contains(query)
-            ).limit(limit).all()
-            
-            results['results']['files'] = [{
-                'id': f.id,
-                'name': f.name,
-                'original_name': f.original_name,
-                'type': f.file_type,
-                'size': format_file_size(f.file_size),
-                'category': f.category,
-                'uploaded_at': f.created_at.isoformat() if f.created_at else None
-            } for f in files]
-        
+            ).limit(limit).all():
+                if len(files) >= limit:
+                    break
+                if f.path.replace(os.sep, '/') in seen:
+                    continue
+                files.append({
+                    'id': f.id,
+                    'path': f.path,
+                    'name': f.name,
+                    'original_name': f.original_name,
+                    'type': f.file_type,
+                    'size': format_file_size(f.file_size),
+                    'category': f.category,
+                    'uploaded_at': f.created_at.isoformat() if f.created_at else None,
+                    'snippet': None,
+                })
+            results['results']['files'] = files
+            # Content matches may be missing until the first index build finishes
+            results['indexing'] = index_warming()
+
         # Search discussions
         if search_type in ['all', 'discussions']:
             discussions = Discussion.query.filter(
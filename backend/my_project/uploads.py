@@ -0,0 +1,268 @@
+"""
+Upload storage for ΠΥΛΗ ΚΟΙΝΩΝΙΚΗΣ ΜΕΡΙΜΝΑΣ file library
+Uploaded bytes are streamed to a temp file under UPLOAD_FOLDER while
+their SHA-256 is computed, then moved into place. A file whose content
+already exists in the library (same hash on a FileItem or content_file
+row) is hard-linked to the existing copy instead of stored twice.
+
+Resumable uploads keep their state next to the data in the temp folder
+(<id>.json + <id>.part), so any worker can continue an upload; the
+running hash is kept in memory and rebuilt from the .part file when
+another worker or a restart picked the upload up. Appends take an
+exclusive flock on the .part file, which serializes chunks for the same
+upload across threads and worker processes alike (a process-local lock
+where flock is unavailable).
+"""
+import os
+import json
+import time
+import uuid
+import hashlib
+import logging
+import threading
+from contextlib import contextmanager
+from typing import IO, Any, Dict, Iterator, Optional, Tuple
+
+from werkzeug.security import safe_join
+
+from .models import ContentFile, FileItem
+from .content_tree import content_root
+
+try:
+    import fcntl
+except ImportError:  # Windows: dev server is single-process
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# Hidden, so the content tree and index skip it; inside UPLOAD_FOLDER so
+# finished files are moved with a rename on the same filesystem
+UPLOAD_TMP_DIR = ".upload-tmp"
+UPLOAD_CHUNK_SIZE = int(os.environ.get("UPLOAD_CHUNK_SIZE", 8 * 1024 * 1024))
+UPLOAD_MAX_SIZE = int(os.environ.get("UPLOAD_MAX_SIZE", 2 * 1024 * 1024 * 1024))
+# Unfinished uploads older than this are removed
+UPLOAD_SESSION_TTL = int(os.environ.get("UPLOAD_SESSION_TTL", 24 * 3600))
+_COPY_BLOCK = 1024 * 1024
+
+# upload id -> (offset, running sha256)
+_hashers: Dict[str, Tuple[int, Any]] = {}
+# Serializes appends where flock is unavailable
+_upload_lock = threading.Lock()
+
+
+class UploadError(Exception):
+    """An upload request that cannot be honoured; carries the HTTP status."""
+
+    def __init__(self, message: str, status: int = 400, **extra):
+        super().__init__(message)
+        self.status = status
+        self.extra = extra
+
+
+def tmp_dir() -> str:
+    path = os.path.join(content_root(), UPLOAD_TMP_DIR)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def category_dir(category: str) -> str:
+    """Absolute folder for a category; rejects traversal and hidden names."""
+    parts = [p for p in category.replace('\\', '/').split('/') if p]
+    if not parts or any(p.startswith('.') for p in parts):
+        raise UploadError(f"Invalid category: {category!r}")
+    path = safe_join(content_root(), *parts)
+    if path is None:
+        raise UploadError(f"Invalid category: {category!r}")
+    return path
+
+
+def copy_stream(src: IO[bytes], dst: IO[bytes], hasher, limit: Optional[int] = None) -> int:
+    """Copy src to dst in blocks, feeding hasher; stops after limit bytes."""
+    written = 0
+    while limit is None or written < limit:
+        block = src.read(_COPY_BLOCK if limit is None else min(_COPY_BLOCK, limit - written))
+        if not block:
+            break
+        dst.write(block)
+        hasher.update(block)
+        written += len(block)
+    return written
+
+
+def stream_to_temp(src: IO[bytes]) -> Tuple[str, int, str]:
+    """Write a stream to a new temp file: (temp path, size, sha256)."""
+    path = os.path.join(tmp_dir(), f"{uuid.uuid4().hex}.part")
+    hasher = hashlib.sha256()
+    try:
+        with open(path, "wb") as dst:
+            size = copy_stream(src, dst, hasher)
+    except BaseException:
+        discard(path)
+        raise
+    return path, size, hasher.hexdigest()
+
+
+def discard(path: Optional[str]) -> None:
+    """Remove a temp file, if it is still there."""
+    if path is None:
+        return
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def find_duplicate(sha256: str, size: int) -> Optional[str]:
+    """Absolute path of a library file with this content, if any."""
+    root = content_root()
+    candidates = [p for (p,) in FileItem.query.with_entities(FileItem.path).filter_by(sha256=sha256)]
+    candidates += [p for (p,) in ContentFile.query.with_entities(ContentFile.path).filter_by(sha256=sha256)]
+    for rel in candidates:
+        path = safe_join(root, *rel.replace('\\', '/').split('/'))
+        try:
+            if path and os.path.getsize(path) == size:
+                return path
+        except OSError:
+            continue
+    return None
+
+
+def store_file(tmp_path: str, size: int, sha256: str, category: str, filename: str) -> Tuple[str, bool]:
+    """Move a finished temp file to category/filename (replacing any file of
+    that name). Returns (relative path, deduplicated)."""
+    folder = category_dir(category)
+    os.makedirs(folder, exist_ok=True)
+    target = os.path.join(folder, filename)
+    rel_path = os.path.relpath(target, content_root()).replace(os.sep, '/')
+
+    existing = find_duplicate(sha256, size)
+    if existing is not None:
+        if os.path.exists(target) and os.path.samefile(existing, target):
+            os.remove(tmp_path)
+            return rel_path, True
+        link = f"{tmp_path}.link"
+        try:
+            os.link(existing, link)
+            os.replace(link, target)
+            os.remove(tmp_path)
+            return rel_path, True
+        except OSError as e:
+            logger.info(f"Hard link to {existing} failed ({e}), storing a copy")
+            if os.path.exists(link):
+                os.remove(link)
+    os.replace(tmp_path, target)
+    return rel_path, False
+
+
+# ── Resumable uploads ──
+
+def _session_paths(upload_id: str) -> Tuple[str, str]:
+    if not upload_id or not all(c in "0123456789abcdef" for c in upload_id):
+        raise UploadError("Upload not found", 404)
+    base = os.path.join(tmp_dir(), upload_id)
+    return f"{base}.json", f"{base}.part"
+
+
+def _cleanup_stale() -> None:
+    cutoff = time.time() - UPLOAD_SESSION_TTL
+    with os.scandir(tmp_dir()) as it:
+        for entry in it:
+            try:
+                if entry.stat().st_mtime < cutoff:
+                    os.remove(entry.path)
+                    _hashers.pop(entry.name.split('.')[0], None)
+            except OSError:
+                continue
+
+
+def create_session(user_id: int, filename: str, original_name: str, category: str, size: int) -> Dict[str, Any]:
+    if size < 0 or size > UPLOAD_MAX_SIZE:
+        raise UploadError(f"File size must be between 0 and {UPLOAD_MAX_SIZE} bytes", 413)
+    category_dir(category)
+    _cleanup_stale()
+    upload_id = uuid.uuid4().hex
+    meta = {'id': upload_id, 'user_id': user_id, 'filename': filename, 'original_name': original_name,
+            'category': category, 'size': size, 'created_at': time.time()}
+    meta_path, part_path = _session_paths(upload_id)
+    open(part_path, "wb").close()
+    with open(meta_path, "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False)
+    return {**meta, 'offset': 0}
+
+
+def get_session(upload_id: str, user_id: int) -> Dict[str, Any]:
+    meta_path, part_path = _session_paths(upload_id)
+    try:
+        with open(meta_path, encoding="utf-8") as f:
+            meta = json.load(f)
+        offset = os.path.getsize(part_path)
+    except (OSError, ValueError):
+        raise UploadError("Upload not found", 404)
+    if meta['user_id'] != user_id:
+        raise UploadError("Upload not found", 404)
+    return {**meta, 'offset': offset}
+
+
+def _running_hash(upload_id: str, part_path: str, offset: int):
+    state = _hashers.get(upload_id)
+    if state is not None and state[0] == offset:
+        return state[1]
+    hasher = hashlib.sha256()
+    with open(part_path, "rb") as f:
+        for block in iter(lambda: f.read(_COPY_BLOCK), b""):
+            hasher.update(block)
+    return hasher
+
+
+@contextmanager
+def _locked(handle: IO[bytes]) -> Iterator[None]:
+    """Exclusive lock on an open .part file for the duration of the block."""
+    if fcntl is None:
+        with _upload_lock:
+            yield
+        return
+    fcntl.flock(handle, fcntl.LOCK_EX)
+    try:
+        yield
+    finally:
+        fcntl.flock(handle, fcntl.LOCK_UN)
+
+
+def append_chunk(upload_id: str, user_id: int, offset: int, src: IO[bytes]) -> Tuple[Dict[str, Any], Optional[str]]:
+    """Append a chunk written at offset. Returns (session, sha256 once the
+    upload is complete, else None). A wrong offset raises 409 with the
+    current one so the client can resume from there."""
+    _, part_path = _session_paths(upload_id)
+    try:
+        dst = open(part_path, "r+b")
+    except OSError:
+        raise UploadError("Upload not found", 404)
+    with dst, _locked(dst):
+        session = get_session(upload_id, user_id)
+        if offset != session['offset']:
+            raise UploadError("Offset does not match the bytes received", 409, offset=session['offset'])
+        hasher = _running_hash(upload_id, part_path, offset)
+        dst.seek(offset)
+        written = copy_stream(src, dst, hasher, limit=session['size'] - offset)
+    session['offset'] = offset + written
+    if session['offset'] < session['size']:
+        _hashers[upload_id] = (session['offset'], hasher)
+        return session, None
+    _hashers.pop(upload_id, None)
+    return session, hasher.hexdigest()
+
+
+def finish_session(upload_id: str, session: Dict[str, Any], sha256: str) -> Tuple[str, bool]:
+    """Store a completed upload and drop its session files."""
+    meta_path, part_path = _session_paths(upload_id)
+    rel_path, deduplicated = store_file(part_path, session['size'], sha256,
+                                        session['category'], session['filename'])
+    os.remove(meta_path)
+    return rel_path, deduplicated
+
+
+def abort_session(upload_id: str, user_id: int) -> None:
+    get_session(upload_id, user_id)
+    _hashers.pop(upload_id, None)
+    for path in _session_paths(upload_id):
+        discard(path)
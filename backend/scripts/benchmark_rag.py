@@ -0,0 +1,103 @@
+#!/usr/bin/env python
+"""
+Benchmark RAG retrieval over knowledge/ with a labeled question set.
+Reports recall@k, MRR, p50/p95 retrieval latency, prompt tokens sent to
+the LLM and ingestion throughput. Runs against a scratch in-memory
+database; embeddings come from a deterministic offline hashing backend
+unless --openai is given.
+
+Usage:
+    python scripts/benchmark_rag.py                       # knowledge/ + bundled questions
+    python scripts/benchmark_rag.py --k 1 3 5 10          # Recall cut-offs
+    python scripts/benchmark_rag.py --repeat 5            # More latency samples per question
+    python scripts/benchmark_rag.py --json report.json    # Save the full report
+    python scripts/benchmark_rag.py --openai              # Real embeddings (requires OPENAI_API_KEY)
+"""
+import os
+import sys
+import json
+import argparse
+import tempfile
+
+# Fix Unicode output on Windows
+if sys.platform == 'win32':
+    sys.stdout.reconfigure(encoding='utf-8', errors='replace')
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, BACKEND_DIR)
+
+DEFAULT_QUESTIONS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'rag_benchmark_questions.json')
+DEFAULT_CORPUS = os.path.join(BACKEND_DIR, '..', 'knowledge')
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark RAG retrieval quality and speed")
+    parser.add_argument("--questions", default=DEFAULT_QUESTIONS, help="Labeled question set (JSON)")
+    parser.add_argument("--corpus", default=DEFAULT_CORPUS, help="Directory the expected paths are relative to")
+    parser.add_argument("--k", type=int, nargs="+", default=[1, 3, 5], help="Recall cut-offs")
+    parser.add_argument("--repeat", type=int, default=1, help="Searches per question (latency samples)")
+    parser.add_argument("--model", default=None, help="LLM model used for prompt token counts (default: LLM_MODEL)")
+    parser.add_argument("--workers", type=int, default=None, help="PDF/DOCX extraction processes")
+    parser.add_argument("--openai", action="store_true", help="Use the real embedding API instead of the offline backend")
+    parser.add_argument("--json", default=None, help="Write the full report to this file")
+    parser.add_argument("--min-recall", type=float, default=None,
+                        help="Exit non-zero if recall at the largest k falls below this")
+    args = parser.parse_args()
+
+    # Scratch database and an empty knowledge folder, so app start-up neither
+    # touches real data nor pre-indexes the corpus we are about to time
+    os.environ['FLASK_ENV'] = 'testing'
+    os.environ['DATABASE_URL'] = 'sqlite:///:memory:'
+    os.environ['KNOWLEDGE_FOLDER'] = tempfile.mkdtemp(prefix='rag_benchmark_')
+
+    from my_project import create_app
+    from my_project.ai.benchmark import fake_embeddings, load_questions, run_benchmark
+
+    questions = load_questions(args.questions)
+    corpus = os.path.abspath(args.corpus)
+    if not os.path.isdir(corpus):
+        print(f"Corpus directory not found: {corpus}")
+        sys.exit(1)
+
+    app = create_app()
+    with app.app_context():
+        print(f"Benchmarking {len(questions)} questions over {corpus}", flush=True)
+        if args.openai:
+            report = run_benchmark(questions, corpus, k_values=args.k, model=args.model,
+                                   repeat=args.repeat, workers=args.workers)
+        else:
+            with fake_embeddings():
+                report = run_benchmark(questions, corpus, k_values=args.k, model=args.model,
+                                       repeat=args.repeat, workers=args.workers)
+
+    ing = report.ingestion
+    print(f"\n{'='*50}")
+    print(f"Ingestion: {ing['files']} files ({ing['megabytes']} MB), {ing['chunks']} chunks in {ing['seconds']}s")
+    print(f"  {ing['files_per_sec']} files/s, {ing['chunks_per_sec']} chunks/s, {ing['mb_per_sec']} MB/s")
+    print("Recall:  " + ", ".join(f"{k} {v:.3f}" for k, v in report.recall.items()))
+    print(f"MRR:     {report.mrr:.3f}")
+    lat = report.latency_ms
+    print(f"Latency: p50 {lat['p50']} ms, p95 {lat['p95']} ms, max {lat['max']} ms")
+    tok = report.prompt_tokens
+    print(f"Prompt tokens ({report.settings['tokenizer']}): mean {tok['mean']}, p95 {tok['p95']}, max {tok['max']}")
+    misses = [r for r in report.results if r.rank is None]
+    if misses:
+        print(f"Misses ({len(misses)}):")
+        for r in misses:
+            print(f"  - {r.question}  →  {', '.join(r.retrieved[:3]) or 'nothing'}")
+    print(f"{'='*50}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report.to_dict(), f, ensure_ascii=False, indent=2)
+        print(f"Report written to {args.json}")
+
+    if args.min_recall is not None:
+        worst_k = f"@{max(args.k)}"
+        if report.recall[worst_k] < args.min_recall:
+            print(f"Recall{worst_k} {report.recall[worst_k]:.3f} is below {args.min_recall}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
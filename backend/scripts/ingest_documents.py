@@ -1,13 +1,17 @@
 #!/usr/bin/env python
 """
-Ingest documents from knowledge/ directory into the knowledge base.
-Parses files, chunks text, and generates embeddings via OpenAI API.
+Ingest documents from knowledge/ (plus KNOWLEDGE_EXTRA_FOLDERS, by default
+the legislation library under content/) into the knowledge base.
+Extracts PDF/DOCX text on all cores, chunks text, and generates embeddings
+via OpenAI API.
 
 Usage:
     python scripts/ingest_documents.py                  # Chunk only (no embeddings)
     python scripts/ingest_documents.py --embed           # Chunk + generate embeddings
     python scripts/ingest_documents.py --embed --dir knowledge/ΝΟΜΟΘΕΣΙΑ  # Specific dir
     python scripts/ingest_documents.py --embed --reset   # Clear + re-ingest everything
+    python scripts/ingest_documents.py --full            # Re-read files even if mtime/size unchanged
+    python scripts/ingest_documents.py --workers 4       # Limit PDF/DOCX extraction processes
 """
 import os
 import sys
@@ -23,28 +27,20 @@ sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 
 from my_project import create_app
 from my_project.extensions import db
-from my_project.ai.knowledge import process_file
+from my_project.ai.knowledge import (
+    embed_pending_chunks, list_documents, reindex_directory,
+)
 from my_project.models import DocumentIndex, FileChunk
 
-SUPPORTED_EXTENSIONS = {'.txt', '.md'}
-
-
-def find_documents(base_dir: str) -> list:
-    """Recursively find all supported documents."""
-    documents = []
-    for root, dirs, files in os.walk(base_dir):
-        for fname in files:
-            ext = os.path.splitext(fname)[1].lower()
-            if ext in SUPPORTED_EXTENSIONS:
-                documents.append(os.path.join(root, fname))
-    return sorted(documents)
-
 
 def main():
     parser = argparse.ArgumentParser(description="Ingest documents into knowledge base")
     parser.add_argument("--embed", action="store_true", help="Generate embeddings (requires OPENAI_API_KEY)")
     parser.add_argument("--dir", default=None, help="Specific directory to ingest (default: knowledge/)")
     parser.add_argument("--reset", action="store_true", help="Clear all existing chunks before ingesting")
+    parser.add_argument("--full", action="store_true", help="Re-read every file (skip the mtime/size pre-check)")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="PDF/DOCX extraction processes (default: INGEST_WORKERS or all cores)")
     args = parser.parse_args()
 
     app = create_app()
@@ -57,42 +53,46 @@ def main():
             db.session.commit()
             print("Done.")
 
-        # Find knowledge directory
-        knowledge_dir = args.dir or os.path.join(
-            os.path.dirname(__file__), '..', '..', 'knowledge'
-        )
-        knowledge_dir = os.path.abspath(knowledge_dir)
-
-        if not os.path.exists(knowledge_dir):
-            print(f"Knowledge directory not found: {knowledge_dir}")
+        # Find knowledge directories
+        if args.dir:
+            roots = [os.path.abspath(args.dir)]
+        else:
+            roots = [os.path.abspath(d) for d in
+                     [app.config['KNOWLEDGE_FOLDER']] + list(app.config.get('KNOWLEDGE_EXTRA_FOLDERS', []))]
+        missing = [d for d in roots if not os.path.exists(d)]
+        roots = [d for d in roots if d not in missing]
+        for d in missing:
+            print(f"Knowledge directory not found: {d}")
+        if not roots:
             print("Make sure the knowledge/ directory exists with documents.")
             sys.exit(1)
 
-        documents = find_documents(knowledge_dir)
-        print(f"Found {len(documents)} documents in {knowledge_dir}")
+        documents = [p for root in roots for p in list_documents(root)]
+        print(f"Found {len(documents)} documents in {', '.join(roots)}")
 
         if not documents:
             print("No supported documents found.")
             return
 
-        success = 0
-        errors = 0
         start_time = time.time()
+        done = [0]
+
+        def on_file(path, status, error):
+            done[0] += 1
+            rel_path = os.path.relpath(path, os.path.commonpath(roots))
+            detail = f"ERROR: {error}" if error else status
+            print(f"[{done[0]}/{len(documents)}] {rel_path}: {detail}", flush=True)
+
+        report = reindex_directory(
+            roots, full=args.full, paths=documents, on_file=on_file, workers=args.workers,
+        )
+        success = report.files_scanned - report.errors
+        errors = report.errors
 
-        for i, doc_path in enumerate(documents, 1):
-            rel_path = os.path.relpath(doc_path, knowledge_dir)
-            print(f"[{i}/{len(documents)}] Processing: {rel_path}...", end=" ", flush=True)
-
-            try:
-                result = process_file(doc_path, generate_vectors=args.embed)
-                if result:
-                    print(f"OK ({result.chunk_count} chunks)")
-                    success += 1
-                else:
-                    print("SKIP (no content)")
-            except Exception as e:
-                print(f"ERROR: {e}")
-                errors += 1
+        if args.embed:
+            print("Embedding pending chunks in token-budgeted batches...", flush=True)
+            stats = embed_pending_chunks()
+            print(f"Embedded {stats['embedded']} chunks ({stats['failed']} failed)")
 
         elapsed = time.time() - start_time
         total_chunks = FileChunk.query.count()
@@ -100,7 +100,10 @@ def main():
 
         print(f"\n{'='*50}")
         print(f"Ingestion complete in {elapsed:.1f}s")
-        print(f"Documents: {success} OK, {errors} errors")
+        print(f"Documents: {success} OK, {errors} errors "
+              f"({report.files_skipped} skipped by stat, {report.files_unchanged} unchanged)")
+        print(f"Chunks: +{report.chunks_added} added, ~{report.chunks_changed} changed, "
+              f"-{report.chunks_removed} removed, {report.chunks_unchanged} kept")
         print(f"Total chunks: {total_chunks}")
         print(f"Embedded chunks: {embedded}")
         print(f"{'='*50}")
@@ -5,7 +5,7 @@ import {
   Bot, Send, Trash2, Clock, AlertTriangle,
   History, Plus, X, ChevronRight, Info, Copy, Check
 } from 'lucide-react';
-import api from '@/lib/api';
+import api, { postEventStream } from '@/lib/api';
 
 function simpleMarkdown(text) {
   let html = DOMPurify.sanitize(text);
@@ -78,20 +78,28 @@ function AssistantPage() {
         } catch { /* continue without persistence */ }
       }
 
-      const { data } = await api.post('/api/chat', {
-        message: text,
-        chat_history: chatHistory,
-        session_id: currentSessionId,
-      });
-
+      const replyId = (Date.now() + 1).toString();
       setMessages(prev => [...prev, {
-        id: (Date.now() + 1).toString(),
+        id: replyId,
         type: 'assistant',
-        content: data.reply,
-        sources: data.sources || [],
+        content: '',
+        sources: [],
         timestamp: new Date().toISOString()
       }]);
+      const updateReply = (patch) =>
+        setMessages(prev => prev.map(m => (m.id === replyId ? { ...m, ...patch(m) } : m)));
+
+      await postEventStream('/api/chat/stream', {
+        message: text,
+        chat_history: chatHistory,
+        session_id: currentSessionId,
+      }, (event, data) => {
+        if (event === 'token') updateReply(m => ({ content: m.content + data.content }));
+        else if (event === 'done') updateReply(() => ({ content: data.reply, sources: data.sources || [] }));
+        else if (event === 'error') throw new Error(data.error);
+      });
     } catch {
+      setMessages(prev => prev.filter(m => !(m.type === 'assistant' && m.content === '' && !m.isError)));
       setMessages(prev => [...prev, {
         id: (Date.now() + 1).toString(),
         type: 'assistant',
@@ -280,7 +288,7 @@ function AssistantPage() {
 
       {/* ─── Messages — borderless, floating on page background ─── */}
       <div className="flex-1 overflow-y-auto px-2 pb-5 flex flex-col gap-7 [&::-webkit-scrollbar]:w-[4px] [&::-webkit-scrollbar-track]:bg-transparent [&::-webkit-scrollbar-thumb]:bg-[#e8e2d8] [&::-webkit-scrollbar-thumb]:rounded-full">
-        {messages.map(m => (
+        {messages.filter(m => m.content !== '').map(m => (
           <div key={m.id} className={`flex ${m.type === 'user' ? 'justify-end' : 'justify-start'}`}>
             {m.type === 'user' ? (
               /* ── User bubble ── */
@@ -356,7 +364,7 @@ function AssistantPage() {
         ))}
 
         {/* Loading indicator */}
-        {isLoading && (
+        {isLoading && !(messages[messages.length - 1]?.type === 'assistant' && messages[messages.length - 1]?.content) && (
           <div className="flex justify-start">
             <div>
               <div className="flex items-center gap-2 mb-2.5">
@@ -109,8 +109,26 @@ export default function KnowledgeBasePage() {
   const handleReindex = async () => {
     setReindexing(true);
     try {
-      const res = await api.post('/api/knowledge/reindex');
-      toast.success(`Reindex: ${res.data.processed} αρχεία, ${res.data.errors} σφάλματα`);
+      let job;
+      try {
+        job = (await api.post('/api/knowledge/reindex')).data.job;
+      } catch (err) {
+        // Another reindex is already running — follow that one instead
+        if (err.response?.status !== 409) throw err;
+        job = err.response.data.job;
+      }
+      while (job.status === 'queued' || job.status === 'running') {
+        await new Promise((resolve) => setTimeout(resolve, 2000));
+        job = (await api.get(`/api/knowledge/jobs/${job.id}`)).data;
+      }
+      if (job.status === 'completed') {
+        const report = job.report || {};
+        toast.success(`Reindex: ${job.processed_files} αρχεία, ${report.errors || 0} σφάλματα`);
+      } else if (job.status === 'cancelled') {
+        toast.info('Το reindex ακυρώθηκε');
+      } else {
+        toast.error(`Σφάλμα reindex${job.error ? `: ${job.error}` : ''}`);
+      }
       fetchData();
     } catch (err) {
       toast.error('Σφάλμα reindex');
@@ -0,0 +1,149 @@
+"""Tests for the semantic answer cache."""
+from datetime import datetime, timedelta
+from unittest.mock import patch, MagicMock
+
+import pytest
+
+from my_project.ai.embeddings import EmbeddingResult
+
+
+def _vector(*weights):
+    vec = [0.0] * 1536
+    for i, w in enumerate(weights):
+        vec[i] = w
+    return vec
+
+
+QUESTIONS = {
+    "Ποιο είναι το πρόστιμο για ΚΔΑΠ χωρίς άδεια;": _vector(1.0),
+    "Τι πρόστιμο έχει ΚΔΑΠ χωρίς άδεια;": _vector(0.99, 0.05),
+    "Πώς γίνεται η αναδοχή παιδιού;": _vector(0.0, 0.0, 1.0),
+}
+
+
+def _fake_embedding(text, model=None):
+    return EmbeddingResult(embedding=QUESTIONS[text], model="fake", text_hash="", token_count=0)
+
+
+@pytest.fixture
+def cache(app):
+    with app.app_context():
+        from my_project.extensions import db
+        from my_project.models import AnswerCache, DocumentIndex
+        from my_project.ai import answer_cache
+        AnswerCache.query.delete()
+        DocumentIndex.query.filter_by(file_path="test/answer_cache_law.txt").delete()
+        db.session.add(DocumentIndex(
+            file_path="test/answer_cache_law.txt", file_name="law.txt",
+            file_type="txt", file_hash="v1", status="ready",
+        ))
+        db.session.commit()
+        with patch.object(answer_cache, "get_query_embedding", side_effect=_fake_embedding):
+            yield answer_cache
+        AnswerCache.query.delete()
+        db.session.commit()
+
+
+RESULT = {
+    "reply": "Πρόστιμο 5.000€.", "sources": ["test/answer_cache_law.txt"],
+    "context_used": True, "chunks_found": 3, "docs_loaded": 1, "model": "gpt-4o-mini",
+}
+
+
+def test_similar_question_hits(cache):
+    cache.store("Ποιο είναι το πρόστιμο για ΚΔΑΠ χωρίς άδεια;", "gpt-4o-mini", "staff",
+                RESULT, ["test/answer_cache_law.txt"])
+
+    hit = cache.lookup("Τι πρόστιμο έχει ΚΔΑΠ χωρίς άδεια;", "gpt-4o-mini", "staff")
+    assert hit["reply"] == "Πρόστιμο 5.000€."
+    assert hit["sources"] == ["test/answer_cache_law.txt"]
+    assert hit["cache_similarity"] >= 0.95
+
+    assert cache.lookup("Πώς γίνεται η αναδοχή παιδιού;", "gpt-4o-mini", "staff") is None
+    assert cache.lookup("Τι πρόστιμο έχει ΚΔΑΠ χωρίς άδεια;", "gpt-4o", "staff") is None
+    assert cache.lookup("Τι πρόστιμο έχει ΚΔΑΠ χωρίς άδεια;", "gpt-4o-mini", "guest") is None
+    assert cache.lookup("Τι πρόστιμο έχει ΚΔΑΠ χωρίς άδεια;", "gpt-4o-mini", "staff",
+                        threshold=0.9999) is None
+
+
+def test_changed_source_hash_invalidates(cache):
+    from my_project.extensions import db
+    from my_project.models import AnswerCache, DocumentIndex
+    question = "Ποιο είναι το πρόστιμο για ΚΔΑΠ χωρίς άδεια;"
+    cache.store(question, "gpt-4o-mini", "", RESULT, ["test/answer_cache_law.txt"])
+
+    DocumentIndex.query.filter_by(file_path="test/answer_cache_law.txt").first().file_hash = "v2"
+    db.session.commit()
+
+    assert cache.lookup(question, "gpt-4o-mini") is None
+    assert AnswerCache.query.count() == 0
+
+
+def test_invalidate_sources_and_ttl(cache):
+    from my_project.extensions import db
+    from my_project.models import AnswerCache
+    question = "Ποιο είναι το πρόστιμο για ΚΔΑΠ χωρίς άδεια;"
+    cache.store(question, "gpt-4o-mini", "", RESULT, ["test/answer_cache_law.txt"])
+    assert cache.invalidate_sources(["test/other.txt"]) == 0
+    assert cache.invalidate_sources(["test/answer_cache_law.txt"]) == 1
+
+    cache.store(question, "gpt-4o-mini", "", RESULT, ["test/answer_cache_law.txt"])
+    AnswerCache.query.first().expires_at = datetime.utcnow() - timedelta(seconds=1)
+    db.session.commit()
+    assert cache.lookup(question, "gpt-4o-mini") is None
+
+
+def test_get_chat_reply_marks_cache_hits(cache):
+    docs = [{"source_path": "test/answer_cache_law.txt", "content": "Νόμος",
+             "relevance_score": 0.9, "chunk_hits": 1}]
+    chunks = [{"content": "Νόμος", "source_path": "test/answer_cache_law.txt", "similarity": 0.9}]
+    with patch("my_project.ai.copilot.search_chunks", return_value=chunks) as search, \
+            patch("my_project.ai.copilot.load_full_documents", return_value=docs), \
+            patch("my_project.ai.copilot.get_llm_client") as mock_client:
+        response = MagicMock()
+        response.choices = [MagicMock()]
+        response.choices[0].message.content = "Πρόστιμο 5.000€."
+        create = mock_client.return_value.chat.completions.create
+        create.return_value = response
+
+        from my_project.ai.copilot import get_chat_reply, stream_chat_reply
+        first = get_chat_reply("Ποιο είναι το πρόστιμο για ΚΔΑΠ χωρίς άδεια;")
+        second = get_chat_reply("Τι πρόστιμο έχει ΚΔΑΠ χωρίς άδεια;")
+        frames = list(stream_chat_reply("Τι πρόστιμο έχει ΚΔΑΠ χωρίς άδεια;"))
+        follow_up = get_chat_reply(
+            "Τι πρόστιμο έχει ΚΔΑΠ χωρίς άδεια;",
+            chat_history=[{"role": "user", "content": "Γεια"}],
+        )
+
+    assert first["cached"] is False
+    assert second["cached"] is True
+    assert second["reply"] == first["reply"]
+    assert frames[-1]["cached"] is True and frames[-1]["reply"] == first["reply"]
+    assert follow_up["cached"] is False
+    assert create.call_count == 2
+    assert search.call_count == 2
+
+
+def test_cacheable_prompts_omit_the_username(cache):
+    docs = [{"source_path": "test/answer_cache_law.txt", "content": "Νόμος",
+             "relevance_score": 0.9, "chunk_hits": 1}]
+    with patch("my_project.ai.copilot.search_chunks", return_value=[]), \
+            patch("my_project.ai.copilot.load_full_documents", return_value=docs), \
+            patch("my_project.ai.copilot.get_llm_client") as mock_client:
+        response = MagicMock()
+        response.choices = [MagicMock()]
+        response.choices[0].message.content = "Πρόστιμο 5.000€."
+        create = mock_client.return_value.chat.completions.create
+        create.return_value = response
+
+        from my_project.ai.copilot import get_chat_reply
+        user = {"username": "maria", "role": "staff"}
+        get_chat_reply("Ποιο είναι το πρόστιμο για ΚΔΑΠ χωρίς άδεια;", user_context=user)
+        get_chat_reply("Ποιο είναι το πρόστιμο για ΚΔΑΠ χωρίς άδεια;", user_context=user,
+                       chat_history=[{"role": "user", "content": "Γεια"}])
+
+    standalone, follow_up = (" ".join(m["content"] for m in call.kwargs["messages"])
+                             for call in create.call_args_list)
+    # The standalone answer may be served to other staff users
+    assert "staff" in standalone and "maria" not in standalone
+    assert "maria" in follow_up
@@ -0,0 +1,65 @@
+"""Tests for the offline RAG retrieval benchmark."""
+import numpy as np
+
+
+def test_hashing_embeddings_are_deterministic_and_topical():
+    from my_project.ai.benchmark import HashingEmbeddingClient
+    client = HashingEmbeddingClient()
+    response = client.embeddings.create(model="m", input=[
+        "Άδεια λειτουργίας ΚΔΑΠ για παιδιά",
+        "Προϋποθέσεις άδειας λειτουργίας ΚΔΑΠ",
+        "Διακρατική υιοθεσία ανηλίκων",
+    ])
+    a, b, c = (np.array(d.embedding) for d in sorted(response.data, key=lambda d: d.index))
+
+    assert len(a) == 1536
+    assert np.isclose(np.linalg.norm(a), 1.0)
+    assert HashingEmbeddingClient().embed("Άδεια λειτουργίας ΚΔΑΠ για παιδιά") == a.tolist()
+    assert a @ b > 0.5
+    assert 0.1 < a @ c < 0.3  # baseline similarity of unrelated texts
+
+
+def test_retrieval_metrics():
+    from my_project.ai.benchmark import first_hit_rank, mean_reciprocal_rank, percentile, recall_at_k
+    assert first_hit_rank(["a.md", "b.md", "c.md"], ["x.md", "b.md"]) == 2
+    assert first_hit_rank(["a.md"], ["x.md"]) is None
+
+    ranks = [1, 2, None, 4]
+    assert recall_at_k(ranks, 1) == 0.25
+    assert recall_at_k(ranks, 3) == 0.5
+    assert recall_at_k(ranks, 5) == 0.75
+    assert mean_reciprocal_rank(ranks) == (1 + 0.5 + 0.25) / 4
+    assert percentile([1, 2, 3, 4, 5], 50) == 3
+    assert percentile([10, 20], 95) == 19.5
+
+
+def test_run_benchmark_offline(app, tmp_path):
+    from my_project.ai import embeddings
+    from my_project.ai.benchmark import fake_embeddings, run_benchmark
+    (tmp_path / "ΚΔΑΠ").mkdir()
+    (tmp_path / "ΚΔΑΠ" / "άδεια.md").write_text(
+        "Η άδεια λειτουργίας Κέντρου Δημιουργικής Απασχόλησης Παιδιών εκδίδεται "
+        "από την Περιφέρεια μετά από αυτοψία.", encoding="utf-8")
+    (tmp_path / "υιοθεσία.md").write_text(
+        "Η διακρατική υιοθεσία ανηλίκων ρυθμίζεται από τη Σύμβαση της Χάγης.", encoding="utf-8")
+    (tmp_path / "κατασκηνώσεις.md").write_text(
+        "Οι παιδικές κατασκηνώσεις ελέγχονται υγειονομικά κάθε καλοκαίρι.", encoding="utf-8")
+    questions = [
+        {"question": "Ποιος εκδίδει την άδεια λειτουργίας ΚΔΑΠ;", "expected": ["ΚΔΑΠ/άδεια.md"]},
+        {"question": "διακρατική υιοθεσία", "expected": ["υιοθεσία.md"]},
+        {"question": "υγειονομικός έλεγχος κατασκηνώσεων", "expected": ["κατασκηνώσεις.md"]},
+    ]
+
+    original = embeddings._get_client
+    with app.app_context(), fake_embeddings() as client:
+        report = run_benchmark(questions, str(tmp_path), k_values=(1, 3), repeat=2)
+
+    assert embeddings._get_client is original
+    assert client.requests > 0
+    assert report.ingestion["files"] == 3 and report.ingestion["chunks_embedded"] == 3
+    assert report.recall == {"@1": 1.0, "@3": 1.0}
+    assert report.mrr == 1.0
+    assert len(report.results[0].latency_ms) == 2
+    assert report.latency_ms["p95"] >= report.latency_ms["p50"] > 0
+    assert all(r.prompt_tokens > 0 for r in report.results)
+    assert report.to_dict()["results"][1]["retrieved"][0] == "υιοθεσία.md"
@@ -0,0 +1,95 @@
+"""Tests for the shared AI client registry."""
+import json
+import threading
+import http.server
+from unittest.mock import patch
+
+import pytest
+
+
+class _EmbeddingHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers["Content-Length"]))
+        body = json.dumps({
+            "object": "list", "model": "m",
+            "data": [{"object": "embedding", "index": 0, "embedding": [0.1, 0.2]}],
+            "usage": {"prompt_tokens": 1, "total_tokens": 1},
+        }).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def local_server():
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), _EmbeddingHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_port}/v1"
+    server.shutdown()
+    server.server_close()
+
+
+def test_clients_are_shared_per_base_url():
+    from my_project.ai.clients import ClientRegistry
+    registry = ClientRegistry()
+    a = registry.client(None, "sk-test")
+    assert registry.client(None, "sk-test") is a
+    assert registry.client("http://ollama:11434/v1", "sk-test") is not a
+    assert registry.metrics()["clients"] == 2
+    registry.close()
+
+
+def test_llm_client_uses_base_url_without_key(monkeypatch):
+    from my_project.ai import clients
+    monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+    monkeypatch.delenv("LLM_API_KEY", raising=False)
+    monkeypatch.delenv("LLM_BASE_URL", raising=False)
+    with pytest.raises(RuntimeError):
+        clients.get_llm_client()
+
+    monkeypatch.setenv("LLM_BASE_URL", "http://ollama:11434/v1")
+    with patch.object(clients, "_registry", clients.ClientRegistry()):
+        client = clients.get_llm_client()
+        assert str(client.base_url).startswith("http://ollama:11434/v1")
+        assert clients.get_llm_client() is client
+
+
+def test_connections_are_reused(local_server):
+    from my_project.ai.clients import ClientRegistry
+    registry = ClientRegistry()
+    client = registry.client(local_server, "sk-test", max_retries=0)
+    for _ in range(4):
+        client.embeddings.create(model="m", input="κείμενο")
+
+    pool = registry.metrics()["pools"][local_server]
+    assert pool["responses"] == 4
+    assert pool["new_connections"] == 1
+    assert pool["reused_connections"] == 3
+    registry.close()
+
+
+def test_encoders_are_cached():
+    from my_project.ai.clients import ClientRegistry
+    registry = ClientRegistry()
+    first = registry.encoder("gpt-4o-mini")
+    if first is None:
+        pytest.skip("tiktoken BPE files unavailable offline")
+    assert registry.encoder("gpt-4o-mini") is first
+    assert registry.metrics()["encoders"] == ["gpt-4o-mini"]
+
+
+def test_encoder_load_failure_is_not_retried():
+    from my_project.ai.clients import ClientRegistry
+    registry = ClientRegistry()
+    with patch("tiktoken.encoding_for_model", side_effect=OSError("offline")) as load:
+        assert registry.encoder("gpt-4o-mini") is None
+        assert registry.encoder("gpt-4o-mini") is None
+    assert load.call_count == 1
+    assert registry.metrics()["encoders"] == []
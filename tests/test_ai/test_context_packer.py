@@ -0,0 +1,71 @@
+"""Tests for token-aware prompt packing."""
+from unittest.mock import patch, MagicMock
+
+
+def _long_document():
+    filler = "\n".join(f"Άρθρο {i}. Γενικές διατάξεις για τη λειτουργία των δομών." for i in range(400))
+    target = "Άρθρο 999. Το πρόστιμο για ΚΔΑΠ χωρίς άδεια ανέρχεται σε 5.000 ευρώ."
+    return filler + "\n" + target + "\n" + filler, target
+
+
+def test_context_window_prefix_match():
+    from my_project.ai.context_packer import context_window, DEFAULT_CONTEXT_WINDOW
+    assert context_window("gpt-4o-mini") == 128000
+    assert context_window("gpt-4") == 8192
+    assert context_window("gpt-4-turbo-preview") == 128000
+    assert context_window("llama3.1:8b") == DEFAULT_CONTEXT_WINDOW
+
+
+def test_long_document_is_reduced_to_matching_window():
+    from my_project.ai import context_packer
+    text, target = _long_document()
+    docs = [{"source_path": "/k/law.txt", "content": text}]
+    chunks = [{"source_path": "/k/law.txt", "content": target, "similarity": 0.9}]
+
+    with patch.object(context_packer, "MAX_PROMPT_TOKENS", 1500):
+        packed = context_packer.pack_context("gpt-4o-mini", ["system"], "Πρόστιμο;", docs, chunks, [])
+
+    doc = packed.documents[0]
+    assert doc["excerpt"] is True
+    assert target in doc["content"]
+    assert len(doc["content"]) < len(text) // 4
+    assert packed.tokens["total"] <= packed.tokens["budget"] == 1500
+
+
+def test_documents_that_fit_are_kept_whole_in_rank_order():
+    from my_project.ai import context_packer
+    docs = [{"source_path": f"/k/{i}.txt", "content": f"Έγγραφο {i}."} for i in range(3)]
+    packed = context_packer.pack_context("gpt-4o-mini", ["system"], "Ερώτηση", docs, [], [])
+    assert [d["content"] for d in packed.documents] == ["Έγγραφο 0.", "Έγγραφο 1.", "Έγγραφο 2."]
+    assert not any(d.get("excerpt") for d in packed.documents)
+
+
+def test_history_keeps_newest_messages_within_budget():
+    from my_project.ai import context_packer
+    history = [{"role": "user", "content": f"Μήνυμα {i} " + "λέξη " * 50} for i in range(20)]
+    with patch.object(context_packer, "HISTORY_MAX_TOKENS", 400):
+        packed = context_packer.pack_context("gpt-4o-mini", ["system"], "Ερώτηση", [], [], history)
+    assert 0 < len(packed.history) < 20
+    assert packed.history[-1] is history[-1]
+    assert packed.tokens["history"] <= 400
+
+
+def test_get_chat_reply_reports_token_breakdown(app):
+    with app.app_context():
+        docs = [{"source_path": "/docs/law.txt", "content": "Πλήρες κείμενο νόμου.",
+                 "relevance_score": 0.9, "chunk_hits": 1}]
+        with patch("my_project.ai.copilot.search_chunks",
+                   return_value=[{"content": "νόμου", "source_path": "/docs/law.txt", "similarity": 0.9}]), \
+                patch("my_project.ai.copilot.load_full_documents", return_value=docs), \
+                patch("my_project.ai.copilot.get_llm_client") as mock_client:
+            response = MagicMock()
+            response.choices = [MagicMock()]
+            response.choices[0].message.content = "Απάντηση"
+            mock_client.return_value.chat.completions.create.return_value = response
+
+            from my_project.ai.copilot import get_chat_reply
+            result = get_chat_reply("Ερώτηση", chat_history=[{"role": "user", "content": "Γεια"}])
+
+        tokens = result["tokens"]
+        assert tokens["documents"] > 0 and tokens["history"] > 0 and tokens["system"] > 0
+        assert tokens["total"] == tokens["system"] + tokens["documents"] + tokens["history"] + tokens["question"]
@@ -128,13 +128,13 @@ def test_get_chat_reply_loads_full_documents(app):
 
         with patch("my_project.ai.copilot.search_chunks", return_value=mock_chunks), \
              patch("my_project.ai.copilot.load_full_documents", return_value=mock_full_docs), \
-             patch("my_project.ai.copilot.openai") as mock_openai:
+             patch("my_project.ai.copilot.get_llm_client") as mock_client:
 
             # Mock the OpenAI response
             mock_response = MagicMock()
             mock_response.choices = [MagicMock()]
             mock_response.choices[0].message.content = "Η απάντηση"
-            mock_openai.OpenAI.return_value.chat.completions.create.return_value = mock_response
+            mock_client.return_value.chat.completions.create.return_value = mock_response
 
             from my_project.ai.copilot import get_chat_reply
             result = get_chat_reply("Ερώτηση")
@@ -149,15 +149,48 @@ def test_get_chat_reply_returns_docs_loaded_field(app):
     """get_chat_reply response should include docs_loaded count."""
     with app.app_context():
         with patch("my_project.ai.copilot.search_chunks", return_value=[]), \
-             patch("my_project.ai.copilot.openai") as mock_openai:
+             patch("my_project.ai.copilot.get_llm_client") as mock_client:
 
             mock_response = MagicMock()
             mock_response.choices = [MagicMock()]
             mock_response.choices[0].message.content = "Δεν βρήκα πληροφορία."
-            mock_openai.OpenAI.return_value.chat.completions.create.return_value = mock_response
+            mock_client.return_value.chat.completions.create.return_value = mock_response
 
             from my_project.ai.copilot import get_chat_reply
             result = get_chat_reply("Ερώτηση")
 
             assert "docs_loaded" in result
             assert result["docs_loaded"] == 0
+
+
+def _stream_events(*texts):
+    events = []
+    for text in texts:
+        event = MagicMock()
+        event.choices = [MagicMock()]
+        event.choices[0].delta.content = text
+        events.append(event)
+    return iter(events)
+
+
+def test_stream_chat_reply_yields_tokens_then_done(app):
+    """stream_chat_reply should yield each delta, then a final frame with metadata."""
+    with app.app_context():
+        mock_chunks = [{"content": "chunk1", "source_path": "/docs/law.txt", "similarity": 0.9}]
+        with patch("my_project.ai.copilot.search_chunks", return_value=mock_chunks), \
+             patch("my_project.ai.copilot.load_full_documents", return_value=[]), \
+             patch("my_project.ai.copilot.get_llm_client") as mock_client:
+            create = mock_client.return_value.chat.completions.create
+            create.return_value = _stream_events("Η ", "απάντηση")
+
+            from my_project.ai.copilot import stream_chat_reply, DISCLAIMER_TEXT
+            frames = list(stream_chat_reply("Ερώτηση"))
+
+        assert create.call_args.kwargs["stream"] is True
+        tokens = [f["content"] for f in frames if f["type"] == "token"]
+        assert tokens[:2] == ["Η ", "απάντηση"]
+        done = frames[-1]
+        assert done["type"] == "done"
+        assert done["reply"] == "Η απάντηση" + DISCLAIMER_TEXT
+        assert done["sources"] == ["/docs/law.txt"]
+        assert done["chunks_found"] == 1
@@ -0,0 +1,72 @@
+"""Tests for the cached knowledge document loader."""
+import os
+from unittest.mock import patch
+
+
+def _tree(tmp_path):
+    sub = tmp_path / "ΝΟΜΟΘΕΣΙΑ"
+    sub.mkdir()
+    (sub / "law_a.md").write_text("Νόμος Α για ΚΔΑΠ.", encoding="utf-8")
+    (tmp_path / "law_b.txt").write_text("Νόμος Β για ΜΦΗ.", encoding="utf-8")
+    return sub
+
+
+def test_resolves_relative_and_basename_paths(tmp_path):
+    from my_project.ai.document_store import DocumentStore
+    _tree(tmp_path)
+    store = DocumentStore(str(tmp_path))
+
+    assert store.read("knowledge/ΝΟΜΟΘΕΣΙΑ/law_a.md") == "Νόμος Α για ΚΔΑΠ."
+    assert store.read("/old/deploy/knowledge/ΝΟΜΟΘΕΣΙΑ/law_a.md") == "Νόμος Α για ΚΔΑΠ."
+    assert store.read("law_b.txt") == "Νόμος Β για ΜΦΗ."
+    assert store.read("missing.md") == ""
+
+
+def test_warm_read_is_one_stat_and_no_walk(tmp_path):
+    from my_project.ai import document_store
+    _tree(tmp_path)
+    store = document_store.DocumentStore(str(tmp_path))
+    store.read("/elsewhere/law_a.md")
+
+    with patch.object(document_store.os, "scandir", side_effect=AssertionError("walked")), \
+            patch.object(document_store.os, "stat", wraps=os.stat) as stat, \
+            patch("builtins.open", side_effect=AssertionError("re-read")):
+        assert store.read("/elsewhere/law_a.md") == "Νόμος Α για ΚΔΑΠ."
+    assert stat.call_count == 1
+    assert store.stats()["hits"] == 1
+
+
+def test_modified_file_is_reloaded(tmp_path):
+    from my_project.ai.document_store import DocumentStore
+    sub = _tree(tmp_path)
+    store = DocumentStore(str(tmp_path))
+    assert "ΚΔΑΠ" in store.read("law_a.md")
+
+    path = sub / "law_a.md"
+    path.write_text("Τροποποιημένος νόμος.", encoding="utf-8")
+    st = path.stat()
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+    assert store.read("law_a.md") == "Τροποποιημένος νόμος."
+
+
+def test_new_file_is_found_after_index_built(tmp_path):
+    from my_project.ai.document_store import DocumentStore
+    sub = _tree(tmp_path)
+    store = DocumentStore(str(tmp_path))
+    store.read("law_a.md")
+
+    (sub / "law_c.md").write_text("Νέος νόμος.", encoding="utf-8")
+    assert store.read("law_c.md") == "Νέος νόμος."
+    assert store.stats()["index_builds"] == 2
+
+
+def test_lru_evicts_by_size(tmp_path):
+    from my_project.ai.document_store import DocumentStore
+    for name in ("a.txt", "b.txt", "c.txt"):
+        (tmp_path / name).write_text(name * 100, encoding="utf-8")
+    store = DocumentStore(str(tmp_path), max_bytes=1000)
+    for name in ("a.txt", "b.txt", "c.txt"):
+        store.read(name)
+    stats = store.stats()
+    assert stats["cached_documents"] == 2
+    assert stats["cached_bytes"] <= 1000
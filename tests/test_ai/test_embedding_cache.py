@@ -0,0 +1,75 @@
+"""Tests for the two-tier query embedding cache."""
+import pytest
+from unittest.mock import patch
+
+
+def _fake_result(text, model="text-embedding-3-small"):
+    from my_project.ai.embeddings import EmbeddingResult
+    return EmbeddingResult(embedding=[0.5] * 1536, model=model, text_hash="x", token_count=3)
+
+
+def test_normalize_query_collapses_whitespace_and_case():
+    from my_project.ai.embedding_cache import normalize_query, query_hash
+    assert normalize_query("  Πρόστιμο   ΚΔΑΠ \n") == "πρόστιμο κδαπ"
+    assert query_hash("Πρόστιμο ΚΔΑΠ") == query_hash("πρόστιμο  κδαπ")
+
+
+def test_lru_cache_evicts_oldest():
+    from my_project.ai.embedding_cache import LRUCache
+    cache = LRUCache(maxsize=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.get("a")  # touch a → b is now oldest
+    cache.put("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert len(cache) == 2
+
+
+def test_repeat_query_hits_memory(app):
+    with app.app_context():
+        from my_project.ai import embedding_cache
+        embedding_cache.clear_cache(reset_stats=True)
+        with patch.object(embedding_cache, "generate_embedding", side_effect=_fake_result) as gen:
+            embedding_cache.get_query_embedding("πρόστιμο ΚΔΑΠ μνήμη")
+            embedding_cache.get_query_embedding("Πρόστιμο  ΚΔΑΠ μνήμη")
+        assert gen.call_count == 1
+        stats = embedding_cache.cache_stats()
+        assert stats["misses"] == 1
+        assert stats["memory_hits"] == 1
+
+
+def test_durable_tier_survives_memory_clear(app):
+    with app.app_context():
+        from my_project.ai import embedding_cache
+        from my_project.models import QueryEmbedding
+        embedding_cache.clear_cache(reset_stats=True)
+        with patch.object(embedding_cache, "generate_embedding", side_effect=_fake_result) as gen:
+            embedding_cache.get_query_embedding("άδεια λειτουργίας ΜΦΗ")
+            embedding_cache.clear_cache()
+            result = embedding_cache.get_query_embedding("άδεια λειτουργίας ΜΦΗ")
+        assert gen.call_count == 1
+        assert len(result.embedding) == 1536
+        assert embedding_cache.cache_stats()["db_hits"] == 1
+        assert QueryEmbedding.query.filter_by(
+            text_hash=embedding_cache.query_hash("άδεια λειτουργίας ΜΦΗ")
+        ).count() == 1
+
+
+def test_durable_lookup_failure_rolls_back(app):
+    with app.app_context():
+        from my_project.ai import embedding_cache
+        from my_project.extensions import db
+        embedding_cache.clear_cache()
+        with patch("my_project.models.QueryEmbedding.query") as query, \
+                patch.object(db.session, "rollback", wraps=db.session.rollback) as rollback:
+            query.filter_by.side_effect = RuntimeError("relation does not exist")
+            assert embedding_cache._load_durable("text-embedding-3-small", "missing") is None
+        rollback.assert_called_once()
+
+
+def test_knowledge_stats_exposes_cache_counters(client, auth_headers):
+    response = client.get('/api/knowledge/stats', headers=auth_headers)
+    assert response.status_code == 200
+    stats = response.get_json()["embedding_cache"]
+    assert {"memory_hits", "db_hits", "misses", "hit_rate"} <= set(stats)
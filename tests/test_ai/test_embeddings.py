@@ -32,3 +32,101 @@ def test_chunk_size_handles_legislative_text():
     # With 1200-char default, should fit in exactly 1 chunk
     assert len(chunks) == 1
     assert chunks[0].content.startswith("Άρθρο 1.")
+
+
+def test_chunks_are_exact_source_slices():
+    """Chunk offsets should slice the source text, overlap included."""
+    from my_project.ai.embeddings import chunk_text
+    text = "  Άρθρο 1.\n\n" + "\n\n".join(f"Παράγραφος {i}. " + "Κείμενο νόμου. " * 12 for i in range(20))
+    chunks = chunk_text(text, chunk_size=400, overlap=80)
+    assert len(chunks) > 3
+    for prev, chunk in zip(chunks, chunks[1:]):
+        assert text[chunk.start:chunk.end] == chunk.content
+        assert chunk.start < prev.end  # overlaps the previous chunk
+        assert text[chunk.start - 1].isspace()  # starts on a word boundary
+    assert chunks[0].content.startswith("Άρθρο 1.")
+
+
+def test_chunker_bounds_text_without_boundaries():
+    """A paragraph with no sentence punctuation is still cut near chunk_size."""
+    from my_project.ai.embeddings import chunk_text, iter_chunk_spans
+    text = "λέξη " * 5000
+    spans = iter_chunk_spans(text, chunk_size=500, overlap=50)
+    assert next(spans) == (0, 499)  # lazy: first span without chunking the rest
+    # chunk_size + overlap, plus at most one word where the overlap backs up to a word start
+    assert max(len(c.content) for c in chunk_text(text, chunk_size=500, overlap=50)) <= 500 + 50 + len("λέξη")
+
+
+from unittest.mock import MagicMock, patch
+
+
+def _fake_embeddings_client(fail_first=0):
+    """Client whose embeddings.create returns one vector per input, failing N times with 429."""
+    import httpx
+    import openai
+
+    calls = {"n": 0, "sizes": []}
+
+    def create(model, input):
+        calls["n"] += 1
+        if calls["n"] <= fail_first:
+            response = httpx.Response(429, request=httpx.Request("POST", "https://api.test/embeddings"))
+            raise openai.RateLimitError("rate limited", response=response, body=None)
+        calls["sizes"].append(len(input))
+        data = [MagicMock(index=i, embedding=[float(len(t))] * 1536) for i, t in enumerate(input)]
+        return MagicMock(data=list(reversed(data)))
+
+    client = MagicMock()
+    client.embeddings.create.side_effect = create
+    return client, calls
+
+
+def test_pack_batches_respects_token_and_item_budgets():
+    from my_project.ai.embeddings import pack_batches
+    assert pack_batches([40, 40, 40, 10], max_tokens=100, max_items=10) == [[0, 1], [2, 3]]
+    assert pack_batches([1, 1, 1, 1, 1], max_tokens=100, max_items=2) == [[0, 1], [2, 3], [4]]
+    # An oversized single input still gets its own request
+    assert pack_batches([500, 1], max_tokens=100, max_items=10) == [[0], [1]]
+
+
+def test_iter_embeddings_preserves_order_across_batches():
+    from my_project.ai.embeddings import iter_embeddings
+    texts = ["α" * n for n in range(1, 21)]
+    client, calls = _fake_embeddings_client()
+    results = {}
+    for indices, batch in iter_embeddings(texts, max_tokens=30, max_items=4, concurrency=3, client=client):
+        for i, r in zip(indices, batch):
+            results[i] = r
+    assert len(results) == 20
+    assert all(results[i].embedding[0] == float(len(texts[i])) for i in range(20))
+    assert max(calls["sizes"]) <= 4
+
+
+def test_iter_embeddings_retries_rate_limits():
+    from my_project.ai.embeddings import iter_embeddings
+    client, calls = _fake_embeddings_client(fail_first=2)
+    with patch("my_project.ai.embeddings.time.sleep") as sleep:
+        batches = list(iter_embeddings(["ένα", "δύο"], client=client, max_retries=3))
+    assert sleep.call_count == 2
+    assert len(batches) == 1 and len(batches[0][1]) == 2
+
+
+def test_embed_pending_chunks_fills_vectors(app):
+    with app.app_context():
+        from my_project.ai import knowledge
+        from my_project.models import FileChunk
+
+        doc = knowledge.process_document_text(
+            text="Πρώτη παράγραφος για ΚΔΑΠ.\n\nΔεύτερη παράγραφος για ΜΦΗ.",
+            source_path="test/pending_embed.txt",
+            file_name="pending_embed.txt",
+            file_type="txt",
+        )
+        client, _ = _fake_embeddings_client()
+        with patch("my_project.ai.embeddings._get_client", return_value=client):
+            stats = knowledge.embed_pending_chunks(document_ids=[doc.id])
+
+        assert stats["embedded"] == doc.chunk_count
+        chunks = FileChunk.query.filter_by(document_id=doc.id).all()
+        assert all(c.embedding is not None for c in chunks)
+        assert all(c.embedding_model == "text-embedding-3-small" for c in chunks)
@@ -0,0 +1,93 @@
+"""Tests for PDF/DOCX extraction and parallel ingestion."""
+import pytest
+
+fitz = pytest.importorskip("fitz")
+docx = pytest.importorskip("docx")
+
+
+def _make_pdf(path, pages):
+    doc = fitz.open()
+    for text in pages:
+        page = doc.new_page()
+        page.insert_text((72, 72), text)
+    doc.save(str(path))
+    doc.close()
+
+
+def _make_docx(path, paragraphs, table=None):
+    document = docx.Document()
+    for text in paragraphs:
+        document.add_paragraph(text)
+    if table:
+        t = document.add_table(rows=len(table), cols=len(table[0]))
+        for r, row in enumerate(table):
+            for c, value in enumerate(row):
+                t.cell(r, c).text = value
+    document.save(str(path))
+
+
+def test_extract_pdf_pages_and_docx_tables(tmp_path):
+    from my_project.ai.ingest import extract_text
+    _make_pdf(tmp_path / "law.pdf", ["Article 1 licensing", "Article 2 penalties"])
+    _make_docx(tmp_path / "guide.docx", ["Οδηγός αδειοδότησης ΚΔΑΠ"], [["Πρόστιμο", "5000"]])
+
+    pdf_text = extract_text(str(tmp_path / "law.pdf"))
+    assert "Article 1 licensing" in pdf_text and "Article 2 penalties" in pdf_text
+    docx_text = extract_text(str(tmp_path / "guide.docx"))
+    assert "Οδηγός αδειοδότησης ΚΔΑΠ" in docx_text
+    assert "Πρόστιμο | 5000" in docx_text
+
+
+def test_extract_texts_in_process_pool_reports_errors(tmp_path):
+    from my_project.ai.ingest import extract_texts
+    _make_pdf(tmp_path / "a.pdf", ["First document"])
+    _make_pdf(tmp_path / "b.pdf", ["Second document"])
+    (tmp_path / "broken.pdf").write_bytes(b"not a pdf")
+
+    results = {p: (text, err) for p, text, err in extract_texts(
+        [str(tmp_path / n) for n in ("a.pdf", "b.pdf", "broken.pdf")], workers=2,
+    )}
+    assert "First document" in results[str(tmp_path / "a.pdf")][0]
+    assert "Second document" in results[str(tmp_path / "b.pdf")][0]
+    assert results[str(tmp_path / "broken.pdf")][1]
+
+
+def test_extraction_time_limit(tmp_path):
+    from my_project.ai import ingest
+    _make_pdf(tmp_path / "slow.pdf", ["page"] * 3)
+    text, error = ingest._extract_one(str(tmp_path / "slow.pdf"), timeout=-1)
+    assert text == "" and "timed out" in error
+
+
+def test_reindex_directory_ingests_pdf_and_docx(app, tmp_path):
+    with app.app_context():
+        from my_project.ai.knowledge import reindex_directory
+        from my_project.models import DocumentIndex, FileChunk
+        _make_pdf(tmp_path / "law.pdf", ["Licensing of day care centres"])
+        _make_docx(tmp_path / "guide.docx", ["Οδηγός εποπτείας ΜΦΗ"])
+        (tmp_path / "notes.md").write_text("Σημειώσεις ελέγχου.", encoding="utf-8")
+        (tmp_path / "broken.docx").write_bytes(b"not a docx")
+
+        statuses = {}
+        report = reindex_directory(
+            str(tmp_path), workers=2,
+            on_file=lambda path, status, error: statuses.__setitem__(path.rsplit("/", 1)[-1], status),
+        )
+
+        assert statuses == {"law.pdf": "added", "guide.docx": "added",
+                            "notes.md": "added", "broken.docx": "error"}
+        assert report.errors == 1
+        pdf = DocumentIndex.query.filter_by(file_path=str(tmp_path / "law.pdf")).one()
+        assert pdf.file_type == "pdf"
+        chunk = FileChunk.query.filter_by(document_id=pdf.id).first()
+        assert "Licensing of day care centres" in chunk.content
+
+        again = reindex_directory(str(tmp_path), workers=2)
+        assert again.files_skipped == 3
+
+
+def test_document_store_serves_extracted_pdf_text(tmp_path):
+    from my_project.ai.document_store import DocumentStore
+    _make_pdf(tmp_path / "law.pdf", ["Licensing of day care centres"])
+    store = DocumentStore(str(tmp_path))
+    assert "Licensing of day care centres" in store.read("law.pdf")
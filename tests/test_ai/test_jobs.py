@@ -0,0 +1,98 @@
+"""Tests for background knowledge reindex jobs."""
+import pytest
+
+
+@pytest.fixture
+def knowledge_dir(app, tmp_path, monkeypatch):
+    (tmp_path / "law_a.md").write_text("Νόμος Α για ΚΔΑΠ.", encoding="utf-8")
+    sub = tmp_path / "ΝΟΜΟΘΕΣΙΑ"
+    sub.mkdir()
+    (sub / "law_b.txt").write_text("Νόμος Β για ΜΦΗ.", encoding="utf-8")
+    monkeypatch.setitem(app.config, "KNOWLEDGE_FOLDER", str(tmp_path))
+    return tmp_path
+
+
+def test_reindex_endpoint_starts_job_and_reports_progress(client, admin_headers, knowledge_dir):
+    resp = client.post('/api/knowledge/reindex', json={}, headers=admin_headers)
+    assert resp.status_code == 202
+    job = resp.get_json()['job']
+
+    resp = client.get(f"/api/knowledge/jobs/{job['id']}?files=true", headers=admin_headers)
+    assert resp.status_code == 200
+    data = resp.get_json()
+    assert data['status'] == 'completed'
+    assert data['total_files'] == 2
+    assert data['processed_files'] == 2
+    assert data['progress'] == 1.0
+    assert {f['status'] for f in data['files']} == {'added'}
+    assert data['report']['files_added'] == 2
+
+
+def test_reindex_rejects_concurrent_job(app, client, admin_headers, knowledge_dir):
+    from my_project.extensions import db
+    from my_project.models import ReindexJob
+
+    with app.app_context():
+        running = ReindexJob(status='running')
+        db.session.add(running)
+        db.session.commit()
+        running_id = running.id
+
+    resp = client.post('/api/knowledge/reindex', json={}, headers=admin_headers)
+    assert resp.status_code == 409
+    assert resp.get_json()['job']['id'] == running_id
+
+    resp = client.post(f'/api/knowledge/jobs/{running_id}/cancel', headers=admin_headers)
+    assert resp.get_json()['cancel_requested'] is True
+    with app.app_context():
+        db.session.get(ReindexJob, running_id).status = 'cancelled'
+        db.session.commit()
+
+
+def test_cancel_queued_job(app, client, admin_headers):
+    from my_project.extensions import db
+    from my_project.models import ReindexJob
+
+    with app.app_context():
+        job = ReindexJob(status='queued')
+        db.session.add(job)
+        db.session.commit()
+        job_id = job.id
+
+    resp = client.post(f'/api/knowledge/jobs/{job_id}/cancel', headers=admin_headers)
+    assert resp.status_code == 200
+    assert resp.get_json()['status'] == 'cancelled'
+
+
+def test_running_job_stops_when_cancel_requested(app, knowledge_dir):
+    with app.app_context():
+        from my_project.extensions import db
+        from my_project.models import ReindexJob
+        from my_project.ai.jobs import run_reindex_job
+
+        job = ReindexJob(status='queued')
+        db.session.add(job)
+        db.session.commit()
+        job.cancel_requested = True
+        db.session.commit()
+
+        run_reindex_job(job.id)
+        assert db.session.get(ReindexJob, job.id).status == 'cancelled'
+
+
+def test_thread_backend_runs_outside_request(app, knowledge_dir):
+    with app.test_request_context():
+        from my_project.extensions import db
+        from my_project.models import ReindexJob
+        from my_project.ai.jobs import start_reindex_job, wait_for_job
+
+        job = start_reindex_job(backend='thread', full=True)
+        assert job.backend == 'thread'
+        wait_for_job(job.id, timeout=30)
+        db.session.expire_all()
+        assert db.session.get(ReindexJob, job.id).status == 'completed'
+
+
+def test_job_endpoints_require_admin(client, auth_headers):
+    assert client.post('/api/knowledge/reindex', json={}, headers=auth_headers).status_code == 403
+    assert client.get('/api/knowledge/jobs/1', headers=auth_headers).status_code == 403
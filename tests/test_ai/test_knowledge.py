@@ -1,6 +1,7 @@
 # tests/test_ai/test_knowledge.py
 import pytest
 import os
+from unittest.mock import patch
 
 def test_parse_txt_content():
     """Should parse plain text files."""
@@ -123,3 +124,107 @@ def test_load_full_documents_empty_chunks(app):
     with app.app_context():
         from my_project.ai.knowledge import load_full_documents
         assert load_full_documents([]) == []
+
+
+def _law_paragraphs(n, marker=""):
+    return "\n\n".join(
+        f"Άρθρο {i}{marker if i == 3 else ''}. " + ("Διάταξη για την αδειοδότηση δομών. " * 30)
+        for i in range(1, n + 1)
+    )
+
+
+def test_reprocess_keeps_unchanged_chunks_and_embeddings(app):
+    """Editing one paragraph should only replace the chunks whose text changed."""
+    with app.app_context():
+        from my_project.ai.knowledge import process_document_text, ReindexReport
+        from my_project.models import FileChunk
+        from my_project.extensions import db
+
+        doc = process_document_text(
+            text=_law_paragraphs(8), source_path="test/diff_law.txt",
+            file_name="diff_law.txt", file_type="txt",
+        )
+        before = {c.text_hash: c.id for c in FileChunk.query.filter_by(document_id=doc.id)}
+        for c in FileChunk.query.filter_by(document_id=doc.id):
+            c.embedding = [0.25] * 1536
+        db.session.commit()
+
+        report = ReindexReport()
+        process_document_text(
+            text=_law_paragraphs(8, marker=" (τροποποιημένο)"), source_path="test/diff_law.txt",
+            file_name="diff_law.txt", file_type="txt", report=report,
+        )
+
+        after = FileChunk.query.filter_by(document_id=doc.id).order_by(FileChunk.chunk_index).all()
+        assert report.files_updated == 1
+        assert report.chunks_changed >= 1
+        assert report.chunks_unchanged >= len(after) - 3
+        kept = [c for c in after if before.get(c.text_hash) == c.id]
+        assert len(kept) == report.chunks_unchanged
+        assert all(c.embedding is not None for c in kept)
+        assert [c.chunk_index for c in after] == list(range(len(after)))
+
+
+def test_process_file_skips_unchanged_file_by_stat(app, tmp_path):
+    with app.app_context():
+        from my_project.ai.knowledge import process_file, ReindexReport
+
+        path = tmp_path / "stat_law.txt"
+        path.write_text("Νόμος για ΚΔΑΠ.\n\nΆρθρο 2.", encoding="utf-8")
+        process_file(str(path))
+
+        report = ReindexReport()
+        with patch("builtins.open", side_effect=AssertionError("file should not be read")):
+            process_file(str(path), report=report)
+        assert report.files_skipped == 1
+
+
+def test_process_file_records_files_without_text(app, tmp_path):
+    with app.app_context():
+        from my_project.ai.knowledge import process_file, ReindexReport
+
+        path = tmp_path / "scanned.txt"
+        path.write_text("Σκαναρισμένο έγγραφο.", encoding="utf-8")
+        process_file(str(path))
+        path.write_text("   \n", encoding="utf-8")
+        doc = process_file(str(path))
+        assert doc.chunk_count == 0 and doc.chunks.count() == 0
+        assert doc.file_size == path.stat().st_size
+
+        report = ReindexReport()
+        with patch("builtins.open", side_effect=AssertionError("file should not be read")):
+            process_file(str(path), report=report)
+        assert report.files_skipped == 1
+
+
+def test_reindex_directory_prunes_deleted_files(app, tmp_path):
+    with app.app_context():
+        from my_project.ai.knowledge import reindex_directory
+        from my_project.models import DocumentIndex
+
+        (tmp_path / "keep.md").write_text("Παραμένει.", encoding="utf-8")
+        gone = tmp_path / "gone.md"
+        gone.write_text("Θα διαγραφεί.", encoding="utf-8")
+
+        first = reindex_directory(str(tmp_path))
+        assert first.files_added == 2
+
+        gone.unlink()
+        second = reindex_directory(str(tmp_path))
+        assert second.files_skipped == 1
+        assert second.files_removed == 1
+        assert DocumentIndex.query.filter_by(file_path=str(gone)).first() is None
+
+
+def test_process_document_stores_chunk_offsets(app):
+    """Each chunk records where its content sits in the source text."""
+    with app.app_context():
+        from my_project.ai.knowledge import process_document_text
+        from my_project.models import FileChunk
+        text = "\n\n".join(f"Άρθρο {i}. " + "Διάταξη για τις δομές. " * 30 for i in range(6))
+        doc = process_document_text(
+            text=text, source_path="test/offsets.txt", file_name="offsets.txt", file_type="txt",
+        )
+        chunks = FileChunk.query.filter_by(document_id=doc.id).order_by(FileChunk.chunk_index).all()
+        assert len(chunks) > 1
+        assert all(text[c.char_start:c.char_end] == c.content for c in chunks)
@@ -0,0 +1,106 @@
+"""Tests for the Greek-aware BM25 index and hybrid fusion."""
+from unittest.mock import patch
+
+
+def test_normalize_strips_accents_and_folds_final_sigma():
+    from my_project.ai.lexical import normalize, tokenize
+    assert normalize("Αδειοδότησης ΪΟΝΙΚΟΣ") == "αδειοδοτησησ ιονικοσ"
+    assert tokenize("αδειοδότηση") == tokenize("ΑΔΕΙΟΔΟΤΗΣΗΣ")
+    assert tokenize("δομές") == tokenize("δομών")
+
+
+def test_tokenize_keeps_statute_references():
+    from my_project.ai.lexical import tokenize
+    terms = tokenize("Σύμφωνα με τον Ν.5041/2023 και το άρθρο 12")
+    assert {"ν.5041/2023", "5041/2023", "5041", "2023", "12"} <= set(terms)
+    assert "και" not in terms
+    assert "5041/2023" in tokenize("ν. 5041/2023")
+
+
+def test_bm25_ranks_and_removes():
+    from my_project.ai.lexical import LexicalIndex
+    index = LexicalIndex()
+    index._loaded = True
+    index.refresh_interval = float("inf")
+    index.add(1, "Πρόστιμο για ΚΔΑΠ χωρίς άδεια. Το πρόστιμο επιβάλλεται άμεσα.")
+    index.add(2, "Άδεια λειτουργίας μονάδας φροντίδας ηλικιωμένων.")
+    index.add(3, "Ο Ν.5041/2023 ορίζει τα πρόστιμα.")
+
+    assert [cid for cid, _ in index.search("πρόστιμα ΚΔΑΠ", 3)][0] == 1
+    assert index.search("5041/2023", 3)[0][0] == 3
+
+    index.remove([1])
+    assert 1 not in [cid for cid, _ in index.search("πρόστιμο", 3)]
+    assert index.stats()["chunks"] == 2
+
+
+def test_failed_load_is_retried(app):
+    from my_project.ai.lexical import LexicalIndex
+
+    index = LexicalIndex(refresh_interval=float("inf"))
+    calls = []
+
+    def flaky_load():
+        calls.append(1)
+        if len(calls) == 1:
+            raise RuntimeError("database unavailable")
+        index.add(7, "Άδεια λειτουργίας")
+
+    index._load = flaky_load
+    with app.app_context():
+        try:
+            index.refresh()
+        except RuntimeError:
+            pass
+        assert not index._loaded
+        assert index.search("άδεια", 3)[0][0] == 7
+        index.search("άδεια", 3)
+    assert len(calls) == 2 and index._loaded
+
+
+def test_reciprocal_rank_fusion_rewards_agreement():
+    from my_project.ai.lexical import reciprocal_rank_fusion
+    fused = reciprocal_rank_fusion([[1, 2, 3], [3, 4, 1]], k=60)
+    assert [cid for cid, _ in fused][:2] == [1, 3]
+
+
+def test_fallback_is_accent_insensitive(app):
+    with app.app_context():
+        from my_project.ai.knowledge import process_document_text, _fallback_keyword_search
+        process_document_text(
+            text="Η ΗΛΙΟΘΕΡΑΠΕΊΑ των φιλοξενούμενων ρυθμίζεται από ειδικό πρόγραμμα.",
+            source_path="test/lexical_accents.txt",
+            file_name="lexical_accents.txt",
+            file_type="txt",
+        )
+        results = _fallback_keyword_search("ηλιοθεραπεια", limit=3)
+        assert results and results[0]["source_path"] == "test/lexical_accents.txt"
+
+
+def test_search_chunks_fuses_vector_and_lexical_hits(app):
+    with app.app_context():
+        from my_project.ai import knowledge
+        from my_project.models import FileChunk
+
+        knowledge.process_document_text(
+            text="Οι κυρώσεις του Ν.4837/2021 για δομές παιδικής προστασίας.",
+            source_path="test/lexical_statute.txt",
+            file_name="lexical_statute.txt",
+            file_type="txt",
+        )
+        knowledge.process_document_text(
+            text="Γενικές αρχές εποπτείας κοινωνικών δομών.",
+            source_path="test/lexical_semantic.txt",
+            file_name="lexical_semantic.txt",
+            file_type="txt",
+        )
+        semantic = FileChunk.query.filter_by(source_path="test/lexical_semantic.txt").first()
+
+        with patch.object(knowledge, "_vector_hits", return_value=[(semantic.id, 0.82)]):
+            results = knowledge.search_chunks("κυρώσεις Ν.4837/2021", limit=5)
+
+        paths = [r["source_path"] for r in results]
+        assert "test/lexical_statute.txt" in paths
+        assert "test/lexical_semantic.txt" in paths
+        semantic_hit = results[paths.index("test/lexical_semantic.txt")]
+        assert semantic_hit["similarity"] == 0.82
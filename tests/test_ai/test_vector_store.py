@@ -0,0 +1,130 @@
+"""Tests for the NumPy vector store backend."""
+import hashlib
+
+import numpy as np
+import pytest
+from unittest.mock import patch
+
+
+def _vector(text, dim=1536):
+    seed = int(hashlib.sha256(text.encode()).hexdigest()[:8], 16)
+    return np.random.default_rng(seed).normal(size=dim).astype(np.float32).tolist()
+
+
+def _fake_batch(texts, model="text-embedding-3-small"):
+    from my_project.ai.embeddings import EmbeddingResult
+    return [EmbeddingResult(embedding=_vector(t), model=model, text_hash="x", token_count=1) for t in texts]
+
+
+@pytest.fixture
+def store(app):
+    from my_project.ai.vector_store import NumpyVectorStore
+    with app.app_context():
+        s = NumpyVectorStore(block_rows=3, refresh_interval=3600)
+        s.refresh(force=True)
+        s.remove(list(s._row_of))  # start empty, ignoring chunks other tests embedded
+        yield s
+        s.close()
+
+
+def test_top_k_matches_brute_force_across_blocks(store):
+    rng = np.random.default_rng(7)
+    vectors = rng.normal(size=(10, 1536)).astype(np.float32)
+    ids = [10_000_000 + i for i in range(10)]
+    store.add(ids, vectors)
+
+    query = rng.normal(size=1536).astype(np.float32)
+    normed = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    expected = np.argsort(-(normed @ (query / np.linalg.norm(query))))[:4]
+
+    hits = store.search(query, 4)
+    assert [cid for cid, _ in hits] == [ids[i] for i in expected]
+    assert hits[0][1] >= hits[-1][1]
+
+
+def test_remove_frees_rows_for_reuse(store):
+    store.add([20_000_001, 20_000_002], [_vector("a"), _vector("b")])
+    size = store._size
+    store.remove([20_000_001])
+    assert [cid for cid, _ in store.search(_vector("a"), 5)] == [20_000_002]
+    store.add([20_000_003], [_vector("c")])
+    assert store._size == size
+    assert store.search(_vector("c"), 1)[0][0] == 20_000_003
+
+
+def test_search_chunks_uses_numpy_store_and_refreshes_incrementally(app):
+    with app.app_context():
+        from my_project.ai import knowledge
+        from my_project.ai.vector_store import NumpyVectorStore, get_vector_store
+
+        store = get_vector_store()
+        assert isinstance(store, NumpyVectorStore)
+        store.refresh(force=True)
+
+        paragraphs = [f"Άρθρο {i}: ρύθμιση {i * 37} για δομές κοινωνικής φροντίδας. " * 20 for i in range(4)]
+        with patch.object(knowledge, "generate_embeddings_batch", side_effect=_fake_batch):
+            knowledge.process_document_text(
+                text="\n\n".join(paragraphs), source_path="test/vector_store.txt",
+                file_name="vector_store.txt", file_type="txt", generate_vectors=True,
+            )
+        from my_project.models import FileChunk
+        target = FileChunk.query.filter_by(source_path="test/vector_store.txt").first()
+
+        # The new chunks are searchable without waiting for a refresh
+        query = _fake_batch([target.content])[0]
+        with patch.object(store, "refresh"), \
+                patch.object(knowledge, "get_query_embedding", return_value=query):
+            results = knowledge.search_chunks("ρύθμιση", limit=3)
+        assert results[0]["content"] == target.content
+        assert results[0]["similarity"] == pytest.approx(1.0, abs=1e-4)
+        assert all(r["similarity"] >= 0.3 for r in results)
+
+
+def test_memmap_store_reloads_from_disk(app, tmp_path):
+    with app.app_context():
+        from my_project.ai.vector_store import NumpyVectorStore
+        from my_project.extensions import db
+        from my_project.models import DocumentIndex, FileChunk
+
+        doc = DocumentIndex(file_path="test/memmap.txt", file_name="memmap.txt", file_type="txt", status="ready")
+        db.session.add(doc)
+        db.session.flush()
+        chunk = FileChunk(document_id=doc.id, source_path=doc.file_path, content="memmap",
+                          text_hash="m", embedding=_vector("memmap"))
+        db.session.add(chunk)
+        db.session.commit()
+
+        first = NumpyVectorStore(path=str(tmp_path))
+        vectors = first.stats()["vectors"]
+        assert (tmp_path / "vectors.f32").exists()
+        first.close()
+
+        second = NumpyVectorStore(path=str(tmp_path))
+        with patch.object(second, "_add") as add:
+            assert second.stats()["vectors"] == vectors
+        add.assert_not_called()
+        assert second.search(_vector("memmap"), 1)[0][0] == chunk.id
+        second.close()
+
+
+def test_cold_load_saves_once_and_retries_failures(app, tmp_path, monkeypatch):
+    with app.app_context():
+        from my_project.ai import vector_store
+        from my_project.ai.vector_store import NumpyVectorStore
+        from my_project.models import FileChunk
+
+        embedded = FileChunk.query.filter(FileChunk.embedding.isnot(None)).count()
+        if embedded < 2:
+            pytest.skip("needs embedded chunks from earlier tests")
+        monkeypatch.setattr(vector_store, "_LOAD_BATCH", 1)
+        store = NumpyVectorStore(path=str(tmp_path))
+        with patch.object(store, "_load", side_effect=RuntimeError("db down")):
+            with pytest.raises(RuntimeError):
+                store.search(_vector("x"), 1)
+        assert not store._loaded
+
+        with patch.object(store, "_save", wraps=store._save) as save:
+            assert store.stats()["vectors"] == embedded
+        save.assert_called_once()
+        assert store._loaded
+        store.close()
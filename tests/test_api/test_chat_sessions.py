@@ -109,3 +109,37 @@ def test_chat_rate_limit_from_config(app):
     with app.app_context():
         # Testing config should have a rate limit value
         assert 'AI_CHAT_RATE_LIMIT' in app.config
+
+
+def test_chat_stream_emits_sse_and_persists_reply(client, auth_headers):
+    """POST /api/chat/stream should stream tokens and store the assembled reply."""
+    from unittest.mock import patch
+
+    resp = client.post('/api/chat/sessions', json={'title': 'Stream Test'}, headers=auth_headers)
+    session_id = resp.get_json()['id']
+
+    frames = [
+        {'type': 'token', 'content': 'Γεια '},
+        {'type': 'token', 'content': 'σας'},
+        {'type': 'done', 'reply': 'Γεια σας', 'sources': ['law.md'], 'model': 'test'},
+    ]
+    with patch('my_project.ai.copilot.stream_chat_reply', return_value=iter(frames)):
+        resp = client.post('/api/chat/stream', json={
+            'message': 'Καλημέρα',
+            'session_id': session_id,
+        }, headers=auth_headers)
+        body = resp.get_data(as_text=True)
+
+    assert resp.status_code == 200
+    assert resp.mimetype == 'text/event-stream'
+    assert body.count('event: token') == 2
+    assert 'event: done' in body and '"sources": ["law.md"]' in body
+
+    messages = client.get(f'/api/chat/sessions/{session_id}/messages', headers=auth_headers).get_json()
+    assert [m['role'] for m in messages] == ['user', 'assistant']
+    assert messages[1]['content'] == 'Γεια σας'
+
+
+def test_chat_stream_requires_message(client, auth_headers):
+    resp = client.post('/api/chat/stream', json={}, headers=auth_headers)
+    assert resp.status_code == 400
@@ -0,0 +1,142 @@
+"""Tests for the content library full-text index behind /api/search."""
+import io
+import os
+
+import pytest
+
+fitz = pytest.importorskip("fitz")
+docx = pytest.importorskip("docx")
+
+
+def _make_pdf(path, text):
+    doc = fitz.open()
+    doc.new_page().insert_text((72, 72), text)
+    doc.save(str(path))
+    doc.close()
+
+
+def _make_docx(path, text):
+    document = docx.Document()
+    document.add_paragraph(text)
+    document.save(str(path))
+
+
+@pytest.fixture
+def library(app, tmp_path):
+    from my_project.extensions import db
+    from my_project.models import ContentFile
+
+    (tmp_path / "ΝΟΜΟΘΕΣΙΑ").mkdir()
+    _make_pdf(tmp_path / "ΝΟΜΟΘΕΣΙΑ" / "fek_b_1234.pdf", "Adeia leitourgias KDAP")
+    _make_docx(tmp_path / "ΝΟΜΟΘΕΣΙΑ" / "οδηγός.docx", "Πρόστιμο για λειτουργία χωρίς άδεια")
+    (tmp_path / "ΕΝΤΥΠΑ").mkdir()
+    (tmp_path / "ΕΝΤΥΠΑ" / "σημειώσεις.md").write_text("Η ΕΠΟΠΤΕΙΑ των Μονάδων Φροντίδας Ηλικιωμένων")
+    (tmp_path / "ΕΝΤΥΠΑ" / "αίτηση_αδειοδότησης.xlsx").write_bytes(b"x" * 10)
+    (tmp_path / "ΕΝΤΥΠΑ" / ".hidden.md").write_text("εποπτεία")
+    (tmp_path / "advisor_reports").mkdir()
+    (tmp_path / "advisor_reports" / "έκθεση.md").write_text("Ωφελούμενη Μαρία Π., πρόστιμο")
+
+    original = app.config["UPLOAD_FOLDER"]
+    app.config["UPLOAD_FOLDER"] = str(tmp_path)
+    yield tmp_path
+    app.config["UPLOAD_FOLDER"] = original
+    with app.app_context():
+        ContentFile.query.delete()
+        db.session.commit()
+        app.extensions.pop("content_index", None)
+
+
+def test_sync_indexes_text_and_names(app, client, auth_headers, library):
+    from my_project.content_index import sync_content_index
+
+    with app.app_context():
+        stats = sync_content_index(workers=1)
+    assert stats["added"] == 4 and stats["errors"] == 0
+
+    # Accent- and case-insensitive match inside DOCX text, with a snippet
+    files = client.get("/api/search?q=προστιμο&type=files",
+                       headers=auth_headers).get_json()["results"]["files"]
+    assert [f["path"] for f in files] == ["ΝΟΜΟΘΕΣΙΑ/οδηγός.docx"]
+    assert files[0]["snippet"].startswith("Πρόστιμο")
+    assert files[0]["type"] == "document" and files[0]["id"] is None
+
+    # Inflected forms match through the stemmer; hidden files are skipped
+    files = client.get("/api/search?q=μονάδα ηλικιωμένου&type=files",
+                       headers=auth_headers).get_json()["results"]["files"]
+    assert [f["path"] for f in files] == ["ΕΝΤΥΠΑ/σημειώσεις.md"]
+    assert "Μονάδων" in files[0]["snippet"]
+
+    # Files without extractable text are found by name, PDFs by content
+    files = client.get("/api/search?q=αδειοδότηση&type=files").get_json()["results"]["files"]
+    assert files[0]["path"] == "ΕΝΤΥΠΑ/αίτηση_αδειοδότησης.xlsx"
+    files = client.get("/api/search?q=kdap&type=files").get_json()["results"]["files"]
+    assert [f["path"] for f in files] == ["ΝΟΜΟΘΕΣΙΑ/fek_b_1234.pdf"]
+
+
+def test_incremental_sync(app, client, library):
+    from my_project.content_index import sync_content_index
+
+    with app.app_context():
+        sync_content_index(workers=1)
+        assert sync_content_index(workers=1)["added"] == 0
+
+        note = library / "ΕΝΤΥΠΑ" / "σημειώσεις.md"
+        note.write_text("Κοινωνική μέριμνα και προνοιακά επιδόματα")
+        os.utime(note, (1, 1))
+        (library / "ΝΟΜΟΘΕΣΙΑ" / "οδηγός.docx").unlink()
+        stats = sync_content_index(workers=1)
+    assert (stats["added"], stats["updated"], stats["removed"]) == (0, 1, 1)
+
+    assert client.get("/api/search?q=πρόστιμο&type=files").get_json()["results"]["files"] == []
+    assert client.get("/api/search?q=εποπτεία&type=files").get_json()["results"]["files"] == []
+    files = client.get("/api/search?q=επιδόματα&type=files").get_json()["results"]["files"]
+    assert [f["path"] for f in files] == ["ΕΝΤΥΠΑ/σημειώσεις.md"]
+
+
+def test_upload_is_indexed(client, auth_headers, library):
+    data = {"category": "ΕΝΤΥΠΑ",
+            "file": (io.BytesIO("Βεβαίωση καταβολής επιδόματος".encode()), "bebaiosi.txt")}
+    resp = client.post("/api/files/upload", data=data, headers=auth_headers,
+                       content_type="multipart/form-data")
+    assert resp.status_code == 201
+
+    files = client.get("/api/search?q=βεβαιωση&type=files").get_json()["results"]["files"]
+    assert [f["path"] for f in files] == ["ΕΝΤΥΠΑ/bebaiosi.txt"]
+    assert files[0]["id"] == resp.get_json()["ids"][0]
+
+
+def test_case_files_stay_private(app, client, auth_headers, library):
+    from my_project.content_index import index_files, sync_content_index
+    from my_project.models import ContentFile
+
+    with app.app_context():
+        sync_content_index(workers=1)
+        index_files(["advisor_reports/έκθεση.md"])
+        assert ContentFile.query.filter(ContentFile.path.like("advisor_reports/%")).count() == 0
+
+    files = client.get("/api/search?q=ωφελούμενη&type=files",
+                       headers=auth_headers).get_json()["results"]["files"]
+    assert files == []
+    # Anonymous searches find library files by content but get no snippets
+    files = client.get("/api/search?q=πρόστιμο&type=files").get_json()["results"]["files"]
+    assert [f["path"] for f in files] == ["ΝΟΜΟΘΕΣΙΑ/οδηγός.docx"]
+    assert files[0]["snippet"] is None
+
+
+def test_warming_index_falls_back_to_names(app, client, library, monkeypatch):
+    import time
+
+    monkeypatch.setitem(app.config, "CONTENT_INDEX_BACKGROUND", True)
+    # A first sync that started but has not finished yet
+    monkeypatch.setitem(app.extensions, "content_index_sync",
+                        {"future": None, "at": time.monotonic(), "synced": False})
+    body = client.get("/api/search?q=αδειοδοτηση&type=files").get_json()
+    assert body["indexing"] is True
+    assert [f["path"] for f in body["results"]["files"]] == ["ΕΝΤΥΠΑ/αίτηση_αδειοδότησης.xlsx"]
+    assert body["results"]["files"][0]["snippet"] is None
+    # Case-file folders stay out of the fallback too
+    assert client.get("/api/search?q=έκθεση&type=files").get_json()["results"]["files"] == []
+
+    app.extensions["content_index_sync"]["synced"] = True
+    body = client.get("/api/search?q=αδειοδοτηση&type=files").get_json()
+    assert body["indexing"] is False and body["results"]["files"] == []
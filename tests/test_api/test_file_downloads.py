@@ -0,0 +1,71 @@
+"""Tests for content downloads: ranges, content-hash ETags, cache policies."""
+import hashlib
+
+import pytest
+
+
+@pytest.fixture
+def content_dir(app, tmp_path):
+    (tmp_path / "ΝΟΜΟΘΕΣΙΑ").mkdir()
+    (tmp_path / "ΝΟΜΟΘΕΣΙΑ" / "νόμος.pdf").write_bytes(bytes(range(256)) * 4)
+    (tmp_path / "uploads").mkdir()
+    (tmp_path / "uploads" / "note.txt").write_text("draft")
+    (tmp_path / ".secret").write_text("x")
+    saved = {k: app.config[k] for k in ("UPLOAD_FOLDER", "CONTENT_CACHE_POLICIES", "CONTENT_SENDFILE")}
+    app.config.update(UPLOAD_FOLDER=str(tmp_path), CONTENT_SENDFILE='',
+                      CONTENT_CACHE_POLICIES={'ΝΟΜΟΘΕΣΙΑ': 'public, max-age=86400',
+                                              'uploads': 'private, no-cache'})
+    yield tmp_path
+    app.config.update(saved)
+
+
+def test_download_range_and_etag(client, content_dir):
+    body = (content_dir / "ΝΟΜΟΘΕΣΙΑ" / "νόμος.pdf").read_bytes()
+    resp = client.get("/api/files/download/ΝΟΜΟΘΕΣΙΑ/νόμος.pdf")
+    assert resp.status_code == 200 and resp.data == body
+    assert resp.headers["ETag"] == f'"{hashlib.sha256(body).hexdigest()}"'
+    assert resp.headers["Accept-Ranges"] == "bytes"
+    assert resp.headers["Cache-Control"] == "public, max-age=86400"
+    assert "attachment" in resp.headers["Content-Disposition"]
+
+    part = client.get("/api/files/download/ΝΟΜΟΘΕΣΙΑ/νόμος.pdf", headers={"Range": "bytes=100-199"})
+    assert part.status_code == 206
+    assert part.data == body[100:200]
+    assert part.headers["Content-Range"] == f"bytes 100-199/{len(body)}"
+
+    etag = resp.headers["ETag"]
+    assert client.get("/content/ΝΟΜΟΘΕΣΙΑ/νόμος.pdf",
+                      headers={"If-None-Match": etag}).status_code == 304
+    # A stale If-Range validator gets the whole file, not a range
+    stale = client.get("/api/files/download/ΝΟΜΟΘΕΣΙΑ/νόμος.pdf",
+                       headers={"Range": "bytes=0-9", "If-Range": '"other"'})
+    assert stale.status_code == 200 and len(stale.data) == len(body)
+
+    (content_dir / "ΝΟΜΟΘΕΣΙΑ" / "νόμος.pdf").write_bytes(b"%PDF-new")
+    changed = client.get("/content/ΝΟΜΟΘΕΣΙΑ/νόμος.pdf", headers={"If-None-Match": etag})
+    assert changed.status_code == 200 and changed.data == b"%PDF-new"
+
+    assert client.get("/content/uploads/note.txt").headers["Cache-Control"] == "private, no-cache"
+
+
+def test_download_rejects_traversal_and_hidden(client, content_dir):
+    assert client.get("/api/files/download/../conftest.py").status_code == 404
+    assert client.get("/api/files/download/ΝΟΜΟΘΕΣΙΑ/..%2F..%2Fsecret").status_code == 404
+    assert client.get("/content/.secret").status_code == 404
+    assert client.get("/content/ΝΟΜΟΘΕΣΙΑ").status_code == 404
+
+
+def test_proxy_sendfile_modes(app, client, content_dir):
+    app.config.update(CONTENT_SENDFILE='x-accel', CONTENT_ACCEL_PREFIX='/_content/')
+    resp = client.get("/api/files/download/ΝΟΜΟΘΕΣΙΑ/νόμος.pdf")
+    assert resp.status_code == 200 and resp.data == b""
+    assert resp.headers["X-Accel-Redirect"] == "/_content/%CE%9D%CE%9F%CE%9C%CE%9F%CE%98%CE%95%CE%A3%CE%99%CE%91/%CE%BD%CF%8C%CE%BC%CE%BF%CF%82.pdf"
+    assert "X-Sendfile" not in resp.headers
+    assert resp.headers["Content-Type"] == "application/pdf"
+    assert client.get("/api/files/download/ΝΟΜΟΘΕΣΙΑ/νόμος.pdf",
+                      headers={"If-None-Match": resp.headers["ETag"]}).status_code == 304
+
+    app.config["CONTENT_SENDFILE"] = 'x-sendfile'
+    resp = client.get("/content/uploads/note.txt")
+    assert resp.data == b""
+    assert resp.headers["X-Sendfile"] == str(content_dir / "uploads" / "note.txt")
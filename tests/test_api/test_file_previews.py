@@ -0,0 +1,120 @@
+"""Tests for rendered file previews and their cache."""
+import pytest
+
+fitz = pytest.importorskip("fitz")
+
+
+@pytest.fixture
+def content_dir(app, tmp_path):
+    from my_project.previews import PreviewCache
+
+    content = tmp_path / "content"
+    (content / "ΑΠΟΦΑΣΕΙΣ").mkdir(parents=True)
+    doc = fitz.open()
+    for text in ("Απόφαση 1", "Σελίδα 2"):
+        doc.new_page(width=595, height=842).insert_text((72, 72), text)
+    doc.save(str(content / "ΑΠΟΦΑΣΕΙΣ" / "απόφαση.pdf"))
+    doc.close()
+    (content / "ΑΠΟΦΑΣΕΙΣ" / "σημείωμα.docx").write_bytes(b"docx")
+
+    original = app.config["UPLOAD_FOLDER"]
+    app.config["UPLOAD_FOLDER"] = str(content)
+    app.extensions["preview_cache"] = PreviewCache(str(tmp_path / "previews"), workers=1)
+    yield content
+    app.config["UPLOAD_FOLDER"] = original
+    app.extensions.pop("preview_cache")
+
+
+def test_thumbnail_and_page_previews_are_cached(app, client, content_dir):
+    cache = app.extensions["preview_cache"]
+    resp = client.get("/api/files/preview/ΑΠΟΦΑΣΕΙΣ/απόφαση.pdf?format=png")
+    assert resp.status_code == 200 and resp.mimetype == "image/png"
+    assert resp.data.startswith(b"\x89PNG")
+    assert cache.renders == 1
+
+    again = client.get("/api/files/preview/ΑΠΟΦΑΣΕΙΣ/απόφαση.pdf?format=png")
+    assert again.data == resp.data and cache.renders == 1
+    assert client.get("/api/files/preview/ΑΠΟΦΑΣΕΙΣ/απόφαση.pdf?format=png",
+                      headers={"If-None-Match": resp.headers["ETag"]}).status_code == 304
+
+    page = client.get("/api/files/preview/ΑΠΟΦΑΣΕΙΣ/απόφαση.pdf?format=png&page=2&size=page")
+    assert page.status_code == 200 and len(page.data) > len(resp.data)
+    assert cache.renders == 2
+
+    # New content gets a new cache entry
+    (content_dir / "ΑΠΟΦΑΣΕΙΣ" / "απόφαση.pdf").write_bytes(
+        (content_dir / "ΑΠΟΦΑΣΕΙΣ" / "απόφαση.pdf").read_bytes() + b"\n")
+    client.get("/api/files/preview/ΑΠΟΦΑΣΕΙΣ/απόφαση.pdf?format=png")
+    assert cache.renders == 3
+
+
+def test_webp_when_accepted(client, content_dir):
+    pytest.importorskip("PIL")
+    resp = client.get("/api/files/preview/ΑΠΟΦΑΣΕΙΣ/απόφαση.pdf", headers={"Accept": "image/webp,*/*"})
+    assert resp.mimetype == "image/webp" and resp.data[8:12] == b"WEBP"
+    assert "Accept" in resp.headers["Vary"]
+
+
+def test_preview_errors(client, content_dir):
+    base = "/api/files/preview/ΑΠΟΦΑΣΕΙΣ/"
+    assert client.get(base + "σημείωμα.docx").status_code == 415
+    assert client.get(base + "λείπει.pdf").status_code == 404
+    assert client.get(base + "απόφαση.pdf?page=3&format=png").status_code == 404
+    assert client.get(base + "απόφαση.pdf?size=huge").status_code == 400
+    assert client.get("/api/files/preview/../secret.pdf").status_code == 404
+
+
+def test_cache_evicts_least_recently_used(tmp_path):
+    from my_project.previews import PreviewCache
+
+    cache = PreviewCache(str(tmp_path / "previews"), max_bytes=300, workers=1)
+    for i in range(3):
+        cache._store(cache.path(cache.key(f"{i}", 0, "thumb", "png"), "png"), b"x" * 100)
+    assert cache.stats()["bytes"] == 300
+
+    cache._store(cache.path(cache.key("3", 0, "thumb", "png"), "png"), b"x" * 100)
+    assert cache.stats()["bytes"] <= 240
+    assert len(list(cache._entries())) == 2
+
+
+def test_concurrent_requests_share_one_render(tmp_path, monkeypatch):
+    import os
+    import time
+    import threading
+    from my_project import previews
+
+    started, release = threading.Event(), threading.Event()
+
+    def slow_render(*args):
+        started.set()
+        release.wait(5)
+        return b"png"
+
+    monkeypatch.setattr(previews, "render_preview", slow_render)
+    cache = previews.PreviewCache(str(tmp_path / "previews"), workers=1)
+    store = cache._store
+    cache._store = lambda *args: (time.sleep(0.2), store(*args))  # widen the render-to-file gap
+    results = []
+    owner = threading.Thread(target=lambda: results.append(cache.get("f.pdf", "abc")))
+    owner.start()
+    started.wait(5)
+    joiner = threading.Thread(target=lambda: results.append(os.path.exists(cache.get("f.pdf", "abc")[0])))
+    joiner.start()
+    time.sleep(0.1)  # let the joiner wait on the pending render
+    release.set()
+    owner.join(5)
+    joiner.join(5)
+    # The joining request only returns once the file is on disk
+    assert True in results and cache.renders == 1
+
+
+def test_render_failures_become_preview_errors(client, content_dir, monkeypatch):
+    from my_project import previews
+
+    def corrupt_page(*args):
+        raise RuntimeError("cannot decode page")
+
+    monkeypatch.setattr(previews, "_render_page", corrupt_page)
+    with pytest.raises(previews.PreviewError, match="cannot decode page"):
+        previews.render_preview("x.pdf", 0, 256, "png")
+    assert client.get("/api/files/preview/ΑΠΟΦΑΣΕΙΣ/απόφαση.pdf?page=2&format=png").status_code == 404
@@ -0,0 +1,145 @@
+"""Tests for the cached content tree behind /api/files/structure."""
+import os
+import json
+import base64
+
+import pytest
+
+
+@pytest.fixture
+def content_dir(app, tmp_path, monkeypatch):
+    from my_project import content_tree
+    monkeypatch.setattr(content_tree, "CONTENT_TREE_REVALIDATE_SECONDS", 0)
+    (tmp_path / "ΝΟΜΟΘΕΣΙΑ" / "ΚΔΑΠ").mkdir(parents=True)
+    (tmp_path / "ΝΟΜΟΘΕΣΙΑ" / "ΚΔΑΠ" / "άδεια.pdf").write_bytes(b"%PDF" + b"0" * 96)
+    (tmp_path / "ΝΟΜΟΘΕΣΙΑ" / "οδηγός.docx").write_bytes(b"d" * 50)
+    (tmp_path / "ΕΝΤΥΠΑ").mkdir()
+    (tmp_path / "ΕΝΤΥΠΑ" / "αίτηση.docx").write_bytes(b"d" * 10)
+    (tmp_path / "ΕΝΤΥΠΑ" / ".hidden").write_bytes(b"x")
+    (tmp_path / "uploads").mkdir()
+    (tmp_path / "welcome.txt").write_text("hi")
+    original = app.config["UPLOAD_FOLDER"]
+    app.config["UPLOAD_FOLDER"] = str(tmp_path)
+    yield tmp_path
+    app.config["UPLOAD_FOLDER"] = original
+
+
+def test_structure_lists_categories_with_totals(client, content_dir):
+    resp = client.get("/api/files/structure")
+    assert resp.status_code == 200
+    data = resp.get_json()
+
+    assert [c["name"] for c in data["categories"]] == ["ΕΝΤΥΠΑ", "ΝΟΜΟΘΕΣΙΑ"]
+    law = data["categories"][1]
+    assert [f["name"] for f in law["files"]] == ["οδηγός.docx"]
+    sub = law["subfolders"][0]
+    assert sub["path"] == "ΝΟΜΟΘΕΣΙΑ/ΚΔΑΠ"
+    assert sub["files"][0] == {**sub["files"][0], "path": "ΝΟΜΟΘΕΣΙΑ/ΚΔΑΠ/άδεια.pdf",
+                               "size": 100, "type": "pdf"}
+    assert data["metadata"]["total_files"] == 3
+    assert data["metadata"]["total_size"] == 160
+    assert data["metadata"]["file_types"] == {"pdf": 1, "document": 2}
+
+
+def test_structure_etag_revalidation(client, content_dir):
+    first = client.get("/api/files/structure")
+    etag = first.headers["ETag"]
+    assert first.headers["Cache-Control"] == "no-cache"
+
+    again = client.get("/api/files/structure", headers={"If-None-Match": etag})
+    assert again.status_code == 304
+    assert again.data == b""
+
+    (content_dir / "ΕΝΤΥΠΑ" / "νέο.pdf").write_bytes(b"p")
+    changed = client.get("/api/files/structure", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["ETag"] != etag
+    assert changed.get_json()["metadata"]["total_files"] == 4
+
+
+def test_only_changed_directories_are_rescanned(app, content_dir):
+    from my_project.content_tree import get_content_tree
+    with app.test_request_context():
+        tree = get_content_tree()
+        tree.structure()
+        scans = tree.scans
+        assert scans == 5  # root, uploads, ΕΝΤΥΠΑ, ΝΟΜΟΘΕΣΙΑ, ΚΔΑΠ
+
+        tree.structure()
+        assert tree.scans == scans
+
+        (content_dir / "ΝΟΜΟΘΕΣΙΑ" / "ΚΔΑΠ" / "εγκύκλιος.md").write_text("νέα εγκύκλιος")
+        categories, metadata = tree.structure()
+        assert tree.scans == scans + 1
+        assert metadata["total_files"] == 4
+        assert len(categories[1]["subfolders"][0]["files"]) == 2
+
+        # Overwriting in place keeps the directory mtime; invalidate() picks it up
+        path = content_dir / "ΕΝΤΥΠΑ" / "αίτηση.docx"
+        stat = os.stat(content_dir / "ΕΝΤΥΠΑ")
+        path.write_bytes(b"d" * 30)
+        os.utime(content_dir / "ΕΝΤΥΠΑ", ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        assert tree.structure()[1]["total_size"] == 160 + len("νέα εγκύκλιος".encode())
+        tree.invalidate("ΕΝΤΥΠΑ/αίτηση.docx")
+        assert tree.structure()[1]["total_size"] == 180 + len("νέα εγκύκλιος".encode())
+
+
+def test_list_root_and_folder_with_counts(client, content_dir):
+    root = client.get("/api/files/list").get_json()
+    assert root["path"] == "" and root["parent"] is None
+    assert [i["name"] for i in root["items"]] == ["ΕΝΤΥΠΑ", "ΝΟΜΟΘΕΣΙΑ"]
+    assert "total_files" not in root["items"][0] and "summary" not in root
+
+    law = client.get("/api/files/list?path=ΝΟΜΟΘΕΣΙΑ&counts=true").get_json()
+    assert law["parent"] == ""
+    assert [(i["name"], i["type"]) for i in law["items"]] == [("ΚΔΑΠ", "folder"), ("οδηγός.docx", "document")]
+    assert law["items"][0]["total_files"] == 1 and law["items"][0]["total_size"] == 100
+    assert law["summary"]["total_files"] == 2 and law["summary"]["total_size"] == 150
+
+    by_size = client.get("/api/files/list?path=ΝΟΜΟΘΕΣΙΑ/ΚΔΑΠ&sort=size&order=desc").get_json()
+    assert by_size["items"][0]["path"] == "ΝΟΜΟΘΕΣΙΑ/ΚΔΑΠ/άδεια.pdf"
+
+
+def test_list_cursor_pagination(client, content_dir):
+    folder = content_dir / "ΕΝΤΥΠΑ"
+    for i in range(7):
+        (folder / f"έντυπο_{i}.pdf").write_bytes(b"x" * i)
+
+    names, cursor = [], None
+    while True:
+        url = "/api/files/list?path=ΕΝΤΥΠΑ&limit=3" + (f"&cursor={cursor}" if cursor else "")
+        page = client.get(url).get_json()
+        assert page["total"] == (8 if len(names) < 3 else 7)
+        names += [i["name"] for i in page["items"]]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+        if len(names) == 3:
+            # Deleting the cursor entry must not skip or repeat the rest
+            (folder / names[-1]).unlink()
+    assert names == ["αίτηση.docx"] + [f"έντυπο_{i}.pdf" for i in range(7)]
+
+
+def test_list_rejects_bad_paths_and_cursors(client, content_dir):
+    assert client.get("/api/files/list?path=../etc").status_code == 400
+    assert client.get("/api/files/list?path=ΑΓΝΩΣΤΟ").status_code == 404
+    assert client.get("/api/files/list?path=uploads").status_code == 404
+    assert client.get("/api/files/list?sort=colour").status_code == 400
+    assert client.get("/api/files/list?cursor=not-a-cursor").status_code == 400
+
+    # Cursors for entries that no longer exist must still be well-formed for the sort
+    def cursor(payload):
+        raw = json.dumps(payload).encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+    gone = {"kind": "file", "name": "διαγραμμένο.pdf"}
+    for sort, value in (("size", "big"), ("name", 5), ("size", None), ("modified", 1.5)):
+        url = f"/api/files/list?path=ΕΝΤΥΠΑ&sort={sort}&cursor={cursor({**gone, 'value': value})}"
+        assert client.get(url).status_code == 400
+    assert client.get(f"/api/files/list?path=ΕΝΤΥΠΑ&cursor={cursor(gone)}").status_code == 400
+    url = f"/api/files/list?path=ΕΝΤΥΠΑ&sort=size&cursor={cursor({**gone, 'value': 10})}"
+    assert client.get(url).status_code == 200
+
+    first = client.get("/api/files/list?path=ΕΝΤΥΠΑ")
+    again = client.get("/api/files/list?path=ΕΝΤΥΠΑ", headers={"If-None-Match": first.headers["ETag"]})
+    assert again.status_code == 304
@@ -0,0 +1,121 @@
+"""Tests for streamed, deduplicated and resumable uploads."""
+import hashlib
+import io
+import json
+import os
+
+import pytest
+
+
+@pytest.fixture
+def content_dir(app, tmp_path):
+    original = app.config["UPLOAD_FOLDER"]
+    app.config["UPLOAD_FOLDER"] = str(tmp_path)
+    yield tmp_path
+    app.config["UPLOAD_FOLDER"] = original
+
+
+def _upload(client, headers, name, body, category="ΕΓΚΥΚΛΙΟΙ"):
+    return client.post("/api/files/upload", headers=headers, content_type="multipart/form-data",
+                       data={"category": category, "file": (io.BytesIO(body), name)})
+
+
+def test_multipart_upload_dedups_across_categories(app, client, auth_headers, content_dir):
+    from my_project.extensions import db
+    from my_project.models import AuditLog, FileItem
+
+    body = b"%PDF circular 12/2024" * 1000
+    first = _upload(client, auth_headers, "circular.pdf", body)
+    assert first.status_code == 201 and first.get_json()["deduplicated"] == 0
+    second = _upload(client, auth_headers, "copy.pdf", body, category="ΑΡΧΕΙΟ")
+    assert second.get_json()["deduplicated"] == 1
+
+    a, b = content_dir / "ΕΓΚΥΚΛΙΟΙ" / "circular.pdf", content_dir / "ΑΡΧΕΙΟ" / "copy.pdf"
+    assert b.read_bytes() == body and os.path.samefile(a, b)
+    assert os.listdir(content_dir / ".upload-tmp") == []
+
+    with app.app_context():
+        item = db.session.get(FileItem, second.get_json()["ids"][0])
+        assert item.path == "ΑΡΧΕΙΟ/copy.pdf" and item.sha256 == hashlib.sha256(body).hexdigest()
+        entry = AuditLog.query.filter_by(action="upload", resource_id=str(item.id)).one()
+        assert json.loads(entry.details)["deduplicated"] is True
+
+    # Replacing a linked file with new content leaves the other copy alone
+    _upload(client, auth_headers, "copy.pdf", b"different", category="ΑΡΧΕΙΟ")
+    assert a.read_bytes() == body and b.read_bytes() == b"different"
+
+
+def test_upload_rejects_bad_category(client, auth_headers, content_dir):
+    resp = _upload(client, auth_headers, "x.pdf", b"x", category="../outside")
+    assert resp.status_code == 400
+    assert not (content_dir.parent / "outside").exists()
+    assert not (content_dir / ".upload-tmp").exists()  # rejected before streaming
+
+
+def test_failed_upload_leaves_no_temp_file(client, auth_headers, content_dir, monkeypatch):
+    from my_project import routes
+
+    def fail(*args):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(routes, "store_file", fail)
+    with pytest.raises(OSError):
+        _upload(client, auth_headers, "x.pdf", b"x" * 1000)
+    assert os.listdir(content_dir / ".upload-tmp") == []
+
+
+def test_resumable_upload(client, auth_headers, content_dir):
+    body = os.urandom(50_000)
+    start = client.post("/api/files/uploads", headers=auth_headers,
+                        json={"filename": "fek.pdf", "category": "ΝΟΜΟΘΕΣΙΑ", "size": len(body)})
+    assert start.status_code == 201
+    upload_id = start.get_json()["upload_id"]
+    url = f"/api/files/uploads/{upload_id}"
+
+    resp = client.patch(url, headers={**auth_headers, "Upload-Offset": "0"}, data=body[:20_000])
+    assert resp.get_json()["offset"] == 20_000
+
+    # A chunk sent at the wrong offset is refused with the offset to resume from
+    resp = client.patch(url, headers={**auth_headers, "Upload-Offset": "30000"}, data=body[30_000:])
+    assert resp.status_code == 409 and resp.get_json()["offset"] == 20_000
+    assert client.get(url, headers=auth_headers).get_json()["offset"] == 20_000
+
+    # Another worker (no in-memory hash) continues the upload
+    from my_project import uploads
+    uploads._hashers.clear()
+    resp = client.patch(url, headers={**auth_headers, "Upload-Offset": "20000"}, data=body[20_000:])
+    assert resp.status_code == 201
+    done = resp.get_json()
+    assert done["path"] == "ΝΟΜΟΘΕΣΙΑ/fek.pdf"
+    assert done["sha256"] == hashlib.sha256(body).hexdigest() and done["deduplicated"] is False
+    assert (content_dir / "ΝΟΜΟΘΕΣΙΑ" / "fek.pdf").read_bytes() == body
+    assert client.get(url, headers=auth_headers).status_code == 404
+
+
+def test_resumable_upload_without_flock(client, auth_headers, content_dir, monkeypatch):
+    from my_project import uploads
+
+    monkeypatch.setattr(uploads, "fcntl", None)  # as on Windows
+    body = b"chunked without flock" * 100
+    upload_id = client.post("/api/files/uploads", headers=auth_headers,
+                            json={"filename": "nolock.pdf", "category": "ΝΟΜΟΘΕΣΙΑ",
+                                  "size": len(body)}).get_json()["upload_id"]
+    url = f"/api/files/uploads/{upload_id}"
+    client.patch(url, headers={**auth_headers, "Upload-Offset": "0"}, data=body[:1000])
+    resp = client.patch(url, headers={**auth_headers, "Upload-Offset": "1000"}, data=body[1000:])
+    assert resp.status_code == 201
+    assert (content_dir / "ΝΟΜΟΘΕΣΙΑ" / "nolock.pdf").read_bytes() == body
+    assert not uploads._upload_lock.locked()
+
+
+def test_resumable_upload_ownership_and_abort(client, auth_headers, admin_headers, content_dir):
+    upload_id = client.post("/api/files/uploads", headers=auth_headers,
+                            json={"filename": "a.pdf", "size": 10}).get_json()["upload_id"]
+    url = f"/api/files/uploads/{upload_id}"
+    assert client.get(url, headers=admin_headers).status_code == 404
+    assert client.get("/api/files/uploads/../../x", headers=auth_headers).status_code == 404
+
+    assert client.delete(url, headers=auth_headers).status_code == 200
+    assert client.get(url, headers=auth_headers).status_code == 404
+    assert client.post("/api/files/uploads", headers=auth_headers,
+                       json={"filename": "a.pdf", "size": -1}).status_code == 413
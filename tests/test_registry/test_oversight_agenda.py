@@ -0,0 +1,147 @@
+"""Tests for the scoped, cached daily agenda."""
+from datetime import date, timedelta
+
+import pytest
+
+UNIT = 'Μονάδα Δοκιμής Agenda'
+OTHER_UNIT = 'Άλλη Μονάδα Agenda'
+
+
+def _login(client, username):
+    token = client.post('/api/auth/login', json={
+        'username': username, 'password': 'agendapass123'
+    }).get_json()['access_token']
+    return {'Authorization': f'Bearer {token}'}
+
+
+@pytest.fixture
+def agenda_data(app):
+    """Two structures per unit: one advised by agenda_advisor, one assigned
+    to agenda_member's committee, plus an unrelated one elsewhere."""
+    from my_project.extensions import db
+    from my_project.models import User
+    from my_project.oversight.models import UserRole
+    from my_project.registry.models import License, Sanction, Structure, StructureType
+    from my_project.inspections.models import (CommitteeMembership, CommitteeStructureAssignment,
+                                               Inspection, InspectionCommittee)
+    from my_project.sanctions.models import SanctionDecision
+
+    with app.app_context():
+        if User.query.filter_by(username='agenda_director').first() is None:
+            users = {}
+            for name, unit in (('agenda_director', UNIT), ('agenda_advisor', None), ('agenda_member', None)):
+                users[name] = User(username=name, email=f'{name}@example.com', role='staff',
+                                   peripheral_unit=unit)
+                users[name].set_password('agendapass123')
+            db.session.add_all(users.values())
+            st = StructureType(code='AGENDA', name='Agenda Type')
+            db.session.add(st)
+            db.session.flush()
+            db.session.add(UserRole(user_id=users['agenda_director'].id, role='director'))
+            advised = Structure(code='AGENDA-1', name='Συμβουλευόμενη', type_id=st.id,
+                                peripheral_unit=UNIT, advisor_id=users['agenda_advisor'].id)
+            committee_structure = Structure(code='AGENDA-2', name='Επιτροπής', type_id=st.id,
+                                            peripheral_unit=UNIT)
+            elsewhere = Structure(code='AGENDA-3', name='Αλλού', type_id=st.id, peripheral_unit=OTHER_UNIT)
+            committee = InspectionCommittee(decision_number='AGENDA/1', appointed_date=date.today())
+            db.session.add_all([advised, committee_structure, elsewhere, committee])
+            db.session.flush()
+            db.session.add_all([
+                CommitteeMembership(committee_id=committee.id, user_id=users['agenda_member'].id, role='member'),
+                CommitteeStructureAssignment(committee_id=committee.id, structure_id=committee_structure.id,
+                                             assigned_date=date.today()),
+            ])
+            today = date.today()
+            db.session.add_all([
+                Inspection(structure_id=advised.id, type='regular', scheduled_date=today + timedelta(days=2)),
+                Inspection(structure_id=committee_structure.id, type='regular', scheduled_date=today),
+                Inspection(structure_id=elsewhere.id, type='regular', scheduled_date=today),
+                License(structure_id=advised.id, type='operation', expiry_date=today + timedelta(days=20)),
+                License(structure_id=elsewhere.id, type='operation', expiry_date=today + timedelta(days=3)),
+            ])
+            sanction = Sanction(structure_id=committee_structure.id, type='fine')
+            db.session.add(sanction)
+            db.session.flush()
+            db.session.add_all([
+                SanctionDecision(sanction_id=sanction.id, status='submitted', final_amount=500,
+                                 obligor_name='Υπόχρεος Α'),
+                SanctionDecision(sanction_id=sanction.id, status='notified', final_amount=900,
+                                 obligor_name='Υπόχρεος Β', payment_deadline=today - timedelta(days=5)),
+            ])
+            db.session.commit()
+        return {s.code: s.id for s in Structure.query.filter(Structure.code.like('AGENDA-%'))}
+
+
+def _agenda(client, headers):
+    return client.get('/api/oversight/daily-agenda', headers=headers).get_json()
+
+
+def test_director_sees_their_unit_in_priority_order(client, agenda_data):
+    agenda = _agenda(client, _login(client, 'agenda_director'))
+    assert [(a['type'], a['priority'], a['structure_id']) for a in agenda['items']] == [
+        ('overdue_payment', 'critical', agenda_data['AGENDA-2']),
+        ('inspection', 'high', agenda_data['AGENDA-2']),
+        ('pending_approval', 'high', agenda_data['AGENDA-2']),
+        ('inspection', 'medium', agenda_data['AGENDA-1']),
+        ('license_expiring', 'medium', agenda_data['AGENDA-1']),
+    ]
+    assert agenda['summary'] == {'total': 5, 'critical': 1, 'high': 2}
+    overdue = agenda['items'][0]
+    assert overdue['title'] == 'Εκπρόθεσμη Πληρωμή: Υπόχρεος Β'
+    assert overdue['link'].startswith('/sanctions/decisions/')
+    license = agenda['items'][-1]
+    assert license['title'] == 'Λήξη Άδειας: Συμβουλευόμενη'
+    assert 'σε 20 ημέρες' in license['subtitle']
+
+
+def test_staff_see_only_assigned_structures(client, agenda_data):
+    advisor = _agenda(client, _login(client, 'agenda_advisor'))
+    assert {a['structure_id'] for a in advisor['items']} == {agenda_data['AGENDA-1']}
+    member = _agenda(client, _login(client, 'agenda_member'))
+    assert {a['structure_id'] for a in member['items']} == {agenda_data['AGENDA-2']}
+    assert len(member['items']) == 3
+
+
+def test_admin_sees_all_units(client, admin_headers, agenda_data):
+    ids = {a['structure_id'] for a in _agenda(client, admin_headers)['items']}
+    assert set(agenda_data.values()) <= ids
+
+
+def test_agenda_cache_is_invalidated_by_commits(app, client, agenda_data):
+    from sqlalchemy import event
+    from my_project.extensions import db
+    from my_project.inspections.models import Inspection
+    from my_project.oversight.agenda import get_agenda
+    from my_project.models import User
+
+    headers = _login(client, 'agenda_advisor')
+    before = _agenda(client, headers)
+    with app.app_context():
+        user_id = User.query.filter_by(username='agenda_advisor').first().id
+        statements = []
+        listener = lambda *args: statements.append(args[2])  # noqa: E731
+        event.listen(db.engine, 'before_cursor_execute', listener)
+        try:
+            get_agenda(user_id)
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', listener)
+        assert statements == []
+
+        db.session.add(Inspection(structure_id=agenda_data['AGENDA-1'], type='extraordinary',
+                                  scheduled_date=date.today()))
+        db.session.commit()
+    after = _agenda(client, headers)
+    assert after['summary']['total'] == before['summary']['total'] + 1
+    assert after['items'][0]['subtitle'].startswith('extraordinary')
+
+
+def test_agenda_cache_is_bounded(app, agenda_data, monkeypatch):
+    from my_project.caching import CommitCache
+    from my_project.models import User
+    from my_project.oversight import agenda
+
+    monkeypatch.setattr(agenda, '_cache', CommitCache(2, agenda.AGENDA_CACHE_TTL))
+    with app.app_context():
+        for user in User.query.filter(User.username.like('agenda_%')):
+            agenda.get_agenda(user.id)
+    assert len(agenda._cache) == 2
@@ -0,0 +1,142 @@
+"""Tests for the materialized oversight alerts."""
+from datetime import date, timedelta
+
+import pytest
+
+UNIT = 'Μονάδα Δοκιμής Alerts'
+
+
+@pytest.fixture
+def alert_data(app):
+    from my_project.extensions import db
+    from my_project.oversight.alerts import refresh_alerts
+    from my_project.registry.models import License, Sanction, Structure, StructureType
+    from my_project.sanctions.models import SanctionDecision
+
+    with app.app_context():
+        structure = Structure.query.filter_by(code='ALERT-1').first()
+        if structure is None:
+            st = StructureType(code='ALERTS', name='Alerts Type')
+            db.session.add(st)
+            db.session.flush()
+            structure = Structure(code='ALERT-1', name='Δομή Ειδοποιήσεων', type_id=st.id,
+                                  peripheral_unit=UNIT)
+            db.session.add(structure)
+            db.session.flush()
+            today = date.today()
+            db.session.add_all([
+                License(structure_id=structure.id, type='operation', expiry_date=today - timedelta(days=1)),
+                License(structure_id=structure.id, type='operation', expiry_date=today + timedelta(days=30)),
+                License(structure_id=structure.id, type='operation', expiry_date=today + timedelta(days=365)),
+            ])
+            sanction = Sanction(structure_id=structure.id, type='fine')
+            db.session.add(sanction)
+            db.session.flush()
+            db.session.add_all([
+                SanctionDecision(sanction_id=sanction.id, status='notified', final_amount=1000,
+                                 payment_deadline=today - timedelta(days=2)),
+                SanctionDecision(sanction_id=sanction.id, status='notified', final_amount=500,
+                                 payment_deadline=today + timedelta(days=30),
+                                 appeal_deadline=today + timedelta(days=2)),
+                SanctionDecision(sanction_id=sanction.id, status='paid', final_amount=300,
+                                 payment_deadline=today - timedelta(days=40)),
+            ])
+            db.session.commit()
+        refresh_alerts()
+        return structure.id
+
+
+def _unit_alerts(client, headers, **params):
+    query = '&'.join(f'{k}={v}' for k, v in {'peripheral_unit': UNIT, **params}.items())
+    return client.get(f'/api/oversight/alerts?{query}', headers=headers)
+
+
+def test_alerts_are_materialized_by_condition(app, client, auth_headers, alert_data):
+    alerts = _unit_alerts(client, auth_headers).get_json()
+    assert [(a['type'], a['severity']) for a in alerts] == [
+        ('license_expired', 'critical'),
+        ('payment_overdue', 'critical'),
+        ('license_expiring', 'warning'),
+        ('appeal_deadline_approaching', 'warning'),
+    ]
+    assert alerts[1]['message'].startswith('Εκπρόθεσμη πληρωμή προστίμου 1,000€ — Δομή Ειδοποιήσεων')
+    assert all(a['structure_id'] == alert_data and not a['acknowledged'] for a in alerts)
+
+
+def test_resolved_conditions_leave_the_feed(app, client, auth_headers, alert_data, monkeypatch):
+    from my_project.extensions import db
+    from my_project.oversight import alerts
+    from my_project.oversight.models import Alert
+    from my_project.sanctions.models import SanctionDecision
+
+    before = {a['type'] for a in _unit_alerts(client, auth_headers).get_json()}
+    assert 'payment_overdue' in before
+    monkeypatch.setitem(app.config, 'ALERTS_REFRESH_BACKEND', 'thread')
+    with app.app_context():
+        decision = SanctionDecision.query.filter_by(status='notified', final_amount=1000).first()
+        decision.status = 'paid'
+        db.session.commit()  # queues a background refresh
+        decision_id = decision.id
+    alerts.wait_for_refresh(timeout=10)
+
+    after = {a['type'] for a in _unit_alerts(client, auth_headers).get_json()}
+    assert after == before - {'payment_overdue'}
+    with app.app_context():
+        row = Alert.query.filter_by(key=f'payment_overdue:{decision_id}').one()
+        assert row.resolved_at is not None
+
+
+def test_cursor_pagination_and_acknowledgement(client, auth_headers, admin_headers, alert_data):
+    first = _unit_alerts(client, auth_headers, limit=2)
+    assert len(first.get_json()) == 2
+    cursor = first.headers['X-Next-Cursor']
+    rest = _unit_alerts(client, auth_headers, limit=2, cursor=cursor)
+    all_ids = [a['id'] for a in first.get_json() + rest.get_json()]
+    assert all_ids == [a['id'] for a in _unit_alerts(client, auth_headers).get_json()]
+    assert len(set(all_ids)) == len(all_ids)
+
+    alert_id = all_ids[0]
+    resp = client.post(f'/api/oversight/alerts/{alert_id}/acknowledge', headers=auth_headers)
+    assert resp.status_code == 200
+    unacked = _unit_alerts(client, auth_headers, acknowledged='exclude').get_json()
+    assert alert_id not in [a['id'] for a in unacked]
+    acked = _unit_alerts(client, auth_headers, acknowledged='only').get_json()
+    assert [a['id'] for a in acked] == [alert_id] and acked[0]['acknowledged']
+    # Acknowledged alerts stay in the default feed, flagged
+    assert [a['acknowledged'] for a in _unit_alerts(client, auth_headers).get_json()
+            if a['id'] == alert_id] == [True]
+    # Acknowledgements are per user
+    assert alert_id in [a['id'] for a in _unit_alerts(client, admin_headers, acknowledged='exclude').get_json()]
+
+    client.delete(f'/api/oversight/alerts/{alert_id}/acknowledge', headers=auth_headers)
+    assert alert_id in [a['id'] for a in _unit_alerts(client, auth_headers, acknowledged='exclude').get_json()]
+
+    assert client.post('/api/oversight/alerts/999999/acknowledge', headers=auth_headers).status_code == 404
+    assert _unit_alerts(client, auth_headers, cursor='bad').status_code == 400
+    assert _unit_alerts(client, auth_headers, acknowledged='maybe').status_code == 400
+
+
+def test_refresh_is_idempotent(app, alert_data):
+    from my_project.oversight.alerts import refresh_alerts
+
+    with app.app_context():
+        refresh_alerts()
+        stats = refresh_alerts()
+    assert (stats['created'], stats['updated'], stats['resolved']) == (0, 0, 0)
+
+
+def test_reads_do_not_refresh(app, client, auth_headers, alert_data, monkeypatch):
+    from my_project.oversight import alerts
+
+    monkeypatch.setattr(alerts, 'compute_alerts', lambda *a: pytest.fail('refreshed inside a read'))
+    monkeypatch.setitem(alerts._state, 'at', 0.0)
+    assert _unit_alerts(client, auth_headers).status_code == 200
+
+
+def test_unpaginated_requests_get_every_alert(client, auth_headers, alert_data, monkeypatch):
+    from my_project.oversight import alerts
+
+    monkeypatch.setattr(alerts, 'ALERTS_MAX_PAGE_SIZE', 1)
+    resp = _unit_alerts(client, auth_headers)
+    assert len(resp.get_json()) >= 3 and 'X-Next-Cursor' not in resp.headers
+    assert len(_unit_alerts(client, auth_headers, limit=10).get_json()) == 1
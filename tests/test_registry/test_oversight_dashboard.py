@@ -0,0 +1,136 @@
+"""Tests for the grouped, cached oversight dashboard aggregation."""
+from datetime import date, timedelta
+
+import pytest
+
+UNIT = 'Μονάδα Δοκιμής Dashboard'
+
+
+@pytest.fixture
+def unit_data(app):
+    from my_project.extensions import db
+    from my_project.models import User
+    from my_project.registry.models import Sanction, Structure, StructureType
+    from my_project.inspections.models import Inspection
+    from my_project.sanctions.models import SanctionDecision
+    from my_project.oversight.models import SocialAdvisorReport
+
+    with app.app_context():
+        if Structure.query.filter_by(peripheral_unit=UNIT).first():
+            return
+        author = User.query.filter_by(username='dashboard_author').first()
+        if not author:
+            author = User(username='dashboard_author', email='dash@example.com', role='guest')
+            author.set_password('dashpass123')
+            db.session.add(author)
+        st = StructureType(code='DASH', name='Dashboard Type')
+        db.session.add(st)
+        db.session.flush()
+        active = Structure(code='DASH-1', name='Α', type_id=st.id, status='active', peripheral_unit=UNIT)
+        closed = Structure(code='DASH-2', name='Β', type_id=st.id, status='closed', peripheral_unit=UNIT)
+        db.session.add_all([active, closed])
+        db.session.flush()
+        today = date.today()
+        db.session.add_all([
+            Inspection(structure_id=active.id, type='regular', scheduled_date=today, status='completed'),
+            Inspection(structure_id=active.id, type='regular', scheduled_date=today, status='scheduled'),
+            Inspection(structure_id=closed.id, type='regular', scheduled_date=today - timedelta(days=400)),
+            SocialAdvisorReport(structure_id=active.id, author_id=author.id, drafted_date=today, type='regular'),
+        ])
+        sanction = Sanction(structure_id=closed.id, type='fine', status='imposed')
+        db.session.add(sanction)
+        db.session.flush()
+        db.session.add_all([
+            SanctionDecision(sanction_id=sanction.id, status='notified', final_amount=1000,
+                             payment_deadline=today - timedelta(days=1)),
+            SanctionDecision(sanction_id=sanction.id, status='notified', final_amount=500,
+                             payment_deadline=today + timedelta(days=10)),
+            SanctionDecision(sanction_id=sanction.id, status='paid', final_amount=200, paid_amount=200),
+        ])
+        db.session.commit()
+
+
+def test_unit_figures(app, unit_data):
+    from my_project.oversight.dashboard import build_dashboard
+
+    with app.app_context():
+        data = build_dashboard(UNIT)
+    assert data['stats'] == {
+        'total_structures': 2, 'active_structures': 1, 'total_inspections': 3,
+        'completed_inspections': 1, 'pending_reports': 1, 'submitted_reports': 0,
+        'total_sanctions': 1,
+    }
+    assert data['decision_stats'] == {
+        'draft': 0, 'submitted': 0, 'approved': 0, 'notified': 2, 'paid': 1,
+        'overdue': 1, 'total_amount_pending': 1500, 'total_amount_paid': 200,
+    }
+    assert data['structures_by_type'] == [{'name': 'Dashboard Type', 'count': 2}]
+    assert data['sanctions_by_status'] == [{'status': 'imposed', 'count': 1}]
+    assert len(data['inspections_by_month']) == 12
+    assert data['inspections_by_month'][-1] == {'month': date.today().strftime('%Y-%m'), 'count': 2}
+    assert sum(m['count'] for m in data['inspections_by_month']) == 2
+    assert len(data['recent_inspections']) == 3 and data['recent_reports'][0]['structure_name'] == 'Α'
+
+
+def test_all_units_match_plain_counts(app, unit_data):
+    from my_project.oversight.dashboard import build_dashboard
+    from my_project.registry.models import Sanction, Structure
+    from my_project.inspections.models import Inspection
+
+    with app.app_context():
+        stats = build_dashboard()['stats']
+        assert stats['total_structures'] == Structure.query.count()
+        assert stats['active_structures'] == Structure.query.filter_by(status='active').count()
+        assert stats['total_inspections'] == Inspection.query.count()
+        assert stats['total_sanctions'] == Sanction.query.count()
+
+
+def test_cache_is_invalidated_by_commits(app, client, auth_headers, unit_data):
+    from my_project.extensions import db
+    from my_project.inspections.models import Inspection
+    from my_project.registry.models import Structure
+
+    url = f'/api/oversight/dashboard?peripheral_unit={UNIT}'
+    first = client.get(url, headers=auth_headers).get_json()
+    with app.app_context():
+        # Writes that do not commit leave the cache alone
+        structure_id = Structure.query.filter_by(code='DASH-1').first().id
+        Structure.query.filter_by(code='DASH-1').update({'notes': 'x'})
+        db.session.rollback()
+    assert client.get(url, headers=auth_headers).get_json() == first
+
+    with app.app_context():
+        db.session.add(Inspection(structure_id=structure_id, type='regular',
+                                  scheduled_date=date.today(), status='completed'))
+        db.session.commit()
+    stats = client.get(url, headers=auth_headers).get_json()['stats']
+    assert stats['total_inspections'] == first['stats']['total_inspections'] + 1
+    assert stats['completed_inspections'] == first['stats']['completed_inspections'] + 1
+
+
+def test_cached_dashboard_runs_no_queries(app, unit_data):
+    from sqlalchemy import event
+    from my_project.extensions import db
+    from my_project.oversight.dashboard import get_dashboard
+
+    with app.app_context():
+        get_dashboard(UNIT)
+        statements = []
+        listener = lambda *args: statements.append(args[2])  # noqa: E731
+        event.listen(db.engine, 'before_cursor_execute', listener)
+        try:
+            get_dashboard(UNIT)
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', listener)
+    assert statements == []
+
+
+def test_cache_is_bounded(app, client, auth_headers, unit_data, monkeypatch):
+    from my_project.oversight import dashboard
+
+    from my_project.caching import CommitCache
+
+    monkeypatch.setattr(dashboard, '_cache', CommitCache(3, dashboard.DASHBOARD_CACHE_TTL))
+    for i in range(10):
+        client.get(f'/api/oversight/dashboard?peripheral_unit=unit-{i}', headers=auth_headers)
+    assert len(dashboard._cache) == 3
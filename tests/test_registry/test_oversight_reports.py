@@ -0,0 +1,88 @@
+"""Tests for the streamed oversight report exports."""
+import io
+import json
+from datetime import date
+
+import pytest
+from openpyxl import load_workbook
+
+
+@pytest.fixture
+def report_data(app):
+    from my_project.extensions import db
+    from my_project.registry.models import Sanction, Structure, StructureType
+    from my_project.sanctions.models import SanctionDecision
+
+    with app.app_context():
+        if Structure.query.filter_by(code='REPORT-1').first() is None:
+            st = StructureType(code='REPORTS', name='Τύπος Αναφορών')
+            db.session.add(st)
+            db.session.flush()
+            structures = [Structure(code=f'REPORT-{i}', name=f'Δομή Αναφοράς {i}', type_id=st.id,
+                                    city='Αθήνα') for i in range(1, 4)]
+            db.session.add_all(structures)
+            db.session.flush()
+            sanction = Sanction(structure_id=structures[0].id, type='fine', amount=1200,
+                                imposed_date=date.today())
+            db.session.add(sanction)
+            db.session.flush()
+            db.session.add(SanctionDecision(sanction_id=sanction.id, status='paid', final_amount=1200,
+                                            paid_amount=1200, protocol_number='REP/1'))
+            db.session.commit()
+
+
+def _get(client, headers, report, fmt, **params):
+    query = '&'.join(f'{k}={v}' for k, v in {'format': fmt, **params}.items())
+    return client.get(f'/api/oversight/reports/{report}?{query}', headers=headers)
+
+
+def test_registry_xlsx_is_written_in_one_pass(app, client, auth_headers, report_data, monkeypatch):
+    from my_project.oversight import reports
+    from my_project.registry.models import Structure
+
+    # Size columns from the first row only, to cover rows after the sample
+    monkeypatch.setattr(reports, 'XL_WIDTH_SAMPLE_ROWS', 1)
+    monkeypatch.setattr(reports, 'EXPORT_BATCH_SIZE', 2)
+    resp = _get(client, auth_headers, 'registry', 'xlsx')
+    assert resp.status_code == 200
+    assert resp.headers['Content-Disposition'].startswith('attachment; filename=registry_')
+
+    ws = load_workbook(io.BytesIO(resp.data)).active
+    rows = list(ws.iter_rows(values_only=True))
+    assert rows[0] == ('Κωδικός', 'Επωνυμία', 'Τύπος', 'Κατάσταση', 'Πόλη', 'Λήξη Αδείας')
+    with app.app_context():
+        assert len(rows) == Structure.query.count() + 1
+    assert ('REPORT-2', 'Δομή Αναφοράς 2', 'Τύπος Αναφορών', 'active', 'Αθήνα', '—') in rows
+    assert ws.column_dimensions['A'].width > 0
+
+
+def test_csv_and_ndjson_are_streamed(client, auth_headers, report_data):
+    resp = _get(client, auth_headers, 'registry', 'csv')
+    assert resp.is_streamed and resp.mimetype == 'text/csv'
+    text = resp.get_data(as_text=True)
+    assert text.startswith('\ufeffΚωδικός,Επωνυμία')
+    assert 'REPORT-3,Δομή Αναφοράς 3,Τύπος Αναφορών,active,Αθήνα,—' in text.splitlines()
+
+    resp = _get(client, auth_headers, 'decisions', 'ndjson')
+    assert resp.is_streamed and resp.mimetype == 'application/x-ndjson'
+    lines = [json.loads(line) for line in resp.get_data(as_text=True).splitlines()]
+    ours = [line for line in lines if line['Πρωτόκολλο'] == 'REP/1']
+    assert ours and ours[0]['Ποσό (€)'] == '1,200.00' and ours[0]['Κατάσταση'] == 'Πληρώθηκε'
+
+
+def test_decisions_xlsx_totals_and_pdf(app, client, auth_headers, report_data):
+    from my_project.sanctions.models import SanctionDecision
+
+    ws = load_workbook(io.BytesIO(_get(client, auth_headers, 'decisions', 'xlsx').data)).active
+    rows = list(ws.iter_rows(values_only=True))
+    with app.app_context():
+        decisions = SanctionDecision.query.all()
+        total = sum(d.final_amount or 0 for d in decisions)
+        paid = sum(d.paid_amount or 0 for d in decisions if d.status == 'paid')
+    assert rows[-2][0] == 'Σύνολο:' and rows[-2][4] == f'{total:,.2f}'
+    assert rows[-1][0] == 'Εισπράξεις:' and rows[-1][4] == f'{paid:,.2f}'
+    assert len(rows) == len(decisions) + 4
+
+    pdf = _get(client, auth_headers, 'decisions', 'pdf')
+    assert pdf.status_code == 200 and pdf.data.startswith(b'%PDF')
+    assert _get(client, auth_headers, 'decisions', 'docx').status_code == 400